@@ -44,6 +44,7 @@ def create_app(config_name=None):
         app.config['SECRET_KEY'] = 'dev-secret-key'
         app.config['DEBUG'] = True
         app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///app.db'
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
         app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
         # print(f"配置加载失败: {e}")
     
@@ -95,8 +96,23 @@ def create_app(config_name=None):
         try:
             db.create_all()
             print("✅ 数据库表创建成功")
+            
+            # 补齐旧表缺失的列（新增投影列时同时回填旧数据）
+            from utils.db_helper import upgrade_schema
+            added_columns = upgrade_schema(db)
+            if added_columns:
+                print(f"✅ 数据库表结构已升级: {', '.join(added_columns)}")
         except Exception as e:
             print(f"❌ 数据库表创建失败: {e}")
+        
+        # 重新入队上次运行中断的提取任务
+        try:
+            from services.extraction_service.job_queue import get_job_queue
+            recovered = get_job_queue(app).recover_jobs()
+            if recovered:
+                print(f"✅ 已恢复后台任务: {recovered}")
+        except Exception as e:
+            app.logger.error(f'恢复后台任务失败: {e}')
     
     return app
 
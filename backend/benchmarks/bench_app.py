@@ -0,0 +1,57 @@
+# benchmarks/bench_app.py
+"""基准测试公共工具：创建独立的测试应用"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+
+def create_bench_app(extra_config=None):
+    """创建基准测试用的应用（默认使用临时 SQLite，可通过 BENCH_DATABASE_URL 指定 PostgreSQL）"""
+    from config import Config
+    from models import init_app as init_models
+    
+    work_dir = tempfile.mkdtemp(prefix='outbound_bench_')
+    
+    app = Flask(__name__)
+    for key in dir(Config):
+        if key.isupper():
+            app.config[key] = getattr(Config, key)
+    
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=os.environ.get('BENCH_DATABASE_URL') or
+            'sqlite:///' + os.path.join(work_dir, 'bench.db'),
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        UPLOAD_FOLDER=os.path.join(work_dir, 'uploads')
+    )
+    if extra_config:
+        app.config.update(extra_config)
+    
+    db = init_models(app)
+    app.db = db
+    
+    from controllers.file_controllers.file_controller import file_bp
+    from controllers.file_controllers.health_controller import health_bp
+    from controllers.company_controllers.company_controller import company_bp
+    from controllers.contract_controllers.contract_controller import contract_bp
+    
+    app.register_blueprint(file_bp, url_prefix='/api')
+    app.register_blueprint(health_bp, url_prefix='/api')
+    app.register_blueprint(company_bp, url_prefix='/api')
+    app.register_blueprint(contract_bp, url_prefix='/api')
+    
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    
+    return app
+
+
+def format_bytes(size):
+    """格式化字节数"""
+    from utils.file_utils import format_file_size
+    return format_file_size(size)
@@ -0,0 +1,107 @@
+# benchmarks/bench_batch_upload.py
+"""批量上传基准：对比逐个保存（每个文件提取+两次提交）与进程池并行提取、单事务批量插入
+
+运行：python benchmarks/bench_batch_upload.py [文件数] [每个文件页数]
+"""
+import io
+import sys
+import time
+
+from bench_app import create_bench_app
+
+from sqlalchemy import event
+from werkzeug.datastructures import FileStorage
+
+
+def make_pdf(pages, seed):
+    """生成带文本内容的PDF（每页若干行文字，便于测量文本提取开销）"""
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for page in range(pages):
+        lines = b''.join(
+            b'BT /F1 9 Tf 40 %d Td (drawing %d page %d line %d dimension %d mm) Tj ET\n'
+            % (800 - line * 12, seed, page, line, seed * 1000 + line)
+            for line in range(60)
+        )
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(lines), lines))
+        content_id = len(objects)
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+                       b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % content_id)
+        kids.append(b'%d 0 R' % len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(kids), pages)
+
+    output = io.BytesIO()
+    output.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(output.tell())
+        output.write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+    xref = output.tell()
+    output.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b'%010d 00000 n \n' % offset)
+    output.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+    return output.getvalue()
+
+
+def make_uploads(contents):
+    """构造上传文件对象"""
+    return [
+        FileStorage(stream=io.BytesIO(content), filename=f'drawing_{i:03d}.pdf', content_type='application/pdf')
+        for i, content in enumerate(contents)
+    ]
+
+
+def upload_one_by_one(repo, files):
+    """旧实现：逐个验证、保存、提取并提交"""
+    results = {'success': [], 'failed': []}
+    for file in files:
+        results['success'].append(repo.save_uploaded_file(file=file, file_type='1', company_id='company_00001'))
+    return results
+
+
+def upload_in_batch(repo, files):
+    """新实现：进程池并行提取元数据，单事务批量插入"""
+    return repo.batch_upload_files(files, '1', company_id='company_00001')
+
+
+def measure(contents, upload_func):
+    """统计上传耗时、SQL 语句数和提交次数"""
+    from repositories.file_repositorie.file_repository import FileRepository
+
+    # 同步提取模式：提取耗时计入上传请求
+    app = create_bench_app({'EXTRACTION_ASYNC': False, 'EXTRACTION_JOB_TABLE': False})
+    with app.app_context():
+        db = app.db
+        repo = FileRepository(db, app.config)
+        files = make_uploads(contents)
+
+        counters = {'statements': 0, 'commits': 0}
+        on_execute = lambda *args: counters.__setitem__('statements', counters['statements'] + 1)
+        on_commit = lambda *args: counters.__setitem__('commits', counters['commits'] + 1)
+        event.listen(db.engine, 'before_cursor_execute', on_execute)
+        event.listen(db.engine, 'commit', on_commit)
+        try:
+            started = time.perf_counter()
+            results = upload_func(repo, files)
+            elapsed = time.perf_counter() - started
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', on_execute)
+            event.remove(db.engine, 'commit', on_commit)
+        return elapsed, counters, len(results['success'])
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    contents = [make_pdf(pages, i) for i in range(count)]
+
+    for label, upload_func in (('逐个上传', upload_one_by_one), ('批量上传', upload_in_batch)):
+        elapsed, counters, succeeded = measure(contents, upload_func)
+        print(f"{label}: {succeeded}/{count} 个文件（每个 {pages} 页）{elapsed:.2f}s, "
+              f"SQL 语句 {counters['statements']} 条, 提交 {counters['commits']} 次")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_bulk_delete.py
+"""批量删除基准：对比逐个删除（每个文件查询+提交）与分批 DELETE ... WHERE id IN 单事务提交
+
+运行：python benchmarks/bench_bulk_delete.py [文件数]
+"""
+import os
+import sys
+import time
+
+from bench_app import create_bench_app
+
+from sqlalchemy import event
+
+
+def seed(app, db, count):
+    """写入文件记录、合同记录和物理文件"""
+    from models.contract_model import ContractModel
+    from models.file_upd_model import FileUpdModel
+    
+    folder = os.path.join(app.config['UPLOAD_FOLDER'], 'bench')
+    os.makedirs(folder, exist_ok=True)
+    ids = []
+    for i in range(count):
+        file_id = f'file_{i + 1:06d}'
+        path = os.path.join(folder, f'{file_id}.pdf')
+        with open(path, 'wb') as f:
+            f.write(b'%PDF-1.4')
+        db.session.add(FileUpdModel(
+            id=file_id, company_id='company_00001', original_name=f'{file_id}.pdf',
+            stored_name=f'{file_id}.pdf', file_type='1', file_size=8, file_path=path
+        ))
+        db.session.add(ContractModel(id=f'contract_{i + 1:06d}', file_id=file_id, company_id='company_00001'))
+        ids.append(file_id)
+    db.session.commit()
+    return ids
+
+
+def measure(app, count, delete_func):
+    """统计删除耗时、SQL 语句数和提交次数"""
+    with app.app_context():
+        db = app.db
+        ids = seed(app, db, count)
+        
+        counters = {'statements': 0, 'commits': 0}
+        on_execute = lambda *args: counters.__setitem__('statements', counters['statements'] + 1)
+        on_commit = lambda *args: counters.__setitem__('commits', counters['commits'] + 1)
+        event.listen(db.engine, 'before_cursor_execute', on_execute)
+        event.listen(db.engine, 'commit', on_commit)
+        try:
+            started = time.perf_counter()
+            delete_func(db, ids)
+            elapsed = time.perf_counter() - started
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', on_execute)
+            event.remove(db.engine, 'commit', on_commit)
+        return elapsed, counters
+
+
+def delete_one_by_one(db, ids):
+    """旧实现：逐个 get_by_id + delete + commit"""
+    from repositories.file_repositorie.file_repository import FileRepository
+    
+    repo = FileRepository(db)
+    for file_id in ids:
+        repo.delete_file_with_physical(file_id)
+
+
+def delete_in_batches(db, ids):
+    """新实现：分批删除，单事务提交，物理文件在线程池中删除"""
+    from repositories.file_repositorie.file_repository import FileRepository
+    from utils.file_utils import wait_for_removals
+    
+    FileRepository(db).batch_delete_files(ids)
+    wait_for_removals()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    
+    for label, delete_func in (('逐个删除', delete_one_by_one), ('批量删除', delete_in_batches)):
+        app = create_bench_app()
+        elapsed, counters = measure(app, count, delete_func)
+        print(f"{label}: {count} 个文件 {elapsed:.2f}s, SQL 语句 {counters['statements']} 条, "
+              f"提交 {counters['commits']} 次")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_list_payload.py
+"""列表接口数据量基准：对比加载文件内容（旧）与只加载元数据列（新）每次请求读取的字节数
+
+运行：python benchmarks/bench_list_payload.py [行数] [每个文件MB数]
+"""
+import os
+import sys
+import time
+
+from bench_app import create_bench_app, format_bytes
+
+from sqlalchemy import event
+from sqlalchemy.orm import undefer
+
+
+class LoadedBytesCounter:
+    """统计 ORM 从数据库加载到对象中的字节数"""
+    
+    def __init__(self, model_class):
+        self.total = 0
+        event.listen(model_class, 'load', self._on_load)
+        event.listen(model_class, 'refresh', self._on_refresh)
+    
+    def _on_load(self, target, context):
+        self.total += sum(self._size_of(v) for k, v in target.__dict__.items() if not k.startswith('_'))
+    
+    def _on_refresh(self, target, context, attrs):
+        for key in attrs or []:
+            self.total += self._size_of(target.__dict__.get(key))
+    
+    @staticmethod
+    def _size_of(value):
+        if value is None:
+            return 0
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return len(value)
+        return len(str(value).encode('utf-8'))
+
+
+def seed(db, rows, blob_size):
+    """写入测试数据"""
+    from models.file_upd_model import FileUpdModel
+    
+    blob = os.urandom(blob_size)
+    text = '合同条款 ' * (blob_size // 64)
+    for i in range(rows):
+        db.session.add(FileUpdModel(
+            id=f'file_{i + 1:03d}',
+            company_id='company_00001',
+            original_name=f'contract_{i}.pdf',
+            stored_name=f'{i}.pdf',
+            file_type='1',
+            file_size=blob_size,
+            file_path=f'/tmp/{i}.pdf',
+            mime_type='application/pdf',
+            file_content=blob,
+            text_content=text
+        ))
+    db.session.commit()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    blob_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    blob_size = int(blob_mb * 1024 * 1024)
+    
+    app = create_bench_app()
+    
+    from models.file_upd_model import FileUpdModel
+    from repositories.file_repositorie.file_repository import FileRepository
+    
+    counter = LoadedBytesCounter(FileUpdModel)
+    
+    with app.app_context():
+        db = app.db
+        seed(db, rows, blob_size)
+        repo = FileRepository(db, app.config)
+        
+        # 旧：整行加载（file_content / text_content 一并读取）
+        db.session.expunge_all()
+        counter.total = 0
+        start = time.perf_counter()
+        files = db.session.query(FileUpdModel)\
+            .options(undefer(FileUpdModel.file_content), undefer(FileUpdModel.text_content))\
+            .order_by(FileUpdModel.upload_time.desc())\
+            .limit(rows).all()
+        [f.to_response_dict() for f in files]
+        before_bytes, before_time = counter.total, time.perf_counter() - start
+        
+        # 新：仓储层只加载元数据列
+        db.session.expunge_all()
+        counter.total = 0
+        start = time.perf_counter()
+        result = repo.get_paginated_files(page=1, page_size=rows)
+        [f.to_response_dict() for f in result['items']]
+        after_bytes, after_time = counter.total, time.perf_counter() - start
+    
+    print(f"行数: {rows}, 每个文件: {format_bytes(blob_size)}")
+    print(f"旧（整行加载）:   {format_bytes(before_bytes):>12}  {before_time * 1000:8.2f} ms")
+    print(f"新（仅元数据列）: {format_bytes(after_bytes):>12}  {after_time * 1000:8.2f} ms")
+    if after_bytes:
+        print(f"每次列表请求读取量减少 {before_bytes / after_bytes:.0f} 倍")
+
+
+if __name__ == '__main__':
+    main()
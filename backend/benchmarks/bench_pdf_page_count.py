@@ -0,0 +1,70 @@
+# benchmarks/bench_pdf_page_count.py
+"""PDF 页数基准：对比 PyPDF2 构建 PdfReader 取页数与按 xref 直接读取 /Pages 的 /Count
+
+样本为 uploads 下各目录中的 PDF 文件。
+
+运行：python benchmarks/bench_pdf_page_count.py [重复轮数]
+"""
+import glob
+import os
+import sys
+import time
+
+import bench_app  # noqa: F401  添加项目根目录到 Python 路径
+
+import PyPDF2
+
+from services.extraction_service.pdf_analyzer import count_pages
+from services.extraction_service.pdf_structure import read_page_count
+
+UPLOAD_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'uploads'))
+
+
+def find_pdfs():
+    """样本 PDF 文件"""
+    return sorted(glob.glob(os.path.join(UPLOAD_ROOT, '*', '*.pdf')))
+
+
+def count_with_reader(file_path):
+    """旧实现：构建 PdfReader（读取 xref 并遍历页面树）取页数"""
+    with open(file_path, 'rb') as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+def measure(func, paths, rounds):
+    """多轮执行取最短耗时"""
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for path in paths:
+            func(path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    paths = find_pdfs()
+    if not paths:
+        print(f"没有找到样本 PDF：{UPLOAD_ROOT}/*/*.pdf")
+        return
+
+    # 两种实现的页数应一致；快速读取失败的文件退回 PdfReader
+    fallbacks = 0
+    for path in paths:
+        fast = read_page_count(path)
+        if fast is None:
+            fallbacks += 1
+        if count_pages(path) != count_with_reader(path):
+            print(f"页数不一致: {path}")
+
+    print(f"样本: {len(paths)} 个 PDF，快速读取失败退回 PdfReader {fallbacks} 个，"
+          f"每种实现执行 {rounds} 轮取最短耗时")
+    for label, func in (('PdfReader', count_with_reader), ('xref 直接读取', count_pages)):
+        elapsed = measure(func, paths, rounds)
+        print(f"{label}: {elapsed:.3f}s（每个文件 {elapsed / len(paths) * 1000:.2f}ms）")
+
+
+if __name__ == '__main__':
+    main()
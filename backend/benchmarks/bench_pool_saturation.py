@@ -0,0 +1,98 @@
+# benchmarks/bench_pool_saturation.py
+"""连接池饱和负载测试：并发请求数超过连接池上限时，观察等待时间、溢出连接和获取超时
+
+运行：python benchmarks/bench_pool_saturation.py [并发线程数] [每次占用连接毫秒数]
+连接池参数使用 database.json production 的 pool 配置，可用环境变量 BENCH_POOL_MAX/MIN/ACQUIRE 覆盖
+例：BENCH_POOL_ACQUIRE=1000 python benchmarks/bench_pool_saturation.py 60 600（排队超过1秒的请求获取连接超时）
+"""
+import os
+import sys
+import threading
+import time
+
+from bench_app import create_bench_app
+
+from sqlalchemy import text
+
+
+def pool_config():
+    """读取 database.json 的 production 连接池配置"""
+    from config import load_database_config
+    
+    backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    cwd = os.getcwd()
+    os.chdir(backend_dir)
+    try:
+        pool = dict(load_database_config().get('production', {}).get('pool') or {})
+    finally:
+        os.chdir(cwd)
+    
+    pool.setdefault('max', 20)
+    pool.setdefault('min', 5)
+    pool.setdefault('acquire', 30000)
+    for key in ('max', 'min', 'acquire'):
+        if os.environ.get(f'BENCH_POOL_{key.upper()}'):
+            pool[key] = int(os.environ[f'BENCH_POOL_{key.upper()}'])
+    return pool
+
+
+def worker(app, hold_seconds, results, index):
+    """模拟一次请求：取出连接、执行查询并占用一段时间"""
+    with app.app_context():
+        started = time.perf_counter()
+        try:
+            with app.db.engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+                time.sleep(hold_seconds)
+            results[index] = ('ok', time.perf_counter() - started)
+        except Exception as e:
+            results[index] = (type(e).__name__, time.perf_counter() - started)
+
+
+def run_round(app, threads, hold_seconds):
+    """并发执行一轮请求"""
+    results = [None] * threads
+    workers = [
+        threading.Thread(target=worker, args=(app, hold_seconds, results, i))
+        for i in range(threads)
+    ]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def main():
+    from utils.db_pool import build_engine_options, get_pool_metrics
+    
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    hold_ms = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    pool = pool_config()
+    
+    app = create_bench_app({'SQLALCHEMY_ENGINE_OPTIONS': build_engine_options(pool)})
+    with app.app_context():
+        metrics = get_pool_metrics(app.db.engine)
+        print(f"连接池: {pool} -> pool_size={metrics['size']}, max_overflow={metrics['maxOverflow']}, "
+              f"pool_timeout={metrics['timeout']}s")
+    
+    for concurrency in sorted({max(threads // 4, 1), pool['max'], threads}):
+        with app.app_context():
+            app.db.engine.dispose()
+        results, elapsed = run_round(app, concurrency, hold_ms / 1000)
+        latencies = sorted(latency for _, latency in results)
+        failures = [status for status, _ in results if status != 'ok']
+        with app.app_context():
+            metrics = get_pool_metrics(app.db.engine)
+        
+        print(f"\n并发 {concurrency}: 总耗时 {elapsed:.2f}s, 失败 {len(failures)} {set(failures) or ''}")
+        print(f"  请求延迟 p50={latencies[len(latencies) // 2] * 1000:.0f}ms "
+              f"max={latencies[-1] * 1000:.0f}ms")
+        print(f"  连接池: 新建连接 {metrics['connects']}, 最多同时等待 {metrics['maxWaiting']}, "
+              f"平均等待 {metrics['avgWaitMs']:.1f}ms, 最长等待 {metrics['maxWaitMs']:.1f}ms, "
+              f"超时 {metrics['timeouts']}, 当前溢出 {metrics['overflow']}")
+
+
+if __name__ == '__main__':
+    main()
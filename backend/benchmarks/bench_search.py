@@ -0,0 +1,183 @@
+# benchmarks/bench_search.py
+"""全文检索基准：对比 ilike '%关键字%' 顺序扫描与全文检索（PostgreSQL 为 tsvector + GIN，SQLite 为进程内倒排索引）
+
+同时对比列表接口关键字搜索：全部取出后切片 与 数据库偏移/游标分页
+
+运行：python benchmarks/bench_search.py [文档数]
+指定 BENCH_DATABASE_URL=postgresql://... 可在 PostgreSQL 上测试 GIN 索引
+"""
+import random
+import sys
+import time
+
+from bench_app import create_bench_app
+
+from sqlalchemy import desc, or_
+
+# 合成语料的词表：常见合同用语 + 少量低频词
+COMMON_WORDS = [
+    '合同', '甲方', '乙方', '付款', '条款', '设备', '采购', '工程', '验收', '交付',
+    '违约', '责任', '期限', '金额', '发票', '服务', '维护', '质量', '保证', '争议',
+    '仲裁', '签订', '生效', '变更', '解除', '通知', '保密', '技术', '图纸', '施工',
+]
+RARE_WORDS = ['钛合金阀门', '冷却塔改造', '光伏逆变器', '隧道盾构机', '消防喷淋系统']
+LATIN_WORDS = ['payment', 'invoice', 'delivery', 'warranty', 'contract', 'service']
+
+QUERIES = ['合同', '付款条款', '冷却塔改造', '光伏逆变器 验收', 'warranty']
+PAGE_SIZE = 20
+
+
+def make_text(rng, words=80):
+    """生成一段合成文本"""
+    parts = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < 0.002:
+            parts.append(rng.choice(RARE_WORDS))
+        elif roll < 0.05:
+            parts.append(' ' + rng.choice(LATIN_WORDS) + ' ')
+        else:
+            parts.append(rng.choice(COMMON_WORDS))
+        if rng.random() < 0.1:
+            parts.append('，')
+    return ''.join(parts)
+
+
+def seed(db, count, batch_size=500):
+    """批量写入合成文档（直接写 search_vector，绕过逐行 ORM 插入）"""
+    from models.file_upd_model import FileUpdModel
+    from models.search_vector import build_search_vector
+    from utils.time_utils import beijing_time
+    
+    rng = random.Random(42)
+    table = FileUpdModel.__table__
+    dialect_name = db.engine.dialect.name
+    now = beijing_time()
+    
+    for start in range(0, count, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, count)):
+            name = f'{rng.choice(COMMON_WORDS)}文件_{i}.pdf'
+            text = make_text(rng)
+            rows.append({
+                'id': f'file_{i + 1:06d}',
+                'company_id': 'company_00001',
+                'original_name': name,
+                'stored_name': f'{i}.pdf',
+                'file_type': '1',
+                'file_size': len(text),
+                'file_path': f'/tmp/{i}.pdf',
+                'mime_type': 'application/pdf',
+                'text_content': text,
+                'has_text': True,
+                'extraction_status': 'completed',
+                'upload_time': now,
+                'created_at': now,
+                'updated_at': now,
+                'search_vector': build_search_vector(dialect_name, [name], [text]),
+            })
+        db.session.execute(table.insert().values(rows))
+        db.session.commit()
+
+
+def run_ilike(db, keyword):
+    """旧实现：文件名和文本内容 ilike 顺序扫描"""
+    from models.file_upd_model import FileUpdModel
+    
+    query = db.session.query(FileUpdModel.id).filter(or_(
+        FileUpdModel.original_name.ilike(f'%{keyword}%'),
+        FileUpdModel.text_content.ilike(f'%{keyword}%')
+    ))
+    total = query.count()
+    query.order_by(desc(FileUpdModel.upload_time)).limit(PAGE_SIZE).all()
+    return total
+
+
+def run_full_text(db, keyword):
+    """新实现：全文检索，按相关度取第一页并生成摘要"""
+    from repositories.file_repositorie.file_repository import FileRepository
+    
+    result = FileRepository(db).search_files_ranked(keyword, limit=PAGE_SIZE)
+    return result['total']
+
+
+def run_list_in_python(db, keyword):
+    """旧的列表搜索：取出全部匹配记录后在 Python 中切片"""
+    from repositories.file_repositorie.file_repository import FileRepository
+    
+    files = FileRepository(db).search_files(keyword)
+    return len(files[:PAGE_SIZE])
+
+
+def run_list_page(db, keyword, page=1, cursor=None):
+    """新的列表搜索：数据库分页（偏移或游标）"""
+    from repositories.file_repositorie.file_repository import FileRepository
+    
+    return FileRepository(db).get_paginated_files(
+        page=page, page_size=PAGE_SIZE, keyword=keyword, cursor=cursor
+    )
+
+
+def deep_cursor(db, keyword, pages):
+    """翻到第 pages 页时的游标"""
+    cursor = None
+    for _ in range(pages - 1):
+        cursor = run_list_page(db, keyword, cursor=cursor)['nextCursor']
+    return cursor
+
+
+def timed(func, *args, repeat=3):
+    """多次运行取最快一次（毫秒）"""
+    best = None
+    value = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = func(*args)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    
+    app = create_bench_app()
+    with app.app_context():
+        db = app.db
+        dialect_name = db.engine.dialect.name
+        
+        started = time.perf_counter()
+        seed(db, count)
+        print(f"数据库: {dialect_name}, 文档数: {count}, 写入耗时 {time.perf_counter() - started:.1f}s")
+        
+        if dialect_name != 'postgresql':
+            from models.file_upd_model import FileUpdModel
+            from services.search_service import FullTextSearch
+            started = time.perf_counter()
+            FullTextSearch(db.session, FileUpdModel).get_index()
+            print(f"倒排索引构建耗时 {time.perf_counter() - started:.1f}s（每个进程首次检索时构建一次）")
+        
+        print(f"{'关键字':<12}{'ilike(ms)':>12}{'全文检索(ms)':>16}{'ilike命中':>12}{'全文命中':>12}")
+        for keyword in QUERIES:
+            # ilike 只能匹配连续子串，多词查询只统计全文检索
+            ilike_ms, ilike_total = timed(run_ilike, db, keyword) if ' ' not in keyword else (None, None)
+            fts_ms, fts_total = timed(run_full_text, db, keyword)
+            ilike_text = f'{ilike_ms:.1f}' if ilike_ms is not None else '-'
+            print(f"{keyword:<12}{ilike_text:>12}{fts_ms:>16.1f}{str(ilike_total or '-'):>12}{fts_total:>12}")
+        
+        # 列表接口（FileListAPI）关键字搜索分页
+        keyword = '付款条款'
+        deep_page = 200
+        cursor = deep_cursor(db, keyword, deep_page)
+        python_ms, _ = timed(run_list_in_python, db, keyword, repeat=1)
+        first_ms, _ = timed(run_list_page, db, keyword)
+        offset_ms, _ = timed(run_list_page, db, keyword, deep_page)
+        cursor_ms, _ = timed(run_list_page, db, keyword, 1, cursor)
+        print(f"\n列表搜索 '{keyword}' 每页 {PAGE_SIZE} 条:")
+        print(f"  全部取出后切片: {python_ms:.1f}ms")
+        print(f"  数据库分页 第1页: {first_ms:.1f}ms")
+        print(f"  第{deep_page}页 OFFSET: {offset_ms:.1f}ms, 游标: {cursor_ms:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
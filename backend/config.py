@@ -3,6 +3,8 @@ import os
 import json
 from datetime import timedelta
 
+from utils.db_pool import build_engine_options
+
 def load_database_config():
     """从JSON文件加载数据库配置"""
     try:
@@ -26,10 +28,82 @@ class Config:
         '1': ['pdf'],
         '2': ['jpg', 'jpeg', 'png', 'gif', 'webp']
     }
+    UPLOAD_CHUNK_SIZE = 1024 * 1024  # 上传分块写入大小：1MB
+    CONTENT_STREAM_CHUNK_SIZE = 1024 * 1024  # 数据库中的文件内容分块读取大小：1MB
+    STORE_FILE_CONTENT_IN_DB = False  # 是否同时在数据库中保存文件内容（已有内容可用 scripts/migrate_content_to_storage.py 移到存储后端）
+    # 文件存储后端：local（保存在 UPLOAD_FOLDER）、s3（S3 兼容对象存储，需要安装 boto3）
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_PREFIX = os.environ.get('S3_PREFIX', '')  # 对象键前缀，例如 'uploads/'
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # MinIO 等兼容服务的地址，AWS S3 留空
+    S3_REGION = os.environ.get('S3_REGION')
+    S3_ACCESS_KEY_ID = os.environ.get('S3_ACCESS_KEY_ID')
+    S3_SECRET_ACCESS_KEY = os.environ.get('S3_SECRET_ACCESS_KEY')
+    S3_PRESIGNED_DOWNLOADS = False  # 下载时重定向到 S3 临时地址（客户端直接从存储下载），否则由 Python 进程转发
+    S3_PRESIGNED_EXPIRES = 300  # 临时下载地址有效秒数
+    # 文件下载方式：send_file（由 Python 进程发送）、x-accel（nginx X-Accel-Redirect）、x-sendfile（Apache/lighttpd X-Sendfile）
+    # x-accel 模式需要在 nginx 中配置内部路径，例如：location /protected-files/ { internal; alias <UPLOAD_FOLDER>/; }
+    FILE_DELIVERY_MODE = os.environ.get('FILE_DELIVERY_MODE', 'send_file')
+    FILE_ACCEL_PREFIX = '/protected-files/'  # x-accel 模式下 UPLOAD_FOLDER 对应的 nginx 内部路径
+    
+    # 后台文本提取/OCR任务配置
+    EXTRACTION_ASYNC = True  # 上传后在后台进程池中提取文本，上传请求立即返回
+    EXTRACTION_WORKERS = 2  # 提取进程数
+    EXTRACTION_JOB_TABLE = True  # 是否将任务写入 file_job 表（应用启动时恢复未完成任务）
+    EXTRACTION_JOB_TIMEOUT = 30 * 60  # 等待中/处理中的任务超过该秒数视为中断，应用启动时重新执行
+    # 提取沙箱：工作进程的内存（地址空间）和 CPU 时间上限，单页/整个文档的提取时限（秒）
+    EXTRACTION_MEMORY_LIMIT = 1024 * 1024 * 1024
+    EXTRACTION_CPU_LIMIT = 30 * 60  # 单个任务的 CPU 秒数（每个任务开始时重新计算），超过时该任务失败
+    EXTRACTION_PAGE_TIMEOUT = 20  # 单页超时时该页文本为空，继续提取其他页
+    EXTRACTION_DOCUMENT_TIMEOUT = 5 * 60
+    EXTRACTION_HARD_TIMEOUT = 10 * 60  # 看门狗：任务执行超过该秒数（不响应超时信号）时终止工作进程
+    EXTRACTION_WATCHDOG_INTERVAL = 5
+    EXTRACTION_QUARANTINE_AFTER = 3  # 连续失败该次数后隔离文件，不再自动提取
+    EXTRACTION_RETRY_DELAY = 60  # 失败后重试前等待的秒数，每次失败加倍
+    UPLOAD_BATCH_WORKERS = min(4, os.cpu_count() or 1)  # 批量上传时并行提取元数据的进程数（在提取沙箱中执行）
+    UPLOAD_EXTRACTION_TIMEOUT = 25  # 上传请求等待同步提取的秒数（应小于 WSGI 超时），超过时改为后台提取
+    # 图片OCR：识别前长边缩小到 OCR_MAX_SIDE 像素并二值化、纠偏；批量上传时图片分批交给常驻识别进程
+    OCR_LANG = 'chi_sim+eng'
+    OCR_MAX_SIDE = 2400
+    OCR_WORKERS = 2  # 识别进程数（0 或 1 表示不使用进程池，在请求进程中识别）
+    OCR_BATCH_SIZE = 8  # 每次交给一个识别进程的图片数
+    EXTRACTION_CACHE_ENABLED = True  # 按内容哈希缓存提取结果（extraction_cache 表），相同内容不再重复提取
+    EXTRACTION_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 缓存总大小上限，超过时按最近使用时间淘汰
+    SEARCH_PAGE_HITS = 5  # 搜索结果中每个文件返回的命中页数（页码和摘要）
+    
+    # 图片缩略图（/files/<id>/image）：请求宽度向上取到档位，按内容哈希缓存在磁盘上，总大小超过上限时淘汰最久未使用的
+    IMAGE_VARIANT_WIDTHS = (160, 320, 640, 1280, 1920)
+    IMAGE_VARIANT_QUALITIES = {'low': 50, 'medium': 75, 'high': 85}
+    IMAGE_VARIANT_DEFAULT_QUALITY = 'medium'
+    IMAGE_VARIANT_CACHE_FOLDER = os.path.join(os.path.dirname(__file__), 'cache', 'images')
+    IMAGE_VARIANT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+    IMAGE_VARIANT_PREGENERATE = ((320, 'webp'), (640, 'webp'))  # 上传图纸图片后预先生成的 (宽度, 格式)
+    IMAGE_VARIANT_WORKERS = 1  # 预生成线程数（0 表示在上传请求中生成）
+    # PDF 单页/页范围（/files/<id>/pages/<n>）：提取为独立 PDF，按 (内容哈希, 页范围) 缓存
+    PDF_PAGE_CACHE_FOLDER = os.path.join(os.path.dirname(__file__), 'cache', 'pages')
+    PDF_PAGE_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+    PDF_PAGE_RANGE_MAX = 50  # 一次请求最多提取的页数
+    PDF_PAGE_TIMEOUT = 20  # 提取页面的时间限制（秒，在提取沙箱的工作进程中执行）
+    
+    # 断点续传配置（分块大小受 MAX_CONTENT_LENGTH 限制）
+    RESUMABLE_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024  # 断点续传的文件大小上限：2GB
+    UPLOAD_SESSION_CHUNK_SIZE = 8 * 1024 * 1024  # 客户端未指定时的分块大小：8MB
+    UPLOAD_SESSION_MIN_CHUNK_SIZE = 256 * 1024
+    UPLOAD_SESSION_MAX_CHUNK_SIZE = 32 * 1024 * 1024
+    UPLOAD_SESSION_TTL = 24 * 3600  # 会话超过该秒数未更新视为放弃，清理分块文件
+    UPLOAD_SESSION_SWEEP_INTERVAL = 10 * 60  # 后台清理间隔秒数（0 表示不在应用进程中清理）
     
     # 数据库配置 - 设置为None，在子类中设置
     SQLALCHEMY_DATABASE_URI = None
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # 连接池参数，由 database.json 的 pool 配置生成（见 utils.db_pool.build_engine_options）
+    SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(None)
+    
+    # 统计接口（/files/stats 等）结果缓存秒数，相关表有写入时立即失效；0 表示不缓存
+    STATS_CACHE_TTL = 30
+    
+    # ID分配号段大小（PostgreSQL 序列步长，每个进程一次租用的ID数量）
+    ID_BLOCK_SIZE = 20
     
     def __init__(self):
         # 确保上传目录存在
@@ -54,6 +128,7 @@ class DevelopmentConfig(Config):
         db_config_data = load_database_config()
         env = os.environ.get('FLASK_ENV', 'development')
         db_config = db_config_data.get(env, {})
+        self.SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(db_config.get('pool'))
         
         if db_config:
             # 从JSON文件构建连接字符串
@@ -80,6 +155,7 @@ class ProductionConfig(Config):
         """设置生产环境数据库配置"""
         db_config_data = load_database_config()
         db_config = db_config_data.get('production', {})
+        self.SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(db_config.get('pool'))
         
         if db_config:
             self.SQLALCHEMY_DATABASE_URI = (
@@ -102,6 +178,7 @@ class TestingConfig(Config):
         """设置测试环境数据库配置"""
         db_config_data = load_database_config()
         db_config = db_config_data.get('testing', {})
+        self.SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(db_config.get('pool'))
         
         if db_config:
             self.SQLALCHEMY_DATABASE_URI = (
@@ -7,6 +7,8 @@ import mimetypes
 from services.contract_service.contract_service import ContractService
 from utils.response import success_200, error_400, error_500, error_404,error_403
 from utils.db_helper import get_db
+from services.preview_service import PageNotFound, UnreadablePdf, get_pdf_page_service, parse_page_range
+from utils.http_utils import send_from_storage, send_stored_file
 
 # 创建蓝图
 contract_bp = Blueprint('contract', __name__)
@@ -125,12 +127,23 @@ class ContractSearchAPI(MethodView):
             db = get_db()
             contract_service = ContractService(db, current_app.config)
             
-            contracts = contract_service.search_contracts(keyword, company_id)
+            if not keyword.strip():
+                contracts = contract_service.search_contracts(keyword, company_id)
+                return success_200('搜索完成', {
+                    'keyword': keyword,
+                    'results': contracts,
+                    'count': len(contracts)
+                })
+            
+            limit = request.args.get('limit', type=int)
+            offset = request.args.get('offset', 0, type=int)
+            result = contract_service.search_contracts_ranked(keyword, company_id, limit=limit, offset=offset)
             
             return success_200('搜索完成', {
                 'keyword': keyword,
-                'results': contracts,
-                'count': len(contracts)
+                'results': result['results'],
+                'count': len(result['results']),
+                'total': result['total']
             })
             
         except Exception as e:
@@ -215,8 +228,12 @@ class FilePreviewAPI(MethodView):
             db = get_db()
             contract_service = ContractService(db, current_app.config)
             
-            # 调用service层获取文件预览信息
-            result = contract_service.get_file_preview(file_id, company_id)
+            # 调用service层获取文件预览信息（page 指定页码，q 为搜索关键字时定位到命中页）
+            result = contract_service.get_file_preview(
+                file_id, company_id,
+                page=request.args.get('page', type=int),
+                keyword=request.args.get('q')
+            )
             
             if result['success']:
                 return success_200(result['message'], result['data'])
@@ -265,22 +282,20 @@ class FileContentAPI(MethodView):
             # 获取文件数据
             file_data = file_info['data']
             
-            # 发送文件
-            response = make_response(send_file(
+            # 发送文件（支持 Range 分段请求，PDF 阅读器可以按需读取页面；ETag 使用内容哈希，未变化时返回 304）
+            response = send_from_storage(
                 file_data['file_path'],
                 mimetype=file_data.get('mime_type', 'application/pdf'),
                 as_attachment=False,  # 预览模式
-                download_name=file_data.get('file_name', f'file_{file_id}')
-            ))
-            
-            # 添加缓存控制头
-            response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-            response.headers['Pragma'] = 'no-cache'
-            response.headers['Expires'] = '0'
+                download_name=file_data.get('file_name', f'file_{file_id}'),
+                file_hash=file_data.get('file_hash')
+            )
+            if response is None:
+                return error_404('物理文件不存在')
             
             # 添加CORS头
             response.headers['Access-Control-Allow-Origin'] = '*'
-            response.headers['Access-Control-Expose-Headers'] = 'Content-Disposition, Content-Type, Content-Length'
+            response.headers['Access-Control-Expose-Headers'] = 'Content-Disposition, Content-Type, Content-Length, Content-Range, Accept-Ranges, ETag'
             
             return response
             
@@ -288,6 +303,71 @@ class FileContentAPI(MethodView):
             current_app.logger.error(f'获取文件内容错误: {str(e)}')
             return error_500(f'获取文件内容失败: {str(e)}')
 
+class FilePagesAPI(MethodView):
+    """PDF 页面API类"""
+    
+    def get(self, file_id, pages):
+        """获取 PDF 的单页或页范围（pages 为 3 或 2-5），返回只包含这些页的 PDF"""
+        try:
+            company_id = request.args.get('companyId')
+            
+            if not company_id:
+                return error_400('缺少客户ID参数')
+            
+            try:
+                start, end = parse_page_range(pages)
+            except ValueError as e:
+                return error_400(str(e))
+            
+            db = get_db()
+            contract_service = ContractService(db, current_app.config)
+            
+            file_info = contract_service.get_file_content_info(file_id, company_id)
+            
+            if not file_info['success']:
+                if '不存在' in file_info['message']:
+                    return error_404(file_info['message'])
+                elif '无权访问' in file_info['message']:
+                    return error_403(file_info['message'])
+                else:
+                    return error_500(file_info['message'])
+            
+            file_data = file_info['data']
+            if file_data.get('mime_type') != 'application/pdf' or not file_data.get('file_hash'):
+                return error_400('仅支持PDF文件')
+            
+            # 提取结果按 (内容哈希, 页范围) 缓存，ETag 同样由这两者决定
+            try:
+                path, etag = get_pdf_page_service().get_pages(
+                    file_data['file_hash'], file_data['file_path'], start, end
+                )
+            except ValueError as e:
+                return error_400(str(e))
+            except PageNotFound as e:
+                return error_404(str(e))
+            except UnreadablePdf as e:
+                # 详细原因只记录日志，不返回给客户端
+                current_app.logger.warning(f'PDF页面提取失败 file_id={file_id}: {e}')
+                return error_400('无法读取该PDF文件（文件已加密或已损坏）', 422)
+            
+            name, _ = os.path.splitext(file_data.get('file_name') or f'file_{file_id}')
+            response = send_stored_file(
+                path,
+                mimetype='application/pdf',
+                download_name=f'{name}_p{pages}.pdf',
+                file_hash=file_data['file_hash'],
+                etag=etag
+            )
+            
+            response.headers['Access-Control-Allow-Origin'] = '*'
+            response.headers['Access-Control-Expose-Headers'] = 'Content-Disposition, Content-Type, Content-Length, Content-Range, Accept-Ranges, ETag'
+            
+            return response
+            
+        except Exception as e:
+            current_app.logger.error(f'获取PDF页面错误: {str(e)}')
+            return error_500(f'获取PDF页面失败: {str(e)}')
+
 @contract_bp.route('/<contract_id>/download', methods=['GET'])
 def download_contract_file(contract_id):
     """下载合同文件"""
@@ -300,7 +380,7 @@ def download_contract_file(contract_id):
             return error_404('合同不存在')
         
         file_path = contract.get('filePath')
-        if not file_path or not os.path.exists(file_path):
+        if not file_path:
             return error_404('合同文件不存在')
         
         # 获取文件名
@@ -311,13 +391,20 @@ def download_contract_file(contract_id):
         if not mime_type:
             mime_type = 'application/octet-stream'
         
-        # 创建响应
-        response = make_response(send_file(
+        # 合同文件与上传文件记录相同时使用内容哈希作为 ETag
+        file_record = contract_service.get_contract_file(contract)
+        file_hash = file_record.file_hash if file_record and file_record.file_path == file_path else None
+        
+        # 创建响应（支持 Range 分段请求和条件请求）
+        response = send_from_storage(
             file_path,
             mimetype=mime_type,
             as_attachment=True,
-            download_name=filename
-        ))
+            download_name=filename,
+            file_hash=file_hash
+        )
+        if response is None:
+            return error_404('合同文件不存在')
         
         return response
         
@@ -333,6 +420,7 @@ contract_expiring_view = ContractExpiringAPI.as_view('contract_expiring_api')
 contract_overdue_view = ContractOverdueAPI.as_view('contract_overdue_api')
 file_preview_view = FilePreviewAPI.as_view('file_preview_api')
 file_content_view = FileContentAPI.as_view('file_content_api')
+file_pages_view = FilePagesAPI.as_view('file_pages_api')
 
 # 注册路由
 contract_bp.add_url_rule(
@@ -382,4 +470,10 @@ contract_bp.add_url_rule(
     '/files/<file_id>/content',
     view_func=file_content_view,
     methods=['GET']
+)
+
+contract_bp.add_url_rule(
+    '/files/<file_id>/pages/<pages>',
+    view_func=file_pages_view,
+    methods=['GET']
 )
\ No newline at end of file
@@ -3,9 +3,12 @@ from flask import Blueprint, request, jsonify, current_app, send_file
 from flask.views import MethodView
 from services.file_service.upload_service import UploadService
 from services.file_service.file_service import FileService
+from services.preview_service import get_image_variant_service
+from repositories.file_repositorie.upload_session_repository import UploadSessionError
 from utils.response import success_200, error_400, error_500, error_404
 from utils.db_helper import get_db
 from utils.file_utils import format_file_size
+from utils.http_utils import send_from_storage, send_stored_file, send_stream
 from urllib.parse import quote
 import os
 
@@ -44,6 +47,44 @@ class FileUploadAPI(MethodView):
             current_app.logger.error(f'文件上传错误: {str(e)}')
             return error_500(f'上传失败: {str(e)}', 500)
 
+class FileHashCheckAPI(MethodView):
+    """秒传API类 - 客户端先计算SHA-256，服务器已有相同内容时不再上传文件"""
+    
+    def post(self):
+        """按内容哈希创建文件记录"""
+        try:
+            data = request.get_json(silent=True) or {}
+            file_hash = data.get('hash', '')
+            file_name = data.get('fileName', '')
+            file_type = str(data.get('fileType', '1'))
+            company_id = data.get('companyId')
+            
+            if not file_hash or not file_name:
+                return error_400('缺少文件哈希或文件名', 400)
+            if not company_id:
+                return error_400('缺少客户ID参数', 400)
+            
+            db = get_db()
+            upload_service = UploadService(db, current_app.config)
+            
+            is_valid, message = upload_service.validate_file_name(file_name, file_type)
+            if not is_valid:
+                return error_400(message, 400)
+            
+            file_info = upload_service.create_from_hash(
+                file_hash, file_name, file_type, company_id=company_id, mime_type=data.get('mimeType')
+            )
+            if file_info is None:
+                # 内容不存在，客户端需要上传文件
+                return success_200('文件内容不存在，请上传文件', {'exists': False})
+            
+            file_info['exists'] = True
+            return success_200('success', file_info)
+            
+        except Exception as e:
+            current_app.logger.error(f'秒传错误: {str(e)}')
+            return error_500(f'上传失败: {str(e)}', 500)
+
 class FileListAPI(MethodView):
     """文件列表API类（支持分页）"""
     
@@ -56,6 +97,7 @@ class FileListAPI(MethodView):
             page = request.args.get('page', 1, type=int)
             page_size = request.args.get('pageSize', 10, type=int)
             company_id = request.args.get('companyId', None) 
+            cursor = request.args.get('cursor') or None
             
             # 验证分页参数
             if page < 1:
@@ -68,47 +110,30 @@ class FileListAPI(MethodView):
             
             file_repo = FileRepository(db, current_app.config)
             
-            # 如果有关键字搜索，使用搜索方法
-            if search:
-                # 先搜索，然后手动分页
-                upload_service = UploadService(db, current_app.config)
-                all_files = upload_service.search_files(search, file_type if file_type else None)
-                
-                # 计算分页信息
-                total = len(all_files)
-                total_pages = (total + page_size - 1) // page_size
-                start_index = (page - 1) * page_size
-                end_index = min(start_index + page_size, total)
-                
-                if start_index < total:
-                    paginated_files = all_files[start_index:end_index]
-                else:
-                    paginated_files = []
-                
-                file_list = [file.to_response_dict() for file in paginated_files]
-                
-            else:
-                # 使用分页查询
+            # 关键字搜索、过滤、计数和分页都在数据库完成；传入 cursor 时使用游标分页
+            try:
                 result = file_repo.get_paginated_files(
                     page=page,
                     page_size=page_size,
                     file_type=file_type if file_type else None,
-                    company_id=company_id
+                    keyword=search if search else None,
+                    company_id=company_id,
+                    cursor=cursor
                 )
-
-                # print(f"Paginated result from repo: {result}")
-                
-                file_list = [file.to_response_dict() for file in result['items']]
-                total = result['total']
-                total_pages = result['totalPages']
-                print(f"Total files: {total}, Total pages: {total_pages}")
+            except ValueError as e:
+                return error_400(str(e), 400)
+            
+            file_list = [file.to_response_dict() for file in result['items']]
+            total = result['total']
+            total_pages = result['totalPages']
             
             return success_200('获取文件列表成功', {
                 'items': file_list,
                 'total': total,
                 'page': page,
                 'pageSize': page_size,
-                'totalPages': total_pages
+                'totalPages': total_pages,
+                'nextCursor': result['nextCursor']
             })
             
         except Exception as e:
@@ -163,31 +188,75 @@ class FileDownloadAPI(MethodView):
             
             file = upload_service.get_file_by_id(file_id)
             
-            if not file or not os.path.exists(file.file_path):
+            if not file:
                 return error_404('文件不存在', 404)
             
-            # 使用 send_file 生成响应后，显式设置 Content-Disposition 为 RFC5987 格式，
-            # 以避免包含非 Latin-1 字符（例如中文）时导致底层 http.server 编码错误。
-            resp = send_file(
+            # Range 分段请求、ETag（内容哈希）和条件请求由 send_stored_file 处理，
+            # 中文文件名按 RFC 5987 写入 Content-Disposition 的 filename*
+            response = send_from_storage(
                 file.file_path,
-                as_attachment=True,
+                mimetype=file.mime_type,
                 download_name=file.original_name,
-                mimetype=file.mime_type
+                as_attachment=True,
+                file_hash=file.file_hash
             )
-            try:
-                # 使用 filename* 指定 UTF-8 编码的文件名（仅包含 ASCII 字符）
-                resp.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(file.original_name)}"
-            except Exception:
-                # 如果设置失败，退回到不包含中文的简化文件名（安全兜底）
-                safe_name = ''.join(c for c in file.original_name if ord(c) < 256)
-                resp.headers['Content-Disposition'] = f'attachment; filename="{safe_name}"'
-
-            return resp
+            if response is None:
+                return error_404('文件不存在', 404)
+            return response
             
         except Exception as e:
             current_app.logger.error(f'下载文件错误: {str(e)}')
             return error_500(f'下载文件失败: {str(e)}', 500)
 
+class FileImageAPI(MethodView):
+    """图片缩略图API类"""
+    
+    def get(self, file_id):
+        """获取图片的缩小版本（w 宽度，format webp/jpeg，quality low/medium/high）"""
+        try:
+            width = request.args.get('w', type=int)
+            image_format = request.args.get('format')
+            quality = request.args.get('quality')
+            
+            db = get_db()
+            upload_service = UploadService(db, current_app.config)
+            
+            file = upload_service.get_file_by_id(file_id)
+            
+            if not file or not (file.mime_type or '').startswith('image/'):
+                return error_404('图片不存在', 404)
+            
+            if not file.file_hash:
+                # 没有内容哈希的旧记录无法生成缓存键，直接返回原图
+                response = send_from_storage(file.file_path, mimetype=file.mime_type,
+                                             download_name=file.original_name)
+                if response is None:
+                    return error_404('文件不存在', 404)
+                return response
+            
+            variants = get_image_variant_service()
+            try:
+                # 只按明确列出 image/webp 判断（*/* 不代表支持 WebP）
+                accept_webp = 'image/webp' in request.accept_mimetypes.values()
+                params = variants.resolve(width, image_format, quality, accept_webp=accept_webp)
+            except ValueError as e:
+                return error_400(str(e), 400)
+            
+            # 缩略图按 (内容哈希, 宽度档位, 格式, 质量) 缓存，ETag 同样由这些参数决定
+            path, mimetype, etag = variants.get_variant(
+                file.file_hash, file.file_path, params['width'], params['format'], params['quality']
+            )
+            response = send_stored_file(path, mimetype=mimetype, file_hash=file.file_hash, etag=etag)
+            if not image_format:
+                response.vary.add('Accept')
+            return response
+            
+        except FileNotFoundError:
+            return error_404('文件不存在', 404)
+        except Exception as e:
+            current_app.logger.error(f'生成缩略图错误: {str(e)}')
+            return error_500(f'生成缩略图失败: {str(e)}', 500)
+
 class FileBatchAPI(MethodView):
     """批量文件操作API类"""
     
@@ -199,6 +268,7 @@ class FileBatchAPI(MethodView):
             
             files = request.files.getlist('files')
             file_type = request.form.get('fileType', '1')
+            company_id = request.form.get('companyId')
             
             if not files:
                 return error_400('文件列表为空', 400)
@@ -207,7 +277,7 @@ class FileBatchAPI(MethodView):
             upload_service = UploadService(db, current_app.config)
             
             # 使用Repository的批量上传方法
-            results = upload_service.batch_upload(files, file_type)
+            results = upload_service.batch_upload(files, file_type, company_id=company_id)
             
             return success_200('批量上传完成', results)
             
@@ -235,12 +305,107 @@ class FileBatchAPI(MethodView):
             current_app.logger.error(f'批量删除错误: {str(e)}')
             return error_500(f'批量删除失败: {str(e)}', 500)
 
+class UploadSessionAPI(MethodView):
+    """断点续传API类
+
+    POST /uploads 创建会话 -> PUT /uploads/<id>/chunks/<n> 按序上传分块（请求体为分块原始数据）
+    -> GET /uploads/<id> 查询已接收的偏移量 -> POST /uploads/<id>/complete 完成上传
+    """
+    
+    def post(self, upload_id=None):
+        """创建会话 / 完成上传"""
+        try:
+            data = request.get_json(silent=True) or {}
+            db = get_db()
+            upload_service = UploadService(db, current_app.config)
+            
+            if upload_id:
+                # 可选的 sha256 用于校验整个文件
+                result = upload_service.complete_upload(upload_id, checksum=data.get('sha256'))
+                return success_200('success', result)
+            
+            try:
+                file_size = int(data.get('fileSize') or 0)
+                chunk_size = int(data['chunkSize']) if data.get('chunkSize') else None
+            except (TypeError, ValueError):
+                return error_400('文件大小或分块大小无效', 400)
+            
+            session = upload_service.create_upload_session(
+                data.get('fileName', ''),
+                file_size,
+                str(data.get('fileType', '1')),
+                company_id=data.get('companyId'),
+                mime_type=data.get('mimeType'),
+                chunk_size=chunk_size
+            )
+            return success_200('上传会话创建成功', session)
+            
+        except UploadSessionError as e:
+            return _upload_session_error(e)
+        except Exception as e:
+            current_app.logger.error(f'断点续传错误: {str(e)}')
+            return error_500(f'上传失败: {str(e)}', 500)
+    
+    def get(self, upload_id):
+        """查询会话状态（中断后从 nextChunk 继续上传）"""
+        try:
+            db = get_db()
+            session = UploadService(db, current_app.config).get_upload_session(upload_id)
+            if not session:
+                return error_404('上传会话不存在或已过期', 404)
+            return success_200('获取上传会话成功', session)
+            
+        except Exception as e:
+            current_app.logger.error(f'获取上传会话错误: {str(e)}')
+            return error_500(f'获取上传会话失败: {str(e)}', 500)
+    
+    def put(self, upload_id, index):
+        """上传分块（可选请求头 X-Chunk-Sha256 校验分块内容）"""
+        try:
+            db = get_db()
+            upload_service = UploadService(db, current_app.config)
+            session = upload_service.upload_chunk(
+                upload_id,
+                index,
+                request.stream,
+                content_length=request.content_length,
+                checksum=request.headers.get('X-Chunk-Sha256')
+            )
+            return success_200('分块上传成功', session)
+            
+        except UploadSessionError as e:
+            return _upload_session_error(e)
+        except Exception as e:
+            current_app.logger.error(f'分块上传错误: {str(e)}')
+            return error_500(f'分块上传失败: {str(e)}', 500)
+    
+    def delete(self, upload_id):
+        """取消上传"""
+        try:
+            db = get_db()
+            if not UploadService(db, current_app.config).abort_upload(upload_id):
+                return error_404('上传会话不存在或已过期', 404)
+            return success_200('上传已取消')
+            
+        except UploadSessionError as e:
+            return _upload_session_error(e)
+        except Exception as e:
+            current_app.logger.error(f'取消上传错误: {str(e)}')
+            return error_500(f'取消上传失败: {str(e)}', 500)
+
+def _upload_session_error(e: UploadSessionError):
+    """上传会话错误响应（带上当前会话状态，客户端据此继续上传）"""
+    return error_400(str(e), e.status_code, e.session.to_response_dict() if e.session else None)
+
 # 创建视图实例
 file_upload_view = FileUploadAPI.as_view('file_upload_api')
+file_hash_check_view = FileHashCheckAPI.as_view('file_hash_check_api')
 file_list_view = FileListAPI.as_view('file_list_api')
 file_detail_view = FileDetailAPI.as_view('file_detail_api')
 file_download_view = FileDownloadAPI.as_view('file_download_api')
+file_image_view = FileImageAPI.as_view('file_image_api')
 file_batch_view = FileBatchAPI.as_view('file_batch_api')
+upload_session_view = UploadSessionAPI.as_view('upload_session_api')
 
 # 注册路由
 file_bp.add_url_rule(
@@ -249,6 +414,36 @@ file_bp.add_url_rule(
     methods=['POST']
 )
 
+file_bp.add_url_rule(
+    '/upload/check',
+    view_func=file_hash_check_view,
+    methods=['POST']
+)
+
+file_bp.add_url_rule(
+    '/uploads',
+    view_func=upload_session_view,
+    methods=['POST']
+)
+
+file_bp.add_url_rule(
+    '/uploads/<upload_id>',
+    view_func=upload_session_view,
+    methods=['GET', 'DELETE']
+)
+
+file_bp.add_url_rule(
+    '/uploads/<upload_id>/chunks/<int:index>',
+    view_func=upload_session_view,
+    methods=['PUT']
+)
+
+file_bp.add_url_rule(
+    '/uploads/<upload_id>/complete',
+    view_func=upload_session_view,
+    methods=['POST']
+)
+
 file_bp.add_url_rule(
     '/files',
     view_func=file_list_view,
@@ -273,6 +468,12 @@ file_bp.add_url_rule(
     methods=['GET']
 )
 
+file_bp.add_url_rule(
+    '/files/<file_id>/image',
+    view_func=file_image_view,
+    methods=['GET']
+)
+
 # 文件统计路由
 @file_bp.route('/files/stats', methods=['GET'])
 def get_file_stats():
@@ -328,14 +529,28 @@ def search_files():
         db = get_db()
         upload_service = UploadService(db, current_app.config)
         
-        files = upload_service.search_files(keyword, file_type if file_type else None)
+        limit = request.args.get('limit', type=int)
+        offset = request.args.get('offset', 0, type=int)
+        result = upload_service.search_files_ranked(
+            keyword, file_type if file_type else None, limit=limit, offset=offset
+        )
         
-        file_list = [file.to_response_dict() for file in files]
+        file_list = []
+        for item in result['items']:
+            file_dict = item['file'].to_response_dict()
+            file_dict['rank'] = round(item['rank'], 6)
+            file_dict['snippet'] = item['snippet']
+            # 命中的页码和摘要，预览时可直接跳转到 page 指定的页
+            file_dict['pages'] = item['pages']
+            file_dict['pageHits'] = item['page_hits']
+            file_dict['page'] = item['pages'][0]['page'] if item['pages'] else None
+            file_list.append(file_dict)
         
         return success_200('搜索完成', {
             'keyword': keyword,
             'results': file_list,
-            'count': len(file_list)
+            'count': len(file_list),
+            'total': result['total']
         })
         
     except Exception as e:
@@ -366,35 +581,63 @@ def get_recent_files():
         current_app.logger.error(f'获取最近文件错误: {str(e)}')
         return error_500(f'获取最近文件失败: {str(e)}', 500)
 
+# 文件内容提取状态路由
+@file_bp.route('/files/<file_id>/status', methods=['GET'])
+def get_file_status(file_id):
+    """获取文件文本提取/OCR任务状态"""
+    try:
+        db = get_db()
+        upload_service = UploadService(db, current_app.config)
+        
+        status = upload_service.get_extraction_status(file_id)
+        
+        if not status:
+            return error_404('文件不存在', 404)
+        
+        return success_200('获取文件处理状态成功', status)
+        
+    except Exception as e:
+        current_app.logger.error(f'获取文件处理状态错误: {str(e)}')
+        return error_500(f'获取文件处理状态失败: {str(e)}', 500)
+
 # 获取文件内容路由
 @file_bp.route('/files/<file_id>/content', methods=['GET'])
 def get_file_content(file_id):
-    """获取文件二进制内容"""
+    """获取文件二进制内容（分块发送，不把整个文件读入内存）"""
     try:
         db = get_db()
         from repositories.file_repositorie.file_repository import FileRepository
         
         file_repo = FileRepository(db, current_app.config)
-        content = file_repo.get_file_content(file_id)
         
-        if not content:
+        # 只查询一次元数据，不加载数据库中的文件内容
+        file = file_repo.get_file_metadata(file_id)
+        if not file:
             return error_404('文件内容不存在', 404)
         
-        # 获取文件信息用于响应头
-        file = file_repo.get_by_id(file_id)
+        # 优先发送存储后端中的文件（本地文件由 WSGI 服务器的 file_wrapper / sendfile 分块发送，支持 Range）
+        response = send_from_storage(
+            file.file_path,
+            mimetype='application/octet-stream',
+            download_name=file.original_name,
+            as_attachment=True,
+            file_hash=file.file_hash
+        )
+        if response is not None:
+            return response
         
-        # 返回二进制内容时也要保证 Content-Disposition 不含非 Latin-1 字符
-        try:
-            cd = f"attachment; filename*=UTF-8''{quote(file.original_name)}"
-        except Exception:
-            safe_name = ''.join(c for c in file.original_name if ord(c) < 256)
-            cd = f'attachment; filename="{safe_name}"'
-
-        return content, 200, {
-            'Content-Type': 'application/octet-stream',
-            'Content-Disposition': cd,
-            'Content-Length': str(len(content))
-        }
+        # 存储后端中不存在时，按窗口分块读取数据库中的内容
+        if not file.has_content:
+            return error_404('文件内容不存在', 404)
+        
+        return send_stream(
+            file_repo.iter_file_content(file.id, file.content_size),
+            file.content_size,
+            mimetype='application/octet-stream',
+            download_name=file.original_name,
+            as_attachment=True,
+            file_hash=file.file_hash
+        )
         
     except Exception as e:
         current_app.logger.error(f'获取文件内容错误: {str(e)}')
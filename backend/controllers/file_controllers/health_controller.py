@@ -2,6 +2,8 @@
 from flask import Blueprint, jsonify
 from flask.views import MethodView
 from datetime import datetime
+from sqlalchemy import text
+from utils.db_pool import get_pool_metrics
 
 class HealthAPI(MethodView):
     """健康检查API类"""
@@ -23,12 +25,13 @@ class HealthAPI(MethodView):
             db = get_db()
             
             # 测试数据库连接
-            db.session.execute('SELECT 1')
+            db.session.execute(text('SELECT 1'))
             
             return jsonify({
                 'status': 'healthy',
                 'message': '服务运行正常，数据库连接正常',
                 'database': 'connected',
+                'pool': get_pool_metrics(db.engine),
                 'timestamp': datetime.utcnow().isoformat() + 'Z'
             })
         except Exception as e:
@@ -39,10 +42,32 @@ class HealthAPI(MethodView):
                 'timestamp': datetime.utcnow().isoformat() + 'Z'
             }), 503
 
+class PoolMetricsAPI(MethodView):
+    """数据库连接池监控API类"""
+    
+    def get(self):
+        """连接池状态：已取出/空闲/溢出连接数，获取连接的等待时间和超时次数"""
+        try:
+            from utils.db_helper import get_db
+            db = get_db()
+            
+            return jsonify({
+                'status': 'healthy',
+                'pool': get_pool_metrics(db.engine),
+                'timestamp': datetime.utcnow().isoformat() + 'Z'
+            })
+        except Exception as e:
+            return jsonify({
+                'status': 'unhealthy',
+                'message': f'获取连接池状态失败: {str(e)}',
+                'timestamp': datetime.utcnow().isoformat() + 'Z'
+            }), 503
+
 # 创建蓝图
 health_bp = Blueprint('health', __name__)
 
 # 将类视图注册到蓝图
 health_view = HealthAPI.as_view('health_api')
 health_bp.add_url_rule('/health', view_func=health_view, methods=['GET', 'POST'])
-health_bp.add_url_rule('/health/db', view_func=health_view, methods=['POST'])  # 专门的数据库检查
\ No newline at end of file
+health_bp.add_url_rule('/health/db', view_func=health_view, methods=['POST'])  # 专门的数据库检查
+health_bp.add_url_rule('/health/pool', view_func=PoolMetricsAPI.as_view('pool_metrics_api'), methods=['GET'])  # 连接池监控
\ No newline at end of file
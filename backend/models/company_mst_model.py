@@ -1,6 +1,7 @@
 # models/company_mst_model.py
 from .base_model import BaseModel
 from . import get_db
+from utils.id_allocator import allocate_id
 import re
 
 # 从包中获取db实例
@@ -152,35 +153,12 @@ class CompanyMstModel(BaseModel):
     @classmethod
     def generate_company_id(cls):
         """生成客户ID：company_00001, company_00002, ..."""
-        try:
-            # 获取当前最大ID
-            max_id_record = cls.query.with_entities(cls.id).order_by(cls.id.desc()).first()
-            
-            if not max_id_record:
-                # 第一个客户
-                return "company_00001"
-            else:
-                # 提取数字部分
-                max_id = max_id_record[0]
-                match = re.search(r'company_(\d+)', max_id)
-                
-                if match:
-                    # 提取数字并加1
-                    next_num = int(match.group(1)) + 1
-                else:
-                    # 如果没有匹配到格式，从1开始
-                    next_num = 1
-                
-                # 格式化为5位数字
-                return f"company_{next_num:05d}"
-        except Exception as e:
-            # 如果查询失败（如表不存在），返回默认ID
-            print(f"生成客户ID时出错: {e}")
-            return "company_00001"
+        # 由ID分配器按号段分配，避免并发插入时生成重复ID
+        return allocate_id(cls, 'company', 5)
     
     @classmethod
     def get_next_company_id(cls):
-        """获取下一个客户ID（不保存）"""
+        """获取下一个客户ID（会占用该ID，不保存记录）"""
         return cls.generate_company_id()
     
     def to_response_dict(self):
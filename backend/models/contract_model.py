@@ -1,6 +1,8 @@
 # models/contract_model.py
 from .base_model import BaseModel
 from . import get_db
+from .search_vector import register_searchable, search_vector_column, search_vector_index
+from utils.id_allocator import allocate_id
 from utils.time_utils import beijing_time
 import re
 from sqlalchemy import Column, String, Integer, Float, DateTime, Text, ForeignKey, Date, Numeric
@@ -11,9 +13,10 @@ db = get_db()
 class ContractModel(BaseModel):
     """合同模型"""
     __tablename__ = 'contracts'
-    __table_args__ = {
-        'comment': '合同信息表'
-    }
+    __table_args__ = (
+        search_vector_index('contracts'),
+        {'comment': '合同信息表'}
+    )
     
     # 自定义ID字段
     id = db.Column(
@@ -133,6 +136,9 @@ class ContractModel(BaseModel):
         comment='合同状态: active-有效, completed-已完成, terminated-已终止'
     )
     
+    # 全文检索向量（标题、文件名 + 主要内容、备忘录，延迟加载）
+    search_vector = search_vector_column()
+    
     # 与公司的关联
     company = relationship('CompanyMstModel', backref='contracts', lazy='select')
     
@@ -162,30 +168,8 @@ class ContractModel(BaseModel):
     @classmethod
     def generate_contract_id(cls):
         """生成合同ID：contract_001, contract_002, ..."""
-        try:
-            # 获取当前最大ID
-            max_id_record = cls.query.with_entities(cls.id).order_by(cls.id.desc()).first()
-            
-            if not max_id_record:
-                # 第一个合同
-                return "contract_001"
-            else:
-                # 提取数字部分
-                max_id = max_id_record[0]
-                match = re.search(r'contract_(\d+)', max_id)
-                
-                if match:
-                    # 提取数字并加1
-                    next_num = int(match.group(1)) + 1
-                else:
-                    # 如果没有匹配到格式，从1开始
-                    next_num = 1
-                
-                # 格式化为3位数字
-                return f"contract_{next_num:03d}"
-        except Exception as e:
-            # 如果查询失败（如表不存在），返回默认ID
-            return "contract_001"
+        # 由ID分配器按号段分配，避免并发插入时生成重复ID
+        return allocate_id(cls, 'contract', 3)
     
     def to_response_dict(self):
         """返回给前端的字典格式"""
@@ -216,4 +200,7 @@ class ContractModel(BaseModel):
     
     def __repr__(self):
         """对象表示"""
-        return f"<ContractModel(id={self.id}, file_id={self.file_id}, contract_title={self.contract_title}, company_id={self.company_id})>"
\ No newline at end of file
+        return f"<ContractModel(id={self.id}, file_id={self.file_id}, contract_title={self.contract_title}, company_id={self.company_id})>"
+
+
+register_searchable(ContractModel, ['contract_title', 'file_name'], ['main_content', 'memo'])
@@ -0,0 +1,98 @@
+from .base_model import BaseModel
+from . import get_db
+
+# 从包中获取db实例
+db = get_db()
+
+class ExtractionCacheModel(BaseModel):
+    """提取结果缓存模型 - 按内容哈希和提取器版本保存提取结果，相同内容不再重复提取"""
+    __tablename__ = 'extraction_cache'
+    __table_args__ = (
+        # 按最近使用时间淘汰
+        db.Index('ix_extraction_cache_last_used_at', 'last_used_at'),
+        {'comment': '提取结果缓存表'}
+    )
+    
+    # 文件哈希
+    file_hash = db.Column(
+        db.String(64),
+        primary_key=True,
+        comment='文件SHA-256哈希值'
+    )
+    
+    # 提取器版本
+    extractor_version = db.Column(
+        db.Integer,
+        primary_key=True,
+        autoincrement=False,
+        comment='提取器版本（版本升级后旧结果失效）'
+    )
+    
+    # 页数
+    page_count = db.Column(
+        db.Integer,
+        nullable=True,
+        comment='页数'
+    )
+    
+    # 宽度
+    width = db.Column(
+        db.Integer,
+        nullable=True,
+        comment='宽度（图片为像素，PDF为首页点数）'
+    )
+    
+    # 高度
+    height = db.Column(
+        db.Integer,
+        nullable=True,
+        comment='高度（图片为像素，PDF为首页点数）'
+    )
+    
+    # 文本内容
+    text_content = db.Column(
+        db.Text,
+        nullable=True,
+        comment='提取的文本内容'
+    )
+    
+    # OCR识别置信度
+    ocr_confidence = db.Column(
+        db.Float,
+        nullable=True,
+        default=0.0,
+        comment='OCR识别置信度'
+    )
+    
+    # 文本语言
+    language = db.Column(
+        db.String(20),
+        nullable=True,
+        comment='文本语言: zh-中文, en-英文, mixed-中英混合'
+    )
+    
+    # 其余提取结果（逐页文本、文档信息等）
+    result_json = db.Column(
+        db.Text,
+        nullable=True,
+        comment='其余提取结果（JSON）'
+    )
+    
+    # 占用字节数
+    size_bytes = db.Column(
+        db.BigInteger,
+        nullable=False,
+        default=0,
+        comment='缓存内容字节数（用于容量淘汰）'
+    )
+    
+    # 最近使用时间
+    last_used_at = db.Column(
+        db.DateTime,
+        nullable=True,
+        comment='最近命中时间'
+    )
+    
+    def __repr__(self):
+        """对象表示"""
+        return f"<ExtractionCacheModel(file_hash={self.file_hash}, extractor_version={self.extractor_version})>"
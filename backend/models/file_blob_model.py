@@ -0,0 +1,55 @@
+# models/file_blob_model.py
+from .base_model import BaseModel
+from . import get_db
+
+# 从包中获取db实例
+db = get_db()
+
+class FileBlobModel(BaseModel):
+    """文件内容对象模型 - 按文件哈希去重存储，多条文件记录共享一个物理文件"""
+    __tablename__ = 'file_blob'
+    __table_args__ = {
+        'comment': '文件内容对象表 - 内容寻址存储及引用计数'
+    }
+    
+    # 文件哈希（主键）
+    file_hash = db.Column(
+        db.String(64),
+        primary_key=True,
+        comment='文件SHA-256哈希值'
+    )
+    
+    # 物理文件路径
+    blob_path = db.Column(
+        db.String(500),
+        nullable=False,
+        comment='内容寻址存储路径（sha256/ab/cd/<hash>）'
+    )
+    
+    # 文件大小
+    file_size = db.Column(
+        db.BigInteger,
+        nullable=False,
+        default=0,
+        comment='文件大小（字节）'
+    )
+    
+    # 引用计数
+    ref_count = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0,
+        comment='引用该内容的文件记录数'
+    )
+    
+    def to_response_dict(self):
+        """返回给前端的字典格式"""
+        return {
+            'fileHash': self.file_hash,
+            'size': self.file_size,
+            'refCount': self.ref_count
+        }
+    
+    def __repr__(self):
+        """对象表示"""
+        return f"<FileBlobModel(file_hash={self.file_hash}, ref_count={self.ref_count})>"
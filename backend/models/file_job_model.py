@@ -0,0 +1,94 @@
+# models/file_job_model.py
+from .base_model import BaseModel
+from . import get_db
+import uuid
+
+# 从包中获取db实例
+db = get_db()
+
+class FileJobModel(BaseModel):
+    """文件后台任务模型 - 记录文本提取/OCR任务，服务重启后可恢复未完成任务"""
+    __tablename__ = 'file_job'
+    __table_args__ = {
+        'comment': '文件后台任务表'
+    }
+    
+    # 任务ID
+    id = db.Column(
+        db.String(36),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4()),
+        comment='任务ID（UUID）'
+    )
+    
+    # 文件ID
+    file_id = db.Column(
+        db.String(50),
+        nullable=False,
+        index=True,
+        comment='文件ID'
+    )
+    
+    # 任务类型
+    job_type = db.Column(
+        db.String(20),
+        nullable=False,
+        default='extract',
+        comment='任务类型: extract-文本提取/OCR'
+    )
+    
+    # 任务状态
+    status = db.Column(
+        db.String(20),
+        nullable=False,
+        default='pending',
+        index=True,
+        comment='任务状态: pending-等待中, processing-处理中, completed-已完成, failed-失败'
+    )
+    
+    # 执行次数
+    attempts = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0,
+        comment='执行次数'
+    )
+    
+    # 错误信息
+    error_message = db.Column(
+        db.Text,
+        nullable=True,
+        comment='错误信息'
+    )
+    
+    # 开始时间
+    started_at = db.Column(
+        db.DateTime,
+        nullable=True,
+        comment='开始执行时间'
+    )
+    
+    # 结束时间
+    finished_at = db.Column(
+        db.DateTime,
+        nullable=True,
+        comment='执行结束时间'
+    )
+    
+    def to_response_dict(self):
+        """返回给前端的字典格式"""
+        return {
+            'id': self.id,
+            'fileId': self.file_id,
+            'jobType': self.job_type,
+            'status': self.status,
+            'attempts': self.attempts,
+            'error': self.error_message,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        """对象表示"""
+        return f"<FileJobModel(id={self.id}, file_id={self.file_id}, status={self.status})>"
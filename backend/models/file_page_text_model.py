@@ -0,0 +1,46 @@
+from .base_model import BaseModel
+from . import get_db
+
+# 从包中获取db实例
+db = get_db()
+
+class FilePageTextModel(BaseModel):
+    """文件逐页文本模型 - 提取时按页写入，检索结果可以定位到页码"""
+    __tablename__ = 'file_page_text'
+    __table_args__ = {
+        'comment': '文件逐页文本表'
+    }
+    
+    # 文件ID
+    file_id = db.Column(
+        db.String(50),
+        primary_key=True,
+        comment='文件ID'
+    )
+    
+    # 页码
+    page_no = db.Column(
+        db.Integer,
+        primary_key=True,
+        autoincrement=False,
+        comment='页码（从1开始）'
+    )
+    
+    # 页面文本
+    text = db.Column(
+        db.Text,
+        nullable=True,
+        comment='页面提取的文本'
+    )
+    
+    def to_response_dict(self):
+        """返回给前端的字典格式"""
+        return {
+            'fileId': self.file_id,
+            'page': self.page_no,
+            'text': self.text
+        }
+    
+    def __repr__(self):
+        """对象表示"""
+        return f"<FilePageTextModel(file_id={self.file_id}, page_no={self.page_no})>"
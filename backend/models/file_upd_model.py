@@ -1,7 +1,11 @@
 # models/file_upd_model.py
 from .base_model import BaseModel
 from . import get_db
+from .search_vector import register_searchable, search_vector_column, search_vector_index
+from utils.id_allocator import allocate_id
 from utils.time_utils import beijing_time  # 从工具导入
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import deferred
 import re
 
 # 从包中获取db实例
@@ -10,9 +14,12 @@ db = get_db()
 class FileUpdModel(BaseModel):
     """文件上传模型 - 包含文件内容"""
     __tablename__ = 'file_upd'
-    __table_args__ = {
-        'comment': '文件上传表 - 存储上传的文件信息和内容'
-    }
+    __table_args__ = (
+        search_vector_index('file_upd'),
+        # 列表按上传时间倒序分页（游标分页使用 (upload_time, id)）
+        db.Index('ix_file_upd_upload_time_id', 'upload_time', 'id'),
+        {'comment': '文件上传表 - 存储上传的文件信息和内容'}
+    )
     
     # 自定义ID字段（覆盖BaseModel的id）
     id = db.Column(
@@ -70,11 +77,25 @@ class FileUpdModel(BaseModel):
         comment='文件MIME类型'
     )
     
-    # 🌟 文件内容（二进制存储）
-    file_content = db.Column(
+    # 🌟 文件内容（二进制存储，延迟加载，列表查询不读取）
+    file_content = deferred(db.Column(
         db.LargeBinary, 
         nullable=True,
         comment='文件二进制内容'
+    ))
+    
+    # 是否存有文件内容（file_content 的投影，避免为判断而加载大字段）
+    has_content = db.Column(
+        db.Boolean,
+        default=False,
+        comment='是否存有文件二进制内容'
+    )
+    
+    # 文件内容字节数（file_content 的投影）
+    content_size = db.Column(
+        db.BigInteger,
+        nullable=True,
+        comment='文件二进制内容大小（字节）'
     )
     
     # 🌟 文件哈希
@@ -91,11 +112,18 @@ class FileUpdModel(BaseModel):
         comment='文件页数（PDF等）'
     )
     
-    # 文本内容
-    text_content = db.Column(
+    # 文本内容（延迟加载）
+    text_content = deferred(db.Column(
         db.Text, 
         nullable=True,
         comment='文本内容'
+    ))
+    
+    # 是否已提取文本（text_content 的投影）
+    has_text = db.Column(
+        db.Boolean,
+        default=False,
+        comment='是否已提取文本内容'
     )
     
     # 是否OCR
@@ -111,6 +139,30 @@ class FileUpdModel(BaseModel):
         default=0.0,
         comment='OCR识别置信度'
     )
+    # 内容提取状态
+    extraction_status = db.Column(
+        db.String(20),
+        nullable=True,
+        default='completed',
+        comment='内容提取状态: pending-等待中, processing-处理中, completed-已完成, failed-失败'
+    )
+    
+    # 提取失败次数
+    extraction_failures = db.Column(
+        db.Integer,
+        default=0,
+        comment='内容提取连续失败次数（超时、内存超限、进程被终止等）'
+    )
+    
+    # 是否隔离
+    quarantined = db.Column(
+        db.Boolean,
+        default=False,
+        comment='多次提取失败后隔离，不再自动提取'
+    )
+    
+    # 全文检索向量（文件名 + 文本内容，延迟加载）
+    search_vector = search_vector_column()
     # print(f"db column beijing_time: {beijing_time()}")
     # 上传时间（北京时间）
     upload_time = db.Column(
@@ -136,37 +188,46 @@ class FileUpdModel(BaseModel):
     @classmethod
     def generate_file_id(cls):
         """生成文件ID：file_001, file_002, ..."""
-        try:
-            # 获取当前最大ID
-            max_id_record = cls.query.with_entities(cls.id).order_by(cls.id.desc()).first()
-            
-            if not max_id_record:
-                # 第一个文件
-                return "file_001"
-            else:
-                # 提取数字部分
-                max_id = max_id_record[0]
-                match = re.search(r'file_(\d+)', max_id)
-                
-                if match:
-                    # 提取数字并加1
-                    next_num = int(match.group(1)) + 1
-                else:
-                    # 如果没有匹配到格式，从1开始
-                    next_num = 1
-                
-                # 格式化为3位数字
-                return f"file_{next_num:03d}"
-        except Exception as e:
-            # 如果查询失败（如表不存在），返回默认ID
-            # print(f"生成ID时出错: {e}")
-            return "file_001"
+        # 由ID分配器按号段分配，避免并发插入时生成重复ID
+        return allocate_id(cls, 'file', 3)
     
     @classmethod
     def get_next_file_id(cls):
-        """获取下一个文件ID（不保存）"""
+        """获取下一个文件ID（会占用该ID，不保存记录）"""
         return cls.generate_file_id()
     
+    @classmethod
+    def metadata_columns(cls):
+        """列表查询需要的元数据列（不含文件内容、文本内容和检索向量）"""
+        return [
+            getattr(cls, column.key) for column in cls.__table__.columns
+            if column.key not in ('file_content', 'text_content', 'search_vector')
+        ]
+    
+    @classmethod
+    def upgrade_columns(cls, connection, columns):
+        """表结构升级时调用：新增投影列后为旧数据回填一次"""
+        if {'has_content', 'content_size', 'has_text'} & set(columns):
+            cls.backfill_projections(connection)
+    
+    @classmethod
+    def backfill_projections(cls, connection):
+        """为旧数据回填 has_content / content_size / has_text（不提交事务）"""
+        table = cls.__table__
+        connection.execute(
+            table.update()
+            .where(table.c.has_content.is_(None))
+            .values(
+                has_content=table.c.file_content.isnot(None),
+                content_size=func.length(table.c.file_content)
+            )
+        )
+        connection.execute(
+            table.update()
+            .where(table.c.has_text.is_(None))
+            .values(has_text=func.coalesce(func.length(table.c.text_content), 0) > 0)
+        )
+    
     def to_response_dict(self):
         """返回给前端的字典格式"""
         from utils.time_utils import format_datetime
@@ -181,10 +242,13 @@ class FileUpdModel(BaseModel):
             'uploadTime': self.upload_time.isoformat() if self.upload_time else None,
             'mimeTimeFormatted': format_datetime(self.upload_time) if self.upload_time else None,
             'mimeType': self.mime_type,
-            'url': f"/api/files/{self.id}/download",
-            'hasContent': self.file_content is not None,
+            # URL 携带内容哈希，内容不变时浏览器可以长期缓存
+            'url': f"/api/files/{self.id}/download" + (f"?v={self.file_hash}" if self.file_hash else ''),
+            'hasContent': bool(self.has_content),
             'pageCount': self.page_count,
-            'textExtracted': bool(self.text_content)
+            'textExtracted': bool(self.has_text),
+            'extractionStatus': self.extraction_status or 'completed',
+            'quarantined': bool(self.quarantined)
         }
     
     def get_file_size_formatted(self):
@@ -203,4 +267,23 @@ class FileUpdModel(BaseModel):
     
     def __repr__(self):
         """对象表示"""
-        return f"<FileUpdModel(id={self.id}, company_id={self.company_id}, original_name={self.original_name}, file_type={self.file_type})>"
\ No newline at end of file
+        return f"<FileUpdModel(id={self.id}, company_id={self.company_id}, original_name={self.original_name}, file_type={self.file_type})>"
+
+
+def _sync_projections(mapper, connection, target):
+    """写入前同步大字段的投影列（只检查变更历史，不触发延迟加载）"""
+    state = inspect(target)
+    
+    if state.attrs.file_content.history.has_changes():
+        content = target.file_content
+        target.has_content = content is not None
+        target.content_size = len(content) if content is not None else None
+    
+    if state.attrs.text_content.history.has_changes():
+        target.has_text = bool(target.text_content)
+
+
+event.listen(FileUpdModel, 'before_insert', _sync_projections)
+event.listen(FileUpdModel, 'before_update', _sync_projections)
+
+register_searchable(FileUpdModel, ['original_name'], ['text_content'])
@@ -0,0 +1,163 @@
+# models/search_vector.py
+"""全文检索向量列 - PostgreSQL 使用 tsvector + GIN 索引，其他数据库存储分词文本"""
+from sqlalchemy import Text, event, func, inspect
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Session, deferred
+from sqlalchemy.types import TypeDecorator
+
+from . import get_db
+from utils.search_tokenizer import build_document
+
+db = get_db()
+
+# 已注册全文检索的模型
+SEARCHABLE_MODELS = {}
+
+
+class SearchVectorType(TypeDecorator):
+    """PostgreSQL 下为 tsvector，其他数据库为文本（"标题词\\n正文词"）"""
+    impl = Text
+    cache_ok = True
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(TSVECTOR())
+        return dialect.type_descriptor(Text())
+
+
+def search_vector_column():
+    """全文检索向量列（延迟加载，普通查询不读取）"""
+    return deferred(db.Column(
+        SearchVectorType(),
+        nullable=True,
+        comment='全文检索向量'
+    ))
+
+
+def search_vector_index(table_name: str):
+    """全文检索 GIN 索引（仅 PostgreSQL 创建）"""
+    return db.Index(
+        f'ix_{table_name}_search_vector',
+        'search_vector',
+        postgresql_using='gin'
+    ).ddl_if(dialect='postgresql')
+
+
+def build_search_vector(dialect_name: str, title_texts, body_texts):
+    """根据标题和正文生成检索向量的值（标题权重更高）"""
+    title = build_document(title_texts)
+    body = build_document(body_texts)
+    
+    if dialect_name == 'postgresql':
+        return func.setweight(func.to_tsvector('simple', title), 'A').op('||')(
+            func.to_tsvector('simple', body)
+        )
+    return f'{title}\n{body}'
+
+
+def compute_search_vector(target, dialect_name: str):
+    """计算模型实例的检索向量"""
+    title_fields, body_fields = SEARCHABLE_MODELS[type(target)]
+    return build_search_vector(
+        dialect_name,
+        [getattr(target, field) or '' for field in title_fields],
+        [getattr(target, field) or '' for field in body_fields]
+    )
+
+
+def register_searchable(model, title_fields, body_fields):
+    """注册模型的全文检索字段，插入和更新时自动维护 search_vector"""
+    SEARCHABLE_MODELS[model] = (tuple(title_fields), tuple(body_fields))
+    event.listen(model, 'before_insert', _update_search_vector)
+    event.listen(model, 'before_update', _update_search_vector)
+
+
+def _update_search_vector(mapper, connection, target):
+    """写入前更新检索向量（更新时只在检索字段变化时重新计算）"""
+    title_fields, body_fields = SEARCHABLE_MODELS[type(target)]
+    state = inspect(target)
+    
+    if state.has_identity and not any(
+        state.attrs[field].history.has_changes() for field in title_fields + body_fields
+    ):
+        return
+    
+    target.search_vector = compute_search_vector(target, connection.dialect.name)
+
+
+def _pending_changes(session):
+    """当前事务中待同步到进程内倒排索引的变更"""
+    return session.info.setdefault('search_index_pending', {})
+
+
+def stage_bulk_delete(session, model, ids) -> None:
+    """批量 DELETE 不经过 ORM 逐行删除，登记需从倒排索引移除的文档（提交后生效）"""
+    if model not in SEARCHABLE_MODELS:
+        return
+    engine = session.get_bind(mapper=inspect(model)).engine
+    if engine.dialect.name == 'postgresql':
+        return
+    pending = _pending_changes(session)
+    for doc_id in ids:
+        pending[(engine, model.__tablename__, doc_id)] = None
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_index_changes(session, flush_context):
+    """记录本次 flush 中检索向量的变更（非 PostgreSQL），提交后再更新倒排索引"""
+    for instances, deleted in ((session.new, False), (session.dirty, False), (session.deleted, True)):
+        for instance in instances:
+            model = type(instance)
+            if model not in SEARCHABLE_MODELS:
+                continue
+            engine = session.get_bind(mapper=inspect(model)).engine
+            if engine.dialect.name == 'postgresql':
+                continue
+            
+            key = (engine, model.__tablename__, instance.id)
+            if deleted:
+                _pending_changes(session)[key] = None
+            elif isinstance(instance.__dict__.get('search_vector'), str):
+                _pending_changes(session)[key] = instance.__dict__['search_vector']
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_index_changes(session):
+    """事务提交后同步进程内倒排索引"""
+    from services.search_service.inverted_index import peek_index
+    
+    pending = session.info.pop('search_index_pending', None)
+    for (engine, table_name, doc_id), document in (pending or {}).items():
+        index = peek_index(engine, table_name)
+        if index is None:
+            continue
+        if document is None:
+            index.remove(doc_id)
+        else:
+            index.add(doc_id, document)
+
+
+@event.listens_for(Session, 'after_transaction_create')
+def _save_index_changes(session, transaction):
+    """开始 SAVEPOINT 时保存当前待同步的变更（创建前已 flush），SAVEPOINT 回滚时恢复"""
+    if transaction.nested:
+        session.info.setdefault('search_index_savepoints', {})[transaction] = \
+            dict(session.info.get('search_index_pending') or {})
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _release_index_savepoint(session, transaction):
+    """SAVEPOINT 结束后不再需要保存的变更"""
+    if transaction.nested:
+        session.info.get('search_index_savepoints', {}).pop(transaction, None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_index_changes(session):
+    """事务回滚时丢弃待同步的变更；SAVEPOINT 回滚时只丢弃 SAVEPOINT 中的变更"""
+    if session.in_nested_transaction():
+        saved = session.info.get('search_index_savepoints', {}).get(session.get_nested_transaction())
+        if saved is not None:
+            session.info['search_index_pending'] = dict(saved)
+        return
+    session.info.pop('search_index_pending', None)
@@ -0,0 +1,126 @@
+# models/upload_session_model.py
+from .base_model import BaseModel
+from . import get_db
+import uuid
+
+# 从包中获取db实例
+db = get_db()
+
+class UploadSessionModel(BaseModel):
+    """断点续传上传会话模型 - 记录已接收的分块，完成后生成文件记录"""
+    __tablename__ = 'upload_session'
+    __table_args__ = {
+        'comment': '断点续传上传会话表'
+    }
+    
+    # 会话ID
+    id = db.Column(
+        db.String(36),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4()),
+        comment='上传会话ID（UUID）'
+    )
+    
+    # 客户ID
+    company_id = db.Column(
+        db.String(50),
+        nullable=False,
+        comment='客户ID'
+    )
+    
+    # 文件类型
+    file_type = db.Column(
+        db.String(20),
+        nullable=False,
+        comment='文件类型：合同、图纸等'
+    )
+    
+    # 原始文件名
+    original_name = db.Column(
+        db.String(255),
+        nullable=False,
+        comment='原始文件名'
+    )
+    
+    # MIME类型
+    mime_type = db.Column(
+        db.String(100),
+        nullable=True,
+        comment='MIME类型'
+    )
+    
+    # 文件总大小
+    total_size = db.Column(
+        db.BigInteger,
+        nullable=False,
+        comment='文件总大小（字节）'
+    )
+    
+    # 分块大小
+    chunk_size = db.Column(
+        db.Integer,
+        nullable=False,
+        comment='分块大小（字节），最后一块可以更小'
+    )
+    
+    # 已接收字节数
+    received_size = db.Column(
+        db.BigInteger,
+        nullable=False,
+        default=0,
+        comment='已接收的连续字节数'
+    )
+    
+    # 下一个分块序号
+    next_chunk = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0,
+        comment='下一个需要上传的分块序号（从0开始）'
+    )
+    
+    # 会话状态
+    status = db.Column(
+        db.String(20),
+        nullable=False,
+        default='uploading',
+        index=True,
+        comment='会话状态: uploading-上传中, finalizing-合并中, completed-已完成, failed-失败'
+    )
+    
+    # 生成的文件ID
+    file_id = db.Column(
+        db.String(50),
+        nullable=True,
+        comment='完成后生成的文件ID'
+    )
+    
+    @property
+    def total_chunks(self) -> int:
+        """分块总数"""
+        return (self.total_size + self.chunk_size - 1) // self.chunk_size
+    
+    def expected_chunk_size(self, index: int) -> int:
+        """指定分块应有的字节数"""
+        return min(self.chunk_size, self.total_size - index * self.chunk_size)
+    
+    def to_response_dict(self):
+        """返回给前端的字典格式"""
+        return {
+            'uploadId': self.id,
+            'fileName': self.original_name,
+            'fileType': self.file_type,
+            'companyId': self.company_id,
+            'totalSize': self.total_size,
+            'chunkSize': self.chunk_size,
+            'totalChunks': self.total_chunks,
+            'receivedSize': self.received_size,
+            'nextChunk': self.next_chunk,
+            'status': self.status,
+            'fileId': self.file_id,
+            'updatedAt': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        """对象表示"""
+        return f"<UploadSessionModel(id={self.id}, status={self.status}, received={self.received_size}/{self.total_size})>"
@@ -1,11 +1,23 @@
 # repositories/base_repository.py
-from typing import List, Optional, TypeVar, Generic
+from typing import Dict, Iterable, List, Optional, TypeVar, Generic
 from flask_sqlalchemy import SQLAlchemy
 from models.base_model import BaseModel
+from models.search_vector import stage_bulk_delete
+from sqlalchemy import delete, inspect, select
 from sqlalchemy.orm import Session
+from utils.stats_cache import stats_cache
 
 T = TypeVar('T', bound=BaseModel)
 
+# 批量操作每条 SQL 语句处理的ID数量
+BULK_CHUNK_SIZE = 500
+
+
+def chunked(items: List, size: int = BULK_CHUNK_SIZE) -> Iterable[List]:
+    """按固定大小切分列表"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
 class BaseRepository(Generic[T]):
     """基础仓储类"""
     
@@ -59,4 +71,47 @@ class BaseRepository(Generic[T]):
     
     def filter_by(self, **filters) -> List[T]:
         """根据条件过滤记录"""
-        return self.model_class.query.filter_by(**filters).all()
\ No newline at end of file
+        return self.model_class.query.filter_by(**filters).all()
+    
+    def bulk_delete(self, ids: List[str], commit: bool = True,
+                    chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, List[str]]:
+        """
+        批量删除：分批执行 DELETE ... WHERE id IN (...)，所有批次在同一事务中提交
+        返回 {'deleted': [已删除ID], 'missing': [不存在的ID]}；commit=False 时由调用方提交
+        """
+        ids = list(dict.fromkeys(id for id in ids if id))
+        primary_key = inspect(self.model_class).primary_key[0]
+        supports_returning = self.session.get_bind().dialect.delete_returning
+        deleted = set()
+        
+        try:
+            for chunk in chunked(ids, chunk_size):
+                statement = delete(self.model_class).where(primary_key.in_(chunk))
+                if supports_returning:
+                    rows = self.session.execute(statement.returning(primary_key))
+                    deleted.update(row[0] for row in rows)
+                else:
+                    existing = [row[0] for row in self.session.execute(
+                        select(primary_key).where(primary_key.in_(chunk))
+                    )]
+                    if existing:
+                        self.session.execute(delete(self.model_class).where(primary_key.in_(existing)))
+                    deleted.update(existing)
+            
+            stage_bulk_delete(self.session, self.model_class, deleted)
+            if commit:
+                self.session.commit()
+        except Exception:
+            if commit:
+                self.session.rollback()
+            raise
+        
+        return {
+            'deleted': [id for id in ids if id in deleted],
+            'missing': [id for id in ids if id not in deleted]
+        }
+    
+    def invalidate_stats(self, *tables: str) -> None:
+        """使统计缓存失效（ORM 写入在提交后自动失效，绕过 ORM 的批量语句需要手动调用）"""
+        tables = tables or (self.model_class.__tablename__,)
+        stats_cache.invalidate(self.session.get_bind(), tables)
@@ -1,8 +1,9 @@
 # repositories/company_repository/company_repository.py
 from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy import func, desc, asc, or_
-from ..base_repository import BaseRepository
+from ..base_repository import BaseRepository, chunked
 from models.company_mst_model import CompanyMstModel
+from utils.stats_cache import cached_stats
 import re
 
 class CompanyRepository(BaseRepository[CompanyMstModel]):
@@ -324,8 +325,9 @@ class CompanyRepository(BaseRepository[CompanyMstModel]):
         """根据银行账户获取客户"""
         return self.filter_by(bank_account=bank_account)
     
+    @cached_stats('company_stats', tables=('company_mst',))
     def get_companies_stats(self) -> Dict[str, Any]:
-        """获取客户统计信息"""
+        """获取客户统计信息（结果缓存 STATS_CACHE_TTL 秒，客户表有写入时失效）"""
         stats = {}
         
         # 总客户数
@@ -478,4 +480,43 @@ class CompanyRepository(BaseRepository[CompanyMstModel]):
                 'success': False,
                 'message': f'删除客户失败: {str(e)}',
                 'errors': [str(e)]
-            }
\ No newline at end of file
+            }
+    
+    def batch_delete_companies(self, company_ids: List[str]) -> Dict[str, List]:
+        """批量删除客户（有关联合同的客户不删除，其余同一事务中分批 DELETE ... WHERE id IN）"""
+        from models.contract_model import ContractModel
+        
+        results = {'success': [], 'failed': []}
+        company_ids = list(dict.fromkeys(company_ids))
+        
+        # 有关联合同的客户不能删除
+        contract_counts = {}
+        for chunk in chunked(company_ids):
+            contract_counts.update(
+                self.session.query(ContractModel.company_id, func.count(ContractModel.id))
+                .filter(ContractModel.company_id.in_(chunk))
+                .group_by(ContractModel.company_id)
+                .all()
+            )
+        
+        deletable = [company_id for company_id in company_ids if company_id not in contract_counts]
+        try:
+            outcome = self.bulk_delete(deletable)
+        except Exception as e:
+            outcome = {'deleted': [], 'missing': []}
+            results['failed'].extend({'id': company_id, 'error': str(e)} for company_id in deletable)
+        
+        deleted = set(outcome['deleted'])
+        missing = set(outcome['missing'])
+        for company_id in company_ids:
+            if company_id in deleted:
+                results['success'].append(company_id)
+            elif company_id in missing:
+                results['failed'].append({'id': company_id, 'error': '客户不存在'})
+            elif company_id in contract_counts:
+                results['failed'].append({
+                    'id': company_id,
+                    'error': f'该客户有 {contract_counts[company_id]} 个相关合同，无法删除'
+                })
+        
+        return results
@@ -5,6 +5,8 @@ from sqlalchemy.orm import joinedload
 
 from models.contract_model import ContractModel
 from ..base_repository import BaseRepository
+from services.search_service import FullTextSearch
+from utils.stats_cache import cached_stats
 from utils.time_utils import beijing_time
 
 class ContractRepository(BaseRepository[ContractModel]):
@@ -31,30 +33,50 @@ class ContractRepository(BaseRepository[ContractModel]):
         return query.all()
     
     def search_contracts(self, keyword: str = None, company_id: str = None) -> List[ContractModel]:
-        """搜索合同"""
+        """搜索合同（标题、文件名、主要内容、备忘录全文检索，按相关度排序）"""
         query = self.session.query(ContractModel)
         
         # 按公司过滤
         if company_id:
             query = query.filter(ContractModel.company_id == company_id)
         
-        # 关键字搜索
-        if keyword:
-            search_conditions = []
-            search_fields = ['contract_title', 'main_content', 'memo', 'file_name']
-            
-            for field in search_fields:
-                if hasattr(ContractModel, field):
-                    field_attr = getattr(ContractModel, field)
-                    search_conditions.append(field_attr.ilike(f'%{keyword}%'))
-            
-            if search_conditions:
-                query = query.filter(or_(*search_conditions))
+        # 没有关键字时按更新时间倒序返回
+        if not keyword or not keyword.strip():
+            return query.order_by(desc(ContractModel.updated_at)).all()
         
-        return query.order_by(desc(ContractModel.updated_at)).all()
+        result = self.search_contracts_ranked(keyword, company_id, with_snippets=False)
+        return [item['contract'] for item in result['items']]
     
+    def search_contracts_ranked(self, keyword: str, company_id: str = None, limit: int = None,
+                                offset: int = 0, with_snippets: bool = True) -> Dict[str, Any]:
+        """全文检索合同，返回相关度和内容摘要"""
+        query = self.session.query(ContractModel)
+        if company_id and company_id != "all":
+            query = query.filter(ContractModel.company_id == company_id)
+        
+        searcher = FullTextSearch(self.session, ContractModel)
+        rows, total = searcher.search(
+            query, keyword, limit=limit, offset=offset,
+            order_by=(desc(ContractModel.updated_at), desc(ContractModel.id))
+        )
+        
+        snippets = {}
+        if with_snippets:
+            snippets = searcher.get_snippets(
+                [contract.id for contract, _ in rows], keyword, ['main_content', 'memo']
+            )
+        
+        return {
+            'items': [
+                {'contract': contract, 'rank': rank, 'snippet': snippets.get(contract.id, '')}
+                for contract, rank in rows
+            ],
+            'total': total
+        }
+    
+    @cached_stats('contract_stats', tables=('contracts',))
     def get_contract_stats(self, company_id: str = None) -> Dict[str, Any]:
-        """获取合同统计信息"""
+        """获取合同统计信息（结果缓存 STATS_CACHE_TTL 秒，合同表有写入时失效）"""
         query = self.session.query(
             func.count(ContractModel.id).label('total_contracts'),
             func.sum(ContractModel.contract_amount).label('total_amount'),
@@ -106,22 +128,27 @@ class ContractRepository(BaseRepository[ContractModel]):
     def get_paginated_contracts(self, page=1, page_size=10, company_id=None, keyword=None):
         """获取分页合同列表"""
         try:
+            # 关键字搜索走全文检索，按相关度排序
+            if keyword:
+                offset = (page - 1) * page_size
+                result = self.search_contracts_ranked(
+                    keyword, company_id, limit=page_size, offset=offset, with_snippets=False
+                )
+                total = result['total']
+                return {
+                    'items': [item['contract'] for item in result['items']],
+                    'total': total,
+                    'page': page,
+                    'pageSize': page_size,
+                    'totalPages': (total + page_size - 1) // page_size
+                }
+            
             query = self.session.query(ContractModel)
             
             # 应用公司ID过滤
             if company_id and company_id != "all":
                 query = query.filter(ContractModel.company_id == company_id)
             
-            # 应用关键字搜索
-            if keyword:
-                query = query.filter(
-                    or_(
-                        ContractModel.contract_title.ilike(f'%{keyword}%'),
-                        ContractModel.main_content.ilike(f'%{keyword}%'),
-                        ContractModel.memo.ilike(f'%{keyword}%')
-                    )
-                )
-            
             # 计算总数
             total = query.count()
             
@@ -182,22 +209,19 @@ class ContractRepository(BaseRepository[ContractModel]):
         return results
     
     def batch_delete_contracts(self, contract_ids: List[str]) -> Dict[str, List]:
-        """批量删除合同"""
+        """批量删除合同（同一事务中分批 DELETE ... WHERE id IN）"""
         results = {'deleted': [], 'failed': []}
         
-        for contract_id in contract_ids:
-            try:
-                if self.delete(contract_id):
-                    results['deleted'].append(contract_id)
-                else:
-                    results['failed'].append({
-                        'contract_id': contract_id,
-                        'error': '合同不存在'
-                    })
-            except Exception as e:
-                results['failed'].append({
-                    'contract_id': contract_id,
-                    'error': str(e)
-                })
-        
-        return results
\ No newline at end of file
+        try:
+            outcome = self.bulk_delete(contract_ids)
+        except Exception as e:
+            results['failed'] = [
+                {'contract_id': contract_id, 'error': str(e)} for contract_id in contract_ids
+            ]
+            return results
+        
+        results['deleted'] = outcome['deleted']
+        results['failed'] = [
+            {'contract_id': contract_id, 'error': '合同不存在'} for contract_id in outcome['missing']
+        ]
+        return results
@@ -1,5 +1,8 @@
 # repositories/__init__.py
 from .file_repository import FileRepository
+from .blob_repository import BlobRepository
+from .page_text_repository import FilePageTextRepository
+from .extraction_cache_repository import ExtractionCacheRepository
 from ..base_repository import BaseRepository
 
-__all__ = ['FileRepository', 'BaseRepository']
\ No newline at end of file
+__all__ = ['FileRepository', 'BlobRepository', 'FilePageTextRepository', 'ExtractionCacheRepository', 'BaseRepository']
\ No newline at end of file
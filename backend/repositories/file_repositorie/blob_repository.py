@@ -0,0 +1,236 @@
+# repositories/file_repositorie/blob_repository.py
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+
+from models.file_blob_model import FileBlobModel
+from ..base_repository import BaseRepository, chunked
+from services.storage_service import BLOB_ROOT, blob_key, delete_location, get_storage, resolve_location
+
+class BlobRepository(BaseRepository[FileBlobModel]):
+    """内容寻址存储仓储类 - 物理文件按哈希保存在存储后端的 sha256/ab/cd/<hash>
+
+    引用计数归零时保留内容记录，提交后在锁住该记录的事务中删除物理文件和记录；上传相同内容时先锁住
+    内容记录再判断物理文件是否存在，删除和复用不会交错（删除进行中的上传等待删除完成后重新保存内容）。
+    """
+    
+    BLOB_ROOT = BLOB_ROOT
+    
+    def __init__(self, db, config=None):
+        super().__init__(FileBlobModel, db)
+        self.config = config or {}
+        self.storage = get_storage(self.config)
+    
+    def get_blob_path(self, file_hash: str) -> str:
+        """根据文件哈希计算存储位置（本地为文件路径，S3 为 s3://bucket/key）"""
+        return self.storage.location(blob_key(file_hash))
+    
+    def is_blob_path(self, file_path: str) -> bool:
+        """判断位置是否位于内容寻址存储中"""
+        if not file_path:
+            return False
+        _, key = resolve_location(file_path, self.config)
+        return key.startswith(self.BLOB_ROOT + '/')
+    
+    def blob_exists(self, file_hash: str) -> bool:
+        """存储后端中是否已有该内容"""
+        return self.storage.exists(blob_key(file_hash))
+    
+    def get_by_hash(self, file_hash: str) -> Optional[FileBlobModel]:
+        """根据文件哈希获取内容对象"""
+        return self.session.get(FileBlobModel, file_hash)
+    
+    def lock_blob(self, file_hash: str) -> Optional[FileBlobModel]:
+        """锁住内容记录直到当前事务结束（SELECT ... FOR UPDATE），记录不存在时返回 None"""
+        return self.session.query(FileBlobModel)\
+            .filter(FileBlobModel.file_hash == file_hash)\
+            .with_for_update()\
+            .populate_existing()\
+            .first()
+    
+    def lock_blobs(self, file_hashes) -> Dict[str, FileBlobModel]:
+        """按哈希顺序锁住多条内容记录（顺序一致，避免并发事务互相等待），返回 {哈希: 记录}"""
+        locked = {}
+        for chunk in chunked(sorted(set(file_hashes))):
+            locked.update((blob.file_hash, blob) for blob in self.session.query(FileBlobModel)
+                          .filter(FileBlobModel.file_hash.in_(chunk))
+                          .order_by(FileBlobModel.file_hash)
+                          .with_for_update()
+                          .populate_existing())
+        return locked
+    
+    def store_file(self, temp_path: str, file_hash: str, file_size: int) -> Tuple[str, bool]:
+        """将临时文件放入内容寻址存储，并增加引用计数（不提交事务）
+
+        返回 (存储路径, 是否为新内容)。内容已存在时直接删除临时文件。
+        """
+        blob_path, is_new = self.place_file(temp_path, file_hash)
+        self.add_reference(file_hash, blob_path, file_size)
+        return blob_path, is_new
+    
+    def place_file(self, temp_path: str, file_hash: str) -> Tuple[str, bool]:
+        """将临时文件保存到内容寻址存储（本地为原子重命名，不修改引用计数）
+
+        返回 (存储位置, 是否为新内容)。内容已存在时直接删除临时文件。
+        先锁住内容记录：正在删除该内容时等待删除完成，再按物理文件是否存在决定是否保存。
+        """
+        self.lock_blob(file_hash)
+        key = blob_key(file_hash)
+        is_new = not self.storage.exists(key)
+        
+        if is_new:
+            self.storage.store(temp_path, key)
+        elif os.path.exists(temp_path):
+            os.remove(temp_path)
+        
+        return self.storage.location(key), is_new
+    
+    def add_reference(self, file_hash: str, blob_path: str = None, file_size: int = 0,
+                      count: int = 1) -> None:
+        """引用计数加 count，内容对象不存在时创建（不提交事务）"""
+        table = FileBlobModel.__table__
+        updated = self.session.execute(
+            table.update()
+            .where(table.c.file_hash == file_hash)
+            .values(ref_count=table.c.ref_count + count)
+        ).rowcount
+        
+        if updated:
+            return
+        
+        try:
+            with self.session.begin_nested():
+                self.session.add(FileBlobModel(
+                    file_hash=file_hash,
+                    blob_path=blob_path or self.get_blob_path(file_hash),
+                    file_size=file_size,
+                    ref_count=count
+                ))
+        except IntegrityError:
+            # 并发上传同一内容时，另一请求已创建记录
+            self.session.execute(
+                table.update()
+                .where(table.c.file_hash == file_hash)
+                .values(ref_count=table.c.ref_count + count)
+            )
+    
+    def add_references(self, counts: Dict[str, int], sizes: Dict[str, int] = None) -> None:
+        """批量增加引用计数 {哈希: 增加次数}，内容对象不存在时批量创建（不提交事务）"""
+        table = FileBlobModel.__table__
+        sizes = sizes or {}
+        
+        # 增加次数相同的哈希合并为一条 UPDATE
+        by_count = defaultdict(list)
+        for file_hash, count in counts.items():
+            if file_hash and count > 0:
+                by_count[count].append(file_hash)
+        for count, hashes in by_count.items():
+            for chunk in chunked(hashes):
+                self.session.execute(
+                    table.update()
+                    .where(table.c.file_hash.in_(chunk))
+                    .values(ref_count=table.c.ref_count + count)
+                )
+        
+        hashes = [file_hash for hashes in by_count.values() for file_hash in hashes]
+        existing = set()
+        for chunk in chunked(hashes):
+            existing.update(row[0] for row in self.session.execute(
+                table.select().with_only_columns(table.c.file_hash).where(table.c.file_hash.in_(chunk))
+            ))
+        missing = [file_hash for file_hash in hashes if file_hash not in existing]
+        if not missing:
+            return
+        
+        try:
+            with self.session.begin_nested():
+                self.session.execute(table.insert(), [
+                    {
+                        'file_hash': file_hash,
+                        'blob_path': self.get_blob_path(file_hash),
+                        'file_size': sizes.get(file_hash, 0),
+                        'ref_count': counts[file_hash]
+                    }
+                    for file_hash in missing
+                ])
+        except IntegrityError:
+            # 并发上传同一内容时，另一请求已创建部分记录，逐个处理
+            for file_hash in missing:
+                self.add_reference(file_hash, file_size=sizes.get(file_hash, 0), count=counts[file_hash])
+    
+    def release_reference(self, file_hash: str) -> Optional[str]:
+        """引用计数减一（不提交事务）
+
+        返回需要删除的物理文件路径：仅当这是最后一个引用时返回，否则返回 None。
+        内容记录保留到物理文件删除时（remove_unreferenced_file）。
+        """
+        table = FileBlobModel.__table__
+        self.session.execute(
+            table.update()
+            .where(table.c.file_hash == file_hash)
+            .values(ref_count=table.c.ref_count - 1)
+        )
+        
+        blob = self.session.execute(
+            table.select().where(table.c.file_hash == file_hash)
+        ).first()
+        if not blob or blob.ref_count > 0:
+            return None
+        return blob.blob_path
+    
+    def release_references(self, counts: Dict[str, int]) -> List[Tuple[str, str]]:
+        """批量减少引用计数 {哈希: 释放次数}（不提交事务）
+
+        返回引用计数归零、需要在提交后删除的 [(哈希, 物理文件路径)]（由 remove_unreferenced_files 删除）。
+        """
+        table = FileBlobModel.__table__
+        
+        # 释放次数相同的哈希合并为一条 UPDATE
+        by_count = defaultdict(list)
+        for file_hash, count in counts.items():
+            if file_hash and count > 0:
+                by_count[count].append(file_hash)
+        for count, hashes in by_count.items():
+            for chunk in chunked(hashes):
+                self.session.execute(
+                    table.update()
+                    .where(table.c.file_hash.in_(chunk))
+                    .values(ref_count=table.c.ref_count - count)
+                )
+        
+        released = []
+        for chunk in chunked([file_hash for hashes in by_count.values() for file_hash in hashes]):
+            rows = self.session.execute(
+                table.select()
+                .with_only_columns(table.c.file_hash, table.c.blob_path)
+                .where(table.c.file_hash.in_(chunk), table.c.ref_count <= 0)
+            ).all()
+            released.extend((row[0], row[1]) for row in rows)
+        return released
+    
+    def remove_unreferenced_files(self, blobs: List[Tuple[str, str]]) -> int:
+        """事务提交后删除引用计数仍为零的内容，返回删除的文件数
+
+        在锁住内容记录的事务中删除物理文件和记录：同时上传相同内容的请求等待删除完成后重新保存内容，
+        已被新上传引用的内容不删除。
+        """
+        removed = 0
+        try:
+            locked = self.lock_blobs(file_hash for file_hash, _ in blobs)
+            for file_hash, blob_path in blobs:
+                blob = locked.get(file_hash)
+                if blob is None or blob.ref_count > 0:
+                    continue
+                delete_location(blob.blob_path or blob_path, self.config)
+                self.session.delete(blob)
+                removed += 1
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return removed
+    
+    def remove_unreferenced_file(self, file_hash: str, blob_path: str) -> bool:
+        """事务提交后删除物理文件（引用计数仍为零时）"""
+        return self.remove_unreferenced_files([(file_hash, blob_path)]) > 0
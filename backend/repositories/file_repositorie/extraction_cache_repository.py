@@ -0,0 +1,133 @@
+# repositories/file_repositorie/extraction_cache_repository.py
+import json
+from datetime import timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import delete, func
+
+from models.extraction_cache_model import ExtractionCacheModel
+from ..base_repository import BaseRepository, chunked
+from services.extraction_service import extractors
+from utils.time_utils import beijing_time
+
+class ExtractionCacheRepository(BaseRepository[ExtractionCacheModel]):
+    """提取结果缓存仓储类 - 按 (文件哈希, 提取器版本) 保存提取结果，总大小超过上限时按最近使用时间淘汰
+
+    上传、补齐和任务恢复时先查缓存，命中则不再解析PDF或OCR；提取器版本升级后旧结果不再命中，
+    容量不足时最先删除。所有方法都不提交事务，由调用方与文件记录一起提交。
+    """
+    
+    # 命中时最多每隔该时间更新一次最近使用时间（避免每次读取都写数据库）
+    TOUCH_INTERVAL = timedelta(hours=1)
+    # 淘汰到上限的该比例以下，避免之后每次写入都触发淘汰
+    EVICT_TARGET_RATIO = 0.9
+    # 淘汰时每批读取的记录数
+    EVICT_BATCH_SIZE = 200
+    
+    def __init__(self, db, config=None):
+        super().__init__(ExtractionCacheModel, db)
+        self.config = config or {}
+        self.enabled = self.config.get('EXTRACTION_CACHE_ENABLED', True)
+        self.max_bytes = self.config.get('EXTRACTION_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+        self.version = extractors.EXTRACTOR_VERSION
+    
+    def get(self, file_hash: str) -> Optional[Dict]:
+        """获取当前提取器版本的缓存结果（格式与 extractors.extract_file 的返回值相同），未命中返回 None"""
+        if not self.enabled or not file_hash:
+            return None
+        entry = self.session.get(ExtractionCacheModel, (file_hash, self.version))
+        if entry is None:
+            return None
+        self._touch([entry])
+        return self._to_result(entry)
+    
+    def get_many(self, file_hashes: List[str]) -> Dict[str, Dict]:
+        """批量获取缓存结果，返回 {哈希: 提取结果}（只包含命中的哈希）"""
+        if not self.enabled:
+            return {}
+        results = {}
+        for chunk in chunked([file_hash for file_hash in dict.fromkeys(file_hashes) if file_hash]):
+            entries = self.session.query(ExtractionCacheModel).filter(
+                ExtractionCacheModel.file_hash.in_(chunk),
+                ExtractionCacheModel.extractor_version == self.version
+            ).all()
+            self._touch(entries)
+            results.update((entry.file_hash, self._to_result(entry)) for entry in entries)
+        return results
+    
+    def put(self, file_hash: str, result: Dict) -> None:
+        """保存提取结果（已有时替换），总大小超过上限时淘汰最久未使用的结果"""
+        if not self.enabled or not file_hash or result is None:
+            return
+        
+        extra = {key: value for key, value in result.items() if key != 'text_content'}
+        result_json = json.dumps(extra, ensure_ascii=False, default=str)
+        text_content = result.get('text_content')
+        size_bytes = len(result_json.encode('utf-8')) + len((text_content or '').encode('utf-8'))
+        
+        self.session.merge(ExtractionCacheModel(
+            file_hash=file_hash,
+            extractor_version=self.version,
+            page_count=result.get('page_count'),
+            width=result.get('image_width') or result.get('page_width'),
+            height=result.get('image_height') or result.get('page_height'),
+            text_content=text_content,
+            ocr_confidence=result.get('ocr_confidence', 0.0),
+            language=result.get('language'),
+            result_json=result_json,
+            size_bytes=size_bytes,
+            last_used_at=beijing_time()
+        ))
+        self.session.flush()
+        self.evict()
+    
+    def evict(self) -> int:
+        """总大小超过上限时淘汰：先删除旧版本提取器的结果，再按最近使用时间删除，返回删除的记录数"""
+        total = self.session.query(func.coalesce(func.sum(ExtractionCacheModel.size_bytes), 0)).scalar()
+        if total <= self.max_bytes:
+            return 0
+        
+        removed = self.session.execute(
+            delete(ExtractionCacheModel).where(ExtractionCacheModel.extractor_version != self.version)
+        ).rowcount
+        total = self.session.query(func.coalesce(func.sum(ExtractionCacheModel.size_bytes), 0)).scalar()
+        
+        target = self.max_bytes * self.EVICT_TARGET_RATIO
+        while total > target:
+            rows = self.session.query(ExtractionCacheModel.file_hash, ExtractionCacheModel.size_bytes)\
+                .order_by(ExtractionCacheModel.last_used_at.asc(), ExtractionCacheModel.file_hash)\
+                .limit(self.EVICT_BATCH_SIZE)\
+                .all()
+            if not rows:
+                break
+            
+            evicted = []
+            for file_hash, size_bytes in rows:
+                if total <= target:
+                    break
+                evicted.append(file_hash)
+                total -= size_bytes or 0
+            self.session.execute(delete(ExtractionCacheModel).where(
+                ExtractionCacheModel.file_hash.in_(evicted),
+                ExtractionCacheModel.extractor_version == self.version
+            ))
+            removed += len(evicted)
+        return removed
+    
+    def _touch(self, entries: List[ExtractionCacheModel]) -> None:
+        """更新命中记录的最近使用时间（距上次更新不足 TOUCH_INTERVAL 时跳过）"""
+        now = beijing_time()
+        for entry in entries:
+            if entry.last_used_at is None or now - entry.last_used_at > self.TOUCH_INTERVAL:
+                entry.last_used_at = now
+    
+    @staticmethod
+    def _to_result(entry: ExtractionCacheModel) -> Dict:
+        """缓存记录转换为提取结果字典"""
+        result = json.loads(entry.result_json) if entry.result_json else {}
+        result.update(
+            page_count=entry.page_count,
+            text_content=entry.text_content,
+            ocr_confidence=entry.ocr_confidence or 0.0,
+            language=entry.language
+        )
+        return result
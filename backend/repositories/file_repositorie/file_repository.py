@@ -2,18 +2,36 @@
 import os
 import uuid
 import hashlib
-import PyPDF2
+import mimetypes
+import tempfile
+import time
+from collections import Counter
 from datetime import datetime
-from typing import List, Optional, Dict, Any, Tuple
+from typing import Iterator, List, Optional, Dict, Any, Tuple
 from werkzeug.utils import secure_filename
-from PIL import Image
-import io
-from sqlalchemy import func, desc, asc, or_
+from sqlalchemy import exists, func, desc, asc, or_, tuple_
+from sqlalchemy.orm import load_only
 
 from models.file_upd_model import FileUpdModel
 from models.contract_model import ContractModel  # 导入合同模型
-from ..base_repository import BaseRepository
-from utils.file_utils import allowed_file, format_file_size
+from models.file_page_text_model import FilePageTextModel
+from ..base_repository import BaseRepository, chunked
+from ..contract_repository.contract_repository import ContractRepository
+from .blob_repository import BlobRepository
+from .extraction_cache_repository import ExtractionCacheRepository
+from .page_text_repository import FilePageTextRepository
+from services.extraction_service import extractors, sandbox
+from services.extraction_service.batch_executor import get_batch_executor
+from services.extraction_service.job_queue import get_job_queue
+from services.extraction_service.ocr_engine import get_ocr_pool
+from services.preview_service import get_image_variant_service
+from services.search_service import FullTextSearch
+from services.storage_service import (
+    blob_key, delete_location, fetch_local, local_path_for, location_exists, resolve_location
+)
+from utils.file_utils import allowed_file, format_file_size, remove_files_in_background
+from utils.pagination import decode_cursor, encode_cursor
+from utils.stats_cache import cached_stats
 from utils.time_utils import beijing_time
 
 class FileRepository(BaseRepository[FileUpdModel]):
@@ -22,15 +40,18 @@ class FileRepository(BaseRepository[FileUpdModel]):
     def __init__(self, db, config=None):
         super().__init__(FileUpdModel, db)
         self.config = config or {}
+        self.blob_repo = BlobRepository(db, self.config)
+        self.page_repo = FilePageTextRepository(db, self.config)
+        self.cache_repo = ExtractionCacheRepository(db, self.config)
     
     def validate_upload(self, file, file_type: str) -> Tuple[bool, str]:
         """验证上传文件 - Repository层验证"""
         if not file or file.filename == '':
             return False, '文件不能为空'
         
-        if not allowed_file(file.filename, file_type, self.config):
-            allowed_exts = self.config.get('ALLOWED_EXTENSIONS', {}).get(file_type, [])
-            return False, f'不支持的文件格式。{file_type}类型支持: {", ".join(allowed_exts)}'
+        is_valid, message = self.validate_file_name(file.filename, file_type)
+        if not is_valid:
+            return is_valid, message
         
         # 检查文件大小
         file.seek(0, 2)  # 移动到文件末尾
@@ -43,15 +64,17 @@ class FileRepository(BaseRepository[FileUpdModel]):
         
         return True, '验证通过'
     
+    def validate_file_name(self, file_name: str, file_type: str) -> Tuple[bool, str]:
+        """验证文件名的扩展名是否允许上传"""
+        if not allowed_file(file_name, file_type, self.config):
+            allowed_exts = self.config.get('ALLOWED_EXTENSIONS', {}).get(file_type, [])
+            return False, f'不支持的文件格式。{file_type}类型支持: {", ".join(allowed_exts)}'
+        return True, '验证通过'
+    
     def save_uploaded_file(self, file, file_type: str, original_name: str = None, 
                           company_id: str = None, contract_data: Dict = None) -> Dict:
         """保存上传的文件 - 完整的文件处理逻辑"""
-        # 生成唯一文件名
         filename = secure_filename(file.filename)
-        original_name = original_name or filename
-        
-        file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-        unique_filename = f"{uuid.uuid4().hex}.{file_ext}" if file_ext else str(uuid.uuid4().hex)
         
         # 创建存储目录
         type_folder = self._get_type_folder(file_type)
@@ -60,51 +83,113 @@ class FileRepository(BaseRepository[FileUpdModel]):
         if not os.path.exists(upload_path):
             os.makedirs(upload_path)
         
-        # 保存物理文件
-        file_path = os.path.join(upload_path, unique_filename)
-        file.save(file_path)
+        # 分块写入临时文件并增量计算哈希
+        temp_path, file_hash, file_size = self._stream_to_temp_file(file, upload_path)
+        
+        return self.save_staged_file(
+            temp_path, file_hash, file_size, filename, file_type,
+            original_name=original_name, mime_type=file.content_type,
+            company_id=company_id, contract_data=contract_data
+        )
+    
+    def save_staged_file(self, temp_path: str, file_hash: str, file_size: int, filename: str, file_type: str,
+                         original_name: str = None, mime_type: str = None, company_id: str = None,
+                         contract_data: Dict = None) -> Dict:
+        """保存已写入临时文件并计算哈希的上传内容（单文件上传和断点续传共用）
+
+        提取元数据、放入内容寻址存储、创建文件记录，合同文件同时创建合同记录；临时文件会被移动或删除。
+        """
+        # 生成唯一文件名
+        original_name = original_name or filename
+        file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+        unique_filename = f"{uuid.uuid4().hex}.{file_ext}" if file_ext else str(uuid.uuid4().hex)
         
-        # 读取文件内容
-        file.seek(0)
-        file_data = file.read()
-        file_size = len(file_data)
-        mime_type = file.content_type
+        # 检查是否已存在相同文件，存在则复用其提取结果
+        existing_file = self._get_existing_by_hash(file_hash)
         
-        # 计算文件哈希
-        file_hash = hashlib.sha256(file_data).hexdigest()
+        # 没有已完成提取的相同记录时查询提取结果缓存
+        cached = None if existing_file else self.cache_repo.get(file_hash)
         
-        # 检查是否已存在相同文件
-        existing_files = self.filter_by(file_hash=file_hash)
-        # if existing_files:
-        #     print(f"文件已存在: {existing_files[0].original_name}")
-            # 可以选择跳过保存或创建引用
+        # 提取和读取内容都使用临时文件（存储后端可能不是本地磁盘）
+        try:
+            if existing_file:
+                metadata = {
+                    'page_count': existing_file.page_count,
+                    'has_ocr': existing_file.has_ocr,
+                    'ocr_confidence': existing_file.ocr_confidence,
+                    'page_source': existing_file.id
+                }
+                text_content = existing_file.text_content
+                extraction_status = 'completed'
+            elif cached is not None:
+                metadata = cached
+                text_content = cached.get('text_content')
+                extraction_status = 'completed'
+            elif self.config.get('EXTRACTION_ASYNC', True):
+                # 文本提取/OCR 交给后台任务，上传立即返回
+                metadata = {}
+                text_content = None
+                extraction_status = 'pending'
+            else:
+                # 提取元数据和文本内容（从临时文件读取，PDF 只解析一次）；提取失败或超时时交给后台任务
+                try:
+                    metadata = self._extract_file(temp_path, filename, mime_type)
+                except Exception as e:
+                    print(f"同步提取失败，改为后台提取: {e}")
+                    metadata = {}
+                    text_content = None
+                    extraction_status = 'pending'
+                else:
+                    self.cache_repo.put(file_hash, metadata)
+                    text_content = metadata.get('text_content')
+                    extraction_status = 'completed'
+            
+            # 数据库中保存文件内容（同一内容只保存一份；默认关闭，内容只保存在存储后端）
+            file_data = None
+            if self.config.get('STORE_FILE_CONTENT_IN_DB', False) and not self.blob_repo.blob_exists(file_hash):
+                with open(temp_path, 'rb') as f:
+                    file_data = f.read()
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
         
-        # 提取文件元数据
-        metadata = self._extract_file_metadata(file_data, filename, mime_type)
+        # 保存到内容寻址存储（内容已存在时只增加引用计数，不再保存第二份）
+        file_path, is_new_blob = self.blob_repo.store_file(temp_path, file_hash, file_size)
         
-        # 提取文本内容
-        text_content = self._extract_text_content(file_data, filename, mime_type)
-
-        # 上传时间 - 使用北京时间
-        beijing_time = self.get_beijing_time()
-        
-        # 创建文件数据库记录
-        file_record = self.create(
-            company_id=company_id,
-            original_name=original_name,
-            stored_name=unique_filename,
-            file_type=file_type,
-            file_size=file_size,
-            file_path=file_path,
-            mime_type=mime_type,
-            file_content=file_data,
-            file_hash=file_hash,
-            page_count=metadata.get('page_count'),
-            text_content=text_content,
-            has_ocr=metadata.get('has_ocr', False),
-            ocr_confidence=metadata.get('ocr_confidence', 0.0),
-            upload_time=beijing_time
-        )
+        try:
+            # 上传时间 - 使用北京时间
+            beijing_time = self.get_beijing_time()
+            
+            # 创建文件数据库记录（与引用计数在同一事务中提交）
+            file_record = self.create(
+                company_id=company_id,
+                original_name=original_name,
+                stored_name=unique_filename,
+                file_type=file_type,
+                file_size=file_size,
+                file_path=file_path,
+                mime_type=mime_type,
+                file_content=file_data,
+                file_hash=file_hash,
+                page_count=metadata.get('page_count'),
+                text_content=text_content,
+                has_ocr=metadata.get('has_ocr', False),
+                ocr_confidence=metadata.get('ocr_confidence', 0.0),
+                extraction_status=extraction_status,
+                upload_time=beijing_time
+            )
+        except Exception:
+            self.session.rollback()
+            if is_new_blob:
+                delete_location(file_path, self.config)
+            raise
+        
+        if extraction_status == 'pending':
+            self._schedule_extraction(file_record, filename)
+        else:
+            self._commit_page_texts([file_record.id], metadata)
+        self._schedule_variants(file_record)
         
         result = {
             'file': file_record.to_response_dict()
@@ -120,6 +205,222 @@ class FileRepository(BaseRepository[FileUpdModel]):
         
         return result
     
+    def create_from_existing_hash(self, file_hash: str, file_name: str, file_type: str, company_id: str = None,
+                                  mime_type: str = None) -> Optional[Dict]:
+        """内容已存在时直接创建文件记录（不传输文件内容），合同文件同时创建合同记录
+
+        返回与上传相同格式的结果；内容不存在时返回 None，由客户端正常上传。
+        """
+        file_hash = (file_hash or '').lower()
+        # 锁住内容记录：正在删除的内容等待删除完成后按不存在处理
+        blob = self.blob_repo.lock_blob(file_hash) if self._is_sha256(file_hash) else None
+        if not blob or not self.blob_repo.blob_exists(file_hash):
+            self.session.rollback()
+            return None
+        
+        filename = secure_filename(file_name)
+        file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+        existing_file = self._get_existing_by_hash(file_hash)
+        cached = None if existing_file else self.cache_repo.get(file_hash)
+        
+        if existing_file:
+            metadata = {
+                'page_count': existing_file.page_count,
+                'has_ocr': existing_file.has_ocr,
+                'ocr_confidence': existing_file.ocr_confidence,
+                'page_source': existing_file.id
+            }
+            text_content = existing_file.text_content
+            extraction_status = 'completed'
+        elif cached is not None:
+            metadata = cached
+            text_content = cached.get('text_content')
+            extraction_status = 'completed'
+        else:
+            # 相同内容还在提取中时，任务完成后会回写所有相同哈希的记录
+            metadata = {}
+            text_content = None
+            extraction_status = 'pending'
+        
+        try:
+            file_record = FileUpdModel(
+                company_id=company_id,
+                original_name=file_name,
+                stored_name=f"{uuid.uuid4().hex}.{file_ext}" if file_ext else str(uuid.uuid4().hex),
+                file_type=file_type,
+                file_size=blob.file_size,
+                file_path=blob.blob_path,
+                mime_type=mime_type or mimetypes.guess_type(file_name)[0],
+                file_hash=file_hash,
+                page_count=metadata.get('page_count'),
+                text_content=text_content,
+                has_ocr=metadata.get('has_ocr', False),
+                ocr_confidence=metadata.get('ocr_confidence', 0.0),
+                extraction_status=extraction_status,
+                upload_time=self.get_beijing_time()
+            )
+            contract = None
+            if file_type == "1" and company_id:
+                contract = ContractModel(file_id=file_record.id, company_id=company_id)
+            
+            # 引用计数、文件记录和合同记录在同一事务中提交
+            self.blob_repo.add_reference(file_hash, blob.blob_path, blob.file_size)
+            self.session.add(file_record)
+            if contract is not None:
+                self.session.add(contract)
+            self.session.flush()
+            self._save_page_texts([file_record.id], metadata)
+            
+            result = {'file': file_record.to_response_dict()}
+            if file_type == "1":
+                result['contract'] = contract.to_response_dict() if contract is not None else None
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        
+        if extraction_status == 'pending' and not self._has_pending_extraction(file_hash, file_record.id):
+            self._schedule_extraction(file_record, filename)
+        self._schedule_variants(file_record)
+        
+        return result
+    
+    @staticmethod
+    def _is_sha256(value: str) -> bool:
+        """是否为 SHA-256 十六进制摘要"""
+        return len(value) == 64 and all(c in '0123456789abcdef' for c in value)
+    
+    def _has_pending_extraction(self, file_hash: str, exclude_id: str) -> bool:
+        """相同内容是否已有等待中的提取任务"""
+        return self.session.query(FileUpdModel.id)\
+            .filter(
+                FileUpdModel.file_hash == file_hash,
+                FileUpdModel.extraction_status == 'pending',
+                FileUpdModel.id != exclude_id
+            )\
+            .first() is not None
+    
+    def _get_existing_by_hash(self, file_hash: str) -> Optional[FileUpdModel]:
+        """获取相同内容且已完成提取的文件记录（只加载提取结果相关的列）"""
+        return self.session.query(FileUpdModel)\
+            .options(load_only(
+                FileUpdModel.id,
+                FileUpdModel.page_count,
+                FileUpdModel.text_content,
+                FileUpdModel.has_ocr,
+                FileUpdModel.ocr_confidence
+            ))\
+            .filter(
+                FileUpdModel.file_hash == file_hash,
+                or_(FileUpdModel.extraction_status.is_(None), FileUpdModel.extraction_status == 'completed')
+            )\
+            .first()
+    
+    def _is_quarantined(self, file_hash: str) -> bool:
+        """相同内容是否已因多次提取失败被隔离"""
+        return bool(file_hash) and self.session.query(FileUpdModel.id)\
+            .filter(FileUpdModel.file_hash == file_hash, FileUpdModel.quarantined.is_(True))\
+            .first() is not None
+    
+    def _schedule_extraction(self, file_record: FileUpdModel, filename: str) -> None:
+        """提交后台文本提取任务（提交失败时退回同步提取；相同内容已被隔离时不再提取）"""
+        if self._is_quarantined(file_record.file_hash):
+            file_record.extraction_status = 'failed'
+            file_record.quarantined = True
+            self.session.commit()
+            return
+        
+        try:
+            get_job_queue().submit(
+                file_record.id,
+                file_record.file_path,
+                filename,
+                file_record.mime_type,
+                file_hash=file_record.file_hash
+            )
+        except Exception as e:
+            print(f"提交后台提取任务失败，改为同步提取: {e}")
+            self.session.rollback()
+            result = self._extract_with_cache(file_record.file_path, filename, file_record.mime_type,
+                                              file_record.file_hash)
+            file_record.page_count = result.get('page_count')
+            file_record.text_content = result.get('text_content')
+            file_record.has_ocr = result.get('has_ocr', False)
+            file_record.ocr_confidence = result.get('ocr_confidence', 0.0)
+            file_record.extraction_status = 'completed'
+            self._save_page_texts([file_record.id], result)
+            self.session.commit()
+    
+    def _schedule_variants(self, file_record: FileUpdModel) -> None:
+        """图纸图片上传后预先生成常用尺寸的缩略图（失败只记录日志，访问时再生成）"""
+        if file_record.file_type != '2' or not (file_record.mime_type or '').startswith('image/'):
+            return
+        try:
+            get_image_variant_service().pregenerate(file_record.file_hash, file_record.file_path)
+        except Exception as e:
+            print(f"提交缩略图预生成失败: {e}")
+    
+    def _save_page_texts(self, file_ids: List[str], metadata: Dict) -> None:
+        """写入逐页文本：有提取结果时按页写入，复用相同内容的提取结果时从来源文件复制（不提交事务）"""
+        if metadata.get('page_texts') is not None:
+            self.page_repo.save_pages(file_ids, metadata['page_texts'])
+        elif metadata.get('page_source'):
+            self.page_repo.copy_pages(metadata['page_source'], file_ids)
+    
+    def _commit_page_texts(self, file_ids: List[str], metadata: Dict) -> None:
+        """文件记录提交后写入逐页文本（失败时只记录日志，可用 scripts/backfill_page_texts.py 补齐）"""
+        try:
+            self._save_page_texts(file_ids, metadata)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            print(f"保存逐页文本失败: {e}")
+    
+    def get_extraction_status(self, file_id: str) -> Optional[Dict]:
+        """获取文件的内容提取状态及后台任务进度"""
+        file = self._metadata_query().filter(FileUpdModel.id == file_id).first()
+        if not file:
+            return None
+        
+        return {
+            'fileId': file.id,
+            'extractionStatus': file.extraction_status or 'completed',
+            'textExtracted': bool(file.has_text),
+            'pageCount': file.page_count,
+            'hasOcr': bool(file.has_ocr),
+            'ocrConfidence': file.ocr_confidence,
+            'extractionFailures': file.extraction_failures or 0,
+            'quarantined': bool(file.quarantined),
+            'job': get_job_queue().get_status(file_id)
+        }
+    
+    def _stream_to_temp_file(self, file, upload_path: str) -> Tuple[str, str, int]:
+        """将上传流分块写入目标目录下的临时文件，同时增量计算SHA-256
+
+        返回 (临时文件路径, 文件哈希, 文件大小)
+        """
+        chunk_size = self.config.get('UPLOAD_CHUNK_SIZE', 1024 * 1024)
+        hasher = hashlib.sha256()
+        file_size = 0
+        
+        fd, temp_path = tempfile.mkstemp(dir=upload_path, prefix='.upload-', suffix='.part')
+        try:
+            file.seek(0)
+            with os.fdopen(fd, 'wb') as temp_file:
+                while True:
+                    chunk = file.stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    temp_file.write(chunk)
+                    file_size += len(chunk)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        
+        return temp_path, hasher.hexdigest(), file_size
+    
     def _create_contract_record(self, file_record,company_id: str) :
         """创建合同记录"""
         try:
@@ -176,88 +477,34 @@ class FileRepository(BaseRepository[FileUpdModel]):
         }
         return type_folders.get(file_type, 'others')
     
-    def _extract_file_metadata(self, file_data: bytes, filename: str, mime_type: str) -> Dict:
-        """提取文件元数据"""
-        metadata = {'page_count': None, 'has_ocr': False, 'ocr_confidence': 0.0}
-        
-        try:
-            # 处理PDF文件
-            if mime_type == 'application/pdf' or filename.lower().endswith('.pdf'):
-                metadata.update(self._extract_pdf_metadata(file_data))
-            # 处理图片文件
-            elif mime_type.startswith('image/'):
-                metadata.update(self._extract_image_metadata(file_data))
-        except Exception as e:
-            # print(f"提取文件元数据失败: {e}")
-            pass
-        
-        return metadata
-    
-    def _extract_pdf_metadata(self, file_data: bytes) -> Dict:
-        """提取PDF文件元数据"""
-        metadata = {'page_count': 0}
-        try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_data))
-            metadata['page_count'] = len(pdf_reader.pages)
-        except Exception as e:
-            # print(f"提取PDF元数据失败: {e}")
-            pass
-        return metadata
-    
-    def _extract_image_metadata(self, file_data: bytes) -> Dict:
-        """提取图片元数据"""
-        metadata = {}
-        try:
-            image = Image.open(io.BytesIO(file_data))
-            metadata['image_width'] = image.width
-            metadata['image_height'] = image.height
-        except Exception as e:
-            # print(f"提取图片元数据失败: {e}")
-            pass
-        return metadata
-    
-    def _extract_text_content(self, file_data: bytes, filename: str, mime_type: str) -> Optional[str]:
-        """提取文件中的文本内容"""
-        try:
-            if mime_type == 'application/pdf' or filename.lower().endswith('.pdf'):
-                return self._extract_pdf_text(file_data)
-            elif mime_type.startswith('image/'):
-                return self._extract_image_text(file_data)
-        except Exception as e:
-            # print(f"提取文本内容失败: {e}")
-            pass
-        return None
+    def _extract_file(self, file_path: str, filename: str, mime_type: str) -> Dict:
+        """在提取沙箱的工作进程中提取文件元数据和文本内容（不在请求进程中解析文件）
+
+        等待超过 UPLOAD_EXTRACTION_TIMEOUT 秒时抛出 TimeoutError，任务由沙箱的时间限制结束。
+        """
+        return get_batch_executor().run(sandbox.extract, file_path, filename, mime_type,
+                                        timeout=self.config.get('UPLOAD_EXTRACTION_TIMEOUT'))
     
-    def _extract_pdf_text(self, file_data: bytes) -> Optional[str]:
-        """从PDF提取文本"""
+    def _extract_with_cache(self, location: str, filename: str, mime_type: str, file_hash: str = None) -> Dict:
+        """优先使用提取结果缓存，未命中时从存储中取出文件提取并写入缓存（不提交事务）"""
+        result = self.cache_repo.get(file_hash)
+        if result is not None:
+            return result
+        
+        local_path, is_temp = fetch_local(location, self.config)
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_data))
-            text_content = []
-            for page_num, page in enumerate(pdf_reader.pages, 1):
-                try:
-                    page_text = page.extract_text()
-                    if page_text.strip():
-                        text_content.append(page_text)
-                except:
-                    continue
-            return "\n\n".join(text_content) if text_content else None
-        except Exception as e:
-            # print(f"提取PDF文本失败: {e}")
-            return None
+            result = self._extract_file(local_path, filename, mime_type)
+        finally:
+            if is_temp:
+                os.remove(local_path)
+        self.cache_repo.put(file_hash, result)
+        return result
     
-    def _extract_image_text(self, file_data: bytes) -> Optional[str]:
-        """从图片提取文本（OCR）"""
-        try:
-            import pytesseract
-            image = Image.open(io.BytesIO(file_data))
-            text = pytesseract.image_to_string(image, lang='chi_sim+eng')
-            return text if text.strip() else None
-        except ImportError:
-            # print("pytesseract未安装，跳过OCR")
-            return None
-        except Exception as e:
-            # print(f"图片OCR失败: {e}")
-            return None
+    def _metadata_query(self):
+        """只加载元数据列的查询（列表类接口使用，不读取文件内容和文本内容）"""
+        return self.session.query(FileUpdModel).options(
+            load_only(*FileUpdModel.metadata_columns(), raiseload=True)
+        )
     
     def get_by_filename(self, filename: str) -> Optional[FileUpdModel]:
         """根据文件名获取文件"""
@@ -269,13 +516,14 @@ class FileRepository(BaseRepository[FileUpdModel]):
     
     def get_recent_files(self, limit: int = 10) -> List[FileUpdModel]:
         """获取最近上传的文件"""
-        return self.session.query(FileUpdModel)\
+        return self._metadata_query()\
             .order_by(desc(FileUpdModel.upload_time))\
             .limit(limit)\
             .all()
     
+    @cached_stats('file_stats', tables=('file_upd',))
     def get_file_stats(self) -> Dict[str, Any]:
-        """获取文件统计信息"""
+        """获取文件统计信息（结果缓存 STATS_CACHE_TTL 秒，文件表有写入时失效）"""
         stats = {}
         
         # 总文件数
@@ -304,7 +552,7 @@ class FileRepository(BaseRepository[FileUpdModel]):
     
     def search_files(self, keyword: str, file_type: str = None) -> List[FileUpdModel]:
         """搜索文件"""
-        query = self.session.query(FileUpdModel)
+        query = self._metadata_query()
         
         # 在多个字段中搜索
         if keyword:
@@ -326,109 +574,566 @@ class FileRepository(BaseRepository[FileUpdModel]):
         return query.all()
     
     def delete_file_with_physical(self, file_id: str) -> bool:
-        """删除文件（包含物理文件）"""
+        """删除文件（包含物理文件，共享内容只在最后一个引用删除时删除）"""
         try:
             file = self.get_by_id(file_id)
             if not file:
                 return False
             
             # 如果是合同文件，同时删除合同记录
-            if file.file_type == '合同':
+            if file.file_type in ('1', '合同'):
                 contract = self.session.query(ContractModel).filter_by(
-                    file_path=file.file_path
+                    file_id=file.id
                 ).first()
                 if contract:
                     self.session.delete(contract)
             
-            # 删除物理文件
-            if os.path.exists(file.file_path):
-                try:
-                    os.remove(file.file_path)
-                except OSError as e:
-                    # print(f"删除物理文件失败: {e}")
-                    pass
+            # 释放内容引用，得到提交后需要删除的物理文件
+            release_hash, release_path = self._release_physical_file(file)
             
             # 删除数据库记录
-            return self.delete(file_id)
+            self.page_repo.delete_for_files([file.id])
+            self.session.delete(file)
+            self.session.commit()
+            
+            # 删除物理文件
+            if release_path:
+                if release_hash:
+                    self.blob_repo.remove_unreferenced_file(release_hash, release_path)
+                else:
+                    delete_location(release_path, self.config)
+            
+            return True
             
         except Exception as e:
+            self.session.rollback()
             # print(f"删除文件失败: {e}")
             return False
     
+    def _release_physical_file(self, file: FileUpdModel) -> Tuple[Optional[str], Optional[str]]:
+        """释放文件记录对物理文件的引用（不提交事务）
+
+        返回 (内容哈希, 需删除的路径)；内容寻址存储的文件返回哈希，旧路径文件哈希为 None。
+        """
+        if self.blob_repo.is_blob_path(file.file_path):
+            return file.file_hash, self.blob_repo.release_reference(file.file_hash)
+        
+        # 旧存储方式：没有其他记录引用同一路径时才删除
+        other_refs = self.session.query(func.count(FileUpdModel.id))\
+            .filter(FileUpdModel.file_path == file.file_path, FileUpdModel.id != file.id)\
+            .scalar()
+        return None, (file.file_path if not other_refs else None)
+    
+    def migrate_to_blob_store(self, batch_size: int = 100) -> Dict[str, int]:
+        """将旧存储路径（contracts/designs/others）的文件迁移到内容寻址存储，重复内容只保留一份"""
+        stats = {'migrated': 0, 'deduplicated': 0, 'missing': 0, 'removed_files': 0}
+        last_id = ''
+        
+        while True:
+            files = self._metadata_query()\
+                .filter(FileUpdModel.id > last_id)\
+                .order_by(FileUpdModel.id)\
+                .limit(batch_size)\
+                .all()
+            if not files:
+                break
+            last_id = files[-1].id
+            
+            legacy_paths = set()
+            for file in files:
+                if self.blob_repo.is_blob_path(file.file_path):
+                    continue
+                local_path = local_path_for(file.file_path, self.config)
+                if not local_path:
+                    stats['missing'] += 1
+                    continue
+                
+                file_hash = file.file_hash or self._hash_file(local_path)
+                blob_path = self.blob_repo.get_blob_path(file_hash)
+                self.blob_repo.lock_blob(file_hash)
+                if self.blob_repo.blob_exists(file_hash):
+                    stats['deduplicated'] += 1
+                else:
+                    self.blob_repo.storage.store_copy(local_path, blob_key(file_hash))
+                
+                self.blob_repo.add_reference(file_hash, blob_path, file.file_size)
+                legacy_paths.add(file.file_path)
+                file.file_hash = file_hash
+                file.file_path = blob_path
+                stats['migrated'] += 1
+            
+            self.session.commit()
+            
+            stats['removed_files'] += self._remove_unused_legacy_paths(legacy_paths)
+        
+        return stats
+    
+    def _remove_unused_legacy_paths(self, legacy_paths) -> int:
+        """旧路径不再被任何记录引用时删除，返回删除的数量"""
+        removed = 0
+        for legacy_path in legacy_paths:
+            still_used = self.session.query(FileUpdModel.id)\
+                .filter(FileUpdModel.file_path == legacy_path)\
+                .first()
+            if not still_used and delete_location(legacy_path, self.config):
+                removed += 1
+        return removed
+    
+    def move_content_to_storage(self, batch_size: int = 100) -> Dict[str, int]:
+        """将数据库中保存的文件内容移到存储后端，之后清空 file_content（只保留元数据）
+
+        内容分块写入临时文件并计算哈希，存储后端已有相同内容时只增加引用计数；
+        文件原来的位置不在内容寻址存储中时改为指向存储后端中的内容。
+        """
+        stats = {'moved': 0, 'deduplicated': 0, 'cleared': 0, 'removed_files': 0}
+        temp_dir = self.config.get('UPLOAD_FOLDER', 'uploads')
+        os.makedirs(temp_dir, exist_ok=True)
+        last_id = ''
+        
+        while True:
+            files = self._metadata_query()\
+                .filter(FileUpdModel.id > last_id, FileUpdModel.has_content.is_(True))\
+                .order_by(FileUpdModel.id)\
+                .limit(batch_size)\
+                .all()
+            if not files:
+                break
+            last_id = files[-1].id
+            
+            legacy_paths = set()
+            for file in files:
+                if not self.blob_repo.is_blob_path(file.file_path) or not location_exists(file.file_path, self.config):
+                    temp_path, file_hash = self._content_to_temp_file(file, temp_dir)
+                    self.blob_repo.lock_blob(file_hash)
+                    if self.blob_repo.blob_exists(file_hash):
+                        os.remove(temp_path)
+                        stats['deduplicated'] += 1
+                    else:
+                        self.blob_repo.storage.store(temp_path, blob_key(file_hash))
+                        stats['moved'] += 1
+                    
+                    if not self.blob_repo.is_blob_path(file.file_path):
+                        # 旧路径改为内容寻址存储中的内容
+                        self.blob_repo.add_reference(file_hash, file_size=file.content_size)
+                        if file.file_path:
+                            legacy_paths.add(file.file_path)
+                    file.file_hash = file_hash
+                    file.file_path = self.blob_repo.get_blob_path(file_hash)
+                
+                # has_content / content_size 由写入前的事件同步
+                file.file_content = None
+                stats['cleared'] += 1
+            
+            self.session.commit()
+            stats['removed_files'] += self._remove_unused_legacy_paths(legacy_paths)
+        
+        return stats
+    
+    def backfill_page_texts(self, batch_size: int = 100) -> Dict[str, int]:
+        """为已完成提取但没有逐页文本的文件补齐 file_page_text（按批处理，每批提交一次，中断后可重新运行）
+
+        相同内容已有逐页文本时直接复制；否则重新提取一次，结果写入该批中所有相同内容的记录。
+        """
+        stats = {'copied': 0, 'extracted': 0, 'failed': 0}
+        has_pages = exists().where(FilePageTextModel.file_id == FileUpdModel.id)
+        last_id = ''
+        
+        while True:
+            files = self._metadata_query()\
+                .filter(
+                    FileUpdModel.id > last_id,
+                    or_(FileUpdModel.extraction_status.is_(None), FileUpdModel.extraction_status == 'completed'),
+                    ~has_pages
+                )\
+                .order_by(FileUpdModel.id)\
+                .limit(batch_size)\
+                .all()
+            if not files:
+                break
+            last_id = files[-1].id
+            
+            groups = {}
+            for file in files:
+                groups.setdefault(file.file_hash or file.id, []).append(file)
+            
+            for group in groups.values():
+                file_ids = [file.id for file in group]
+                source = None
+                if group[0].file_hash:
+                    source = self.session.query(FilePageTextModel.file_id)\
+                        .join(FileUpdModel, FileUpdModel.id == FilePageTextModel.file_id)\
+                        .filter(FileUpdModel.file_hash == group[0].file_hash)\
+                        .first()
+                if source:
+                    self.page_repo.copy_pages(source[0], file_ids)
+                    stats['copied'] += len(file_ids)
+                    continue
+                
+                try:
+                    result = self._extract_with_cache(group[0].file_path, group[0].original_name,
+                                                      group[0].mime_type, group[0].file_hash)
+                except Exception as e:
+                    print(f"补齐逐页文本失败 file_id={group[0].id}: {e}")
+                    stats['failed'] += len(file_ids)
+                    continue
+                self.page_repo.save_pages(file_ids, result.get('page_texts') or [])
+                stats['extracted'] += len(file_ids)
+            
+            self.session.commit()
+        
+        return stats
+    
+    def _content_to_temp_file(self, file: FileUpdModel, temp_dir: str) -> Tuple[str, str]:
+        """将数据库中的文件内容分块写入临时文件，返回 (临时文件路径, 文件哈希)"""
+        hasher = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir, prefix='.content-', suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in self.iter_file_content(file.id, file.content_size):
+                    hasher.update(chunk)
+                    temp_file.write(chunk)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        return temp_path, hasher.hexdigest()
+    
+    def _hash_file(self, file_path: str) -> str:
+        """分块计算文件SHA-256"""
+        chunk_size = self.config.get('UPLOAD_CHUNK_SIZE', 1024 * 1024)
+        hasher = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+    
     def batch_delete_files(self, file_ids: List[str]) -> Dict[str, List]:
-        """批量删除文件"""
+        """批量删除文件：记录、关联合同和内容引用在同一事务中分批删除，提交后在线程池中删除物理文件"""
         results = {'deleted': [], 'failed': []}
+        file_ids = list(dict.fromkeys(file_ids))
+        
+        try:
+            files = []
+            for chunk in chunked(file_ids):
+                files.extend(self._metadata_query().filter(FileUpdModel.id.in_(chunk)).all())
+            
+            # 合同文件同时删除合同记录
+            contract_file_ids = [file.id for file in files if file.file_type in ('1', '合同')]
+            contract_ids = []
+            for chunk in chunked(contract_file_ids):
+                contract_ids.extend(row[0] for row in self.session.query(ContractModel.id).filter(
+                    ContractModel.file_id.in_(chunk)
+                ))
+            ContractRepository(self.db, self.config).bulk_delete(contract_ids, commit=False)
+            
+            # 释放内容引用，得到提交后需要删除的物理文件
+            blob_files = [file for file in files if self.blob_repo.is_blob_path(file.file_path)]
+            released_blobs = self.blob_repo.release_references(
+                Counter(file.file_hash for file in blob_files)
+            )
+            legacy_paths = self._unreferenced_legacy_paths(
+                [file for file in files if not self.blob_repo.is_blob_path(file.file_path)]
+            )
+            
+            deleted = self.bulk_delete([file.id for file in files], commit=False)['deleted']
+            self.page_repo.delete_for_files(deleted)
+            self.session.commit()
+            
+        except Exception as e:
+            self.session.rollback()
+            results['failed'] = [{'file_id': file_id, 'error': str(e)} for file_id in file_ids]
+            return results
         
-        for file_id in file_ids:
+        # 删除物理文件：内容寻址存储的文件在锁住内容记录时删除（确认没有被新上传引用），旧路径文件在后台删除
+        if released_blobs:
             try:
-                if self.delete_file_with_physical(file_id):
-                    results['deleted'].append(file_id)
-                else:
-                    results['failed'].append({
-                        'file_id': file_id,
-                        'error': '文件不存在'
-                    })
+                self.blob_repo.remove_unreferenced_files(released_blobs)
             except Exception as e:
-                results['failed'].append({
-                    'file_id': file_id,
-                    'error': str(e)
-                })
+                print(f"删除未引用的内容失败: {e}")
+        remove_files_in_background(
+            legacy_paths,
+            remove=lambda location: delete_location(location, self.config)
+        )
         
+        deleted_ids = set(deleted)
+        results['deleted'] = [file_id for file_id in file_ids if file_id in deleted_ids]
+        results['failed'] = [
+            {'file_id': file_id, 'error': '文件不存在'}
+            for file_id in file_ids if file_id not in deleted_ids
+        ]
         return results
+    
+    def _unreferenced_legacy_paths(self, files: List[FileUpdModel]) -> List[str]:
+        """旧存储方式的文件：删除这些记录后不再被其他记录引用的路径"""
+        deleting_ids = {file.id for file in files}
+        paths = list({file.file_path for file in files if file.file_path})
+        
+        referenced = set()
+        for chunk in chunked(paths):
+            rows = self.session.query(FileUpdModel.file_path, FileUpdModel.id)\
+                .filter(FileUpdModel.file_path.in_(chunk))
+            referenced.update(path for path, file_id in rows if file_id not in deleting_ids)
+        return [path for path in paths if path not in referenced]
 
     def batch_upload_files(self, files, file_type: str, company_id: str = None, 
                           contract_data_list: List[Dict] = None) -> Dict[str, List]:
-        """批量上传文件"""
+        """批量上传文件
+
+        逐个流式写入临时文件并计算哈希，新内容的元数据在有界进程池中并行提取，
+        所有文件记录和合同记录在同一事务中批量插入，返回每个文件的成功/失败结果。
+        """
         results = {'success': [], 'failed': []}
         
-        contract_data_list = contract_data_list or []
-        
-        for i, file in enumerate(files):
+        # 验证并写入临时文件（请求体只能顺序读取）
+        staged = []
+        for file in files:
             try:
-                # 验证文件
                 is_valid, message = self.validate_upload(file, file_type)
                 if not is_valid:
-                    results['failed'].append({
-                        'filename': file.filename,
-                        'error': message
-                    })
+                    results['failed'].append({'filename': file.filename, 'error': message})
                     continue
+                staged.append(self._stage_upload(file, file_type))
+            except Exception as e:
+                results['failed'].append({'filename': file.filename, 'error': str(e)})
+        
+        if not staged:
+            return results
+        
+        placed = []
+        try:
+            extraction = self._extract_batch_metadata(staged)
+            
+            # 数据库中保存文件内容时从临时文件读取（同一内容只保存一份）
+            store_content = self.config.get('STORE_FILE_CONTENT_IN_DB', False)
+            contents = {}
+            if store_content:
+                for item in staged:
+                    if item['file_hash'] not in contents:
+                        contents[item['file_hash']] = None
+                        if not self.blob_repo.blob_exists(item['file_hash']):
+                            with open(item['temp_path'], 'rb') as f:
+                                contents[item['file_hash']] = f.read()
+            
+            # 放入内容寻址存储，引用计数按哈希合并更新（先按哈希顺序锁住已有的内容记录）
+            self.blob_repo.lock_blobs(item['file_hash'] for item in staged)
+            for item in staged:
+                item['file_path'], item['is_new_blob'] = self.blob_repo.place_file(
+                    item['temp_path'], item['file_hash']
+                )
+                if item['is_new_blob']:
+                    placed.append(item['file_path'])
+            self.blob_repo.add_references(
+                Counter(item['file_hash'] for item in staged),
+                {item['file_hash']: item['file_size'] for item in staged}
+            )
+            
+            records = []
+            for item in staged:
+                metadata, text_content, extraction_status = extraction[item['file_hash']]
+                file_data = contents.get(item['file_hash']) if item['is_new_blob'] else None
                 
-                # 获取对应的合同数据
-                contract_data = contract_data_list[i] if i < len(contract_data_list) else None
-
-                # print(f" 合同数据: {contract_data}")
-                
-                # 保存文件
-                file_info = self.save_uploaded_file(
-                    file=file, 
-                    file_type=file_type,
+                file_record = FileUpdModel(
                     company_id=company_id,
-                    contract_data=contract_data
+                    original_name=item['original_name'],
+                    stored_name=item['stored_name'],
+                    file_type=file_type,
+                    file_size=item['file_size'],
+                    file_path=item['file_path'],
+                    mime_type=item['mime_type'],
+                    file_content=file_data,
+                    file_hash=item['file_hash'],
+                    page_count=metadata.get('page_count'),
+                    text_content=text_content,
+                    has_ocr=metadata.get('has_ocr', False),
+                    ocr_confidence=metadata.get('ocr_confidence', 0.0),
+                    extraction_status=extraction_status,
+                    upload_time=self.get_beijing_time()
                 )
-                results['success'].append(file_info)
                 
-            except Exception as e:
-                results['failed'].append({
-                    'filename': file.filename,
-                    'error': str(e)
-                })
+                # 合同文件同时创建合同记录（缺少客户ID时不创建）
+                contract = None
+                if file_type == "1" and company_id:
+                    contract = ContractModel(file_id=file_record.id, company_id=company_id)
+                records.append((item, file_record, contract))
+            
+            self.session.add_all([record for _, record, _ in records])
+            self.session.add_all([contract for _, _, contract in records if contract is not None])
+            self.session.flush()
+            
+            # 已完成提取的内容写入逐页文本（相同内容的记录一次写入）
+            completed = {}
+            for item, file_record, _ in records:
+                if file_record.extraction_status == 'completed':
+                    completed.setdefault(item['file_hash'], []).append(file_record.id)
+            for file_hash, file_ids in completed.items():
+                self._save_page_texts(file_ids, extraction[file_hash][0])
+            
+            # 提交前生成返回数据，避免提交后逐条重新加载
+            for item, file_record, contract in records:
+                file_info = {'file': file_record.to_response_dict()}
+                if file_type == "1":
+                    file_info['contract'] = contract.to_response_dict() if contract is not None else None
+                results['success'].append(file_info)
+            
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            for item in staged:
+                if os.path.exists(item['temp_path']):
+                    os.remove(item['temp_path'])
+            for file_path in placed:
+                delete_location(file_path, self.config)
+            results['success'] = []
+            results['failed'].extend(
+                {'filename': item['filename'], 'error': str(e)} for item in staged
+            )
+            return results
+        
+        # 相同内容只提交一个后台任务（任务完成后回写所有相同哈希的记录）
+        scheduled = set()
+        for item, file_record, _ in records:
+            if file_record.extraction_status == 'pending' and item['file_hash'] not in scheduled:
+                scheduled.add(item['file_hash'])
+                self._schedule_extraction(file_record, item['filename'])
+        
+        variant_hashes = set()
+        for item, file_record, _ in records:
+            if item['file_hash'] not in variant_hashes:
+                variant_hashes.add(item['file_hash'])
+                self._schedule_variants(file_record)
         
         return results
     
+    def _stage_upload(self, file, file_type: str) -> Dict:
+        """将上传文件写入存储目录下的临时文件，返回批量处理需要的信息"""
+        filename = secure_filename(file.filename)
+        file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+        
+        upload_path = os.path.join(self.config.get('UPLOAD_FOLDER', 'uploads'), self._get_type_folder(file_type))
+        os.makedirs(upload_path, exist_ok=True)
+        
+        temp_path, file_hash, file_size = self._stream_to_temp_file(file, upload_path)
+        return {
+            'filename': file.filename,
+            'original_name': filename,
+            'stored_name': f"{uuid.uuid4().hex}.{file_ext}" if file_ext else str(uuid.uuid4().hex),
+            'mime_type': file.content_type,
+            'temp_path': temp_path,
+            'file_hash': file_hash,
+            'file_size': file_size
+        }
+    
+    def _extract_batch_metadata(self, staged: List[Dict]) -> Dict[str, Tuple[Dict, Optional[str], str]]:
+        """批量提取内容：已有相同内容或提取结果缓存命中的直接复用，其余按哈希去重后在进程池中并行提取
+
+        返回 {哈希: (元数据, 文本内容, 提取状态)}。异步提取模式下进程池只提取元数据，
+        文本由提交后的后台任务提取；进程池执行失败的同样交给后台任务。同步提取时图片分批交给识别进程池。
+        """
+        hashes = list({item['file_hash'] for item in staged})
+        extraction = {}
+        for chunk in chunked(hashes):
+            for existing in self.session.query(FileUpdModel)\
+                    .options(load_only(
+                        FileUpdModel.file_hash,
+                        FileUpdModel.page_count,
+                        FileUpdModel.text_content,
+                        FileUpdModel.has_ocr,
+                        FileUpdModel.ocr_confidence
+                    ))\
+                    .filter(
+                        FileUpdModel.file_hash.in_(chunk),
+                        or_(FileUpdModel.extraction_status.is_(None), FileUpdModel.extraction_status == 'completed')
+                    ):
+                extraction.setdefault(existing.file_hash, ({
+                    'page_count': existing.page_count,
+                    'has_ocr': existing.has_ocr,
+                    'ocr_confidence': existing.ocr_confidence,
+                    'page_source': existing.id
+                }, existing.text_content, 'completed'))
+        
+        # 提取结果缓存中已有的内容不再提取
+        for file_hash, cached in self.cache_repo.get_many(
+                [file_hash for file_hash in hashes if file_hash not in extraction]).items():
+            extraction[file_hash] = (cached, cached.get('text_content'), 'completed')
+        
+        tasks = {}
+        for item in staged:
+            if item['file_hash'] not in extraction and item['file_hash'] not in tasks:
+                tasks[item['file_hash']] = (item['temp_path'], item['filename'], item['mime_type'])
+        
+        extract_async = self.config.get('EXTRACTION_ASYNC', True)
+        executor = get_batch_executor()
+        if extract_async:
+            results = executor.map(extractors.extract_file_metadata, tasks)
+        else:
+            # 图片在进程池中只提取元数据，文字由常驻识别进程分批识别；两批任务共用一个等待期限
+            image_tasks = {
+                file_hash: task for file_hash, task in tasks.items() if extractors.is_image(task[1], task[2])
+            }
+            started = time.monotonic()
+            results = executor.map(extractors.extract_file_metadata, image_tasks)
+            results.update(executor.map(extractors.extract_file, {
+                file_hash: task for file_hash, task in tasks.items() if file_hash not in image_tasks
+            }, timeout=executor.timeout and max(executor.timeout - (time.monotonic() - started), 0.001)))
+            image_hashes = [file_hash for file_hash in image_tasks if not results[file_hash][1]]
+            ocr_results = get_ocr_pool().recognize([image_tasks[file_hash][0] for file_hash in image_hashes])
+            for file_hash, ocr in zip(image_hashes, ocr_results):
+                extractors.apply_ocr_result(results[file_hash][0], ocr)
+        
+        for file_hash, (result, error) in results.items():
+            if error or extract_async:
+                extraction[file_hash] = (result or {}, None, 'pending')
+            else:
+                extraction[file_hash] = (result, result.get('text_content'), 'completed')
+                self.cache_repo.put(file_hash, result)
+        return extraction
+    
     def get_file_content(self, file_id: str) -> Optional[bytes]:
-        """获取文件内容"""
+        """获取文件内容（优先读取存储后端中的文件，不存在时读取数据库中的内容）"""
         try:
-            file = self.get_by_id(file_id)
-            if file and file.file_content:
-                return file.file_content
+            file = self.get_file_metadata(file_id)
+            if not file:
+                return None
+            
+            if location_exists(file.file_path, self.config):
+                backend, key = resolve_location(file.file_path, self.config)
+                with backend.open(key) as f:
+                    return f.read()
+            
+            if file.has_content:
+                return b''.join(self.iter_file_content(file.id, file.content_size))
         except Exception as e:
             # print(f"获取文件内容失败: {e}")
             pass
         return None
     
-    def get_paginated_files(self, page=1, page_size=10, file_type=None, keyword=None, company_id=None):
-        """获取分页文件列表"""
+    def get_file_metadata(self, file_id: str) -> Optional[FileUpdModel]:
+        """获取文件元数据（不加载文件内容和文本内容）"""
+        return self._metadata_query().filter(FileUpdModel.id == file_id).first()
+    
+    def iter_file_content(self, file_id: str, content_size: int = None, chunk_size: int = None) -> Iterator[bytes]:
+        """分块读取数据库中保存的文件内容，每次只查询一个 substr 窗口，不把整个文件读入内存"""
+        chunk_size = chunk_size or self.config.get('CONTENT_STREAM_CHUNK_SIZE', 1024 * 1024)
+        if content_size is None:
+            content_size = self.session.query(func.length(FileUpdModel.file_content))\
+                .filter(FileUpdModel.id == file_id)\
+                .scalar() or 0
+        
+        offset = 0
+        while offset < content_size:
+            chunk = self.session.query(func.substr(FileUpdModel.file_content, offset + 1, chunk_size))\
+                .filter(FileUpdModel.id == file_id)\
+                .scalar()
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield bytes(chunk)
+    
+    def get_paginated_files(self, page=1, page_size=10, file_type=None, keyword=None, company_id=None, cursor=None):
+        """
+        获取分页文件列表（按上传时间倒序）
+        keyword 走全文检索，过滤、计数和分页都在数据库完成；
+        传入 cursor 时使用游标分页 (upload_time, id)，深分页不需要 OFFSET 扫描
+        """
         try:
             
             # 确保 self.session 存在
@@ -442,54 +1147,56 @@ class FileRepository(BaseRepository[FileUpdModel]):
                 else:
                     raise AttributeError("无法获取数据库 session")
             
-            query = self.session.query(FileUpdModel)
+            query = self._filtered_query(
+                file_type,
+                company_id if company_id and company_id != "all" else None
+            )
             
-            # 应用类型过滤
-            if file_type:
-                query = query.filter(FileUpdModel.file_type == file_type)
-
-            # 应用公司ID过滤
-            if company_id and company_id != "all":
-                query = query.filter(FileUpdModel.company_id == company_id)
-            
-            # 应用关键字搜索
-            if keyword:
-                query = query.filter(
-                    (FileUpdModel.original_name.ilike(f'%{keyword}%')) 
-                )
+            # 应用关键字搜索（文件名和文本内容）
+            if keyword and keyword.strip():
+                query = FullTextSearch(self.session, FileUpdModel).match(query, keyword)
             
             # 计算总数
-            total = query.count()
-            
-            # 计算分页
+            total = query.order_by(None).count()
             total_pages = (total + page_size - 1) // page_size
-            offset = (page - 1) * page_size
             
-            # 获取当前页数据
-            query = query.order_by(FileUpdModel.upload_time.desc())
-            files = query.offset(offset).limit(page_size).all()
+            # 获取当前页数据（ID 作为同一时间的次序，保证顺序稳定）
+            query = query.order_by(FileUpdModel.upload_time.desc(), FileUpdModel.id.desc())
+            if cursor:
+                upload_time, last_id = decode_cursor(cursor)
+                query = query.filter(
+                    tuple_(FileUpdModel.upload_time, FileUpdModel.id) < tuple_(upload_time, last_id)
+                )
+            else:
+                query = query.offset((page - 1) * page_size)
+            files = query.limit(page_size).all()
+            
+            next_cursor = None
+            if len(files) == page_size:
+                next_cursor = encode_cursor(files[-1].upload_time, files[-1].id)
 
             return {
                 'items': files,
                 'total': total,
                 'page': page,
                 'pageSize': page_size,
-                'totalPages': total_pages
+                'totalPages': total_pages,
+                'nextCursor': next_cursor
             }
             
         except Exception as e:
-            self.logger.error(f"获取分页文件列表错误: {str(e)}")
+            print(f"获取分页文件列表错误: {str(e)}")
             raise
     
     def get_contract_by_file_id(self, file_id: str) -> Optional[Dict]:
         """根据文件ID获取关联的合同信息"""
         try:
             file = self.get_by_id(file_id)
-            if not file or file.file_type != '合同':
+            if not file or file.file_type not in ('1', '合同'):
                 return None
             
             contract = self.session.query(ContractModel).filter_by(
-                file_path=file.file_path
+                file_id=file.id
             ).first()
             
             if contract:
@@ -503,7 +1210,7 @@ class FileRepository(BaseRepository[FileUpdModel]):
     def get_by_company_id(self, company_id: str, file_type: str = None) -> List[FileUpdModel]:
         """根据客户ID获取文件列表"""
         try:
-            query = self.session.query(FileUpdModel).filter_by(company_id=company_id)
+            query = self._metadata_query().filter_by(company_id=company_id)
             
             if file_type:
                 query = query.filter_by(file_type=file_type)
@@ -515,34 +1222,61 @@ class FileRepository(BaseRepository[FileUpdModel]):
             return []
     
     def search_files(self, keyword: str, file_type: str = None, company_id: str = None) -> List[FileUpdModel]:
-        """搜索文件"""
+        """搜索文件（文件名和文本内容全文检索，按相关度排序）"""
         try:
-            query = self.session.query(FileUpdModel)
+            if not keyword or not keyword.strip():
+                return self._filtered_query(file_type, company_id).order_by(desc(FileUpdModel.upload_time)).all()
             
-            # 应用公司ID过滤
-            if company_id:
-                query = query.filter(FileUpdModel.company_id == company_id)
-            
-            # 应用类型过滤
-            if file_type:
-                query = query.filter(FileUpdModel.file_type == file_type)
-            
-            # 关键字搜索
-            if keyword and keyword.strip():
-                search_conditions = []
-                search_fields = ['original_name', 'text_content']
-                
-                for field in search_fields:
-                    if hasattr(FileUpdModel, field):
-                        field_attr = getattr(FileUpdModel, field)
-                        search_conditions.append(field_attr.ilike(f'%{keyword}%'))
-                
-                if search_conditions:
-                    query = query.filter(or_(*search_conditions))
-            
-            return query.order_by(desc(FileUpdModel.upload_time)).all()
+            result = self.search_files_ranked(keyword, file_type, company_id, with_snippets=False)
+            return [item['file'] for item in result['items']]
             
         except Exception as e:
             if hasattr(self, 'logger') and self.logger:
                 self.logger.error(f'搜索文件失败 keyword={keyword}: {e}')
-            return []
\ No newline at end of file
+            return []
+    
+    def search_files_ranked(self, keyword: str, file_type: str = None, company_id: str = None,
+                            limit: int = None, offset: int = 0, with_snippets: bool = True) -> Dict[str, Any]:
+        """全文检索文件，返回相关度、文本摘要以及命中的页码和页面摘要"""
+        searcher = FullTextSearch(self.session, FileUpdModel)
+        rows, total = searcher.search(
+            self._filtered_query(file_type, company_id), keyword,
+            limit=limit, offset=offset,
+            order_by=(desc(FileUpdModel.upload_time), desc(FileUpdModel.id))
+        )
+        
+        snippets = {}
+        page_hits = {}
+        if with_snippets:
+            file_ids = [file.id for file, _ in rows]
+            snippets = searcher.get_snippets(file_ids, keyword, ['text_content'])
+            # 命中的页码和页面摘要（每个文件只返回前几页）
+            page_hits = self.page_repo.search_pages(
+                file_ids, keyword, per_file=self.config.get('SEARCH_PAGE_HITS', 5)
+            )
+        
+        items = []
+        for file, rank in rows:
+            hits = page_hits.get(file.id, {'pages': [], 'total': 0})
+            items.append({
+                'file': file,
+                'rank': rank,
+                'snippet': snippets.get(file.id, ''),
+                'pages': hits['pages'],
+                'page_hits': hits['total']
+            })
+        return {'items': items, 'total': total}
+    
+    def _filtered_query(self, file_type: str = None, company_id: str = None):
+        """按公司和类型过滤的元数据查询"""
+        query = self._metadata_query()
+        
+        # 应用公司ID过滤
+        if company_id:
+            query = query.filter(FileUpdModel.company_id == company_id)
+        
+        # 应用类型过滤
+        if file_type:
+            query = query.filter(FileUpdModel.file_type == file_type)
+        
+        return query
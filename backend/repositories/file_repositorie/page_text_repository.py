@@ -0,0 +1,98 @@
+# repositories/file_repositorie/page_text_repository.py
+from typing import Dict, List, Sequence
+from sqlalchemy import delete, func, insert, literal, select
+
+from models.file_page_text_model import FilePageTextModel
+from ..base_repository import BaseRepository, chunked
+from services.search_service.full_text_search import snippet_window
+from utils.search_tokenizer import make_snippet, query_terms
+from utils.time_utils import beijing_time
+
+class FilePageTextRepository(BaseRepository[FilePageTextModel]):
+    """文件逐页文本仓储类 - 提取结果按页分批写入，检索时返回命中的页码和摘要"""
+    
+    # 每条 INSERT 语句写入的页数（大文件分批写入，不一次构造所有行）
+    INSERT_BATCH_SIZE = 200
+    
+    def __init__(self, db, config=None):
+        super().__init__(FilePageTextModel, db)
+        self.config = config or {}
+    
+    def save_pages(self, file_ids: Sequence[str], page_texts: Sequence[str]) -> int:
+        """写入文件的逐页文本（替换已有内容，空白页不保存；不提交事务），返回每个文件写入的页数
+
+        相同内容的多条文件记录共用一次提取结果，按文件ID分别写入。
+        """
+        file_ids = [file_id for file_id in dict.fromkeys(file_ids) if file_id]
+        pages = [(page_no, text) for page_no, text in enumerate(page_texts or [], 1) if text and text.strip()]
+        self.delete_for_files(file_ids)
+        
+        now = beijing_time()
+        for file_id in file_ids:
+            for batch in chunked(pages, self.INSERT_BATCH_SIZE):
+                self.session.execute(insert(FilePageTextModel), [
+                    {'file_id': file_id, 'page_no': page_no, 'text': text, 'created_at': now, 'updated_at': now}
+                    for page_no, text in batch
+                ])
+        return len(pages)
+    
+    def copy_pages(self, source_file_id: str, file_ids: Sequence[str]) -> None:
+        """复用相同内容文件的逐页文本（在数据库中 INSERT ... SELECT，不经过应用进程；不提交事务）"""
+        file_ids = [file_id for file_id in dict.fromkeys(file_ids) if file_id and file_id != source_file_id]
+        self.delete_for_files(file_ids)
+        
+        now = beijing_time()
+        columns = ['file_id', 'page_no', 'text', 'created_at', 'updated_at']
+        for file_id in file_ids:
+            self.session.execute(insert(FilePageTextModel).from_select(columns, select(
+                literal(file_id),
+                FilePageTextModel.page_no,
+                FilePageTextModel.text,
+                literal(now),
+                literal(now)
+            ).where(FilePageTextModel.file_id == source_file_id)))
+    
+    def delete_for_files(self, file_ids: Sequence[str]) -> None:
+        """删除文件的逐页文本（不提交事务）"""
+        for chunk in chunked(list(file_ids)):
+            self.session.execute(delete(FilePageTextModel).where(FilePageTextModel.file_id.in_(chunk)))
+    
+    def search_pages(self, file_ids: List[str], keyword: str, per_file: int = 5,
+                     width: int = 100) -> Dict[str, Dict]:
+        """查找文件中包含所有关键词的页面
+
+        返回 {文件ID: {'pages': [{'page': 页码, 'snippet': 摘要}], 'total': 命中页数}}，
+        每个文件只返回前 per_file 页；数据库只返回关键字附近的一段文本。
+        """
+        terms = query_terms(keyword or '')
+        if not file_ids or not terms:
+            return {}
+        
+        is_postgresql = self.session.get_bind().dialect.name == 'postgresql'
+        needle = keyword.strip().lower()
+        text = FilePageTextModel.text
+        
+        results = {}
+        for chunk in chunked(list(file_ids)):
+            hits = select(
+                FilePageTextModel.file_id,
+                FilePageTextModel.page_no,
+                snippet_window(text, needle, is_postgresql).label('window'),
+                func.row_number().over(
+                    partition_by=FilePageTextModel.file_id, order_by=FilePageTextModel.page_no
+                ).label('position'),
+                func.count().over(partition_by=FilePageTextModel.file_id).label('total')
+            ).where(
+                FilePageTextModel.file_id.in_(chunk),
+                *[func.lower(text).contains(term, autoescape=True) for term in terms]
+            ).subquery()
+            
+            rows = self.session.execute(
+                select(hits.c.file_id, hits.c.page_no, hits.c.window, hits.c.total)
+                .where(hits.c.position <= per_file)
+                .order_by(hits.c.file_id, hits.c.page_no)
+            )
+            for file_id, page_no, window, total in rows:
+                entry = results.setdefault(file_id, {'pages': [], 'total': total})
+                entry['pages'].append({'page': page_no, 'snippet': make_snippet(window, keyword, width)})
+        return results
@@ -0,0 +1,339 @@
+# repositories/file_repositorie/upload_session_repository.py
+import os
+import hashlib
+import mimetypes
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+from werkzeug.utils import secure_filename
+
+from models.upload_session_model import UploadSessionModel
+from ..base_repository import BaseRepository
+from .file_repository import FileRepository
+from utils.file_utils import allowed_file, format_file_size
+from utils.time_utils import beijing_time
+
+# 进程内保存的增量哈希状态 {会话ID: (已哈希字节数, hasher)}；
+# 请求落到其他进程或服务重启后状态缺失，完成上传时从分块文件重新计算
+_HASH_STATE_LIMIT = 256
+_hash_states = OrderedDict()
+_hash_lock = threading.Lock()
+
+
+class UploadSessionError(ValueError):
+    """上传会话错误（status_code 为返回给客户端的 HTTP 状态码）"""
+    
+    def __init__(self, message: str, status_code: int = 400, session: UploadSessionModel = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.session = session
+
+
+class UploadSessionRepository(BaseRepository[UploadSessionModel]):
+    """断点续传上传会话仓储类
+
+    协议：创建会话 -> 按序号 PUT 分块 -> 查询已接收的偏移量（中断后从 nextChunk 继续）-> 完成上传。
+    分块按序写入 UPLOAD_FOLDER/.sessions/<会话ID>.part，同时增量计算SHA-256；
+    完成上传时交给 FileRepository.save_staged_file，与单文件上传共用元数据提取和合同创建逻辑。
+    """
+    
+    SESSION_FOLDER = '.sessions'
+    
+    def __init__(self, db, config=None):
+        super().__init__(UploadSessionModel, db)
+        self.config = config or {}
+        self.file_repo = FileRepository(db, self.config)
+    
+    def get_session_folder(self) -> str:
+        """分块文件目录"""
+        return os.path.join(self.config.get('UPLOAD_FOLDER', 'uploads'), self.SESSION_FOLDER)
+    
+    def get_part_path(self, session_id: str) -> str:
+        """会话的分块文件路径"""
+        return os.path.join(self.get_session_folder(), f'{session_id}.part')
+    
+    def create_session(self, file_name: str, file_size: int, file_type: str, company_id: str = None,
+                       mime_type: str = None, chunk_size: int = None) -> UploadSessionModel:
+        """创建上传会话"""
+        if not file_name:
+            raise UploadSessionError('文件名不能为空')
+        if not company_id:
+            raise UploadSessionError('缺少客户ID参数')
+        
+        if not allowed_file(file_name, file_type, self.config):
+            allowed_exts = self.config.get('ALLOWED_EXTENSIONS', {}).get(file_type, [])
+            raise UploadSessionError(f'不支持的文件格式。{file_type}类型支持: {", ".join(allowed_exts)}')
+        
+        max_size = self.config.get('RESUMABLE_UPLOAD_MAX_SIZE', 2 * 1024 * 1024 * 1024)
+        if not file_size or file_size <= 0:
+            raise UploadSessionError('文件大小无效')
+        if file_size > max_size:
+            raise UploadSessionError(f'文件大小不能超过 {format_file_size(max_size)}')
+        
+        # 分块大小不能超过单个请求的大小限制
+        max_chunk = min(self.config.get('UPLOAD_SESSION_MAX_CHUNK_SIZE', 32 * 1024 * 1024),
+                        self.config.get('MAX_CONTENT_LENGTH') or 100 * 1024 * 1024)
+        min_chunk = self.config.get('UPLOAD_SESSION_MIN_CHUNK_SIZE', 256 * 1024)
+        chunk_size = chunk_size or self.config.get('UPLOAD_SESSION_CHUNK_SIZE', 8 * 1024 * 1024)
+        chunk_size = max(min(chunk_size, max_chunk), min(min_chunk, max_chunk))
+        
+        session = UploadSessionModel(
+            company_id=company_id,
+            file_type=file_type,
+            original_name=file_name,
+            mime_type=mime_type or mimetypes.guess_type(file_name)[0],
+            total_size=file_size,
+            chunk_size=chunk_size,
+            received_size=0,
+            next_chunk=0,
+            status='uploading'
+        )
+        self.session.add(session)
+        self.session.commit()
+        
+        os.makedirs(self.get_session_folder(), exist_ok=True)
+        open(self.get_part_path(session.id), 'wb').close()
+        return session
+    
+    def get_session(self, session_id: str) -> Optional[UploadSessionModel]:
+        """获取上传会话（重新读取数据库中的最新状态）"""
+        return self.session.get(UploadSessionModel, session_id, populate_existing=True)
+    
+    def write_chunk(self, session_id: str, index: int, stream, content_length: int = None,
+                    checksum: str = None) -> UploadSessionModel:
+        """写入一个分块
+
+        分块必须按序上传：已接收的分块重复上传时直接返回当前状态（幂等），跳过分块时返回 409。
+        数据先写入分块文件的对应偏移量，长度和校验和都正确后才更新已接收的偏移量，
+        中途断开的分块重新上传时覆盖写入。
+        """
+        session = self._get_active_session(session_id)
+        
+        if index < 0 or index >= session.total_chunks:
+            raise UploadSessionError(f'分块序号超出范围（共 {session.total_chunks} 块）', 400, session)
+        if index < session.next_chunk:
+            return session
+        if index > session.next_chunk:
+            raise UploadSessionError(f'请先上传第 {session.next_chunk} 块', 409, session)
+        
+        expected_size = session.expected_chunk_size(index)
+        if content_length is not None and content_length != expected_size:
+            raise UploadSessionError(f'分块大小应为 {expected_size} 字节', 400, session)
+        
+        offset = session.received_size
+        hasher = self._get_hash_state(session_id, offset)
+        chunk_hasher = hashlib.sha256() if checksum else None
+        written = self._write_part(session_id, offset, stream, expected_size, hasher, chunk_hasher)
+        
+        if written != expected_size:
+            raise UploadSessionError(f'分块大小应为 {expected_size} 字节，实际收到 {written} 字节', 400, session)
+        if chunk_hasher and chunk_hasher.hexdigest() != checksum.lower():
+            raise UploadSessionError('分块校验失败，请重新上传', 400, session)
+        
+        # 条件更新：并发上传同一分块时只有一个请求推进偏移量
+        table = UploadSessionModel.__table__
+        advanced = self.session.execute(
+            table.update()
+            .where(table.c.id == session_id, table.c.next_chunk == index, table.c.status == 'uploading')
+            .values(next_chunk=index + 1, received_size=offset + written)
+        ).rowcount
+        self.session.commit()
+        
+        if advanced and hasher is not None:
+            self._set_hash_state(session_id, offset + written, hasher)
+        return self.get_session(session_id)
+    
+    def complete_session(self, session_id: str, checksum: str = None) -> Tuple[UploadSessionModel, Dict]:
+        """完成上传：校验完整性并保存文件，返回 (会话, 与单文件上传相同的结果)
+
+        已完成的会话重复调用时返回已生成的文件。
+        """
+        session = self.get_session(session_id)
+        if not session:
+            raise UploadSessionError('上传会话不存在', 404)
+        if session.status == 'completed':
+            return session, self._completed_result(session)
+        
+        # 条件更新抢占会话，避免重复生成文件
+        table = UploadSessionModel.__table__
+        claimed = self.session.execute(
+            table.update()
+            .where(table.c.id == session_id, table.c.status == 'uploading',
+                   table.c.received_size == table.c.total_size)
+            .values(status='finalizing')
+        ).rowcount
+        self.session.commit()
+        
+        if not claimed:
+            session = self.get_session(session_id)
+            if session.status == 'completed':
+                return session, self._completed_result(session)
+            if session.status == 'uploading':
+                raise UploadSessionError(
+                    f'文件尚未上传完整（已接收 {session.received_size}/{session.total_size} 字节）', 409, session
+                )
+            raise UploadSessionError('上传会话正在处理或已失效', 409, session)
+        
+        session = self.get_session(session_id)
+        part_path = self.get_part_path(session_id)
+        try:
+            file_hash = self._finish_hash(session_id, part_path, session.total_size)
+            if checksum and checksum.lower() != file_hash:
+                self._fail_session(session, part_path)
+                raise UploadSessionError('文件校验失败，请重新上传', 400, session)
+            
+            result = self.file_repo.save_staged_file(
+                part_path, file_hash, session.total_size, secure_filename(session.original_name),
+                session.file_type, original_name=session.original_name, mime_type=session.mime_type,
+                company_id=session.company_id
+            )
+        except UploadSessionError:
+            raise
+        except Exception:
+            self.session.rollback()
+            # 分块文件仍在时允许重试完成上传
+            session = self.get_session(session_id)
+            if os.path.exists(part_path):
+                session.status = 'uploading'
+                self.session.commit()
+            else:
+                self._fail_session(session, part_path)
+            raise
+        
+        session = self.get_session(session_id)
+        session.status = 'completed'
+        session.file_id = result['file']['id']
+        self.session.commit()
+        return session, result
+    
+    def abort_session(self, session_id: str) -> bool:
+        """取消上传：删除会话和分块文件"""
+        session = self.get_session(session_id)
+        if not session:
+            return False
+        if session.status == 'finalizing':
+            raise UploadSessionError('上传会话正在处理，无法取消', 409, session)
+        
+        self.session.delete(session)
+        self.session.commit()
+        self._remove_part(session_id)
+        return True
+    
+    def cleanup_stale_sessions(self, ttl: int = None) -> Dict[str, int]:
+        """清理超过 ttl 秒未更新的会话：删除未完成会话的分块文件和会话记录，以及没有会话记录的分块文件"""
+        ttl = ttl or self.config.get('UPLOAD_SESSION_TTL', 24 * 3600)
+        stale_before = beijing_time() - timedelta(seconds=ttl)
+        stats = {'expired': 0, 'completed': 0, 'orphan_parts': 0}
+        
+        stale = self.session.query(UploadSessionModel)\
+            .filter(UploadSessionModel.updated_at < stale_before)\
+            .all()
+        for session in stale:
+            if session.status == 'completed':
+                stats['completed'] += 1
+            else:
+                stats['expired'] += 1
+            self.session.delete(session)
+            self._remove_part(session.id)
+        self.session.commit()
+        
+        # 会话记录已删除但分块文件残留（如进程在删除文件前退出）
+        folder = self.get_session_folder()
+        if os.path.isdir(folder):
+            cutoff = stale_before.timestamp()
+            for name in os.listdir(folder):
+                path = os.path.join(folder, name)
+                session_id = name.split('.', 1)[0]
+                try:
+                    if os.path.getmtime(path) < cutoff and not self.session.get(UploadSessionModel, session_id):
+                        os.remove(path)
+                        stats['orphan_parts'] += 1
+                except OSError:
+                    pass
+        return stats
+    
+    def _get_active_session(self, session_id: str) -> UploadSessionModel:
+        """获取可以继续上传的会话"""
+        session = self.get_session(session_id)
+        if not session:
+            raise UploadSessionError('上传会话不存在或已过期', 404)
+        if session.status != 'uploading':
+            raise UploadSessionError(f'上传会话状态为 {session.status}，不能继续上传', 409, session)
+        return session
+    
+    def _write_part(self, session_id: str, offset: int, stream, expected_size: int,
+                    hasher=None, chunk_hasher=None) -> int:
+        """从请求流分块读取，写入分块文件的 offset 位置，返回写入的字节数（超过 expected_size 时停止读取）"""
+        read_size = self.config.get('UPLOAD_CHUNK_SIZE', 1024 * 1024)
+        written = 0
+        with open(self.get_part_path(session_id), 'r+b') as part:
+            part.seek(offset)
+            while written <= expected_size:
+                data = stream.read(min(read_size, expected_size + 1 - written))
+                if not data:
+                    break
+                written += len(data)
+                if written > expected_size:
+                    break
+                part.write(data)
+                if hasher is not None:
+                    hasher.update(data)
+                if chunk_hasher is not None:
+                    chunk_hasher.update(data)
+            if written == expected_size:
+                # 丢弃之前中断的上传留下的多余数据
+                part.truncate(offset + written)
+        return written
+    
+    def _get_hash_state(self, session_id: str, offset: int):
+        """获取偏移量一致的增量哈希状态副本；没有时返回 None（完成上传时重新计算）"""
+        with _hash_lock:
+            state = _hash_states.get(session_id)
+            if offset == 0:
+                return hashlib.sha256()
+            if state and state[0] == offset:
+                return state[1].copy()
+        return None
+    
+    def _set_hash_state(self, session_id: str, offset: int, hasher) -> None:
+        with _hash_lock:
+            _hash_states[session_id] = (offset, hasher)
+            _hash_states.move_to_end(session_id)
+            while len(_hash_states) > _HASH_STATE_LIMIT:
+                _hash_states.popitem(last=False)
+    
+    def _finish_hash(self, session_id: str, part_path: str, total_size: int) -> str:
+        """文件哈希：优先使用增量哈希状态，缺失时重新读取分块文件"""
+        with _hash_lock:
+            state = _hash_states.pop(session_id, None)
+        
+        with open(part_path, 'r+b') as part:
+            part.truncate(total_size)
+        if state and state[0] == total_size:
+            return state[1].hexdigest()
+        return self.file_repo._hash_file(part_path)
+    
+    def _completed_result(self, session: UploadSessionModel) -> Dict:
+        """已完成会话的上传结果"""
+        file_record = self.file_repo.get_file_metadata(session.file_id) if session.file_id else None
+        if not file_record:
+            raise UploadSessionError('上传生成的文件已删除', 410, session)
+        
+        result = {'file': file_record.to_response_dict()}
+        if session.file_type == "1":
+            result['contract'] = self.file_repo.get_contract_by_file_id(file_record.id)
+        return result
+    
+    def _fail_session(self, session: UploadSessionModel, part_path: str) -> None:
+        session.status = 'failed'
+        self.session.commit()
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    
+    def _remove_part(self, session_id: str) -> None:
+        with _hash_lock:
+            _hash_states.pop(session_id, None)
+        part_path = self.get_part_path(session_id)
+        if os.path.exists(part_path):
+            os.remove(part_path)
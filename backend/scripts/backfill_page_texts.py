@@ -0,0 +1,26 @@
+# scripts/backfill_page_texts.py
+"""为已有文件补齐逐页文本（file_page_text），之后搜索结果可以返回命中的页码
+
+运行：python scripts/backfill_page_texts.py [每批条数]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def main():
+    from app import app
+    from repositories.file_repositorie.file_repository import FileRepository
+    
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    
+    with app.app_context():
+        file_repo = FileRepository(app.db, app.config)
+        stats = file_repo.backfill_page_texts(batch_size=batch_size)
+    
+    print(f"补齐完成: 复制 {stats['copied']} 条, 重新提取 {stats['extracted']} 条, 失败 {stats['failed']} 条")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+# scripts/cleanup_upload_sessions.py
+"""清理超时未完成的断点续传会话和残留的分块文件（可由 cron 定时执行）
+
+运行：python scripts/cleanup_upload_sessions.py [超时秒数]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def main():
+    from app import app
+    from repositories.file_repositorie.upload_session_repository import UploadSessionRepository
+    
+    ttl = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    
+    with app.app_context():
+        stats = UploadSessionRepository(app.db, app.config).cleanup_stale_sessions(ttl)
+    
+    print(f"清理完成: 超时会话 {stats['expired']} 个, 已完成会话 {stats['completed']} 个, "
+          f"残留分块文件 {stats['orphan_parts']} 个")
+
+
+if __name__ == '__main__':
+    main()
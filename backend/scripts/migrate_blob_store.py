@@ -0,0 +1,27 @@
+# scripts/migrate_blob_store.py
+"""将已上传文件迁移到内容寻址存储（UPLOAD_FOLDER/sha256/ab/cd/<hash>），重复内容只保留一份
+
+运行：python scripts/migrate_blob_store.py [每批条数]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def main():
+    from app import app
+    from repositories.file_repositorie.file_repository import FileRepository
+    
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    
+    with app.app_context():
+        file_repo = FileRepository(app.db, app.config)
+        stats = file_repo.migrate_to_blob_store(batch_size=batch_size)
+    
+    print(f"迁移完成: 迁移 {stats['migrated']} 条, 重复内容 {stats['deduplicated']} 条, "
+          f"文件缺失 {stats['missing']} 条, 删除旧文件 {stats['removed_files']} 个")
+
+
+if __name__ == '__main__':
+    main()
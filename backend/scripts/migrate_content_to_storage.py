@@ -0,0 +1,27 @@
+# scripts/migrate_content_to_storage.py
+"""将数据库中保存的文件内容（file_upd.file_content）移到存储后端（STORAGE_BACKEND），之后清空该列
+
+运行：python scripts/migrate_content_to_storage.py [每批条数]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def main():
+    from app import app
+    from repositories.file_repositorie.file_repository import FileRepository
+    
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    
+    with app.app_context():
+        file_repo = FileRepository(app.db, app.config)
+        stats = file_repo.move_content_to_storage(batch_size=batch_size)
+    
+    print(f"迁移完成: 写入存储 {stats['moved']} 条, 存储中已有 {stats['deduplicated']} 条, "
+          f"清空数据库内容 {stats['cleared']} 条, 删除旧文件 {stats['removed_files']} 个")
+
+
+if __name__ == '__main__':
+    main()
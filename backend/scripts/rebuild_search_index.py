@@ -0,0 +1,27 @@
+# scripts/rebuild_search_index.py
+"""重新计算文件和合同的全文检索向量（升级后为旧数据回填 search_vector）
+
+运行：python scripts/rebuild_search_index.py [每批条数]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def main():
+    from app import app
+    from models.contract_model import ContractModel
+    from models.file_upd_model import FileUpdModel
+    from services.search_service import FullTextSearch
+    
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    
+    with app.app_context():
+        for model in (FileUpdModel, ContractModel):
+            count = FullTextSearch(app.db.session, model).rebuild(batch_size=batch_size)
+            print(f"{model.__tablename__}: 已重建 {count} 条检索向量")
+
+
+if __name__ == '__main__':
+    main()
@@ -56,26 +56,7 @@ class CompanyService:
     
     def batch_delete_companies(self, company_ids: List[str]) -> Dict:
         """批量删除客户"""
-        results = {
-            'success': [],
-            'failed': []
-        }
-        
-        for company_id in company_ids:
-            try:
-                success = self.company_repo.delete(company_id)
-                if success:
-                    results['success'].append(company_id)
-                else:
-                    results['failed'].append({
-                        'id': company_id,
-                        'error': '客户不存在'
-                    })
-            except Exception as e:
-                results['failed'].append({
-                    'id': company_id,
-                    'error': str(e)
-                })
+        results = self.company_repo.batch_delete_companies(company_ids)
         
         return {
             'success': len(results['success']) > 0,
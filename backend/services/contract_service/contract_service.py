@@ -4,10 +4,12 @@ from datetime import datetime, date
 from decimal import Decimal
 import mimetypes
 import os
+from urllib.parse import quote
 
 from repositories.contract_repository.contract_repository import ContractRepository
 from repositories.file_repositorie.file_repository import FileRepository
 from models.file_upd_model import FileUpdModel
+from services.storage_service import location_exists
 
 class ContractService:
     """合同服务"""
@@ -222,6 +224,12 @@ class ContractService:
         contract = self.contract_repo.get_by_id(contract_id)
         return contract.to_response_dict() if contract else None
     
+    def get_contract_file(self, contract: Dict) -> Optional[FileUpdModel]:
+        """获取合同对应的上传文件记录"""
+        if not self.file_repo or not contract.get('fileId'):
+            return None
+        return self.file_repo.get_by_id(contract['fileId'])
+    
     def get_company_contracts(self, company_id: str) -> List[Dict]:
         """获取公司合同列表"""
         contracts = self.contract_repo.get_by_company_id(company_id)
@@ -237,6 +245,18 @@ class ContractService:
         contracts = self.contract_repo.search_contracts(keyword, company_id)
         return [contract.to_response_dict() for contract in contracts]
     
+    def search_contracts_ranked(self, keyword: str, company_id: str = None, limit: int = None,
+                                offset: int = 0) -> Dict[str, Any]:
+        """全文检索合同（带相关度和摘要）"""
+        result = self.contract_repo.search_contracts_ranked(keyword, company_id, limit=limit, offset=offset)
+        results = []
+        for item in result['items']:
+            contract_dict = item['contract'].to_response_dict()
+            contract_dict['rank'] = round(item['rank'], 6)
+            contract_dict['snippet'] = item['snippet']
+            results.append(contract_dict)
+        return {'results': results, 'total': result['total']}
+    
     def delete_contract(self, contract_id: str) -> Dict:
         """删除合同"""
         try:
@@ -368,8 +388,9 @@ class ContractService:
         return None
     
     # 新增：获取文件预览信息
-    def get_file_preview(self, file_id: str, company_id: str) -> Dict[str, Any]:
-        """获取文件预览信息"""
+    def get_file_preview(self, file_id: str, company_id: str, page: int = None,
+                         keyword: str = None) -> Dict[str, Any]:
+        """获取文件预览信息（page 指定打开的页码；传入 keyword 时返回命中的页面，默认打开第一个命中页）"""
         try:
             # 1. 从repository层获取文件信息
             if not self.file_repo:
@@ -399,7 +420,7 @@ class ContractService:
                 }
             
             # 3. 检查物理文件是否存在
-            if not os.path.exists(file_record.file_path):
+            if not location_exists(file_record.file_path, self.config):
                 return {
                     'success': False,
                     'message': f'物理文件不存在: {file_record.file_path}',
@@ -415,7 +436,19 @@ class ContractService:
                     'data': None
                 }
             
-            # 5. 构建返回数据
+            # 5. 确定打开的页码（超出范围时取最近的有效页）
+            page_count = file_record.page_count or 0
+            matched_pages = []
+            if keyword:
+                hits = self.file_repo.page_repo.search_pages(
+                    [file_record.id], keyword, per_file=self.config.get('SEARCH_PAGE_HITS', 5)
+                )
+                matched_pages = hits.get(file_record.id, {}).get('pages', [])
+            if page is None:
+                page = matched_pages[0]['page'] if matched_pages else 1
+            page = max(1, min(page, page_count)) if page_count else 1
+            
+            # 6. 构建返回数据
             file_info = {
                 'success': True,
                 'message': '获取文件信息成功',
@@ -427,8 +460,14 @@ class ContractService:
                     'mimeType': file_record.mime_type or 'application/pdf',
                     'companyId': file_record.company_id,
                     'isPdf': is_pdf,
-                    'pageCount': file_record.page_count or 0,
-                    'uploadTime': file_record.upload_time.isoformat() if file_record.upload_time else None
+                    'pageCount': page_count,
+                    'uploadTime': file_record.upload_time.isoformat() if file_record.upload_time else None,
+                    'page': page,
+                    'matchedPages': matched_pages,
+                    # PDF 阅读器按 #page=N 打开指定页
+                    'contentUrl': f'/api/files/{file_record.id}/content?companyId={quote(file_record.company_id)}#page={page}',
+                    # 只包含打开页的小 PDF，首屏不必下载整个文件
+                    'pageUrl': f'/api/files/{file_record.id}/pages/{page}?companyId={quote(file_record.company_id)}'
                 }
             }
             
@@ -474,7 +513,7 @@ class ContractService:
                 }
             
             # 3. 检查物理文件是否存在
-            if not os.path.exists(file_record.file_path):
+            if not location_exists(file_record.file_path, self.config):
                 return {
                     'success': False,
                     'message': f'物理文件不存在: {file_record.file_path}',
@@ -492,7 +531,8 @@ class ContractService:
                     'file_path': file_record.file_path,
                     'file_name': file_record.original_name,
                     'mime_type': mime_type,
-                    'file_size': file_record.file_size
+                    'file_size': file_record.file_size,
+                    'file_hash': file_record.file_hash
                 }
             }
             
@@ -636,7 +676,7 @@ class ContractService:
             if file_record.company_id != company_id:
                 return False, file_record, '无权访问此文件'
             
-            if not os.path.exists(file_record.file_path):
+            if not location_exists(file_record.file_path, self.config):
                 return False, file_record, '物理文件不存在'
             
             return True, file_record, '验证通过'
@@ -0,0 +1,4 @@
+# services/extraction_service/__init__.py
+from . import extractors
+
+__all__ = ['extractors']
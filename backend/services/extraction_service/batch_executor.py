@@ -0,0 +1,138 @@
+# services/extraction_service/batch_executor.py
+"""批量上传使用的有界进程池 - 并行执行元数据/文本提取，结果按任务键返回"""
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from flask import current_app
+
+from . import sandbox
+
+_executor_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    """默认进程数：CPU 核数，最多 4 个"""
+    return min(4, os.cpu_count() or 1)
+
+
+class BatchExecutor:
+    """有界进程池：同一批任务并行执行，单个任务失败不影响其他任务
+
+    initializer 在每个工作进程启动时执行（设置资源限制），任务通过 sandbox.run_task 执行；
+    单个任务也在工作进程中执行，不在请求进程中解析文件。timeout 是请求等待一批任务的秒数，
+    超时只放弃本批未完成的任务，进程池由所有请求共用，不因超时重建。
+    """
+
+    def __init__(self, max_workers: int = None, initializer: Callable = None, initargs: Tuple = (),
+                 timeout: float = None):
+        self.max_workers = max(1, max_workers if max_workers is not None else default_workers())
+        self.initializer = initializer
+        self.initargs = initargs
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """延迟创建进程池"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=self.initializer,
+                    initargs=self.initargs
+                )
+            return self._executor
+
+    def _reset(self) -> None:
+        """工作进程异常退出后丢弃进程池，下次使用时重建"""
+        with self._lock:
+            self._executor = None
+
+    def map(self, func: Callable, tasks: Dict[Hashable, Tuple],
+            timeout: float = None) -> Dict[Hashable, Tuple[Any, Optional[str]]]:
+        """并行执行 {任务键: 参数元组}，返回 {任务键: (结果, 错误信息)}
+
+        整批等待超过 timeout（默认 self.timeout）秒后不再等待：未开始的任务取消，已开始的任务
+        由沙箱的时间限制结束，均返回错误；不终止其他请求正在使用的进程池。
+        """
+        if not tasks:
+            return {}
+
+        try:
+            executor = self._get_executor()
+            futures = {key: executor.submit(sandbox.run_task, func, *args) for key, args in tasks.items()}
+        except BrokenProcessPool:
+            self._reset()
+            executor = self._get_executor()
+            futures = {key: executor.submit(sandbox.run_task, func, *args) for key, args in tasks.items()}
+
+        timeout = timeout if timeout is not None else self.timeout
+        deadline = time.monotonic() + timeout if timeout else None
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = (future.result(
+                    timeout=max(deadline - time.monotonic(), 0) if deadline else None
+                ), None)
+            except TimeoutError:
+                future.cancel()
+                results[key] = (None, f'提取超过 {timeout} 秒，改为后台提取')
+            except BrokenProcessPool as e:
+                self._reset()
+                results[key] = (None, f'提取进程异常退出: {e}')
+            except Exception as e:
+                results[key] = (None, str(e))
+        return results
+
+    def run(self, func: Callable, *args, timeout: float = None):
+        """在工作进程中执行单个任务并返回结果，任务抛出的异常原样抛出
+
+        等待超过 timeout 秒时抛出 TimeoutError；未开始的任务取消，已开始的任务由沙箱的时间限制结束，
+        不终止其他请求正在使用的进程池。
+        """
+        try:
+            future = self._get_executor().submit(sandbox.run_task, func, *args)
+        except BrokenProcessPool:
+            self._reset()
+            future = self._get_executor().submit(sandbox.run_task, func, *args)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+        except BrokenProcessPool:
+            self._reset()
+            raise
+
+    def shutdown(self, wait: bool = False):
+        """关闭进程池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=not wait)
+                self._executor = None
+
+
+def get_batch_executor(app=None) -> BatchExecutor:
+    """获取应用的批量上传进程池（进程数由 UPLOAD_BATCH_WORKERS 配置，工作进程使用提取沙箱的限制）"""
+    app = app or current_app._get_current_object()
+    executor = app.extensions.get('upload_batch_executor')
+    if executor is not None:
+        return executor
+
+    with _executor_lock:
+        executor = app.extensions.get('upload_batch_executor')
+        if executor is None:
+            executor = BatchExecutor(
+                app.config.get('UPLOAD_BATCH_WORKERS'),
+                initializer=sandbox.init_worker,
+                initargs=(sandbox.limits_from_config(app.config),),
+                timeout=app.config.get('UPLOAD_EXTRACTION_TIMEOUT')
+            )
+            app.extensions['upload_batch_executor'] = executor
+            atexit.register(executor.shutdown)
+    return executor
@@ -0,0 +1,165 @@
+# services/extraction_service/extractors.py
+"""文件内容提取函数 - 模块级函数，可在后台进程池中执行"""
+import re
+from typing import Dict, Optional
+from PIL import Image
+
+from . import ocr_engine
+from .pdf_analyzer import analyze_pdf, count_pages
+from .sandbox import ExtractionTimeout
+
+# 提取器版本：提取逻辑变化（结果会不同）时加 1，提取结果缓存中旧版本的结果随之失效
+EXTRACTOR_VERSION = 2
+
+_CJK_PATTERN = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+_LATIN_PATTERN = re.compile(r'[A-Za-z]')
+
+
+def is_pdf(filename: str, mime_type: str) -> bool:
+    """判断是否为PDF文件"""
+    return mime_type == 'application/pdf' or (filename or '').lower().endswith('.pdf')
+
+
+def is_image(filename: str, mime_type: str) -> bool:
+    """判断是否为图片文件"""
+    return bool(mime_type) and mime_type.startswith('image/')
+
+
+def extract_file(file_path: str, filename: str, mime_type: str) -> Dict:
+    """提取文件的元数据和文本内容（后台任务入口，PDF 只解析一次）"""
+    if is_pdf(filename, mime_type):
+        return extract_pdf(file_path)
+    
+    result = extract_file_metadata(file_path, filename, mime_type)
+    if is_image(filename, mime_type):
+        return apply_ocr_result(result, ocr_engine.recognize_file(file_path))
+    
+    result['text_content'] = extract_text_content(file_path, filename, mime_type)
+    result['language'] = detect_language(result['text_content'])
+    return result
+
+
+def apply_ocr_result(result: Dict, ocr: Dict) -> Dict:
+    """将图片的识别结果（文本、置信度）合并到元数据中"""
+    text = ocr.get('text')
+    result['text_content'] = text
+    result['has_ocr'] = bool(text)
+    result['ocr_confidence'] = ocr.get('confidence', 0.0) if text else 0.0
+    # 图片的识别文本作为第 1 页
+    if text:
+        result['page_texts'] = [text]
+    result['language'] = detect_language(text)
+    return result
+
+
+def detect_language(text: Optional[str]) -> Optional[str]:
+    """根据中文字符和英文字母的比例判断文本语言：zh / en / mixed，没有文字时返回 None"""
+    if not text:
+        return None
+    cjk = len(_CJK_PATTERN.findall(text))
+    latin = len(_LATIN_PATTERN.findall(text))
+    if not cjk and not latin:
+        return None
+    # 英文单词平均约 5 个字母，按单词数与中文字数比较
+    words = latin / 5
+    if cjk >= words * 4:
+        return 'zh'
+    if words >= cjk * 4:
+        return 'en'
+    return 'mixed'
+
+
+def extract_file_metadata(file_path: str, filename: str, mime_type: str) -> Dict:
+    """提取文件元数据"""
+    metadata = {'page_count': None, 'has_ocr': False, 'ocr_confidence': 0.0}
+    
+    try:
+        # 处理PDF文件
+        if is_pdf(filename, mime_type):
+            metadata.update(extract_pdf_metadata(file_path))
+        # 处理图片文件
+        elif is_image(filename, mime_type):
+            metadata.update(extract_image_metadata(file_path))
+    except Exception as e:
+        # print(f"提取文件元数据失败: {e}")
+        pass
+    
+    return metadata
+
+
+def extract_pdf(file_path: str) -> Dict:
+    """一次解析同时提取PDF的元数据、逐页文本和扫描件判断"""
+    result = {'page_count': 0, 'has_ocr': False, 'ocr_confidence': 0.0, 'text_content': None}
+    try:
+        analysis = analyze_pdf(file_path)
+        page_width, page_height = analysis['page_size'] or (None, None)
+        result.update(
+            page_count=analysis['page_count'],
+            page_width=page_width,
+            page_height=page_height,
+            text_content=analysis['text_content'],
+            language=detect_language(analysis['text_content']),
+            pdf_info=analysis['info'],
+            pdf_kind=analysis['pdf_kind'],
+            page_texts=analysis['pages'],
+            scanned_pages=analysis['scanned_pages'],
+            timed_out_pages=analysis['timed_out_pages']
+        )
+    except (MemoryError, ExtractionTimeout):
+        # 内存超限、整个文档超时交给任务队列记录失败，不能当作没有内容的PDF
+        raise
+    except Exception as e:
+        # print(f"分析PDF失败: {e}")
+        pass
+    return result
+
+
+def extract_pdf_metadata(file_path: str) -> Dict:
+    """提取PDF文件元数据（只读取页数，不解析页面和文档信息；文档信息由完整提取得到）"""
+    metadata = {'page_count': 0}
+    try:
+        metadata['page_count'] = count_pages(file_path)
+    except Exception as e:
+        # print(f"提取PDF元数据失败: {e}")
+        pass
+    return metadata
+
+
+def extract_image_metadata(file_path: str) -> Dict:
+    """提取图片元数据"""
+    metadata = {}
+    try:
+        with Image.open(file_path) as image:
+            metadata['image_width'] = image.width
+            metadata['image_height'] = image.height
+    except Exception as e:
+        # print(f"提取图片元数据失败: {e}")
+        pass
+    return metadata
+
+
+def extract_text_content(file_path: str, filename: str, mime_type: str) -> Optional[str]:
+    """提取文件中的文本内容"""
+    try:
+        if is_pdf(filename, mime_type):
+            return extract_pdf_text(file_path)
+        elif is_image(filename, mime_type):
+            return extract_image_text(file_path)
+    except Exception as e:
+        # print(f"提取文本内容失败: {e}")
+        pass
+    return None
+
+
+def extract_pdf_text(file_path: str) -> Optional[str]:
+    """从PDF提取文本"""
+    try:
+        return analyze_pdf(file_path)['text_content']
+    except Exception as e:
+        # print(f"提取PDF文本失败: {e}")
+        return None
+
+
+def extract_image_text(file_path: str) -> Optional[str]:
+    """从图片提取文本（OCR，预处理后使用进程内常驻的识别引擎）"""
+    return ocr_engine.recognize_file(file_path).get('text')
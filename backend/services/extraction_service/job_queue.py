@@ -0,0 +1,464 @@
+# services/extraction_service/job_queue.py
+"""文本提取/OCR 后台任务队列"""
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from functools import partial
+from typing import Dict, Optional
+
+from flask import current_app
+from sqlalchemy.orm import load_only
+
+from models import get_db
+from models.file_upd_model import FileUpdModel
+from models.file_job_model import FileJobModel
+from services.storage_service import fetch_local
+from utils.time_utils import beijing_time
+from . import sandbox
+
+_queue_lock = threading.Lock()
+
+
+class ExtractionJobQueue:
+    """后台任务队列 - 在进程池中执行文本提取/OCR，完成后回写文件记录
+
+    内存中记录每个文件的任务状态；开启 EXTRACTION_JOB_TABLE 时同时写入 file_job 表（提交时为等待中，
+    工作进程开始执行时改为处理中并累计执行次数），应用启动时超时未完成的任务重新入队。
+
+    工作进程在提取沙箱中运行（内存、CPU 时间、单页和整个文档限时）；看门狗线程终止执行超过
+    EXTRACTION_HARD_TIMEOUT 的进程并重建进程池，同时被中断的其他任务重新提交。失败的任务在
+    EXTRACTION_RETRY_DELAY 秒后重试（每次失败延迟加倍），连续失败 EXTRACTION_QUARANTINE_AFTER 次的文件被隔离，不再自动提取。工作进程异常退出（无法确定
+    由哪个任务导致）时进程池中的任务都重新提交，不计入失败次数；同一任务经历的异常退出达到隔离阈值时才记为失败。
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        self.max_workers = app.config.get('EXTRACTION_WORKERS', 2)
+        self.use_job_table = app.config.get('EXTRACTION_JOB_TABLE', True)
+        self.job_timeout = app.config.get('EXTRACTION_JOB_TIMEOUT', 30 * 60)
+        self.hard_timeout = app.config.get('EXTRACTION_HARD_TIMEOUT')
+        self.watchdog_interval = app.config.get('EXTRACTION_WATCHDOG_INTERVAL', 5)
+        self.quarantine_after = app.config.get('EXTRACTION_QUARANTINE_AFTER', 3)
+        self.retry_delay = app.config.get('EXTRACTION_RETRY_DELAY', 60)
+        self._executor = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._jobs = {}  # file_id -> 任务状态
+        self._sequence = 0
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """延迟创建进程池（避免在开发服务器重载进程中提前创建）"""
+        with self._lock:
+            if self._executor is None:
+                # 工作进程启动时设置资源限制并加载一次识别引擎，之后的图片识别复用
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=sandbox.init_worker,
+                    initargs=(sandbox.limits_from_config(self.app.config),)
+                )
+            if self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._watch, name='extraction-watchdog', daemon=True)
+                self._watchdog.start()
+            return self._executor
+    
+    def _watch(self):
+        """看门狗：记录任务开始执行；任务开始执行后超过 hard_timeout 秒仍未完成时终止工作进程
+
+        卡在 C 代码中的提取不响应超时信号，只能终止进程；进程池随之不可用，
+        进程池中的其他任务会失败，由 _on_done 重新提交（不计入失败次数）。
+        """
+        while not self._stopped.wait(self.watchdog_interval):
+            self.check_stuck_jobs()
+    
+    def check_stuck_jobs(self) -> int:
+        """检查并终止超时任务所在的进程池，返回超时的任务数"""
+        now = time.monotonic()
+        with self._lock:
+            running = [job for job in self._jobs.values() if not job['future'].done()]
+            started = []
+            for job in running:
+                if job['started_at'] is None and job['future'].running():
+                    job['started_at'] = now
+                    started.append(job)
+        
+        if self.use_job_table:
+            self._start_job_records(started)
+        if not self.hard_timeout:
+            return 0
+        
+        with self._lock:
+            stuck = [
+                job for job in running
+                if job['started_at'] is not None and now - job['started_at'] > self.hard_timeout
+            ]
+            if not stuck:
+                return 0
+            for job in running:
+                job['timed_out'] = job in stuck
+                job['interrupted'] = job not in stuck
+            executor = self._executor
+            self._executor = None
+        
+        self.app.logger.warning(f'提取任务超过 {self.hard_timeout} 秒，终止工作进程: '
+                                f'{[job["file_id"] for job in stuck]}')
+        sandbox.kill_workers(executor)
+        return len(stuck)
+    
+    def submit(self, file_id: str, file_path: str, filename: str, mime_type: str,
+               file_hash: str = None) -> Optional[str]:
+        """提交提取任务，返回任务ID（未启用任务表时返回 None）"""
+        job_id = self._create_job_record(file_id) if self.use_job_table else None
+        self._dispatch(job_id, file_id, file_path, filename, mime_type, file_hash)
+        return job_id
+    
+    def _dispatch(self, job_id, file_id, file_path, filename, mime_type, file_hash, crashes=0, retries=0):
+        """将任务交给进程池执行（远程存储的文件先下载到本地临时文件，任务完成后删除）"""
+        local_path, is_temp = fetch_local(file_path, self.app.config)
+        try:
+            try:
+                future = self._get_executor().submit(sandbox.run_extraction, local_path, filename, mime_type)
+            except BrokenProcessPool:
+                # 工作进程异常退出后进程池不可用，重建后重试一次
+                with self._lock:
+                    self._executor = None
+                future = self._get_executor().submit(sandbox.run_extraction, local_path, filename, mime_type)
+        except Exception:
+            if is_temp:
+                os.remove(local_path)
+            raise
+        
+        with self._lock:
+            self._sequence += 1
+            self._jobs[file_id] = {
+                'job_id': job_id,
+                'file_id': file_id,
+                'future': future,
+                'args': (file_path, filename, mime_type, file_hash),
+                'sequence': self._sequence,
+                'submitted_at': beijing_time(),
+                'started_at': None,  # 看门狗首次发现任务在执行的时间
+                'recorded': False,  # 任务记录是否已标记为处理中
+                'timed_out': False,
+                'interrupted': False,
+                'crashes': crashes,  # 执行期间进程池异常退出的次数
+                'retries': retries,  # 失败后重试的次数
+                'retry_at': None,
+                'finished_at': None,
+                'error': None
+            }
+        
+        future.add_done_callback(partial(self._on_done, job_id, file_id, file_hash,
+                                         local_path if is_temp else None))
+    
+    def _on_done(self, job_id, file_id, file_hash, temp_path, future):
+        """任务完成回调（在进程池的管理线程中执行）"""
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        
+        with self._lock:
+            job = self._jobs.get(file_id)
+            if job and job['future'] is not future:
+                job = None
+        
+        error = None
+        result = None
+        try:
+            result = future.result()
+        except BrokenProcessPool as e:
+            with self._lock:
+                if self._executor is not None and getattr(self._executor, '_broken', False):
+                    self._executor = None
+            if job and job['timed_out']:
+                error = f'提取超过 {self.hard_timeout} 秒，进程已终止'
+            elif job and job['interrupted']:
+                # 其他任务超时导致进程池被终止，本任务直接重新提交
+                self._redispatch(job)
+                return
+            elif job and job['crashes'] + 1 < self.quarantine_after:
+                # 无法确定由哪个任务导致，进程池中的任务都重新提交，不计入失败次数
+                job['crashes'] += 1
+                self._redispatch(job)
+                return
+            else:
+                error = f'提取进程异常退出: {e}'
+        except MemoryError:
+            error = '提取超过内存限制'
+        except Exception as e:
+            error = str(e)
+        
+        if job:
+            with self._lock:
+                job['finished_at'] = beijing_time()
+                job['error'] = error
+        
+        retry = False
+        with self.app.app_context():
+            db = get_db()
+            try:
+                retry = self._apply_result(db, file_id, file_hash, result, error)
+                if job_id:
+                    self._finish_job_record(db, job_id, error, retry=retry,
+                                            started=bool(job and job.get('recorded')))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                retry = False
+                self.app.logger.error(f'保存提取结果失败 file_id={file_id}: {e}')
+            finally:
+                db.session.remove()
+        
+        if retry and job:
+            # 失败后延迟重试，每次失败延迟加倍
+            delay = self.retry_delay * 2 ** job.get('retries', 0)
+            with self._lock:
+                job['retry_at'] = beijing_time() + timedelta(seconds=delay)
+            timer = threading.Timer(delay, self._redispatch, (job,), {'retries': job.get('retries', 0) + 1})
+            timer.daemon = True
+            timer.start()
+    
+    def _redispatch(self, job: Dict, retries: Optional[int] = None) -> None:
+        """重新提交任务（进程池被终止、失败次数未达到隔离阈值时）"""
+        if self._stopped.is_set():
+            return
+        with self._lock:
+            if self._jobs.get(job['file_id']) is not job:
+                # 等待重试期间已重新提交
+                return
+        try:
+            self._dispatch(job['job_id'], job['file_id'], *job['args'], crashes=job.get('crashes', 0),
+                           retries=job.get('retries', 0) if retries is None else retries)
+        except Exception as e:
+            self.app.logger.error(f'重新提交提取任务失败 file_id={job["file_id"]}: {e}')
+    
+    def _apply_result(self, db, file_id, file_hash, result, error) -> bool:
+        """回写提取结果（相同内容的文件记录一并更新），返回是否需要重试
+
+        失败时累计失败次数：未达到隔离阈值时保持等待状态并重试，达到时标记为失败并隔离。
+        """
+        from repositories.file_repositorie.extraction_cache_repository import ExtractionCacheRepository
+        from repositories.file_repositorie.page_text_repository import FilePageTextRepository
+        
+        query = db.session.query(FileUpdModel).options(load_only(
+            FileUpdModel.id, FileUpdModel.extraction_failures, FileUpdModel.quarantined
+        ))
+        if file_hash:
+            query = query.filter(FileUpdModel.file_hash == file_hash)
+        else:
+            query = query.filter(FileUpdModel.id == file_id)
+        
+        files = query.all()
+        if error:
+            # 相同内容的记录一起计数（后上传的记录沿用已有的失败次数）
+            failures = max((file.extraction_failures or 0 for file in files), default=0) + 1
+            quarantined = failures >= self.quarantine_after
+            for file in files:
+                file.extraction_failures = failures
+                file.quarantined = quarantined
+                file.extraction_status = 'failed' if quarantined else 'pending'
+            if quarantined:
+                self.app.logger.warning(f'文件提取失败 {failures} 次，已隔离 file_id={file_id}: {error}')
+            return bool(files) and not quarantined
+        
+        for file in files:
+            file.page_count = result.get('page_count')
+            file.text_content = result.get('text_content')
+            file.has_ocr = result.get('has_ocr', False)
+            file.ocr_confidence = result.get('ocr_confidence', 0.0)
+            file.extraction_status = 'completed'
+            file.extraction_failures = 0
+            file.quarantined = False
+        
+        # 逐页文本分批写入 file_page_text，检索结果可以定位到页码
+        if result.get('page_texts') is not None:
+            FilePageTextRepository(db).save_pages([file.id for file in files], result['page_texts'])
+        
+        # 写入提取结果缓存，相同内容再次上传时不再提取
+        ExtractionCacheRepository(db, self.app.config).put(file_hash, result)
+        return False
+    
+    def _create_job_record(self, file_id: str) -> str:
+        """创建任务记录（等待中，工作进程开始执行时改为处理中）"""
+        db = get_db()
+        job = FileJobModel(
+            file_id=file_id,
+            status='pending',
+            attempts=0
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+    
+    def _start_job_records(self, jobs) -> None:
+        """将开始执行的任务记录标记为处理中并累计执行次数（在看门狗线程中执行）"""
+        job_ids = []
+        with self._lock:
+            for job in jobs:
+                if job.get('job_id') and not job.get('recorded'):
+                    job['recorded'] = True
+                    job_ids.append(job['job_id'])
+        if not job_ids:
+            return
+        
+        table = FileJobModel.__table__
+        with self.app.app_context():
+            db = get_db()
+            try:
+                db.session.execute(
+                    table.update()
+                    .where(table.c.id.in_(job_ids), table.c.status.in_(('pending', 'processing')))
+                    .values(status='processing', attempts=table.c.attempts + 1, started_at=beijing_time())
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(f'更新任务记录失败 job_ids={job_ids}: {e}')
+            finally:
+                db.session.remove()
+    
+    def _finish_job_record(self, db, job_id: str, error: Optional[str], retry: bool = False,
+                           started: bool = True):
+        """更新任务记录为完成/失败；需要重试时恢复为等待中
+
+        任务在看门狗发现之前就已结束时（started=False），在这里补记开始时间和执行次数。
+        """
+        job = db.session.get(FileJobModel, job_id)
+        if job:
+            if not started:
+                job.attempts = (job.attempts or 0) + 1
+                job.started_at = job.started_at or beijing_time()
+            job.error_message = error
+            if retry:
+                job.status = 'pending'
+            else:
+                job.status = 'failed' if error else 'completed'
+                job.finished_at = beijing_time()
+    
+    def recover_jobs(self) -> int:
+        """重新入队超时未完成的任务（应用启动时调用）
+
+        等待中的任务按最后更新时间、处理中的任务按开始时间判断，超过 EXTRACTION_JOB_TIMEOUT
+        秒视为所在进程已退出；未超时的任务可能仍在其他进程的队列中，不重复执行。
+        """
+        from repositories.file_repositorie.extraction_cache_repository import ExtractionCacheRepository
+        
+        if not self.use_job_table:
+            return 0
+        
+        db = get_db()
+        stale_before = beijing_time() - timedelta(seconds=self.job_timeout)
+        table = FileJobModel.__table__
+        
+        candidates = db.session.query(FileJobModel).filter(
+            ((FileJobModel.status == 'pending') & (FileJobModel.updated_at < stale_before)) |
+            ((FileJobModel.status == 'processing') & (FileJobModel.started_at < stale_before))
+        ).all()
+        
+        recovered = 0
+        for job in candidates:
+            # 条件更新抢占任务（重新计时），避免多个进程重复执行
+            claimed = db.session.execute(
+                table.update()
+                .where(table.c.id == job.id, table.c.status == job.status,
+                       table.c.attempts == job.attempts, table.c.updated_at == job.updated_at)
+                .values(status='pending', updated_at=beijing_time())
+            ).rowcount
+            db.session.commit()
+            if not claimed:
+                continue
+            
+            file = db.session.get(FileUpdModel, job.file_id)
+            if not file or file.quarantined:
+                # 已隔离的文件（多次提取失败）不再自动提取
+                db.session.execute(
+                    table.update().where(table.c.id == job.id)
+                    .values(status='failed', error_message='文件已隔离' if file else '文件不存在',
+                            finished_at=beijing_time())
+                )
+                db.session.commit()
+                continue
+            
+            # 提取结果缓存已有相同内容的结果时直接回写，不再提取
+            cached = ExtractionCacheRepository(db, self.app.config).get(file.file_hash)
+            if cached is not None:
+                self._apply_result(db, file.id, file.file_hash, cached, None)
+                self._finish_job_record(db, job.id, None, started=False)
+                db.session.commit()
+                recovered += 1
+                continue
+            
+            self._dispatch(job.id, file.id, file.file_path, file.original_name,
+                           file.mime_type, file.file_hash)
+            recovered += 1
+        
+        return recovered
+    
+    def get_status(self, file_id: str) -> Optional[Dict]:
+        """获取文件的任务状态"""
+        with self._lock:
+            job = self._jobs.get(file_id)
+            if job:
+                future = job['future']
+                if future.done() and job['retry_at']:
+                    status = 'pending'
+                elif future.done():
+                    status = 'failed' if job['error'] else 'completed'
+                elif future.running():
+                    status = 'processing'
+                else:
+                    status = 'pending'
+                
+                queue_position = 0
+                if status == 'pending':
+                    queue_position = sum(
+                        1 for other in self._jobs.values()
+                        if other['sequence'] < job['sequence'] and not other['future'].done()
+                    )
+                
+                return {
+                    'jobId': job['job_id'],
+                    'status': status,
+                    'queuePosition': queue_position,
+                    'submittedAt': job['submitted_at'].isoformat(),
+                    'finishedAt': job['finished_at'].isoformat() if job['finished_at'] else None,
+                    'error': job['error']
+                }
+        
+        if self.use_job_table:
+            db = get_db()
+            job = db.session.query(FileJobModel)\
+                .filter(FileJobModel.file_id == file_id)\
+                .order_by(FileJobModel.created_at.desc())\
+                .first()
+            if job:
+                return job.to_response_dict()
+        
+        return None
+    
+    def shutdown(self, wait: bool = False):
+        """关闭进程池和看门狗"""
+        self._stopped.set()
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=not wait)
+                self._executor = None
+
+
+def get_job_queue(app=None) -> ExtractionJobQueue:
+    """获取应用的后台任务队列（未完成任务的恢复在应用启动时调用 recover_jobs）"""
+    app = app or current_app._get_current_object()
+    queue = app.extensions.get('extraction_jobs')
+    if queue is not None:
+        return queue
+    
+    with _queue_lock:
+        queue = app.extensions.get('extraction_jobs')
+        if queue is None:
+            queue = ExtractionJobQueue(app)
+            app.extensions['extraction_jobs'] = queue
+            atexit.register(queue.shutdown)
+    return queue
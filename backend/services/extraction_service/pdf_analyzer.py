@@ -0,0 +1,158 @@
+# services/extraction_service/pdf_analyzer.py
+"""PDF 分析 - 只解析一次，同时得到页数、文档信息、逐页文本和扫描件判断"""
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import PyPDF2
+
+from .pdf_structure import read_page_count
+from .sandbox import ExtractionTimeout, PageTimeout, page_timeout, time_limit
+
+# 页面可提取文字少于该字符数（不含空白）且含有图片时视为扫描页
+SCANNED_PAGE_MIN_CHARS = 20
+
+
+def analyze_pdf(file_path: str, extract_text: bool = True) -> Dict:
+    """分析PDF文件
+
+    返回：
+    - page_count: 页数
+    - info: 文档信息 {title, author, creation_date}
+    - page_size: 首页尺寸 (宽, 高)，单位为点；没有页面时为 None
+    - pages: 逐页文本列表（extract_text 为 False 时为空列表）
+    - text_content: 非空页面文本以空行连接，没有文本时为 None
+    - pdf_kind: text-文本型 / scanned-扫描件 / mixed-部分页面为扫描页 / empty-无内容（不提取文本时为 None）
+    - scanned_pages: 扫描页页码列表（从 1 开始）
+    - timed_out_pages: 提取文本超时的页码列表（在提取进程中按 EXTRACTION_PAGE_TIMEOUT 限时，超时的页面文本为空）
+    """
+    # 传入文件对象而非路径，避免 PdfReader 将整个文件读入内存
+    with open(file_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        result = {
+            'page_count': len(reader.pages),
+            'info': _document_info(reader),
+            'page_size': _page_size(reader.pages[0]) if len(reader.pages) else None,
+            'pages': [],
+            'text_content': None,
+            'pdf_kind': None,
+            'scanned_pages': [],
+            'timed_out_pages': []
+        }
+        if not extract_text:
+            return result
+
+        pages = []
+        scanned_pages = []
+        timed_out_pages = []
+        timeout = page_timeout()
+        for page_number, page in enumerate(reader.pages, 1):
+            page_text = _page_text(page, timeout)
+            if page_text is None:
+                timed_out_pages.append(page_number)
+                page_text = ''
+            pages.append(page_text)
+            if len(''.join(page_text.split())) < SCANNED_PAGE_MIN_CHARS and _has_images(page):
+                scanned_pages.append(page_number)
+
+    non_empty = [text for text in pages if text.strip()]
+    result['pages'] = pages
+    result['text_content'] = "\n\n".join(non_empty) if non_empty else None
+    result['scanned_pages'] = scanned_pages
+    result['timed_out_pages'] = timed_out_pages
+    result['pdf_kind'] = _classify(len(pages), len(scanned_pages), len(non_empty))
+    return result
+
+
+def count_pages(file_path: str) -> int:
+    """PDF页数：先从 xref 直接读取 /Pages 的 /Count，结构无法快速读取时退回 PdfReader 完整解析"""
+    page_count = read_page_count(file_path)
+    if page_count is not None:
+        return page_count
+    with open(file_path, 'rb') as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+def _page_text(page, timeout: Optional[float] = None) -> Optional[str]:
+    """提取单页文本（失败时返回空字符串，超时返回 None；内存超限和整个文档超时向上抛出）"""
+    try:
+        with time_limit(timeout, PageTimeout):
+            return page.extract_text() or ''
+    except PageTimeout:
+        return None
+    except (MemoryError, ExtractionTimeout):
+        raise
+    except Exception:
+        return ''
+
+
+def _page_size(page) -> Optional[Tuple[int, int]]:
+    """页面尺寸（点）"""
+    try:
+        box = page.mediabox
+        return int(round(float(box.width))), int(round(float(box.height)))
+    except Exception:
+        return None
+
+
+def _has_images(page) -> bool:
+    """页面资源中是否有图片"""
+    try:
+        resources = page.get('/Resources')
+        resources = resources.get_object() if resources is not None else {}
+        xobjects = resources.get('/XObject')
+        if xobjects is None:
+            return False
+        for xobject in xobjects.get_object().values():
+            if xobject.get_object().get('/Subtype') == '/Image':
+                return True
+    except Exception:
+        pass
+    return False
+
+
+def _classify(page_count: int, scanned_count: int, text_count: int) -> str:
+    """根据扫描页和有文本页面的数量判断PDF类型"""
+    if page_count == 0 or (scanned_count == 0 and text_count == 0):
+        return 'empty'
+    if scanned_count == 0:
+        return 'text'
+    if scanned_count == page_count or text_count == 0:
+        return 'scanned'
+    return 'mixed'
+
+
+def _document_info(reader) -> Dict[str, Optional[str]]:
+    """文档信息（标题、作者、创建时间）"""
+    info = {'title': None, 'author': None, 'creation_date': None}
+    try:
+        metadata = reader.metadata
+    except Exception:
+        return info
+    if not metadata:
+        return info
+
+    for key, name in (('title', '/Title'), ('author', '/Author')):
+        value = metadata.get(name)
+        if value:
+            info[key] = str(value).strip() or None
+    info['creation_date'] = _parse_pdf_date(metadata.get('/CreationDate'))
+    return info
+
+
+def _parse_pdf_date(value) -> Optional[str]:
+    """解析PDF日期（D:YYYYMMDDHHmmSS+HH'mm'），返回 ISO 格式字符串"""
+    if not value:
+        return None
+    text = str(value).strip()
+    if text.startswith('D:'):
+        text = text[2:]
+    digits = ''
+    for c in text:
+        if not c.isdigit() or len(digits) == 14:
+            break
+        digits += c
+
+    formats = {14: '%Y%m%d%H%M%S', 12: '%Y%m%d%H%M', 10: '%Y%m%d%H', 8: '%Y%m%d', 6: '%Y%m', 4: '%Y'}
+    try:
+        return datetime.strptime(digits, formats[len(digits)]).isoformat()
+    except (KeyError, ValueError):
+        return None
@@ -0,0 +1,368 @@
+# services/extraction_service/pdf_structure.py
+"""PDF 结构读取 - 只定位 trailer 和 xref，按偏移读取 /Root → /Pages → /Count 得到页数，不构建完整的 PdfReader
+
+支持传统 xref 表、xref 流和对象流（FlateDecode，PNG 预测器）以及增量更新（/Prev）。
+xref 偏移与对象不符、使用其他过滤器等情况返回 None，由调用方改用 PyPDF2 完整解析。
+"""
+import os
+import re
+import zlib
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+
+# 文件末尾查找 startxref 的范围（规范要求 %%EOF 在最后 1024 字节内，留出余量）
+TAIL_SIZE = 2048
+# 读取对象时首次读取的字节数，以及对象（含 xref 表/流）的最大字节数
+READ_CHUNK_SIZE = 4096
+MAX_READ_SIZE = 64 * 1024 * 1024
+# 跟随 /Prev 的 xref 段数上限（增量更新次数，防止循环引用）
+MAX_XREF_SECTIONS = 64
+
+_WHITESPACE = b'\x00\t\n\x0c\r '
+_DELIMITERS = b'()<>[]{}/%'
+_OBJECT_HEADER = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj')
+_XREF_ENTRY = re.compile(rb'\s*(\d{10}) +(\d{5}) +([nf])')
+_STREAM_START = re.compile(rb'\s*stream\r?\n')
+
+
+class _Malformed(Exception):
+    """结构不符合预期（交给完整解析器处理）"""
+
+
+class _Truncated(_Malformed):
+    """读取的字节不足以解析完整的对象"""
+
+
+def read_page_count(source: Union[str, BinaryIO]) -> Optional[int]:
+    """读取PDF页数（文件路径或可 seek 的二进制文件对象），无法快速读取时返回 None"""
+    try:
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                return _page_count(f)
+        return _page_count(source)
+    except (OSError, ValueError, zlib.error, _Malformed):
+        return None
+
+
+def _page_count(f: BinaryIO) -> int:
+    """从最后一个 xref 开始合并各段 xref，依次解析 /Root、/Pages 和 /Count"""
+    size = f.seek(0, os.SEEK_END)
+    f.seek(max(0, size - TAIL_SIZE))
+    tail = f.read()
+    index = tail.rfind(b'startxref')
+    if index < 0:
+        raise _Malformed('没有 startxref')
+    token, _ = _next_token(tail + b' ', index + len(b'startxref'))
+    offset = int(token)
+
+    entries = {}
+    trailer = None
+    seen = set()
+    while offset is not None:
+        if offset in seen or len(seen) >= MAX_XREF_SECTIONS or not 0 <= offset < size:
+            raise _Malformed('xref 偏移无效')
+        seen.add(offset)
+        section = _read_xref(f, offset, entries)
+        if '/XRefStm' in section:
+            # 混合引用文件：部分对象只登记在 xref 流中
+            raise _Malformed('混合引用文件')
+        if trailer is None:
+            trailer = section
+        prev = section.get('/Prev')
+        offset = prev if isinstance(prev, int) else None
+
+    root = _resolve(f, entries, trailer.get('/Root'))
+    if not isinstance(root, dict):
+        raise _Malformed('没有 /Root')
+    pages = _resolve(f, entries, root.get('/Pages'))
+    if not isinstance(pages, dict) or pages.get('/Type', b'/Pages') != b'/Pages':
+        raise _Malformed('没有 /Pages')
+    count = _resolve(f, entries, pages.get('/Count'))
+    if not isinstance(count, int) or count < 0:
+        raise _Malformed('/Count 无效')
+    return count
+
+
+def _resolve(f: BinaryIO, entries: Dict[int, Tuple[int, int, int]], value):
+    """间接引用按 xref 读取对象（普通对象按偏移读取，压缩对象从对象流中读取），直接值原样返回
+
+    entries 的值为 (1, 偏移, 代数) 或 (2, 对象流编号, 流中序号)。
+    """
+    if not isinstance(value, tuple):
+        return value
+    number, generation = value
+    kind, first, second = entries.get(number) or (0, 0, 0)
+    if kind == 1 and second == generation:
+        value, _, _ = _read_object(f, first, number, generation)
+        return value
+    if kind == 2 and generation == 0:
+        return _read_compressed_object(f, entries, first, number)
+    raise _Malformed(f'无法定位对象 {number}')
+
+
+def _read_compressed_object(f: BinaryIO, entries: Dict[int, Tuple[int, int, int]], stream_number: int,
+                            number: int):
+    """从对象流（/Type /ObjStm）中读取对象：流开头是 N 对 "编号 相对偏移"，对象从 /First 开始"""
+    kind, offset, generation = entries.get(stream_number) or (0, 0, 0)
+    if kind != 1:
+        raise _Malformed(f'无法定位对象流 {stream_number}')
+    header, data = _read_stream(f, offset, stream_number, generation, entries)
+    if header.get('/Type') != b'/ObjStm' or not isinstance(header.get('/N'), int) \
+            or not isinstance(header.get('/First'), int):
+        raise _Malformed('不是对象流')
+
+    data += b' '
+    pos = 0
+    for _ in range(header['/N']):
+        object_number, pos = _next_token(data, pos)
+        object_offset, pos = _next_token(data, pos)
+        if int(object_number) == number:
+            value, _ = _parse_value(data, header['/First'] + int(object_offset))
+            return value
+    raise _Malformed(f'对象流 {stream_number} 中没有对象 {number}')
+
+
+def _read_stream(f: BinaryIO, offset: int, number: int = None, generation: int = None,
+                 entries: Dict[int, Tuple[int, int, int]] = None) -> Tuple[Dict, bytes]:
+    """读取流对象，返回 (流字典, 解码后的数据)；/Length 为间接引用时需要传入 entries"""
+    header, data, end = _read_object(f, offset, number, generation)
+    if not isinstance(header, dict):
+        raise _Malformed('不是流对象')
+    length = header.get('/Length')
+    if isinstance(length, tuple) and entries is not None:
+        length = _resolve(f, entries, length)
+    if not isinstance(length, int) or not 0 <= length <= MAX_READ_SIZE:
+        raise _Malformed('流长度无效')
+    match = _STREAM_START.match(data, end)
+    if not match:
+        raise _Malformed('没有 stream')
+    f.seek(offset + match.end())
+    raw = f.read(length)
+    if len(raw) < length:
+        raise _Malformed('流被截断')
+    return header, _decode_stream(raw, header)
+
+
+def _read_object(f: BinaryIO, offset: int, number: int = None, generation: int = None):
+    """读取偏移处的间接对象，返回 (值, 已读取的字节, 值结束位置)；读取的字节不足时加倍重读"""
+    size = READ_CHUNK_SIZE
+    while True:
+        f.seek(offset)
+        data = f.read(size)
+        try:
+            match = _OBJECT_HEADER.match(data)
+            if not match:
+                raise _Malformed(f'偏移 {offset} 处不是对象')
+            if number is not None and (int(match.group(1)), int(match.group(2))) != (number, generation):
+                raise _Malformed(f'偏移 {offset} 处不是对象 {number}')
+            value, end = _parse_value(data, match.end())
+            return value, data, end
+        except _Truncated:
+            if len(data) < size or size >= MAX_READ_SIZE:
+                raise
+            size *= 4
+
+
+def _read_xref(f: BinaryIO, offset: int, entries: Dict[int, Tuple[int, int, int]]) -> Dict:
+    """读取一段 xref（表或流），将未登记的对象偏移加入 entries（后面的段优先），返回该段的 trailer"""
+    f.seek(offset)
+    if f.read(4) == b'xref':
+        return _read_xref_table(f, offset + 4, entries)
+    return _read_xref_stream(f, offset, entries)
+
+
+def _read_xref_table(f: BinaryIO, offset: int, entries: Dict[int, Tuple[int, int, int]]) -> Dict:
+    """传统 xref 表：若干 "起始编号 数量" 小节，每项 "偏移 代数 n/f"，之后是 trailer 字典"""
+    size = READ_CHUNK_SIZE
+    while True:
+        f.seek(offset)
+        data = f.read(size)
+        try:
+            section = {}
+            pos = 0
+            while True:
+                token, pos = _next_token(data, pos)
+                if token == b'trailer':
+                    break
+                start = int(token)
+                token, pos = _next_token(data, pos)
+                for number in range(start, start + int(token)):
+                    match = _XREF_ENTRY.match(data, pos)
+                    if not match:
+                        raise _Truncated if len(data) - pos < 24 else _Malformed('xref 表项无效')
+                    pos = match.end()
+                    if match.group(3) == b'n':
+                        section[number] = (1, int(match.group(1)), int(match.group(2)))
+            trailer, _ = _parse_dict(data, pos)
+            break
+        except _Truncated:
+            if len(data) < size or size >= MAX_READ_SIZE:
+                raise
+            size *= 4
+
+    for number, entry in section.items():
+        entries.setdefault(number, entry)
+    return trailer
+
+
+def _read_xref_stream(f: BinaryIO, offset: int, entries: Dict[int, Tuple[int, int, int]]) -> Dict:
+    """xref 流（PDF 1.5）：/W 指定每项各字段的字节数，类型 1 为普通对象，类型 2 为对象流中的对象"""
+    trailer, rows = _read_stream(f, offset)
+    widths = trailer.get('/W')
+    if trailer.get('/Type') != b'/XRef' or not isinstance(widths, list) or len(widths) != 3 \
+            or not all(isinstance(width, int) and width >= 0 for width in widths):
+        raise _Malformed('不是 xref 流')
+
+    index = trailer.get('/Index') or [0, trailer.get('/Size')]
+    if not all(isinstance(value, int) for value in index) or len(index) % 2:
+        raise _Malformed('/Index 无效')
+    numbers = (number for start, count in zip(index[::2], index[1::2]) for number in range(start, start + count))
+
+    row_size = sum(widths)
+    for row_start, number in zip(range(0, len(rows) - row_size + 1, row_size), numbers):
+        fields = []
+        pos = row_start
+        for width in widths:
+            fields.append(int.from_bytes(rows[pos:pos + width], 'big'))
+            pos += width
+        # 第一个字段宽度为 0 时类型默认为 1
+        kind = fields[0] if widths[0] else 1
+        if kind in (1, 2):
+            entries.setdefault(number, (kind, fields[1], fields[2]))
+    return trailer
+
+
+def _decode_stream(raw: bytes, params: Dict) -> bytes:
+    """解码流数据：只支持 FlateDecode 和 PNG 预测器（None/Sub/Up）"""
+    filters = params.get('/Filter')
+    if filters is None:
+        return raw
+    if filters not in (b'/FlateDecode', [b'/FlateDecode']):
+        raise _Malformed(f'不支持的过滤器 {filters}')
+    decompressor = zlib.decompressobj()
+    data = decompressor.decompress(raw, MAX_READ_SIZE)
+    if decompressor.unconsumed_tail:
+        raise _Malformed('流解压后过大')
+
+    decode_params = params.get('/DecodeParms')
+    if isinstance(decode_params, list):
+        decode_params = decode_params[0] if decode_params else None
+    predictor = decode_params.get('/Predictor', 1) if isinstance(decode_params, dict) else 1
+    if predictor == 1:
+        return data
+    if predictor < 10:
+        raise _Malformed('不支持 TIFF 预测器')
+
+    columns = decode_params.get('/Columns', 1)
+    if not isinstance(columns, int) or columns < 1:
+        raise _Malformed('/Columns 无效')
+    output = bytearray()
+    previous = bytearray(columns)
+    for row_start in range(0, len(data) - columns, columns + 1):
+        kind = data[row_start]
+        row = bytearray(data[row_start + 1:row_start + 1 + columns])
+        if kind == 1:
+            for i in range(1, len(row)):
+                row[i] = (row[i] + row[i - 1]) & 0xFF
+        elif kind == 2:
+            for i in range(len(row)):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif kind != 0:
+            raise _Malformed(f'不支持的 PNG 预测器 {kind}')
+        output.extend(row)
+        previous = row
+    return bytes(output)
+
+
+def _skip_whitespace(data: bytes, pos: int) -> int:
+    """跳过空白和注释"""
+    length = len(data)
+    while pos < length:
+        if data[pos] in _WHITESPACE:
+            pos += 1
+        elif data[pos] == 0x25:  # %
+            while pos < length and data[pos] not in b'\r\n':
+                pos += 1
+        else:
+            break
+    return pos
+
+
+def _next_token(data: bytes, pos: int) -> Tuple[bytes, int]:
+    """读取下一个词法单元：<< >> [ ] 原样返回，字符串只返回起始符号 ( 或 <，名称带 /"""
+    pos = _skip_whitespace(data, pos)
+    length = len(data)
+    if pos >= length:
+        raise _Truncated
+    if data.startswith(b'<<', pos) or data.startswith(b'>>', pos):
+        return data[pos:pos + 2], pos + 2
+    char = data[pos:pos + 1]
+    if char in (b'[', b']', b'{', b'}'):
+        return char, pos + 1
+    if char == b'(':
+        depth = 0
+        while pos < length:
+            if data[pos] == 0x5C:  # 反斜杠转义
+                pos += 2
+                continue
+            if data[pos] == 0x28:
+                depth += 1
+            elif data[pos] == 0x29:
+                depth -= 1
+                if not depth:
+                    return b'(', pos + 1
+            pos += 1
+        raise _Truncated
+    if char == b'<':
+        end = data.find(b'>', pos)
+        if end < 0:
+            raise _Truncated
+        return b'<', end + 1
+
+    end = pos + 1 if char == b'/' else pos
+    while end < length and data[end] not in _WHITESPACE and data[end] not in _DELIMITERS:
+        end += 1
+    if end >= length:
+        raise _Truncated
+    if end == pos:
+        raise _Malformed(f'意外的字符 {char!r}')
+    return data[pos:end], end
+
+
+def _parse_value(data: bytes, pos: int):
+    """解析一个值：字典为 dict，数组为 list，整数为 int，间接引用为 (编号, 代数)，其他为原始字节"""
+    token, end = _next_token(data, pos)
+    if token == b'<<':
+        return _parse_dict(data, pos)
+    if token == b'[':
+        items = []
+        while True:
+            token, after = _next_token(data, end)
+            if token == b']':
+                return items, after
+            item, end = _parse_value(data, end)
+            items.append(item)
+    if token in (b']', b'>>', b'{', b'}'):
+        raise _Malformed(f'意外的 {token!r}')
+    if token.isdigit():
+        generation, after_generation = _next_token(data, end)
+        if generation.isdigit():
+            keyword, after_keyword = _next_token(data, after_generation)
+            if keyword == b'R':
+                return (int(token), int(generation)), after_keyword
+        return int(token), end
+    return token, end
+
+
+def _parse_dict(data: bytes, pos: int) -> Tuple[Dict, int]:
+    """解析字典（键为名称字符串）"""
+    token, pos = _next_token(data, pos)
+    if token != b'<<':
+        raise _Malformed('不是字典')
+    result = {}
+    while True:
+        token, pos = _next_token(data, pos)
+        if token == b'>>':
+            return result, pos
+        if not token.startswith(b'/'):
+            raise _Malformed(f'字典键无效 {token!r}')
+        result[token.decode('latin-1')], pos = _parse_value(data, pos)
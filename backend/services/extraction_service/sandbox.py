@@ -0,0 +1,159 @@
+# services/extraction_service/sandbox.py
+"""提取进程沙箱 - 工作进程限制内存和 CPU 时间，单页和整个文档分别限时
+
+畸形 PDF 或解压炸弹可能让 PyPDF2 长时间占用 CPU 或耗尽内存。提取只在工作进程中执行：
+- 进程启动时用 setrlimit 限制地址空间（超过时抛出 MemoryError）；
+- 每个任务开始时把 CPU 时间软限制设为已用时间加上单个任务的预算（工作进程常驻，累计时间不能算到后来的任务上），
+  超过时收到 SIGXCPU，抛出 ExtractionTimeout，只有该任务失败；
+- 单页和整个文档用 SIGALRM 限时，超时抛出 PageTimeout / ExtractionTimeout；
+- 卡在 C 代码中无法响应信号的进程由任务队列的看门狗终止后重建进程池。
+"""
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from . import ocr_engine
+
+try:
+    import resource
+except ImportError:  # Windows 不支持 setrlimit
+    resource = None
+
+# 当前进程的限制（由 init_worker 设置；未设置时不限制）
+_limits = {'cpu_limit': None, 'page_timeout': None, 'document_timeout': None}
+
+
+class ExtractionTimeout(Exception):
+    """提取超过整个文档的时间限制"""
+
+
+class PageTimeout(ExtractionTimeout):
+    """单页提取超过时间限制"""
+
+
+def limits_from_config(config) -> Dict:
+    """从应用配置读取沙箱限制（传给工作进程的初始化函数）"""
+    return {
+        'memory_limit': config.get('EXTRACTION_MEMORY_LIMIT'),
+        'cpu_limit': config.get('EXTRACTION_CPU_LIMIT'),
+        'page_timeout': config.get('EXTRACTION_PAGE_TIMEOUT'),
+        'document_timeout': config.get('EXTRACTION_DOCUMENT_TIMEOUT'),
+        'ocr_lang': config.get('OCR_LANG', ocr_engine.DEFAULT_LANG),
+        'ocr_max_side': config.get('OCR_MAX_SIDE', ocr_engine.DEFAULT_MAX_SIDE)
+    }
+
+
+def init_worker(limits: Dict) -> None:
+    """工作进程启动时执行：设置资源限制和超时，加载识别引擎"""
+    apply_resource_limits(limits.get('memory_limit'), None)
+    _limits['cpu_limit'] = limits.get('cpu_limit')
+    if _limits['cpu_limit'] and hasattr(signal, 'SIGXCPU'):
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    _limits['page_timeout'] = limits.get('page_timeout')
+    _limits['document_timeout'] = limits.get('document_timeout')
+    ocr_engine.init_worker(
+        limits.get('ocr_lang') or ocr_engine.DEFAULT_LANG,
+        limits.get('ocr_max_side') or ocr_engine.DEFAULT_MAX_SIDE
+    )
+
+
+def apply_resource_limits(memory_limit: Optional[int], cpu_limit: Optional[int]) -> None:
+    """限制当前进程的地址空间（字节）和累计 CPU 时间（秒），不支持时忽略"""
+    if resource is None:
+        return
+    if memory_limit:
+        _set_limit(resource.RLIMIT_AS, memory_limit)
+    if cpu_limit:
+        _set_limit(resource.RLIMIT_CPU, cpu_limit)
+
+
+def _set_limit(kind, value: int) -> None:
+    """设置软限制（不超过已有的硬限制）"""
+    soft, hard = resource.getrlimit(kind)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    try:
+        resource.setrlimit(kind, (value, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def _on_cpu_limit(signum, frame):
+    """CPU 时间达到软限制（硬限制不变，进程不会被终止）"""
+    raise ExtractionTimeout(f"提取超过 CPU 时间限制 {_limits['cpu_limit']} 秒")
+
+
+def arm_cpu_limit() -> None:
+    """任务开始时设置 CPU 时间软限制：当前进程已用的 CPU 时间加上单个任务的预算"""
+    if resource is None or not _limits['cpu_limit']:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _set_limit(resource.RLIMIT_CPU, int(usage.ru_utime + usage.ru_stime) + 1 + _limits['cpu_limit'])
+
+
+def page_timeout() -> Optional[float]:
+    """当前进程的单页时间限制"""
+    return _limits['page_timeout']
+
+
+@contextmanager
+def time_limit(seconds: Optional[float], error=ExtractionTimeout):
+    """限时执行（SIGALRM，只在进程主线程中生效，其他情况不限时）
+
+    可以嵌套：外层剩余时间更短时由外层计时，退出后恢复外层的剩余时间。
+    """
+    if not seconds or not hasattr(signal, 'setitimer') \
+            or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    outer_remaining, _ = signal.getitimer(signal.ITIMER_REAL)
+    if outer_remaining and outer_remaining <= seconds:
+        yield
+        return
+
+    def on_timeout(signum, frame):
+        raise error(f'提取超过 {seconds} 秒')
+
+    outer_handler = signal.signal(signal.SIGALRM, on_timeout)
+    started = time.monotonic()
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, outer_handler)
+        if outer_remaining:
+            signal.setitimer(signal.ITIMER_REAL, max(outer_remaining - (time.monotonic() - started), 0.001))
+
+
+def run_task(func: Callable, *args):
+    """在工作进程中执行一个任务：重新设置 CPU 时间预算，整个任务限时"""
+    arm_cpu_limit()
+    with time_limit(_limits['document_timeout']):
+        return func(*args)
+
+
+def extract(file_path: str, filename: str, mime_type: str) -> Dict:
+    """在工作进程中调用提取函数（按名称查找，提交任务时不需要序列化提取函数）"""
+    from . import extractors
+
+    return extractors.extract_file(file_path, filename, mime_type)
+
+
+def run_extraction(file_path: str, filename: str, mime_type: str) -> Dict:
+    """在工作进程中提取文件（超时或内存超限时抛出异常，由任务队列记录失败）"""
+    return run_task(extract, file_path, filename, mime_type)
+
+
+def kill_workers(executor) -> int:
+    """强制终止进程池中的所有工作进程（卡住的任务无法取消），返回终止的进程数"""
+    processes = list((getattr(executor, '_processes', None) or {}).values())
+    for process in processes:
+        try:
+            process.kill()
+        except Exception:
+            pass
+    return len(processes)
@@ -1,11 +1,10 @@
 # services/file_service/file_service.py
 from typing import List, Dict, Any, Optional
-from flask import send_file
-from urllib.parse import quote
 import os
 
 from repositories.file_repositorie.file_repository import FileRepository
 from utils.file_utils import format_file_size
+from utils.http_utils import send_from_storage
 
 class FileService:
     """文件管理服务 - 主要协调业务流程"""
@@ -96,23 +95,18 @@ class FileService:
     def download_file(self, file_id: str):
         """下载文件"""
         try:
-            file = self.file_repo.get_by_id(file_id)
-            if not file or not os.path.exists(file.file_path):
+            file = self.file_repo.get_file_metadata(file_id)
+            if not file:
                 return None
             
-            resp = send_file(
+            # 本地文件和远程存储的文件都由 send_from_storage 发送，内容不存在时返回 None
+            return send_from_storage(
                 file.file_path,
-                as_attachment=True,
+                mimetype=file.mime_type,
                 download_name=file.original_name,
-                mimetype=file.mime_type
+                as_attachment=True,
+                file_hash=file.file_hash
             )
-            try:
-                resp.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(file.original_name)}"
-            except Exception:
-                safe_name = ''.join(c for c in file.original_name if ord(c) < 256)
-                resp.headers['Content-Disposition'] = f'attachment; filename="{safe_name}"'
-
-            return resp
         except Exception as e:
             # print(f"下载文件失败: {e}")
             return None
@@ -1,6 +1,8 @@
 # services/file_service/upload_service.py
 from typing import Dict, Tuple
 from repositories.file_repositorie.file_repository import FileRepository
+from repositories.file_repositorie.upload_session_repository import UploadSessionRepository
+from services.file_service.upload_session_sweeper import get_session_sweeper
 from utils.db_helper import get_db
 
 class UploadService:
@@ -10,19 +12,62 @@ class UploadService:
         self.db = db
         self.config = config
         self.file_repo = FileRepository(db, config)
+        self.session_repo = UploadSessionRepository(db, config)
         self.logger = config.get('logger')
     
     def validate_upload(self, file, file_type: str) -> Tuple[bool, str]:
         """验证上传文件 - 调用Repository的验证"""
         return self.file_repo.validate_upload(file, file_type)
     
+    def validate_file_name(self, file_name: str, file_type: str) -> Tuple[bool, str]:
+        """验证文件名（秒传时没有文件内容）"""
+        return self.file_repo.validate_file_name(file_name, file_type)
+    
     def save_file(self, file, file_type: str, original_name: str = None, company_id: str = None) -> Dict:
         """保存文件 - 调用Repository的保存方法"""
         return self.file_repo.save_uploaded_file(file, file_type, original_name, company_id=company_id)
     
     def batch_upload(self, files, file_type: str, company_id: str = None) -> Dict:
-        """批量上传文件"""
+        """批量上传文件（并行提取元数据，单事务批量插入）"""
         return self.file_repo.batch_upload_files(files, file_type, company_id=company_id)
+    
+    def create_from_hash(self, file_hash: str, file_name: str, file_type: str, company_id: str = None,
+                         mime_type: str = None):
+        """内容已存在时直接创建文件记录（秒传），不存在时返回 None"""
+        return self.file_repo.create_from_existing_hash(
+            file_hash, file_name, file_type, company_id=company_id, mime_type=mime_type
+        )
+    
+    def create_upload_session(self, file_name: str, file_size: int, file_type: str, company_id: str = None,
+                              mime_type: str = None, chunk_size: int = None) -> Dict:
+        """创建断点续传会话（同时确保后台清理线程已启动）"""
+        get_session_sweeper()
+        session = self.session_repo.create_session(
+            file_name, file_size, file_type, company_id=company_id, mime_type=mime_type, chunk_size=chunk_size
+        )
+        return session.to_response_dict()
+    
+    def get_upload_session(self, upload_id: str):
+        """获取断点续传会话状态（已接收的偏移量）"""
+        session = self.session_repo.get_session(upload_id)
+        return session.to_response_dict() if session else None
+    
+    def upload_chunk(self, upload_id: str, index: int, stream, content_length: int = None,
+                     checksum: str = None) -> Dict:
+        """写入一个分块"""
+        session = self.session_repo.write_chunk(upload_id, index, stream, content_length, checksum)
+        return session.to_response_dict()
+    
+    def complete_upload(self, upload_id: str, checksum: str = None) -> Dict:
+        """完成断点续传，返回与单文件上传相同的结果"""
+        session, result = self.session_repo.complete_session(upload_id, checksum)
+        result['upload'] = session.to_response_dict()
+        return result
+    
+    def abort_upload(self, upload_id: str) -> bool:
+        """取消断点续传"""
+        return self.session_repo.abort_session(upload_id)
+    
     def get_file_stats(self) -> Dict:
         """获取文件统计信息"""
         return self.file_repo.get_file_stats()
@@ -31,6 +76,14 @@ class UploadService:
         """搜索文件"""
         return self.file_repo.search_files(keyword, file_type)
     
+    def search_files_ranked(self, keyword: str, file_type: str = None, limit: int = None, offset: int = 0) -> Dict:
+        """全文检索文件（带相关度和摘要）"""
+        return self.file_repo.search_files_ranked(keyword, file_type, limit=limit, offset=offset)
+    
+    def get_extraction_status(self, file_id: str):
+        """获取文件内容提取状态"""
+        return self.file_repo.get_extraction_status(file_id)
+    
     def get_file_by_id(self, file_id: str):
         """根据ID获取文件"""
         return self.file_repo.get_by_id(file_id)
@@ -0,0 +1,69 @@
+# services/file_service/upload_session_sweeper.py
+"""断点续传会话的后台清理"""
+import atexit
+import threading
+
+from flask import current_app
+
+from models import get_db
+
+_sweeper_lock = threading.Lock()
+
+
+class UploadSessionSweeper:
+    """定期清理超时未完成的上传会话和残留的分块文件（后台守护线程）"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config.get('UPLOAD_SESSION_SWEEP_INTERVAL', 10 * 60)
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """启动清理线程（间隔为 0 时不启动，由 scripts/cleanup_upload_sessions.py 定时执行）"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='upload-session-sweeper', daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sweep()
+    
+    def sweep(self):
+        """执行一次清理"""
+        from repositories.file_repositorie.upload_session_repository import UploadSessionRepository
+        
+        with self.app.app_context():
+            db = get_db()
+            try:
+                stats = UploadSessionRepository(db, self.app.config).cleanup_stale_sessions()
+                if stats['expired'] or stats['orphan_parts']:
+                    self.app.logger.info(f'清理上传会话: {stats}')
+                return stats
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(f'清理上传会话失败: {e}')
+            finally:
+                db.session.remove()
+    
+    def shutdown(self):
+        """停止清理线程"""
+        self._stop.set()
+
+
+def get_session_sweeper(app=None) -> UploadSessionSweeper:
+    """获取应用的会话清理器（首次获取时启动清理线程）"""
+    app = app or current_app._get_current_object()
+    sweeper = app.extensions.get('upload_session_sweeper')
+    if sweeper is not None:
+        return sweeper
+    
+    with _sweeper_lock:
+        sweeper = app.extensions.get('upload_session_sweeper')
+        if sweeper is None:
+            sweeper = UploadSessionSweeper(app)
+            app.extensions['upload_session_sweeper'] = sweeper
+            atexit.register(sweeper.shutdown)
+            sweeper.start()
+    return sweeper
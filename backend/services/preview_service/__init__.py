@@ -0,0 +1,10 @@
+# services/preview_service/__init__.py
+"""预览服务：由原文件生成的缩略图、PDF 单页等派生内容，按内容哈希缓存在磁盘上"""
+from .disk_cache import DiskLRUCache
+from .image_variants import ImageVariantService, get_image_variant_service
+from .pdf_pages import PageNotFound, PdfPageService, UnreadablePdf, get_pdf_page_service, parse_page_range
+
+__all__ = [
+    'DiskLRUCache', 'ImageVariantService', 'get_image_variant_service',
+    'PageNotFound', 'PdfPageService', 'UnreadablePdf', 'get_pdf_page_service', 'parse_page_range'
+]
@@ -0,0 +1,119 @@
+# services/preview_service/disk_cache.py
+"""磁盘 LRU 缓存 - 按键保存生成的文件（图片缩略图、PDF 页面等），总大小超过预算时删除最久未使用的文件"""
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+# 命中时更新文件修改时间（作为最近使用时间）的最小间隔秒数，避免每次读取都写文件元数据
+TOUCH_INTERVAL = 60
+# 淘汰时删除到预算的该比例以下，避免每次写入都触发淘汰
+EVICT_TARGET_RATIO = 0.9
+
+
+class DiskLRUCache:
+    """磁盘 LRU 缓存：文件修改时间即最近使用时间，写入后总大小超过 max_bytes 时按修改时间淘汰
+
+    多个进程可以共用同一个目录：写入先写临时文件再原子替换；各进程只估算总大小，
+    淘汰时重新扫描目录得到准确的大小和使用时间。
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self._size = None  # 首次写入时扫描目录得到
+        self._lock = threading.Lock()
+
+    def path_for(self, key: str) -> str:
+        """键对应的文件路径（键由调用方生成，使用 / 分隔子目录）"""
+        return os.path.join(self.root, *key.split('/'))
+
+    def get(self, key: str) -> Optional[str]:
+        """命中时返回文件路径并记录使用时间，未命中返回 None"""
+        path = self.path_for(key)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        now = time.time()
+        if now - mtime > TOUCH_INTERVAL:
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+        return path
+
+    def put(self, key: str, write: Callable) -> str:
+        """调用 write(文件对象) 生成内容并保存，返回文件路径"""
+        def write_file(temp_path):
+            with open(temp_path, 'wb') as f:
+                write(f)
+        return self.put_file(key, write_file)
+
+    def put_file(self, key: str, write_file: Callable) -> str:
+        """调用 write_file(临时文件路径) 生成内容并保存（可以由其他进程写入），返回文件路径"""
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            write_file(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        size = os.path.getsize(path)
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += size
+            over_budget = self.max_bytes and self._size > self.max_bytes
+        if over_budget:
+            self.evict(keep=path)
+        return path
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        """保存字节内容，返回文件路径"""
+        return self.put(key, lambda f: f.write(data))
+
+    def evict(self, keep: str = None) -> int:
+        """删除最久未使用的文件直到总大小低于预算的 90%，返回删除的字节数（keep 为刚写入的文件，不删除）"""
+        with self._lock:
+            entries = [(mtime, path, size) for path, size, mtime in self._scan()]
+            total = sum(size for _, _, size in entries)
+            target = int(self.max_bytes * EVICT_TARGET_RATIO)
+
+            removed = 0
+            for mtime, path, size in sorted(entries):
+                if total - removed <= target:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    removed += size
+                except OSError:
+                    pass
+            self._size = total - removed
+            return removed
+
+    def _scan_size(self) -> int:
+        """扫描目录得到缓存总大小"""
+        return sum(size for _, size, _ in self._scan())
+
+    def _scan(self):
+        """遍历缓存文件，返回 (路径, 大小, 修改时间)（跳过写入中的临时文件）"""
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.startswith('.tmp-'):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
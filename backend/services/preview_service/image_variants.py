@@ -0,0 +1,186 @@
+# services/preview_service/image_variants.py
+"""图片缩略图/网页版本 - 按宽度档位和质量档位生成 WebP/JPEG，按内容哈希缓存在磁盘上
+
+列表和网格视图使用缩小后的图片，不再下载原图。生成时 JPEG 使用 draft 在解码阶段按 1/2、1/4、1/8 缩小，
+再用 thumbnail 缩小到目标宽度；上传后在后台线程中预先生成常用尺寸。
+"""
+import atexit
+import math
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from flask import current_app
+from PIL import Image, ImageOps
+
+from services.storage_service import fetch_local
+from .disk_cache import DiskLRUCache
+
+DEFAULT_WIDTHS = (160, 320, 640, 1280, 1920)
+DEFAULT_QUALITIES = {'low': 50, 'medium': 75, 'high': 85}
+DEFAULT_QUALITY = 'medium'
+FORMATS = {'webp': ('WEBP', 'image/webp'), 'jpeg': ('JPEG', 'image/jpeg')}
+
+_service_lock = threading.Lock()
+
+
+def render_variant(source_path: str, output, width: int, image_format: str, quality: int) -> Tuple[int, int]:
+    """生成缩小后的图片写入 output，返回 (宽, 高)；原图不比目标宽度大时不放大"""
+    with Image.open(source_path) as image:
+        # 按 EXIF 方向旋转 90° 的图片，解码前的宽度是旋转后的高度
+        orientation = image.getexif().get(0x0112, 1)
+        oriented_width = image.height if orientation in (5, 6, 7, 8) else image.width
+        scale = min(1.0, width / oriented_width)
+        # JPEG 在解码时直接按比例缩小（只影响 JPEG，其他格式忽略）
+        image.draft('RGB', (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+
+        # 动图只取第一帧（Image.open 默认停在第一帧）
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            image.thumbnail((width, image.height), Image.LANCZOS)
+
+        if FORMATS[image_format][0] == 'JPEG':
+            image = _flatten(image) if _has_alpha(image) else image.convert('RGB')
+            image.save(output, 'JPEG', quality=quality, optimize=True, progressive=True)
+        else:
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if _has_alpha(image) else 'RGB')
+            image.save(output, 'WEBP', quality=quality, method=4)
+        return image.size
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    """图片是否带透明通道"""
+    return image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """透明图片合成到白色背景（JPEG 不支持透明）"""
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+class ImageVariantService:
+    """图片缩略图服务：请求的宽度向上取到档位，(内容哈希, 宽度, 格式, 质量) 生成一次后从磁盘缓存读取"""
+
+    def __init__(self, config):
+        self.config = config
+        self.widths = sorted(config.get('IMAGE_VARIANT_WIDTHS') or DEFAULT_WIDTHS)
+        self.qualities = config.get('IMAGE_VARIANT_QUALITIES') or DEFAULT_QUALITIES
+        self.cache = DiskLRUCache(
+            config.get('IMAGE_VARIANT_CACHE_FOLDER') or os.path.join(config.get('UPLOAD_FOLDER', 'uploads'),
+                                                                     '.variants'),
+            config.get('IMAGE_VARIANT_CACHE_MAX_BYTES', 1024 * 1024 * 1024)
+        )
+        self.workers = config.get('IMAGE_VARIANT_WORKERS', 1)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def resolve(self, width: Optional[int], image_format: Optional[str], quality: Optional[str],
+                accept_webp: bool = True) -> Dict:
+        """校验并规范化请求参数：宽度取不小于请求值的档位（超过最大档位时取最大档位），
+        未指定格式时浏览器支持 WebP 则使用 WebP，否则使用 JPEG；参数无效时抛出 ValueError"""
+        if width is None:
+            width = self.widths[0]
+        if width <= 0:
+            raise ValueError('宽度必须大于 0')
+        bucket = next((candidate for candidate in self.widths if candidate >= width), self.widths[-1])
+
+        image_format = (image_format or ('webp' if accept_webp else 'jpeg')).lower()
+        if image_format == 'jpg':
+            image_format = 'jpeg'
+        if image_format not in FORMATS:
+            raise ValueError(f'不支持的图片格式: {image_format}')
+
+        quality = quality or self.config.get('IMAGE_VARIANT_DEFAULT_QUALITY', DEFAULT_QUALITY)
+        if quality not in self.qualities:
+            raise ValueError(f'不支持的质量档位: {quality}')
+
+        return {'width': bucket, 'format': image_format, 'quality': quality}
+
+    @staticmethod
+    def variant_key(file_hash: str, width: int, image_format: str, quality: str) -> str:
+        """缓存键：哈希前两位分目录"""
+        return f'{file_hash[:2]}/{file_hash}/w{width}-{quality}.{image_format}'
+
+    def get_variant(self, file_hash: str, location: str, width: int, image_format: str,
+                    quality: str) -> Tuple[str, str, str]:
+        """获取缩略图文件，未缓存时生成；返回 (文件路径, MIME 类型, ETag)"""
+        key = self.variant_key(file_hash, width, image_format, quality)
+        path = self.cache.get(key)
+        if path is None:
+            path = self._generate(key, location, width, image_format, quality)
+        return path, FORMATS[image_format][1], f'{file_hash}-w{width}-{quality}.{image_format}'
+
+    def _generate(self, key: str, location: str, width: int, image_format: str, quality: str) -> str:
+        """从存储中取出原图生成缩略图并写入缓存"""
+        source_path, is_temp = fetch_local(location, self.config)
+        try:
+            return self.cache.put(key, lambda output: render_variant(
+                source_path, output, width, image_format, self.qualities[quality]
+            ))
+        finally:
+            if is_temp:
+                os.remove(source_path)
+
+    def pregenerate(self, file_hash: str, location: str) -> Optional[Future]:
+        """生成上传后常用的尺寸（IMAGE_VARIANT_PREGENERATE 中的 (宽度, 格式)）
+
+        IMAGE_VARIANT_WORKERS 为 0 时在当前线程中生成，否则交给后台线程，返回 Future。
+        """
+        sizes = self.config.get('IMAGE_VARIANT_PREGENERATE', ((320, 'webp'), (640, 'webp')))
+        if not sizes or not file_hash or not location:
+            return None
+        if self.workers <= 0:
+            self._pregenerate(file_hash, location, sizes)
+            return None
+        return self._get_executor().submit(self._pregenerate, file_hash, location, sizes)
+
+    def _pregenerate(self, file_hash: str, location: str, sizes) -> int:
+        """生成尚未缓存的尺寸，返回生成的数量（失败只记录日志，不影响上传）"""
+        quality = self.config.get('IMAGE_VARIANT_DEFAULT_QUALITY', DEFAULT_QUALITY)
+        generated = 0
+        for width, image_format in sizes:
+            key = self.variant_key(file_hash, width, image_format, quality)
+            if self.cache.get(key) is not None:
+                continue
+            try:
+                self._generate(key, location, width, image_format, quality)
+                generated += 1
+            except Exception as e:
+                print(f"预生成缩略图失败 {file_hash} w{width}.{image_format}: {e}")
+                break
+        return generated
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """延迟创建预生成线程池（Pillow 解码、缩放和编码时释放 GIL）"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-variant')
+            return self._executor
+
+    def shutdown(self, wait: bool = False):
+        """关闭预生成线程池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=not wait)
+                self._executor = None
+
+
+def get_image_variant_service(app=None) -> ImageVariantService:
+    """获取应用的图片缩略图服务（缓存目录、预算、预生成尺寸由 IMAGE_VARIANT_* 配置）"""
+    app = app or current_app._get_current_object()
+    service = app.extensions.get('image_variants')
+    if service is not None:
+        return service
+
+    with _service_lock:
+        service = app.extensions.get('image_variants')
+        if service is None:
+            service = ImageVariantService(app.config)
+            app.extensions['image_variants'] = service
+            atexit.register(service.shutdown)
+    return service
@@ -0,0 +1,135 @@
+# services/preview_service/pdf_pages.py
+"""PDF 单页/页范围 - 把指定页面提取为独立的小 PDF，按 (内容哈希, 页范围) 缓存在磁盘上
+
+预览只需要前几页时不必下载整个文件（几百页的图纸集），阅读器先打开提取出的页面。
+解析 PDF 在提取沙箱的工作进程中执行（内存、CPU 时间和时间限制），畸形文件不会占满 Web 进程。
+"""
+import os
+import re
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from typing import Tuple
+
+import PyPDF2
+from flask import current_app
+
+from services.extraction_service import sandbox
+from services.extraction_service.batch_executor import BatchExecutor, get_batch_executor
+from services.storage_service import fetch_local
+from .disk_cache import DiskLRUCache
+
+_PAGE_RANGE = re.compile(r'^(\d+)(?:-(\d+))?$')
+
+_service_lock = threading.Lock()
+
+
+class PageNotFound(Exception):
+    """请求的页码超出文件页数"""
+
+
+class UnreadablePdf(Exception):
+    """PDF 无法解析：已加密、已损坏，或超过提取沙箱的时间/内存限制"""
+
+
+def parse_page_range(spec: str) -> Tuple[int, int]:
+    """解析页范围：'3' 或 '2-5'（页码从 1 开始），格式无效时抛出 ValueError"""
+    match = _PAGE_RANGE.match((spec or '').strip())
+    if not match:
+        raise ValueError(f'页码格式无效: {spec}')
+    start = int(match.group(1))
+    end = int(match.group(2) or start)
+    if start < 1 or end < start:
+        raise ValueError(f'页码范围无效: {spec}')
+    return start, end
+
+
+def write_pages(source_path: str, output, start: int, end: int) -> int:
+    """把 start-end 页写入 output 为独立 PDF，返回原文件页数；超出页数时抛出 PageNotFound
+
+    PdfWriter 只复制这些页面引用的对象（内容流、字体、图片），其余页面不会被解析。
+    有密码或无法解析时抛出 UnreadablePdf。
+    """
+    try:
+        reader = PyPDF2.PdfReader(source_path, strict=False)
+        if reader.is_encrypted and not reader.decrypt(''):
+            raise UnreadablePdf('PDF 已加密')
+        page_count = len(reader.pages)
+        if end > page_count:
+            raise PageNotFound(f'页码超出范围: 共 {page_count} 页')
+
+        writer = PyPDF2.PdfWriter()
+        for index in range(start - 1, end):
+            writer.add_page(reader.pages[index])
+        writer.write(output)
+        return page_count
+    except (PageNotFound, UnreadablePdf, OSError):
+        raise
+    except Exception as e:
+        # 畸形文件可能抛出 PdfReadError 以外的各种异常
+        raise UnreadablePdf(f'PDF 无法解析: {type(e).__name__}: {e}') from e
+
+
+def extract_pages(source_path: str, dest_path: str, start: int, end: int, timeout: float = None) -> int:
+    """提取沙箱工作进程中执行：把 start-end 页写入 dest_path，超过 timeout 秒抛出 ExtractionTimeout"""
+    with sandbox.time_limit(timeout):
+        with open(dest_path, 'wb') as output:
+            return write_pages(source_path, output, start, end)
+
+
+class PdfPageService:
+    """PDF 页面提取服务：(内容哈希, 页范围) 提取一次后从磁盘缓存读取，提取在沙箱工作进程中执行"""
+
+    def __init__(self, config, executor: BatchExecutor):
+        self.config = config
+        self.executor = executor
+        self.max_pages = config.get('PDF_PAGE_RANGE_MAX', 50)
+        self.timeout = config.get('PDF_PAGE_TIMEOUT', 20)
+        self.cache = DiskLRUCache(
+            config.get('PDF_PAGE_CACHE_FOLDER') or os.path.join(config.get('UPLOAD_FOLDER', 'uploads'), '.pages'),
+            config.get('PDF_PAGE_CACHE_MAX_BYTES', 1024 * 1024 * 1024)
+        )
+
+    @staticmethod
+    def page_key(file_hash: str, start: int, end: int) -> str:
+        """缓存键：哈希前两位分目录"""
+        return f'{file_hash[:2]}/{file_hash}/p{start}-{end}.pdf'
+
+    def get_pages(self, file_hash: str, location: str, start: int, end: int) -> Tuple[str, str]:
+        """获取页范围对应的 PDF 文件，未缓存时提取；返回 (文件路径, ETag)"""
+        if end - start + 1 > self.max_pages:
+            raise ValueError(f'一次最多提取 {self.max_pages} 页')
+
+        key = self.page_key(file_hash, start, end)
+        path = self.cache.get(key)
+        if path is None:
+            source_path, is_temp = fetch_local(location, self.config)
+            try:
+                path = self.cache.put_file(key, lambda temp_path: self._extract(source_path, temp_path, start, end))
+            finally:
+                if is_temp:
+                    os.remove(source_path)
+        return path, f'{file_hash}-p{start}-{end}'
+
+    def _extract(self, source_path: str, dest_path: str, start: int, end: int) -> None:
+        """在工作进程中提取页面；超时、超过内存限制或工作进程异常退出时抛出 UnreadablePdf"""
+        # 工作进程中的时间限制先到；进程卡在 C 代码中时请求最多多等 5 秒
+        wait = self.timeout + 5 if self.timeout else None
+        try:
+            self.executor.run(extract_pages, source_path, dest_path, start, end, self.timeout, timeout=wait)
+        except (sandbox.ExtractionTimeout, MemoryError, BrokenProcessPool, TimeoutError) as e:
+            raise UnreadablePdf(f'提取页面失败: {type(e).__name__}: {e}') from e
+
+
+def get_pdf_page_service(app=None) -> PdfPageService:
+    """获取应用的 PDF 页面提取服务（缓存目录、预算由 PDF_PAGE_* 配置）"""
+    app = app or current_app._get_current_object()
+    service = app.extensions.get('pdf_pages')
+    if service is not None:
+        return service
+
+    with _service_lock:
+        service = app.extensions.get('pdf_pages')
+        if service is None:
+            service = PdfPageService(app.config, get_batch_executor(app))
+            app.extensions['pdf_pages'] = service
+    return service
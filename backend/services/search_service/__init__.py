@@ -0,0 +1,6 @@
+# services/search_service/__init__.py
+"""全文检索服务"""
+from .full_text_search import FullTextSearch
+from .inverted_index import InvertedIndex
+
+__all__ = ['FullTextSearch', 'InvertedIndex']
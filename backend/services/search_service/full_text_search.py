@@ -0,0 +1,195 @@
+# services/search_service/full_text_search.py
+"""全文检索 - PostgreSQL 使用 tsvector/GIN 索引排序，其他数据库使用进程内倒排索引"""
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy import bindparam, desc, false, func, inspect
+from sqlalchemy.orm import undefer
+
+from models.search_vector import SEARCHABLE_MODELS, compute_search_vector
+from utils.search_tokenizer import make_snippet, query_terms, to_tsquery
+from .inverted_index import get_index
+
+# 构建倒排索引时每批读取的记录数
+INDEX_BUILD_BATCH = 1000
+# 倒排索引匹配数不超过该值时，用 IN 条件只查询匹配的记录
+IN_CLAUSE_LIMIT = 500
+# 生成摘要时从数据库截取的窗口（关键字前后的字符数）
+SNIPPET_WINDOW_BEFORE = 60
+SNIPPET_WINDOW_SIZE = 240
+
+
+class FullTextSearch:
+    """单个模型的全文检索"""
+    
+    def __init__(self, session, model_class):
+        if model_class not in SEARCHABLE_MODELS:
+            raise ValueError(f'{model_class.__name__} 未注册全文检索字段')
+        
+        self.session = session
+        self.model_class = model_class
+        self.engine = session.get_bind(mapper=inspect(model_class)).engine
+    
+    @property
+    def is_native(self) -> bool:
+        """是否使用数据库原生全文检索（PostgreSQL）"""
+        return self.engine.dialect.name == 'postgresql'
+    
+    def search(self, query, keyword: str, limit: int = None, offset: int = 0,
+               order_by: Sequence = ()) -> Tuple[List[Tuple[Any, float]], int]:
+        """
+        在已带过滤条件的查询上执行全文检索
+        返回 ([(记录, 相关度)], 匹配总数)，按相关度倒序；
+        相关度相同时 PostgreSQL 按 order_by 排序，倒排索引按ID倒序
+        """
+        terms = query_terms(keyword)
+        if not terms:
+            return [], 0
+        
+        if self.is_native:
+            return self._search_native(query, keyword, limit, offset, order_by)
+        return self._search_index(query, terms, limit, offset)
+    
+    def match(self, query, keyword: str):
+        """只追加全文匹配条件，不改变排序（列表分页使用）"""
+        terms = query_terms(keyword)
+        if not terms:
+            return query.filter(false())
+        
+        if self.is_native:
+            vector = self.model_class.__table__.c.search_vector
+            return query.filter(vector.op('@@')(func.to_tsquery('simple', to_tsquery(keyword))))
+        
+        matched = list(self.get_index().search(terms))
+        if not matched:
+            return query.filter(false())
+        # ID直接写入SQL，不受 SQLite 绑定参数个数的限制
+        return query.filter(self.model_class.id.in_(
+            bindparam('search_ids', matched, expanding=True, literal_execute=True)
+        ))
+    
+    def _search_native(self, query, keyword, limit, offset, order_by):
+        """PostgreSQL：@@ 匹配（走 GIN 索引），ts_rank 排序"""
+        vector = self.model_class.__table__.c.search_vector
+        tsquery = func.to_tsquery('simple', to_tsquery(keyword))
+        rank = func.ts_rank(vector, tsquery)
+        
+        query = query.filter(vector.op('@@')(tsquery))
+        total = query.order_by(None).count() if limit is not None else None
+        
+        query = query.add_columns(rank.label('search_rank'))
+        query = query.order_by(desc('search_rank'), *order_by).offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        
+        rows = [(record, float(rank_value or 0)) for record, rank_value in query.all()]
+        return rows, total if total is not None else len(rows)
+    
+    def _search_index(self, query, terms, limit, offset):
+        """其他数据库：匹配和排序在倒排索引中完成，过滤条件在数据库执行"""
+        model = self.model_class
+        
+        scores = self.get_index().search(terms)
+        if not scores:
+            return [], 0
+        
+        # 相关度倒序，相同时按ID倒序（ID按顺序分配，即新上传的在前）
+        ordered = sorted(scores, reverse=True)
+        ordered.sort(key=lambda doc_id: -scores[doc_id])
+        
+        # 查询带过滤条件时，只保留满足条件的ID；匹配较少时只查询匹配的ID
+        if query.whereclause is not None:
+            candidate_query = query.with_entities(model.id).order_by(None)
+            if len(scores) <= IN_CLAUSE_LIMIT:
+                candidate_query = candidate_query.filter(model.id.in_(list(scores)))
+            allowed = {row[0] for row in candidate_query.all()}
+            ordered = [doc_id for doc_id in ordered if doc_id in allowed]
+        
+        end = None if limit is None else offset + limit
+        page_ids = ordered[offset:end]
+        if not page_ids:
+            return [], len(ordered)
+        
+        records = {record.id: record for record in query.filter(model.id.in_(page_ids)).all()}
+        rows = [(records[doc_id], scores[doc_id]) for doc_id in page_ids if doc_id in records]
+        return rows, len(ordered)
+    
+    def get_index(self):
+        """获取倒排索引（首次使用时从 search_vector 列构建）"""
+        table_name = self.model_class.__tablename__
+        index, created = get_index(self.engine, table_name)
+        if created:
+            self._build_index(index)
+        return index
+    
+    def _build_index(self, index) -> None:
+        """从数据库分批读取检索向量构建倒排索引"""
+        table = self.model_class.__table__
+        last_id = None
+        while True:
+            statement = table.select().with_only_columns(table.c.id, table.c.search_vector)
+            if last_id is not None:
+                statement = statement.where(table.c.id > last_id)
+            rows = self.session.execute(
+                statement.order_by(table.c.id).limit(INDEX_BUILD_BATCH)
+            ).all()
+            if not rows:
+                break
+            for doc_id, document in rows:
+                if document:
+                    index.add(doc_id, document)
+            last_id = rows[-1][0]
+    
+    def get_snippets(self, ids: List[str], keyword: str, fields: Sequence[str],
+                     width: int = 100) -> Dict[str, str]:
+        """为检索结果生成摘要：数据库只返回关键字附近的一段文本，不读取整个大字段"""
+        if not ids:
+            return {}
+        
+        term = (keyword or '').strip().lower()
+        columns = [self._snippet_window(getattr(self.model_class, field), term) for field in fields]
+        
+        snippets = {}
+        rows = self.session.query(self.model_class.id, *columns).filter(
+            self.model_class.id.in_(ids)
+        ).all()
+        for row in rows:
+            windows = [window for window in row[1:] if window]
+            # 优先使用包含关键字的字段
+            matched = [window for window in windows if term and term in window.lower()]
+            text = (matched or windows or [''])[0]
+            snippets[row[0]] = make_snippet(text, keyword, width)
+        return snippets
+    
+    def _snippet_window(self, column, term: str):
+        """截取关键字所在位置附近的文本窗口（找不到关键字时取开头）"""
+        return snippet_window(column, term, self.is_native)
+    
+    def rebuild(self, batch_size: int = 500) -> int:
+        """重新计算所有记录的检索向量（旧数据回填），返回处理的记录数"""
+        model = self.model_class
+        dialect_name = self.engine.dialect.name
+        title_fields, body_fields = SEARCHABLE_MODELS[model]
+        load_fields = [undefer(getattr(model, field)) for field in title_fields + body_fields]
+        processed = 0
+        last_id = None
+        while True:
+            query = self.session.query(model).options(*load_fields).order_by(model.id)
+            if last_id is not None:
+                query = query.filter(model.id > last_id)
+            records = query.limit(batch_size).all()
+            if not records:
+                break
+            for record in records:
+                record.search_vector = compute_search_vector(record, dialect_name)
+            last_id = records[-1].id
+            self.session.commit()
+            processed += len(records)
+        return processed
+
+
+def snippet_window(column, term: str, is_postgresql: bool):
+    """截取列中关键字所在位置附近的文本窗口（找不到关键字时取开头），数据库只返回这一段文本"""
+    greatest = func.greatest if is_postgresql else func.max
+    position = func.strpos(func.lower(column), term) if is_postgresql \
+        else func.instr(func.lower(column), term)
+    return func.substr(column, greatest(position - SNIPPET_WINDOW_BEFORE, 1), SNIPPET_WINDOW_SIZE)
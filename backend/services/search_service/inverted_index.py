@@ -0,0 +1,124 @@
+# services/search_service/inverted_index.py
+"""进程内倒排索引 - 不支持 tsvector 的数据库（如测试用的 SQLite）使用"""
+import math
+import threading
+import weakref
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from utils.search_tokenizer import is_prefix_term
+
+# 标题词权重高于正文词
+TITLE_WEIGHT = 2.0
+BODY_WEIGHT = 1.0
+
+
+def parse_document(document: str) -> Dict[str, float]:
+    """解析回退存储格式 "标题词...\\n正文词..." 为 词 -> 权重"""
+    weights = {}
+    if not document:
+        return weights
+    title, _, body = document.partition('\n')
+    for token in body.split():
+        weights[token] = BODY_WEIGHT
+    for token in title.split():
+        weights[token] = TITLE_WEIGHT
+    return weights
+
+
+class InvertedIndex:
+    """倒排索引：词 -> {文档ID: 权重}"""
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._documents: Dict[str, Dict[str, float]] = {}
+    
+    def __len__(self):
+        return len(self._documents)
+    
+    def add(self, doc_id: str, document: str) -> None:
+        """添加或替换文档"""
+        with self._lock:
+            self.remove(doc_id)
+            weights = parse_document(document)
+            self._documents[doc_id] = weights
+            for token, weight in weights.items():
+                self._postings[token][doc_id] = weight
+    
+    def remove(self, doc_id: str) -> None:
+        """删除文档"""
+        with self._lock:
+            weights = self._documents.pop(doc_id, None)
+            for token in weights or {}:
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[token]
+    
+    def _match_term(self, term: str) -> Dict[str, float]:
+        """单个查询词匹配的文档（前缀词合并所有以其开头的词）"""
+        if not is_prefix_term(term):
+            return dict(self._postings.get(term, {}))
+        
+        matched: Dict[str, float] = {}
+        for token, postings in self._postings.items():
+            if token.startswith(term):
+                for doc_id, weight in postings.items():
+                    matched[doc_id] = max(matched.get(doc_id, 0.0), weight)
+        return matched
+    
+    def search(self, terms: List[str], candidates: Optional[set] = None) -> Dict[str, float]:
+        """查询：所有词都匹配的文档及得分（权重 × 逆文档频率）"""
+        if not terms:
+            return {}
+        
+        with self._lock:
+            total = max(len(self._documents), 1)
+            scores: Optional[Dict[str, float]] = None
+            
+            # 先处理匹配文档少的词，尽早缩小结果集
+            matches = sorted((self._match_term(term) for term in terms), key=len)
+            for matched in matches:
+                idf = math.log(1 + total / (1 + len(matched)))
+                if scores is None:
+                    scores = {
+                        doc_id: weight * idf for doc_id, weight in matched.items()
+                        if candidates is None or doc_id in candidates
+                    }
+                else:
+                    scores = {
+                        doc_id: score + matched[doc_id] * idf
+                        for doc_id, score in scores.items() if doc_id in matched
+                    }
+                if not scores:
+                    return {}
+            return scores or {}
+
+
+# 引擎 -> {表名: 倒排索引}；测试中多个内存数据库的URL相同，因此按引擎对象区分
+_indexes = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_index(engine, table_name: str) -> Tuple[InvertedIndex, bool]:
+    """获取（或创建）数据库表对应的倒排索引，返回 (索引, 是否新建)"""
+    with _indexes_lock:
+        tables = _indexes.setdefault(engine, {})
+        index = tables.get(table_name)
+        if index is not None:
+            return index, False
+        index = tables[table_name] = InvertedIndex()
+        return index, True
+
+
+def peek_index(engine, table_name: str) -> Optional[InvertedIndex]:
+    """获取已建立的倒排索引（未建立时返回 None）"""
+    return _indexes.get(engine, {}).get(table_name)
+
+
+def drop_index(engine, table_name: str) -> None:
+    """丢弃倒排索引（下次查询时重新构建）"""
+    with _indexes_lock:
+        _indexes.get(engine, {}).pop(table_name, None)
@@ -0,0 +1,129 @@
+# services/storage_service/__init__.py
+"""文件存储后端
+
+STORAGE_BACKEND 配置为 local（默认，保存在 UPLOAD_FOLDER）或 s3（S3 兼容对象存储）。
+数据库中的 file_path / blob_path 保存位置字符串，本地为文件路径，S3 为 s3://<bucket>/<key>；
+切换后端后已有记录仍按原位置读取。
+"""
+import os
+import tempfile
+import threading
+from typing import Optional, Tuple
+
+from .base import StorageBackend
+from .local_storage import LocalStorage
+from .s3_storage import LOCATION_SCHEME as S3_SCHEME, S3Storage
+
+BLOB_ROOT = 'sha256'
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def _get_config(config=None):
+    """未传入配置时使用当前应用的配置"""
+    if config:
+        return config
+    try:
+        from flask import current_app
+        return current_app.config
+    except RuntimeError:
+        return {}
+
+
+def _cached(cache_key, factory) -> StorageBackend:
+    with _backends_lock:
+        backend = _backends.get(cache_key)
+        if backend is None:
+            backend = _backends[cache_key] = factory()
+        return backend
+
+
+def _local_storage(config) -> LocalStorage:
+    root = os.path.abspath(config.get('UPLOAD_FOLDER', 'uploads'))
+    return _cached(('local', root), lambda: LocalStorage(root))
+
+
+def _s3_storage(config, bucket: str = None) -> S3Storage:
+    bucket = bucket or config.get('S3_BUCKET')
+    cache_key = ('s3', bucket, config.get('S3_PREFIX', ''), config.get('S3_ENDPOINT_URL'))
+    return _cached(cache_key, lambda: S3Storage.from_config(config, bucket))
+
+
+def get_storage(config=None) -> StorageBackend:
+    """获取配置的存储后端（新文件保存到这里）"""
+    config = _get_config(config)
+    if config.get('STORAGE_BACKEND', 'local') == 's3':
+        return _s3_storage(config)
+    return _local_storage(config)
+
+
+def blob_key(file_hash: str) -> str:
+    """内容寻址存储的键：sha256/ab/cd/<hash>"""
+    return f'{BLOB_ROOT}/{file_hash[:2]}/{file_hash[2:4]}/{file_hash}'
+
+
+def resolve_location(location: str, config=None) -> Tuple[StorageBackend, str]:
+    """根据位置字符串找到所在的存储后端和键"""
+    config = _get_config(config)
+    if location.startswith(S3_SCHEME):
+        bucket, _ = S3Storage.parse_location(location)
+        backend = _s3_storage(config, bucket)
+    else:
+        backend = _local_storage(config)
+    return backend, backend.key_for(location)
+
+
+def location_exists(location: Optional[str], config=None) -> bool:
+    """位置中的内容是否存在"""
+    if not location:
+        return False
+    backend, key = resolve_location(location, config)
+    return backend.exists(key)
+
+
+def delete_location(location: Optional[str], config=None) -> bool:
+    """删除位置中的内容（不存在时返回 False）"""
+    if not location:
+        return False
+    try:
+        backend, key = resolve_location(location, config)
+        return backend.delete(key)
+    except Exception as e:
+        print(f"删除存储文件失败 {location}: {e}")
+        return False
+
+
+def local_path_for(location: Optional[str], config=None) -> Optional[str]:
+    """本地存储的文件路径；远程存储或文件不存在时返回 None"""
+    if not location:
+        return None
+    backend, key = resolve_location(location, config)
+    return backend.local_path(key)
+
+
+def fetch_local(location: str, config=None) -> Tuple[str, bool]:
+    """获取可以直接读取的本地文件（提取文本等需要文件路径的场景）
+
+    返回 (本地路径, 是否为临时文件)；远程存储的内容下载到临时文件，使用后由调用方删除。
+    """
+    backend, key = resolve_location(location, config)
+    path = backend.local_path(key)
+    if path:
+        return path, False
+    
+    fd, temp_path = tempfile.mkstemp(prefix='.fetch-', suffix=os.path.splitext(key)[1])
+    os.close(fd)
+    try:
+        backend.fetch(key, temp_path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+    return temp_path, True
+
+
+__all__ = [
+    'StorageBackend', 'LocalStorage', 'S3Storage', 'BLOB_ROOT',
+    'get_storage', 'blob_key', 'resolve_location', 'location_exists',
+    'delete_location', 'local_path_for', 'fetch_local'
+]
@@ -0,0 +1,63 @@
+# services/storage_service/base.py
+"""文件存储后端接口"""
+from typing import BinaryIO, Iterator, Optional
+
+
+class StorageBackend:
+    """文件存储后端 - 按键（如 sha256/ab/cd/<hash>）保存文件内容
+
+    数据库中保存的是 location(key) 生成的位置字符串（本地为绝对路径，S3 为 s3://bucket/key），
+    读取和删除时由 services.storage_service.resolve_location 找回对应的后端和键。
+    """
+    
+    name = None
+    
+    def location(self, key: str) -> str:
+        """键对应的位置字符串（保存到 file_path / blob_path）"""
+        raise NotImplementedError
+    
+    def exists(self, key: str) -> bool:
+        """内容是否存在"""
+        raise NotImplementedError
+    
+    def store(self, temp_path: str, key: str) -> None:
+        """保存临时文件的内容（临时文件会被移动或删除）"""
+        raise NotImplementedError
+    
+    def store_copy(self, source_path: str, key: str) -> None:
+        """保存本地文件的副本（源文件保留）"""
+        raise NotImplementedError
+    
+    def delete(self, key: str) -> bool:
+        """删除内容，返回是否删除"""
+        raise NotImplementedError
+    
+    def size(self, key: str) -> Optional[int]:
+        """内容大小，不存在时返回 None"""
+        raise NotImplementedError
+    
+    def open(self, key: str) -> BinaryIO:
+        """打开只读数据流"""
+        raise NotImplementedError
+    
+    def local_path(self, key: str) -> Optional[str]:
+        """本地文件路径（可以直接 sendfile）；远程存储返回 None"""
+        return None
+    
+    def fetch(self, key: str, dest_path: str) -> None:
+        """下载到本地文件"""
+        raise NotImplementedError
+    
+    def iter_chunks(self, key: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """分块读取内容"""
+        with self.open(key) as stream:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    
+    def presigned_url(self, key: str, download_name: str = None, as_attachment: bool = False,
+                      expires: int = 300) -> Optional[str]:
+        """生成客户端直接下载的临时地址；不支持时返回 None"""
+        return None
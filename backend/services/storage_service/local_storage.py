@@ -0,0 +1,85 @@
+# services/storage_service/local_storage.py
+"""本地文件系统存储后端"""
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Optional
+
+from .base import StorageBackend
+
+
+class LocalStorage(StorageBackend):
+    """本地文件系统存储 - 键对应 root 下的相对路径；绝对路径（旧存储方式的文件）按原样访问"""
+    
+    name = 'local'
+    
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+    
+    def _path(self, key: str) -> str:
+        """键对应的文件路径"""
+        if os.path.isabs(key):
+            return key
+        return os.path.join(self.root, *key.split('/'))
+    
+    def key_for(self, location: str) -> str:
+        """位置字符串对应的键（root 下的文件为相对路径，其他文件为绝对路径）"""
+        path = os.path.abspath(location)
+        if path.startswith(self.root + os.sep):
+            return os.path.relpath(path, self.root).replace(os.sep, '/')
+        return path
+    
+    def location(self, key: str) -> str:
+        return self._path(key)
+    
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+    
+    def store(self, temp_path: str, key: str) -> None:
+        """原子重命名到目标位置（临时文件需与目标在同一文件系统）"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.replace(temp_path, path)
+        except OSError:
+            # 跨文件系统时先复制再删除临时文件
+            self.store_copy(temp_path, key)
+            os.remove(temp_path)
+    
+    def store_copy(self, source_path: str, key: str) -> None:
+        """复制文件到目标位置（先写临时文件再原子重命名）"""
+        path = self._path(key)
+        target_dir = os.path.dirname(path)
+        os.makedirs(target_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=target_dir, prefix='.copy-', suffix='.part')
+        os.close(fd)
+        try:
+            shutil.copyfile(source_path, temp_path)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._path(key))
+        except OSError:
+            return None
+    
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), 'rb')
+    
+    def local_path(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        return path if os.path.exists(path) else None
+    
+    def fetch(self, key: str, dest_path: str) -> None:
+        shutil.copyfile(self._path(key), dest_path)
@@ -0,0 +1,112 @@
+# services/storage_service/s3_storage.py
+"""S3 兼容对象存储后端（AWS S3 / MinIO 等，依赖 boto3）"""
+import os
+from typing import BinaryIO, Optional
+from urllib.parse import quote
+
+from .base import StorageBackend
+
+LOCATION_SCHEME = 's3://'
+
+
+class S3Storage(StorageBackend):
+    """S3 兼容对象存储 - 位置字符串为 s3://<bucket>/<prefix><key>
+
+    endpoint_url 指向 MinIO、moto server 等兼容服务时可在本地测试。
+    """
+    
+    name = 's3'
+    
+    def __init__(self, bucket: str, prefix: str = '', endpoint_url: str = None, region: str = None,
+                 access_key_id: str = None, secret_access_key: str = None):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise RuntimeError('使用 S3 存储需要安装 boto3（pip install boto3）')
+        
+        if not bucket:
+            raise ValueError('S3 存储需要配置 S3_BUCKET')
+        
+        self.bucket = bucket
+        self.prefix = prefix or ''
+        self._client_error = ClientError
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key
+        )
+    
+    @classmethod
+    def from_config(cls, config, bucket: str = None) -> 'S3Storage':
+        """根据配置创建（bucket 指定时使用该存储桶，用于读取其他存储桶中的旧文件）"""
+        return cls(
+            bucket=bucket or config.get('S3_BUCKET'),
+            prefix=config.get('S3_PREFIX', '') if not bucket or bucket == config.get('S3_BUCKET') else '',
+            endpoint_url=config.get('S3_ENDPOINT_URL'),
+            region=config.get('S3_REGION'),
+            access_key_id=config.get('S3_ACCESS_KEY_ID'),
+            secret_access_key=config.get('S3_SECRET_ACCESS_KEY')
+        )
+    
+    @staticmethod
+    def parse_location(location: str):
+        """s3://bucket/object_key -> (bucket, object_key)"""
+        bucket, _, object_key = location[len(LOCATION_SCHEME):].partition('/')
+        return bucket, object_key
+    
+    def key_for(self, location: str) -> str:
+        """位置字符串对应的键"""
+        _, object_key = self.parse_location(location)
+        if self.prefix and object_key.startswith(self.prefix):
+            return object_key[len(self.prefix):]
+        return object_key
+    
+    def _object_key(self, key: str) -> str:
+        return f'{self.prefix}{key}'
+    
+    def location(self, key: str) -> str:
+        return f'{LOCATION_SCHEME}{self.bucket}/{self._object_key(key)}'
+    
+    def _head(self, key: str) -> Optional[dict]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except self._client_error as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+    
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+    
+    def store(self, temp_path: str, key: str) -> None:
+        """上传后删除临时文件（大文件由 boto3 自动分片上传）"""
+        self.store_copy(temp_path, key)
+        os.remove(temp_path)
+    
+    def store_copy(self, source_path: str, key: str) -> None:
+        self.client.upload_file(source_path, self.bucket, self._object_key(key))
+    
+    def delete(self, key: str) -> bool:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        return True
+    
+    def size(self, key: str) -> Optional[int]:
+        head = self._head(key)
+        return head['ContentLength'] if head else None
+    
+    def open(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))['Body']
+    
+    def fetch(self, key: str, dest_path: str) -> None:
+        self.client.download_file(self.bucket, self._object_key(key), dest_path)
+    
+    def presigned_url(self, key: str, download_name: str = None, as_attachment: bool = False,
+                      expires: int = 300) -> Optional[str]:
+        params = {'Bucket': self.bucket, 'Key': self._object_key(key)}
+        if download_name:
+            disposition = 'attachment' if as_attachment else 'inline'
+            params['ResponseContentDisposition'] = f"{disposition}; filename*=UTF-8''{quote(download_name)}"
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=expires)
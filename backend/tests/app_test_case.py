@@ -0,0 +1,59 @@
+# tests/app_test_case.py
+"""测试公共基类 - 每个测试创建使用内存 SQLite 的 Flask 应用并建表"""
+import importlib
+import os
+import pkgutil
+import shutil
+import sys
+import tempfile
+import unittest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+
+def import_models():
+    """导入 models 包中的全部模块（create_all 只创建已导入的模型对应的表）"""
+    import models
+
+    for module in pkgutil.iter_modules(models.__path__):
+        importlib.import_module(f'models.{module.name}')
+
+
+class AppTestCase(unittest.TestCase):
+    """数据库测试基类：self.app / self.db，测试期间保持应用上下文，结束后删除所有表
+
+    子类重写 app_config() 补充应用配置（每个测试调用一次，可以返回新的临时目录）。
+    """
+
+    def app_config(self):
+        """测试应用的额外配置"""
+        return {}
+
+    def temp_dir(self):
+        """创建临时目录，测试结束后删除"""
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        return path
+
+    def setUp(self):
+        from models import init_app
+
+        import_models()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        self.app.config.update(self.app_config())
+        self.db = init_app(self.app)
+        self.app.db = self.db
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.db.create_all()
+
+    def tearDown(self):
+        self.db.session.remove()
+        self.db.drop_all()
+        self.ctx.pop()
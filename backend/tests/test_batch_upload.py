@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+from sqlalchemy import event
+from werkzeug.datastructures import FileStorage
+
+
+class TestBatchUpload(AppTestCase):
+    """测试批量上传（并行提取元数据，单事务批量插入）"""
+
+    def app_config(self):
+        return {
+            'UPLOAD_FOLDER': tempfile.mkdtemp(),
+            'ALLOWED_EXTENSIONS': {'1': ['pdf']},
+            'MAX_CONTENT_LENGTH': 1024 * 1024,
+            'EXTRACTION_ASYNC': False,
+            'UPLOAD_BATCH_WORKERS': 1
+        }
+
+    def _upload(self, content, filename):
+        return FileStorage(stream=io.BytesIO(content), filename=filename, content_type='application/pdf')
+
+    def test_batch_upload_single_commit_with_per_file_results(self):
+        from models.contract_model import ContractModel
+        from models.file_blob_model import FileBlobModel
+        from repositories.file_repositorie.file_repository import FileRepository
+
+        files = [
+            self._upload(b'%PDF-1.4 first', 'a.pdf'),
+            self._upload(b'%PDF-1.4 second', 'b.pdf'),
+            self._upload(b'%PDF-1.4 first', 'a-copy.pdf'),
+            self._upload(b'not a pdf', 'notes.txt')
+        ]
+
+        commits = []
+        on_commit = lambda *args: commits.append(1)
+        event.listen(self.db.engine, 'commit', on_commit)
+        try:
+            results = FileRepository(self.db, self.app.config).batch_upload_files(
+                files, '1', company_id='company_00001'
+            )
+        finally:
+            event.remove(self.db.engine, 'commit', on_commit)
+
+        self.assertEqual(len(commits), 1)
+        self.assertEqual([item['file']['originalName'] for item in results['success']],
+                         ['a.pdf', 'b.pdf', 'a-copy.pdf'])
+        self.assertEqual([item['filename'] for item in results['failed']], ['notes.txt'])
+        self.assertTrue(all(item['contract']['fileId'] == item['file']['id'] for item in results['success']))
+        self.assertEqual(ContractModel.query.count(), 3)
+        self.assertEqual(sorted(blob.ref_count for blob in FileBlobModel.query.all()), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
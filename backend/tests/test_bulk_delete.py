@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+
+
+class TestBulkDelete(AppTestCase):
+    """测试批量删除（分批 DELETE ... WHERE id IN，单事务提交）"""
+    
+    def setUp(self):
+        from models.file_upd_model import FileUpdModel
+        from models.contract_model import ContractModel
+        
+        super().setUp()
+        self.upload_dir = tempfile.mkdtemp()
+        self.FileUpdModel = FileUpdModel
+        self.ContractModel = ContractModel
+    
+    def _add_file(self, file_id, file_path):
+        with open(file_path, 'wb') as f:
+            f.write(b'%PDF-1.4')
+        self.db.session.add(self.FileUpdModel(
+            id=file_id,
+            company_id='company_00001',
+            original_name=f'{file_id}.pdf',
+            stored_name=f'{file_id}.pdf',
+            file_type='1',
+            file_size=8,
+            file_path=file_path
+        ))
+        self.db.session.add(self.ContractModel(file_id=file_id, company_id='company_00001'))
+        self.db.session.commit()
+    
+    def test_bulk_delete_reports_per_id(self):
+        from repositories.base_repository import BaseRepository
+        
+        for i in range(5):
+            self._add_file(f'file_{i:03d}', os.path.join(self.upload_dir, f'{i}.pdf'))
+        
+        result = BaseRepository(self.FileUpdModel, self.db).bulk_delete(
+            ['file_000', 'file_missing', 'file_003', 'file_000'], chunk_size=1
+        )
+        self.assertEqual(result, {'deleted': ['file_000', 'file_003'], 'missing': ['file_missing']})
+        self.assertEqual(self.FileUpdModel.query.count(), 3)
+    
+    def test_batch_delete_files_removes_contracts_and_unshared_files(self):
+        """同时删除关联合同；其他记录仍引用的物理文件保留"""
+        from repositories.file_repositorie.file_repository import FileRepository
+        from utils.file_utils import wait_for_removals
+        
+        shared_path = os.path.join(self.upload_dir, 'shared.pdf')
+        own_path = os.path.join(self.upload_dir, 'own.pdf')
+        self._add_file('file_001', shared_path)
+        self._add_file('file_002', shared_path)
+        self._add_file('file_003', own_path)
+        
+        results = FileRepository(self.db).batch_delete_files(['file_001', 'file_003', 'file_404'])
+        wait_for_removals()
+        
+        self.assertEqual(results['deleted'], ['file_001', 'file_003'])
+        self.assertEqual([item['file_id'] for item in results['failed']], ['file_404'])
+        self.assertEqual([c.file_id for c in self.ContractModel.query.all()], ['file_002'])
+        self.assertTrue(os.path.exists(shared_path))
+        self.assertFalse(os.path.exists(own_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, exc, text
+
+
+class TestDbPool(unittest.TestCase):
+    """测试连接池配置映射和监控指标"""
+    
+    def test_build_engine_options(self):
+        """database.json 的 pool 配置映射为 SQLAlchemy 引擎参数"""
+        from utils.db_pool import MonitoredQueuePool, build_engine_options
+        
+        options = build_engine_options({'max': 20, 'min': 5, 'acquire': 30000, 'idle': 10000})
+        self.assertIs(options['poolclass'], MonitoredQueuePool)
+        self.assertEqual(options['pool_size'], 5)
+        self.assertEqual(options['max_overflow'], 15)
+        self.assertEqual(options['pool_timeout'], 30)
+        self.assertNotIn('pool_recycle', options)
+        self.assertTrue(options['pool_pre_ping'])
+        
+        # 连接重建时间单独配置，与空闲时间无关
+        options = build_engine_options({'max': 20, 'min': 5, 'idle': 10000, 'recycle': 3600000})
+        self.assertEqual(options['pool_recycle'], 3600)
+        
+        # min 为 0 时常驻连接至少1个（SQLAlchemy 中 pool_size=0 表示不限制）
+        options = build_engine_options({'max': 5, 'min': 0})
+        self.assertEqual((options['pool_size'], options['max_overflow']), (1, 4))
+        
+        self.assertEqual(build_engine_options(None), {'pool_pre_ping': True})
+    
+    def test_metrics_under_saturation(self):
+        """连接用尽时获取连接超时，并记录到监控指标"""
+        from utils.db_pool import build_engine_options, get_pool_metrics
+        
+        db_path = os.path.join(tempfile.mkdtemp(), 'pool.db')
+        engine = create_engine(
+            f'sqlite:///{db_path}',
+            **build_engine_options({'max': 2, 'min': 1, 'acquire': 1000})
+        )
+        try:
+            first = engine.connect()
+            second = engine.connect()
+            first.execute(text('SELECT 1'))
+            
+            metrics = get_pool_metrics(engine)
+            self.assertEqual(metrics['checkedOut'], 2)
+            self.assertEqual(metrics['overflow'], 1)
+            
+            with self.assertRaises(exc.TimeoutError):
+                engine.connect()
+            
+            first.close()
+            second.close()
+            metrics = get_pool_metrics(engine)
+            self.assertEqual(metrics['checkedOut'], 0)
+            self.assertEqual(metrics['timeouts'], 1)
+            self.assertEqual(metrics['connects'], 2)
+        finally:
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+from werkzeug.datastructures import FileStorage
+
+
+class TestExtractionCache(AppTestCase):
+    """测试提取结果缓存：相同内容不再重复提取，版本升级失效，超过容量按最近使用淘汰"""
+
+    EXTRACTED = {
+        'page_count': 2,
+        'page_width': 595,
+        'page_height': 842,
+        'has_ocr': False,
+        'ocr_confidence': 0.0,
+        'language': 'zh',
+        'text_content': '施工合同',
+        'page_texts': ['施工合同', '']
+    }
+
+    def app_config(self):
+        return {
+            'UPLOAD_FOLDER': tempfile.mkdtemp(),
+            'ALLOWED_EXTENSIONS': {'1': ['pdf']},
+            'EXTRACTION_ASYNC': False
+        }
+
+    def _upload(self, file_repo, name):
+        upload = FileStorage(stream=io.BytesIO(b'%PDF-1.4 same content'), filename=name,
+                             content_type='application/pdf')
+        return file_repo.save_uploaded_file(upload, '2', company_id='company_00001')['file']['id']
+
+    def test_upload_uses_cache_after_records_removed(self):
+        from models.extraction_cache_model import ExtractionCacheModel
+        from repositories.file_repositorie.file_repository import FileRepository
+
+        file_repo = FileRepository(self.db, self.app.config)
+        with mock.patch('repositories.file_repositorie.file_repository.FileRepository._extract_file',
+                        return_value=dict(self.EXTRACTED)) as extract_file:
+            first = self._upload(file_repo, 'a.pdf')
+            entry = ExtractionCacheModel.query.one()
+            self.assertEqual((entry.page_count, entry.width, entry.height, entry.language), (2, 595, 842, 'zh'))
+
+            # 所有相同内容的记录删除后再次上传，从缓存取得结果
+            file_repo.delete_file_with_physical(first)
+            second = self._upload(file_repo, 'b.pdf')
+            self.assertEqual(extract_file.call_count, 1)
+
+        record = file_repo.get_by_id(second)
+        self.assertEqual(record.page_count, 2)
+        self.assertEqual(record.text_content, '施工合同')
+        self.assertEqual(record.extraction_status, 'completed')
+        self.assertEqual(file_repo.page_repo.search_pages([second], '施工')[second]['pages'][0]['page'], 1)
+
+        # 提取器版本升级后旧结果不再命中
+        from services.extraction_service import extractors
+        with mock.patch.object(extractors, 'EXTRACTOR_VERSION', extractors.EXTRACTOR_VERSION + 1):
+            self.assertIsNone(FileRepository(self.db, self.app.config).cache_repo.get(record.file_hash))
+
+    def test_eviction_by_size_and_version(self):
+        from models.extraction_cache_model import ExtractionCacheModel
+        from repositories.file_repositorie.extraction_cache_repository import ExtractionCacheRepository
+
+        cache = ExtractionCacheRepository(self.db, {'EXTRACTION_CACHE_MAX_BYTES': 1000})
+        self.db.session.add(ExtractionCacheModel(file_hash='old', extractor_version=cache.version - 1,
+                                                 size_bytes=300))
+        text = 'x' * 300
+        cache.put('a' * 64, {'text_content': text})
+        cache.put('b' * 64, {'text_content': text})
+        self.db.session.commit()
+        self.assertEqual(ExtractionCacheModel.query.count(), 3)
+
+        # 超过容量时先删除旧版本的结果；'a' 最近被读取，再淘汰最久未使用的 'b'
+        entry = self.db.session.get(ExtractionCacheModel, ('b' * 64, cache.version))
+        entry.last_used_at -= timedelta(days=1)
+        self.db.session.commit()
+        self.assertEqual(cache.get('a' * 64)['text_content'], text)
+        cache.put('c' * 64, {'text_content': text})
+        self.db.session.commit()
+
+        self.assertIsNone(self.db.session.get(ExtractionCacheModel, ('old', cache.version - 1)))
+        remaining = {entry.file_hash[0] for entry in ExtractionCacheModel.query.all()}
+        self.assertEqual(remaining, {'a', 'c'})
+
+
+if __name__ == '__main__':
+    unittest.main()
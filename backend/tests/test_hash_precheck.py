@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+import io
+import hashlib
+import tempfile
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+from werkzeug.datastructures import FileStorage
+
+
+class TestHashPrecheck(AppTestCase):
+    """测试秒传：内容已存在时按哈希创建文件记录，不传输文件内容"""
+
+    def app_config(self):
+        return {
+            'UPLOAD_FOLDER': tempfile.mkdtemp(),
+            'ALLOWED_EXTENSIONS': {'1': ['pdf']},
+            'EXTRACTION_ASYNC': False
+        }
+
+    def test_create_from_existing_hash(self):
+        from models.contract_model import ContractModel
+        from models.file_blob_model import FileBlobModel
+        from repositories.file_repositorie.file_repository import FileRepository
+
+        data = b'%PDF-1.4 drawing set'
+        file_hash = hashlib.sha256(data).hexdigest()
+        file_repo = FileRepository(self.db, self.app.config)
+
+        self.assertIsNone(file_repo.create_from_existing_hash(file_hash, 'a.pdf', '1', 'company_00001'))
+
+        upload = FileStorage(stream=io.BytesIO(data), filename='a.pdf', content_type='application/pdf')
+        first = file_repo.save_uploaded_file(upload, '1', company_id='company_00001')
+
+        result = file_repo.create_from_existing_hash(file_hash, 'b.pdf', '1', 'company_00002')
+        self.assertEqual(result['file']['originalName'], 'b.pdf')
+        self.assertEqual(result['file']['size'], len(data))
+        self.assertEqual(result['contract']['companyId'], 'company_00002')
+        self.assertEqual(ContractModel.query.count(), 2)
+        self.assertEqual(self.db.session.get(FileBlobModel, file_hash).ref_count, 2)
+        self.assertEqual(file_repo.get_file_content(result['file']['id']), data)
+
+        # 删除原上传后内容仍被新记录引用
+        file_repo.delete_file_with_physical(first['file']['id'])
+        self.assertEqual(file_repo.get_file_content(result['file']['id']), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
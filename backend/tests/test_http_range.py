@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+
+class TestHttpRange(unittest.TestCase):
+    """测试文件下载的 Range 分段请求、ETag 和条件请求"""
+
+    FILE_HASH = 'ab' * 32
+
+    def setUp(self):
+        from utils.http_utils import send_stored_file
+
+        fd, self.file_path = tempfile.mkstemp(suffix='.pdf')
+        self.data = bytes(range(256)) * 4
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self.data)
+
+        self.app = Flask(__name__)
+
+        @self.app.route('/file')
+        def download():
+            return send_stored_file(self.file_path, mimetype='application/pdf',
+                                    download_name='图纸.pdf', file_hash=self.FILE_HASH)
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def test_single_and_multiple_ranges(self):
+        response = self.client.get('/file', headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, self.data[10:20])
+
+        # 重叠分段合并为一段
+        response = self.client.get('/file', headers={'Range': 'bytes=0-9,5-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers['Content-Range'], f'bytes 0-19/{len(self.data)}')
+
+        response = self.client.get('/file', headers={'Range': 'bytes=0-3,-4'})
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.headers['Content-Type'].startswith('multipart/byteranges'))
+        self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+        self.assertIn(self.data[:4], response.data)
+        self.assertIn(self.data[-4:], response.data)
+
+        response = self.client.get('/file', headers={'Range': f'bytes={len(self.data)}-'})
+        self.assertEqual(response.status_code, 416)
+
+    def test_etag_and_cache_headers(self):
+        response = self.client.get('/file')
+        self.assertEqual(response.headers['ETag'], f'"{self.FILE_HASH}"')
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+        self.assertIn("filename*=UTF-8''", response.headers['Content-Disposition'])
+
+        response = self.client.get('/file', headers={'If-None-Match': f'"{self.FILE_HASH}"'})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get('/file', headers={'If-None-Match': f'"{self.FILE_HASH}"',
+                                                     'Range': 'bytes=0-1,4-5'})
+        self.assertEqual(response.status_code, 304)
+
+        # If-Range 不匹配时返回完整文件
+        response = self.client.get('/file', headers={'Range': 'bytes=0-1', 'If-Range': '"other"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, self.data)
+
+        response = self.client.get(f'/file?v={self.FILE_HASH}')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+
+    def test_x_accel_redirect_mode(self):
+        """x-accel 模式只返回响应头，文件由 nginx 从内部路径发送"""
+        self.app.config['FILE_DELIVERY_MODE'] = 'x-accel'
+        self.app.config['UPLOAD_FOLDER'] = os.path.dirname(self.file_path)
+
+        response = self.client.get('/file', headers={'Range': 'bytes=0-3'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.headers['X-Accel-Redirect'],
+                         '/protected-files/' + os.path.basename(self.file_path))
+        self.assertEqual(response.headers['ETag'], f'"{self.FILE_HASH}"')
+
+        response = self.client.get('/file', headers={'If-None-Match': f'"{self.FILE_HASH}"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('X-Accel-Redirect', response.headers)
+
+        # 不在 UPLOAD_FOLDER 中的文件仍由 Python 进程发送
+        self.app.config['UPLOAD_FOLDER'] = tempfile.mkdtemp()
+        response = self.client.get('/file')
+        self.assertEqual(response.data, self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+
+
+class TestIdAllocator(AppTestCase):
+    """测试ID分配器（SQLite 回退实现）"""
+    
+    def setUp(self):
+        from models.file_upd_model import FileUpdModel
+        from models.company_mst_model import CompanyMstModel
+        
+        super().setUp()
+        self.FileUpdModel = FileUpdModel
+        self.CompanyMstModel = CompanyMstModel
+    
+    def _add_file(self, file_id):
+        self.db.session.add(self.FileUpdModel(
+            id=file_id,
+            company_id='company_00001',
+            original_name=f'{file_id}.pdf',
+            stored_name=f'{file_id}.pdf',
+            file_type='1',
+            file_size=0,
+            file_path=f'/tmp/{file_id}.pdf'
+        ))
+        self.db.session.commit()
+    
+    def test_first_ids_keep_readable_format(self):
+        """空表时从1开始，保持原有格式"""
+        self.assertEqual(self.FileUpdModel.generate_file_id(), 'file_001')
+        self.assertEqual(self.FileUpdModel.generate_file_id(), 'file_002')
+        self.assertEqual(self.CompanyMstModel.generate_company_id(), 'company_00001')
+    
+    def test_seed_uses_numeric_max(self):
+        """按数值而非字符串取最大编号：file_1000 之后是 file_1001"""
+        self._add_file('file_999')
+        self._add_file('file_1000')
+        self.assertEqual(self.FileUpdModel.generate_file_id(), 'file_1001')
+    
+    def test_ids_are_unique(self):
+        """连续分配不重复"""
+        ids = [self.FileUpdModel.generate_file_id() for _ in range(50)]
+        self.assertEqual(len(ids), len(set(ids)))
+
+    
+    def test_sequence_table_created_once(self):
+        """id_sequence 表每个数据库只检查一次"""
+        from utils.id_allocator import id_sequence_table
+        
+        self.FileUpdModel.generate_file_id()
+        with mock.patch.object(id_sequence_table, 'create') as create:
+            for _ in range(3):
+                self.FileUpdModel.generate_file_id()
+        create.assert_not_called()
+    
+    def test_sequence_block_leased_without_extra_queries(self):
+        """PostgreSQL：序列检查一次，之后每个号段只执行一次 nextval"""
+        from utils.id_allocator import IdAllocator
+        
+        allocator = IdAllocator(self.FileUpdModel, 'file', 3)
+        session = mock.Mock()
+        session.get_bind.return_value.dialect.name = 'postgresql'
+        session.execute.return_value.scalar.side_effect = [1, 3]
+        
+        def ensure_sequence(session, block_size):
+            allocator._increment = 2
+        
+        with mock.patch.object(allocator, '_ensure_sequence', side_effect=ensure_sequence) as ensure:
+            ids = [allocator.next_id(session, 2) for _ in range(4)]
+        self.assertEqual(ids, ['file_001', 'file_002', 'file_003', 'file_004'])
+        ensure.assert_called_once()
+        self.assertEqual(session.execute.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+import sys
+import os
+import io
+import time
+import hashlib
+from unittest import mock
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+
+def _jpeg_bytes(size, orientation=None):
+    """生成测试 JPEG（可带 EXIF 方向）"""
+    image = Image.new('RGB', size, (200, 30, 30))
+    output = io.BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        image.save(output, 'JPEG', exif=exif)
+    else:
+        image.save(output, 'JPEG')
+    return output.getvalue()
+
+
+class TestImageVariants(AppTestCase):
+    """测试图片缩略图：宽度档位、EXIF 方向、磁盘缓存和淘汰、上传后预生成、接口的 ETag"""
+
+    def app_config(self):
+        return {
+            'UPLOAD_FOLDER': self.temp_dir(),
+            'ALLOWED_EXTENSIONS': {'2': ['jpg', 'png']},
+            'EXTRACTION_ASYNC': False,
+            'IMAGE_VARIANT_CACHE_FOLDER': self.temp_dir(),
+            'IMAGE_VARIANT_WORKERS': 0
+        }
+
+    def _upload(self, data, filename='drawing.jpg'):
+        from repositories.file_repositorie.file_repository import FileRepository
+
+        upload = FileStorage(stream=io.BytesIO(data), filename=filename, content_type='image/jpeg')
+        with mock.patch('repositories.file_repositorie.file_repository.FileRepository._extract_file',
+                        return_value={'text_content': '', 'has_ocr': False}):
+            return FileRepository(self.db, self.app.config).save_uploaded_file(
+                upload, '2', company_id='company_00001'
+            )['file']['id']
+
+    def test_resolve_buckets_and_formats(self):
+        from services.preview_service import get_image_variant_service
+
+        variants = get_image_variant_service()
+        self.assertEqual(variants.resolve(300, None, None)['width'], 320)
+        self.assertEqual(variants.resolve(5000, None, None)['width'], 1920)
+        self.assertEqual(variants.resolve(None, None, None, accept_webp=False),
+                         {'width': 160, 'format': 'jpeg', 'quality': 'medium'})
+        self.assertEqual(variants.resolve(640, 'JPG', 'high')['format'], 'jpeg')
+        for args in ((0, None, None), (320, 'bmp', None), (320, None, 'best')):
+            with self.assertRaises(ValueError):
+                variants.resolve(*args)
+
+    def test_render_and_cache(self):
+        from services.preview_service import get_image_variant_service
+
+        # EXIF 方向 6：存储为 800x400，显示为 400x800
+        source = os.path.join(self.app.config['UPLOAD_FOLDER'], 'rotated.jpg')
+        with open(source, 'wb') as f:
+            f.write(_jpeg_bytes((800, 400), orientation=6))
+
+        variants = get_image_variant_service()
+        path, mimetype, etag = variants.get_variant('ab' * 32, source, 320, 'webp', 'medium')
+        self.assertEqual(mimetype, 'image/webp')
+        self.assertEqual(etag, f"{'ab' * 32}-w320-medium.webp")
+        with Image.open(path) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (320, 640)))
+
+        # 命中缓存时不再读取原图
+        os.remove(source)
+        self.assertEqual(variants.get_variant('ab' * 32, source, 320, 'webp', 'medium')[0], path)
+
+        # 原图比档位小时不放大；透明 PNG 转 JPEG 时合成白色背景
+        small = os.path.join(self.app.config['UPLOAD_FOLDER'], 'small.png')
+        Image.new('RGBA', (100, 50), (0, 0, 0, 0)).save(small)
+        path, _, _ = variants.get_variant('cd' * 32, small, 640, 'jpeg', 'low')
+        with Image.open(path) as image:
+            self.assertEqual((image.format, image.size), ('JPEG', (100, 50)))
+            self.assertEqual(image.convert('RGB').getpixel((50, 25)), (255, 255, 255))
+
+    def test_lru_eviction(self):
+        from services.preview_service import DiskLRUCache
+
+        cache = DiskLRUCache(self.temp_dir(), 250)
+        first = cache.put_bytes('a/1', b'x' * 100)
+        second = cache.put_bytes('a/2', b'x' * 100)
+        old = time.time() - 3600
+        os.utime(first, (old - 10, old - 10))
+        os.utime(second, (old, old))
+
+        # 读取后变为最近使用，写入超过预算时淘汰最久未使用的 a/2
+        self.assertEqual(cache.get('a/1'), first)
+        cache.put_bytes('a/3', b'x' * 100)
+        self.assertIsNone(cache.get('a/2'))
+        self.assertIsNotNone(cache.get('a/1'))
+        self.assertIsNotNone(cache.get('a/3'))
+
+    def test_upload_pregenerates_and_endpoint(self):
+        from controllers.file_controllers.file_controller import file_bp
+        from services.preview_service import get_image_variant_service
+
+        self.app.register_blueprint(file_bp, url_prefix='/api')
+        data = _jpeg_bytes((1600, 1200))
+        file_hash = hashlib.sha256(data).hexdigest()
+        file_id = self._upload(data)
+
+        variants = get_image_variant_service()
+        for width in (320, 640):
+            self.assertIsNotNone(variants.cache.get(variants.variant_key(file_hash, width, 'webp', 'medium')))
+
+        client = self.app.test_client()
+        response = client.get(f'/api/files/{file_id}/image?w=600', headers={'Accept': 'image/webp,*/*'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'image/webp')
+        self.assertIn('Accept', response.headers['Vary'])
+        etag = response.headers['ETag']
+        self.assertEqual(etag, f'"{file_hash}-w640-medium.webp"')
+        with Image.open(io.BytesIO(response.data)) as image:
+            self.assertEqual(image.size, (640, 480))
+
+        response = client.get(f'/api/files/{file_id}/image?w=600',
+                              headers={'Accept': 'image/webp,*/*', 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        # 未列出 image/webp 的客户端返回 JPEG
+        response = client.get(f'/api/files/{file_id}/image?w=600', headers={'Accept': '*/*'})
+        self.assertEqual(response.mimetype, 'image/jpeg')
+
+        response = client.get(f'/api/files/{file_id}/image?w=600&format=jpeg&v={file_hash}')
+        self.assertEqual(response.mimetype, 'image/jpeg')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+
+        self.assertEqual(client.get(f'/api/files/{file_id}/image?format=gif').status_code, 400)
+        self.assertEqual(client.get('/api/files/missing/image').status_code, 404)
+
+        # 没有内容哈希的旧记录返回原图
+        from models.file_upd_model import FileUpdModel
+        self.db.session.get(FileUpdModel, file_id).file_hash = None
+        self.db.session.commit()
+        response = client.get(f'/api/files/{file_id}/image?w=320')
+        self.assertEqual((response.status_code, response.mimetype), (200, 'image/jpeg'))
+        self.assertEqual(response.data, data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image, ImageDraw
+
+
+def _text_like_image(width, height, angle=0.0):
+    """白底黑色横条（模拟文字行），按 angle 度倾斜"""
+    image = Image.new('L', (width, height), 230)
+    draw = ImageDraw.Draw(image)
+    for top in range(height // 10, height - height // 10, max(height // 30, 4)):
+        draw.rectangle([width // 10, top, width - width // 10, top + max(height // 120, 2)], fill=20)
+    return image.rotate(angle, resample=Image.BICUBIC, fillcolor=230) if angle else image
+
+
+class TestOcrEngine(unittest.TestCase):
+    """测试OCR预处理（缩小、二值化、纠偏）、置信度和批量识别"""
+
+    OCR_DATA = {
+        'text': ['', '采购', '合同', '', 'Total'],
+        'conf': ['-1', '90', '80', '-1', '70'],
+        'block_num': [1, 1, 1, 1, 1],
+        'par_num': [1, 1, 1, 1, 1],
+        'line_num': [0, 1, 1, 2, 2]
+    }
+
+    def test_preprocess_downscales_binarizes_and_deskews(self):
+        from services.extraction_service.ocr_engine import estimate_skew, preprocess_image
+
+        result = preprocess_image(_text_like_image(4000, 3000).convert('RGB'), max_side=2400)
+        self.assertLessEqual(max(result.size), 2400)
+        self.assertEqual(result.mode, 'L')
+        self.assertEqual({value for value, count in enumerate(result.histogram()) if count}, {0, 255})
+
+        binary = _text_like_image(1200, 900, angle=3).point(lambda value: 255 if value > 127 else 0)
+        self.assertAlmostEqual(estimate_skew(binary), -3, delta=0.5)
+        self.assertEqual(estimate_skew(_text_like_image(1200, 900).point(lambda v: 255 if v > 127 else 0)), 0.0)
+
+    def test_batch_recognition_records_confidence(self):
+        from services.extraction_service import extractors, ocr_engine
+
+        paths = []
+        for _ in range(3):
+            fd, path = tempfile.mkstemp(suffix='.png')
+            os.close(fd)
+            _text_like_image(300, 200).save(path)
+            paths.append(path)
+        self.addCleanup(lambda: [os.remove(path) for path in paths])
+
+        with mock.patch('pytesseract.image_to_data', return_value=self.OCR_DATA) as image_to_data:
+            pool = ocr_engine.OcrPool(max_workers=1, batch_size=2)
+            results = pool.recognize(paths + ['/nonexistent.png'])
+            self.assertEqual(image_to_data.call_count, 3)
+
+            result = extractors.extract_file(paths[0], 'photo.png', 'image/png')
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0], {'text': '采购合同\nTotal', 'confidence': 0.8})
+        self.assertIn('error', results[3])
+        self.assertTrue(result['has_ocr'])
+        self.assertEqual(result['ocr_confidence'], 0.8)
+        self.assertEqual(result['page_texts'], ['采购合同\nTotal'])
+        self.assertEqual((result['image_width'], result['image_height']), (300, 200))
+
+    def test_join_words(self):
+        from services.extraction_service.ocr_engine import join_words
+
+        self.assertEqual(join_words(['采购', '合同', '，', '金额']), '采购合同，金额')
+        self.assertEqual(join_words(['合同', 'No.', '2024', '号']), '合同 No. 2024 号')
+        self.assertEqual(join_words(['Total', 'amount']), 'Total amount')
+
+    def test_pooled_recognition(self):
+        from services.extraction_service import ocr_engine
+
+        paths = []
+        for _ in range(3):
+            fd, path = tempfile.mkstemp(suffix='.png')
+            os.close(fd)
+            _text_like_image(300, 200).save(path)
+            paths.append(path)
+        self.addCleanup(lambda: [os.remove(path) for path in paths])
+
+        # 识别进程在 patch 生效期间创建（fork），继承替换后的 image_to_data
+        with mock.patch('pytesseract.image_to_data', return_value=self.OCR_DATA):
+            pool = ocr_engine.OcrPool(max_workers=2, batch_size=2)
+            self.addCleanup(pool.shutdown, True)
+            results = pool.recognize(paths + ['/nonexistent.png'])
+
+        self.assertIsNotNone(pool._executor)
+        self.assertEqual([result.get('text') for result in results[:3]], ['采购合同\nTotal'] * 3)
+        self.assertIn('error', results[3])
+
+
+if __name__ == '__main__':
+    unittest.main()
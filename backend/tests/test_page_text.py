@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+from unittest import mock
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+from werkzeug.datastructures import FileStorage
+
+
+class TestPageText(AppTestCase):
+    """测试逐页文本：提取时写入，搜索返回命中页码，预览定位到页"""
+
+    EXTRACTED = {
+        'page_count': 3,
+        'has_ocr': False,
+        'ocr_confidence': 0.0,
+        'text_content': '采购合同\n\n付款条件：验收后付款 Payment terms',
+        'page_texts': ['采购合同', '   ', '付款条件：验收后付款 Payment terms']
+    }
+
+    def app_config(self):
+        return {
+            'UPLOAD_FOLDER': tempfile.mkdtemp(),
+            'ALLOWED_EXTENSIONS': {'1': ['pdf']},
+            'EXTRACTION_ASYNC': False
+        }
+
+    def setUp(self):
+        super().setUp()
+
+        patcher = mock.patch('repositories.file_repositorie.file_repository.FileRepository._extract_file',
+                             return_value=dict(self.EXTRACTED))
+        self.extract_file = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _pages(self, file_id):
+        from models.file_page_text_model import FilePageTextModel
+        return [row.page_no for row in FilePageTextModel.query.filter_by(file_id=file_id).order_by('page_no')]
+
+    def test_pages_saved_searched_and_previewed(self):
+        from repositories.file_repositorie.file_repository import FileRepository
+        from services.contract_service.contract_service import ContractService
+
+        file_repo = FileRepository(self.db, self.app.config)
+        upload = FileStorage(stream=io.BytesIO(b'%PDF-1.4 contract'), filename='a.pdf',
+                             content_type='application/pdf')
+        first = file_repo.save_uploaded_file(upload, '1', company_id='company_00001')['file']['id']
+        self.assertEqual(self._pages(first), [1, 3])
+
+        # 秒传复用已有内容的逐页文本
+        file_hash = file_repo.get_by_id(first).file_hash
+        second = file_repo.create_from_existing_hash(file_hash, 'b.pdf', '1', 'company_00001')['file']['id']
+        self.assertEqual(self._pages(second), [1, 3])
+        self.assertEqual(self.extract_file.call_count, 1)
+
+        result = file_repo.search_files_ranked('付款', company_id='company_00001')
+        self.assertEqual(result['total'], 2)
+        for item in result['items']:
+            self.assertEqual([hit['page'] for hit in item['pages']], [3])
+            self.assertEqual(item['page_hits'], 1)
+            self.assertIn('付款', item['pages'][0]['snippet'])
+
+        contract_service = ContractService(self.db, self.app.config)
+        preview = contract_service.get_file_preview(first, 'company_00001', keyword='payment')['data']
+        self.assertEqual(preview['page'], 3)
+        self.assertTrue(preview['contentUrl'].endswith('#page=3'))
+        self.assertIn(f'/api/files/{first}/pages/3?', preview['pageUrl'])
+        preview = contract_service.get_file_preview(first, 'company_00001', page=10)['data']
+        self.assertEqual(preview['page'], 3)
+
+        # 删除文件时删除逐页文本；补齐脚本重新提取没有逐页文本的文件
+        file_repo.delete_file_with_physical(first)
+        self.assertEqual(self._pages(first), [])
+        file_repo.page_repo.delete_for_files([second])
+        self.db.session.commit()
+        stats = file_repo.backfill_page_texts()
+        self.assertEqual(stats['extracted'], 1)
+        self.assertEqual(self._pages(second), [1, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
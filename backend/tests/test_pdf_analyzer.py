@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import tempfile
+import zlib
+from unittest import mock
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import PyPDF2
+
+
+def _compressed_pdf(page_count):
+    """xref 流 + 对象流（PDF 1.5 压缩结构）的最小PDF：目录和页面树都在对象流中"""
+    header = b'%PDF-1.5\n'
+    objects = b'<< /Type /Catalog /Pages 2 0 R >> << /Type /Pages /Kids [] /Count %d >>' % page_count
+    pairs = b'1 0 2 %d ' % objects.index(b'<< /Type /Pages')
+    stream = zlib.compress(pairs + objects)
+    object_stream = b'3 0 obj\n<< /Type /ObjStm /N 2 /First %d /Filter /FlateDecode /Length %d >>\nstream\n' \
+        % (len(pairs), len(stream)) + stream + b'\nendstream\nendobj\n'
+
+    xref_offset = len(header) + len(object_stream)
+    rows = [(0, 0, 255), (2, 3, 0), (2, 3, 1), (1, len(header), 0), (1, xref_offset, 0)]
+    previous = bytes(4)
+    encoded = b''
+    for kind, field, index in rows:
+        row = bytes([kind]) + field.to_bytes(2, 'big') + bytes([index])
+        # PNG Up 预测器：每行记录与上一行的差值
+        encoded += b'\x02' + bytes((a - b) & 0xFF for a, b in zip(row, previous))
+        previous = row
+    xref = zlib.compress(encoded)
+    xref_stream = b'4 0 obj\n<< /Type /XRef /Size 5 /W [1 2 1] /Root 1 0 R /Filter /FlateDecode ' \
+        b'/DecodeParms << /Columns 4 /Predictor 12 >> /Length %d >>\nstream\n' % len(xref) \
+        + xref + b'\nendstream\nendobj\n'
+    return header + object_stream + xref_stream + b'startxref\n%d\n%%%%EOF\n' % xref_offset
+
+
+class TestPdfAnalyzer(unittest.TestCase):
+    """测试PDF一次解析得到页数、文档信息和类型"""
+
+    def setUp(self):
+        writer = PyPDF2.PdfWriter()
+        for _ in range(3):
+            writer.add_blank_page(width=595, height=842)
+        writer.add_metadata({'/Title': '施工图纸', '/Author': 'designer', '/CreationDate': "D:20231030045044+09'00'"})
+
+        fd, self.file_path = tempfile.mkstemp(suffix='.pdf')
+        with os.fdopen(fd, 'wb') as f:
+            writer.write(f)
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def test_analyze_pdf(self):
+        from services.extraction_service.pdf_analyzer import analyze_pdf
+
+        result = analyze_pdf(self.file_path)
+        self.assertEqual(result['page_count'], 3)
+        self.assertEqual(result['info'], {
+            'title': '施工图纸', 'author': 'designer', 'creation_date': '2023-10-30T04:50:44'
+        })
+        self.assertEqual(len(result['pages']), 3)
+        self.assertIsNone(result['text_content'])
+        self.assertEqual(result['pdf_kind'], 'empty')
+
+        metadata_only = analyze_pdf(self.file_path, extract_text=False)
+        self.assertEqual(metadata_only['pages'], [])
+        self.assertIsNone(metadata_only['pdf_kind'])
+
+    def test_fast_page_count(self):
+        import io
+        from services.extraction_service import extractors
+        from services.extraction_service.pdf_analyzer import count_pages
+        from services.extraction_service.pdf_structure import read_page_count
+
+        self.assertEqual(read_page_count(self.file_path), 3)
+        self.assertEqual(read_page_count(io.BytesIO(_compressed_pdf(7))), 7)
+
+        # 元数据提取不构建 PdfReader
+        with mock.patch.object(PyPDF2, 'PdfReader', side_effect=AssertionError):
+            self.assertEqual(extractors.extract_file_metadata(self.file_path, 'a.pdf', 'application/pdf'),
+                             {'page_count': 3, 'has_ocr': False, 'ocr_confidence': 0.0})
+
+        # startxref 偏移错误时退回完整解析
+        with open(self.file_path, 'rb') as f:
+            data = f.read()
+        index = data.rindex(b'startxref')
+        with open(self.file_path, 'wb') as f:
+            f.write(data[:index] + b'startxref\n1\n%%EOF\n')
+        self.assertIsNone(read_page_count(self.file_path))
+        self.assertEqual(count_pages(self.file_path), 3)
+
+    def test_extract_file_uses_single_parse(self):
+        from services.extraction_service import extractors
+
+        parses = []
+        original_init = PyPDF2.PdfReader.__init__
+
+        def counting_init(reader, *args, **kwargs):
+            parses.append(1)
+            original_init(reader, *args, **kwargs)
+
+        PyPDF2.PdfReader.__init__ = counting_init
+        try:
+            result = extractors.extract_file(self.file_path, 'drawing.pdf', 'application/pdf')
+        finally:
+            PyPDF2.PdfReader.__init__ = original_init
+
+        self.assertEqual(len(parses), 1)
+        self.assertEqual(result['page_count'], 3)
+        self.assertEqual(result['pdf_info']['title'], '施工图纸')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import sys
+import os
+import io
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+
+
+class TestPdfPages(AppTestCase):
+    """测试 PDF 单页/页范围接口：提取为独立 PDF、磁盘缓存、强 ETag 和参数校验"""
+
+    FILE_HASH = 'ef' * 32
+
+    def app_config(self):
+        return {
+            'UPLOAD_FOLDER': self.temp_dir(),
+            'PDF_PAGE_CACHE_FOLDER': self.temp_dir(),
+            'PDF_PAGE_RANGE_MAX': 3
+        }
+
+    def setUp(self):
+        import PyPDF2
+        from models.file_upd_model import FileUpdModel
+        from controllers.contract_controllers.contract_controller import contract_bp
+
+        super().setUp()
+        self.app.register_blueprint(contract_bp, url_prefix='/api')
+
+        # 5 页，页宽不同以便区分
+        self.file_path = os.path.join(self.app.config['UPLOAD_FOLDER'], 'drawings.pdf')
+        writer = PyPDF2.PdfWriter()
+        for index in range(5):
+            writer.add_blank_page(width=100 + index, height=842)
+        with open(self.file_path, 'wb') as f:
+            writer.write(f)
+
+        self.db.session.add(FileUpdModel(
+            id='file_001', company_id='company_00001', original_name='图纸.pdf', stored_name='drawings.pdf',
+            file_type='1', file_size=os.path.getsize(self.file_path), file_path=self.file_path,
+            mime_type='application/pdf', file_hash=self.FILE_HASH, page_count=5
+        ))
+        self.db.session.commit()
+        self.client = self.app.test_client()
+
+    def _widths(self, data):
+        import PyPDF2
+
+        return [int(page.mediabox.width) for page in PyPDF2.PdfReader(io.BytesIO(data)).pages]
+
+    def test_single_page_and_range(self):
+        response = self.client.get('/api/files/file_001/pages/2?companyId=company_00001')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/pdf')
+        self.assertEqual(self._widths(response.data), [101])
+        etag = response.headers['ETag']
+        self.assertEqual(etag, f'"{self.FILE_HASH}-p2-2"')
+
+        response = self.client.get('/api/files/file_001/pages/2?companyId=company_00001',
+                                   headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get('/api/files/file_001/pages/3-5?companyId=company_00001')
+        self.assertEqual(self._widths(response.data), [102, 103, 104])
+
+        # 命中缓存时不再读取原文件
+        os.remove(self.file_path)
+        from services.preview_service import get_pdf_page_service
+        path, _ = get_pdf_page_service().get_pages(self.FILE_HASH, self.file_path, 3, 5)
+        with open(path, 'rb') as f:
+            self.assertEqual(self._widths(f.read()), [102, 103, 104])
+
+    def test_invalid_requests(self):
+        url = '/api/files/file_001/pages/{}?companyId=company_00001'
+        self.assertEqual(self.client.get(url.format('0')).status_code, 400)
+        self.assertEqual(self.client.get(url.format('4-2')).status_code, 400)
+        self.assertEqual(self.client.get(url.format('a')).status_code, 400)
+        self.assertEqual(self.client.get(url.format('1-4')).status_code, 400)  # 超过 PDF_PAGE_RANGE_MAX
+        self.assertEqual(self.client.get(url.format('6')).status_code, 404)
+        self.assertEqual(self.client.get('/api/files/file_001/pages/1').status_code, 400)
+        self.assertEqual(self.client.get('/api/files/file_001/pages/1?companyId=other').status_code, 403)
+
+    def test_encrypted_and_corrupt_files(self):
+        import PyPDF2
+        from models.file_upd_model import FileUpdModel
+
+        encrypted_path = os.path.join(self.app.config['UPLOAD_FOLDER'], 'encrypted.pdf')
+        writer = PyPDF2.PdfWriter()
+        writer.add_blank_page(width=100, height=842)
+        writer.encrypt('secret')
+        with open(encrypted_path, 'wb') as f:
+            writer.write(f)
+
+        corrupt_path = os.path.join(self.app.config['UPLOAD_FOLDER'], 'corrupt.pdf')
+        with open(corrupt_path, 'wb') as f:
+            f.write(b'%PDF-1.4\n1 0 obj << /Type /Catalog /Pages 2 0 R >>\n%%EOF')
+
+        for file_id, path, file_hash in (('file_002', encrypted_path, '12' * 32), ('file_003', corrupt_path, '34' * 32)):
+            self.db.session.add(FileUpdModel(
+                id=file_id, company_id='company_00001', original_name=f'{file_id}.pdf', stored_name=f'{file_id}.pdf',
+                file_type='1', file_size=os.path.getsize(path), file_path=path,
+                mime_type='application/pdf', file_hash=file_hash
+            ))
+        self.db.session.commit()
+
+        for file_id in ('file_002', 'file_003'):
+            response = self.client.get(f'/api/files/{file_id}/pages/1?companyId=company_00001')
+            self.assertEqual(response.status_code, 422)
+            self.assertNotIn('Error', response.get_data(as_text=True))
+
+        # 失败的提取不写入缓存
+        self.assertEqual([name for _, _, names in os.walk(self.app.config['PDF_PAGE_CACHE_FOLDER'])
+                          for name in names], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import urllib.request
+import uuid
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+
+try:
+    import boto3
+    from moto.server import ThreadedMotoServer
+except ImportError:
+    boto3 = None
+
+
+@unittest.skipIf(boto3 is None, '需要安装 boto3 和 moto[server]')
+class TestS3Storage(AppTestCase):
+    """测试 S3 存储后端（本地 moto server 作为 S3 兼容服务，通过 S3_ENDPOINT_URL 访问）"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadedMotoServer(ip_address='127.0.0.1', port=0, verbose=False)
+        cls.server.start()
+        host, port = cls.server.get_host_and_port()
+        cls.endpoint_url = f'http://{host}:{port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def app_config(self):
+        upload_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, upload_folder, ignore_errors=True)
+        # 每个测试使用新的存储桶（存储后端按存储桶缓存）
+        return {
+            'UPLOAD_FOLDER': upload_folder,
+            'STORAGE_BACKEND': 's3',
+            'S3_BUCKET': f'test-{uuid.uuid4().hex[:12]}',
+            'S3_PREFIX': 'uploads/',
+            'S3_ENDPOINT_URL': self.endpoint_url,
+            'S3_REGION': 'us-east-1',
+            'S3_ACCESS_KEY_ID': 'testing',
+            'S3_SECRET_ACCESS_KEY': 'testing'
+        }
+
+    def setUp(self):
+        from services.storage_service import get_storage
+
+        super().setUp()
+        self.storage = get_storage(self.app.config)
+        self.storage.client.create_bucket(Bucket=self.app.config['S3_BUCKET'])
+
+    def _temp_file(self, data):
+        fd, path = tempfile.mkstemp(dir=self.app.config['UPLOAD_FOLDER'])
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_object_operations(self):
+        from services.storage_service import blob_key, fetch_local, resolve_location
+
+        key = blob_key('ab' * 32)
+        self.assertFalse(self.storage.exists(key))
+        self.assertIsNone(self.storage.size(key))
+
+        temp_path = self._temp_file(b'%PDF-s3-content')
+        self.storage.store(temp_path, key)
+        self.assertFalse(os.path.exists(temp_path))
+        self.assertTrue(self.storage.exists(key))
+        self.assertEqual(self.storage.size(key), 15)
+        self.assertIsNone(self.storage.local_path(key))
+
+        location = self.storage.location(key)
+        self.assertEqual(location, f"s3://{self.app.config['S3_BUCKET']}/uploads/{key}")
+        backend, resolved_key = resolve_location(location, self.app.config)
+        self.assertIs(backend, self.storage)
+        self.assertEqual(resolved_key, key)
+
+        with self.storage.open(key) as body:
+            self.assertEqual(body.read(), b'%PDF-s3-content')
+        self.assertEqual(b''.join(self.storage.iter_chunks(key, 4)), b'%PDF-s3-content')
+
+        # 远程内容下载到临时文件
+        path, is_temp = fetch_local(location, self.app.config)
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        self.assertTrue(is_temp)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'%PDF-s3-content')
+
+        # 临时下载地址可以直接访问，并带上下载文件名
+        url = self.storage.presigned_url(key, download_name='合同.pdf', as_attachment=True)
+        with urllib.request.urlopen(url) as response:
+            self.assertEqual(response.read(), b'%PDF-s3-content')
+            self.assertIn("filename*=UTF-8''", response.headers['Content-Disposition'])
+
+        self.assertTrue(self.storage.delete(key))
+        self.assertFalse(self.storage.exists(key))
+
+    def test_move_content_to_storage_and_download(self):
+        from controllers.file_controllers.file_controller import file_bp
+        from models.file_blob_model import FileBlobModel
+        from models.file_upd_model import FileUpdModel
+        from repositories.file_repositorie.file_repository import FileRepository
+
+        self.app.register_blueprint(file_bp, url_prefix='/api')
+        legacy_path = os.path.join(self.app.config['UPLOAD_FOLDER'], 'others', 'old.pdf')
+        for file_id in ('file_a', 'file_b'):
+            self.db.session.add(FileUpdModel(
+                id=file_id, company_id='company_00001', original_name='old.pdf', stored_name=f'{file_id}.pdf',
+                file_type='1', file_size=8, file_path=legacy_path, mime_type='application/pdf', file_content=b'%PDF-old'
+            ))
+        self.db.session.commit()
+
+        file_repo = FileRepository(self.db, self.app.config)
+        stats = file_repo.move_content_to_storage(batch_size=1)
+        self.assertEqual((stats['moved'], stats['deduplicated'], stats['cleared']), (1, 1, 2))
+
+        blob = FileBlobModel.query.one()
+        self.assertTrue(blob.blob_path.startswith(f"s3://{self.app.config['S3_BUCKET']}/uploads/sha256/"))
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(file_repo.get_file_content('file_a'), b'%PDF-old')
+
+        # 由 Python 进程分块转发
+        client = self.app.test_client()
+        response = client.get('/api/files/file_a/download')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b'%PDF-old')
+        self.assertEqual(response.headers['ETag'], f'"{blob.file_hash}"')
+
+        # 重定向到临时下载地址
+        self.app.config['S3_PRESIGNED_DOWNLOADS'] = True
+        response = client.get('/api/files/file_b/download')
+        self.assertEqual(response.status_code, 302)
+        with urllib.request.urlopen(response.headers['Location']) as redirected:
+            self.assertEqual(redirected.read(), b'%PDF-old')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,310 @@
+import unittest
+import sys
+import os
+import io
+import shutil
+import time
+import tempfile
+from unittest import mock
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+from werkzeug.datastructures import FileStorage
+
+
+def _busy(seconds):
+    """占用 CPU 一段时间（可被超时信号中断）"""
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+class TestSandbox(AppTestCase):
+    """测试提取沙箱：单页/整个文档限时、看门狗终止卡住的进程、多次失败后隔离"""
+
+    def app_config(self):
+        return {
+            'EXTRACTION_WORKERS': 1,
+            'EXTRACTION_JOB_TABLE': False,
+            'EXTRACTION_QUARANTINE_AFTER': 2
+        }
+
+    def test_time_limit_nested(self):
+        from services.extraction_service.sandbox import ExtractionTimeout, PageTimeout, time_limit
+
+        with self.assertRaises(ExtractionTimeout) as raised:
+            with time_limit(0.5):
+                with self.assertRaises(PageTimeout):
+                    with time_limit(0.1, PageTimeout):
+                        _busy(1)
+                # 内层退出后外层继续计时
+                _busy(1)
+        self.assertNotIsInstance(raised.exception, PageTimeout)
+
+    def test_page_timeout_leaves_page_empty(self):
+        import PyPDF2
+        from services.extraction_service import sandbox
+        from services.extraction_service.pdf_analyzer import analyze_pdf
+
+        fd, path = tempfile.mkstemp(suffix='.pdf')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        writer = PyPDF2.PdfWriter()
+        for _ in range(3):
+            writer.add_blank_page(width=595, height=842)
+        with open(path, 'wb') as f:
+            writer.write(f)
+
+        texts = iter(['第一页', None, '第三页'])
+
+        def extract_text(page):
+            text = next(texts)
+            if text is None:
+                _busy(1)
+            return text
+
+        with mock.patch.dict(sandbox._limits, {'page_timeout': 0.1}), \
+                mock.patch.object(PyPDF2.PageObject, 'extract_text', extract_text):
+            result = analyze_pdf(path)
+
+        self.assertEqual(result['pages'], ['第一页', '', '第三页'])
+        self.assertEqual(result['timed_out_pages'], [2])
+
+    def test_watchdog_kills_stuck_worker(self):
+        from concurrent.futures.process import BrokenProcessPool
+        from services.extraction_service.job_queue import ExtractionJobQueue
+
+        self.app.config['EXTRACTION_HARD_TIMEOUT'] = 0.2
+        queue = ExtractionJobQueue(self.app)
+        queue._stopped.set()
+        self.addCleanup(queue.shutdown)
+
+        future = queue._get_executor().submit(time.sleep, 30)
+        queue._jobs['file_001'] = {'file_id': 'file_001', 'future': future, 'started_at': None}
+        while not future.running():
+            time.sleep(0.05)
+        self.assertEqual(queue.check_stuck_jobs(), 0)
+        time.sleep(0.3)
+        self.assertEqual(queue.check_stuck_jobs(), 1)
+
+        self.assertTrue(queue._jobs['file_001']['timed_out'])
+        with self.assertRaises(BrokenProcessPool):
+            future.result(timeout=10)
+
+    def test_cpu_limit_is_per_task(self):
+        from concurrent.futures import ProcessPoolExecutor
+        from services.extraction_service import sandbox
+
+        executor = ProcessPoolExecutor(max_workers=1, initializer=sandbox.init_worker,
+                                       initargs=({'cpu_limit': 1},))
+        self.addCleanup(executor.shutdown)
+
+        # 累计超过 1 秒 CPU 时间的多个任务都能完成
+        for _ in range(3):
+            executor.submit(sandbox.run_task, _busy, 0.6).result(timeout=30)
+
+        # 单个任务超过预算时只有该任务失败，进程池仍然可用
+        with self.assertRaises(sandbox.ExtractionTimeout):
+            executor.submit(sandbox.run_task, _busy, 5).result(timeout=30)
+        self.assertIsNone(executor.submit(sandbox.run_task, _busy, 0.1).result(timeout=30))
+
+    def test_batch_timeout_keeps_shared_pool(self):
+        from services.extraction_service.batch_executor import BatchExecutor
+
+        executor = BatchExecutor(2, timeout=0.5)
+        self.addCleanup(executor.shutdown)
+
+        # 超过等待期限的任务只返回错误，不终止进程池，其他任务和后续请求照常执行
+        results = executor.map(_busy, {'slow': (3,), 'fast': (0,)})
+        self.assertEqual(results['fast'], (None, None))
+        self.assertIsNone(results['slow'][0])
+        self.assertIn('后台提取', results['slow'][1])
+        pool = executor._executor
+        self.assertIsNotNone(pool)
+        self.assertIsNone(executor.run(_busy, 0, timeout=10))
+        self.assertIs(executor._executor, pool)
+
+    def test_crash_redispatches_without_failure(self):
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+        from models.file_upd_model import FileUpdModel
+        from services.extraction_service.job_queue import ExtractionJobQueue
+
+        self.db.session.add(FileUpdModel(
+            id='file_001', company_id='company_00001', original_name='a.pdf', stored_name='file_001.pdf',
+            file_type='1', file_size=8, file_path='/tmp/a.pdf', file_hash='b' * 64, extraction_status='pending'
+        ))
+        self.db.session.commit()
+
+        queue = ExtractionJobQueue(self.app)
+        future = Future()
+        queue._jobs['file_001'] = {'file_id': 'file_001', 'job_id': None, 'future': future, 'crashes': 0,
+                                   'timed_out': False, 'interrupted': False,
+                                   'args': ('/tmp/a.pdf', 'a.pdf', 'application/pdf', 'b' * 64)}
+        future.set_exception(BrokenProcessPool('worker died'))
+
+        with mock.patch.object(queue, '_dispatch') as dispatch:
+            queue._on_done(None, 'file_001', 'b' * 64, None, future)
+        dispatch.assert_called_once_with(None, 'file_001', '/tmp/a.pdf', 'a.pdf', 'application/pdf', 'b' * 64,
+                                         crashes=1, retries=0)
+        file = self.db.session.get(FileUpdModel, 'file_001')
+        self.assertEqual((file.extraction_failures or 0, file.extraction_status), (0, 'pending'))
+
+    def test_job_record_lifecycle(self):
+        from concurrent.futures import Future
+        from datetime import timedelta
+        from models.file_job_model import FileJobModel
+        from models.file_upd_model import FileUpdModel
+        from services.extraction_service.job_queue import ExtractionJobQueue
+        from utils.time_utils import beijing_time
+
+        self.app.config['EXTRACTION_JOB_TABLE'] = True
+        self.app.config['EXTRACTION_RETRY_DELAY'] = 0.1
+        self.db.session.add(FileUpdModel(
+            id='file_001', company_id='company_00001', original_name='a.pdf', stored_name='file_001.pdf',
+            file_type='1', file_size=8, file_path='/tmp/a.pdf', file_hash='c' * 64, extraction_status='pending'
+        ))
+        self.db.session.commit()
+
+        queue = ExtractionJobQueue(self.app)
+        self.addCleanup(queue.shutdown)
+        job_id = queue._create_job_record('file_001')
+        record = self.db.session.get(FileJobModel, job_id)
+        self.assertEqual((record.status, record.attempts, record.started_at), ('pending', 0, None))
+
+        # 工作进程开始执行时标记为处理中
+        future = Future()
+        queue._jobs['file_001'] = {'file_id': 'file_001', 'job_id': job_id, 'future': future, 'crashes': 0,
+                                   'retries': 0, 'retry_at': None, 'started_at': None, 'recorded': False,
+                                   'timed_out': False, 'interrupted': False, 'sequence': 1,
+                                   'submitted_at': beijing_time(), 'finished_at': None, 'error': None,
+                                   'args': ('/tmp/a.pdf', 'a.pdf', 'application/pdf', 'c' * 64)}
+        future.set_running_or_notify_cancel()
+        queue.check_stuck_jobs()
+        self.db.session.expire_all()
+        record = self.db.session.get(FileJobModel, job_id)
+        self.assertEqual((record.status, record.attempts), ('processing', 1))
+        self.assertIsNotNone(record.started_at)
+
+        # 失败后恢复为等待中，延迟后重新提交
+        future.set_exception(ValueError('提取失败'))
+        with mock.patch.object(queue, '_dispatch') as dispatch:
+            queue._on_done(job_id, 'file_001', 'c' * 64, None, future)
+            dispatch.assert_not_called()
+            self.assertEqual(queue.get_status('file_001')['status'], 'pending')
+            deadline = time.monotonic() + 5
+            while not dispatch.called and time.monotonic() < deadline:
+                time.sleep(0.05)
+        dispatch.assert_called_once_with(job_id, 'file_001', '/tmp/a.pdf', 'a.pdf', 'application/pdf', 'c' * 64,
+                                         crashes=0, retries=1)
+        self.db.session.expire_all()
+        record = self.db.session.get(FileJobModel, job_id)
+        self.assertEqual((record.status, record.attempts, record.error_message), ('pending', 1, '提取失败'))
+
+        # 启动时只恢复超时的任务
+        queue._jobs.clear()
+        with mock.patch.object(queue, '_dispatch') as dispatch:
+            self.assertEqual(queue.recover_jobs(), 0)
+            table = FileJobModel.__table__
+            self.db.session.execute(table.update().where(table.c.id == job_id)
+                                    .values(updated_at=beijing_time() - timedelta(hours=1)))
+            self.db.session.commit()
+            self.assertEqual(queue.recover_jobs(), 1)
+        dispatch.assert_called_once()
+
+    def test_repeated_failures_quarantine(self):
+        from models.file_upd_model import FileUpdModel
+        from repositories.file_repositorie.file_repository import FileRepository
+        from services.extraction_service.job_queue import ExtractionJobQueue
+
+        for file_id in ('file_001', 'file_002'):
+            self.db.session.add(FileUpdModel(
+                id=file_id,
+                company_id='company_00001',
+                original_name='bomb.pdf',
+                stored_name=f'{file_id}.pdf',
+                file_type='1',
+                file_size=8,
+                file_path='/tmp/bomb.pdf',
+                file_hash='a' * 64,
+                extraction_status='pending'
+            ))
+        self.db.session.commit()
+
+        queue = ExtractionJobQueue(self.app)
+        self.assertTrue(queue._apply_result(self.db, 'file_001', 'a' * 64, None, '提取超过内存限制'))
+        self.db.session.commit()
+        self.assertEqual(self.db.session.get(FileUpdModel, 'file_002').extraction_status, 'pending')
+
+        self.assertFalse(queue._apply_result(self.db, 'file_001', 'a' * 64, None, '提取超过内存限制'))
+        self.db.session.commit()
+        for file_id in ('file_001', 'file_002'):
+            file = self.db.session.get(FileUpdModel, file_id)
+            self.assertEqual((file.extraction_status, file.extraction_failures, file.quarantined),
+                             ('failed', 2, True))
+
+        # 相同内容再次上传时不再提交提取任务
+        record = FileUpdModel(id='file_003', company_id='company_00001', original_name='bomb.pdf',
+                              stored_name='file_003.pdf', file_type='1', file_size=8,
+                              file_path='/tmp/bomb.pdf', file_hash='a' * 64, extraction_status='pending')
+        self.db.session.add(record)
+        self.db.session.commit()
+        with mock.patch('repositories.file_repositorie.file_repository.get_job_queue') as get_job_queue:
+            FileRepository(self.db, self.app.config)._schedule_extraction(record, 'bomb.pdf')
+        get_job_queue.assert_not_called()
+        self.assertEqual((record.extraction_status, record.quarantined), ('failed', True))
+        self.assertTrue(record.to_response_dict()['quarantined'])
+
+
+class TestSandboxedUpload(AppTestCase):
+    """测试同步上传：提取在沙箱工作进程中执行，失败时改为后台提取"""
+
+    def app_config(self):
+        upload_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, upload_folder, ignore_errors=True)
+        return {
+            'UPLOAD_FOLDER': upload_folder,
+            'ALLOWED_EXTENSIONS': {'1': ['pdf']},
+            'EXTRACTION_ASYNC': False,
+            'UPLOAD_BATCH_WORKERS': 1
+        }
+
+    def setUp(self):
+        from services.extraction_service.batch_executor import get_batch_executor
+
+        super().setUp()
+        self.addCleanup(get_batch_executor(self.app).shutdown)
+
+    def _upload(self, content):
+        from repositories.file_repositorie.file_repository import FileRepository
+
+        upload = FileStorage(stream=io.BytesIO(content), filename='a.pdf', content_type='application/pdf')
+        return FileRepository(self.db, self.app.config).save_uploaded_file(upload, '1', company_id='company_00001')
+
+    def test_sync_extraction_runs_in_worker(self):
+        from models.file_upd_model import FileUpdModel
+
+        # 进程池在 patch 生效后创建，工作进程中的提取函数返回工作进程的 pid
+        with mock.patch('services.extraction_service.extractors.extract_file',
+                        side_effect=lambda *args: {'page_count': 1, 'text_content': str(os.getpid())}):
+            file = self._upload(b'%PDF-1.4 first')['file']
+        self.assertEqual(file['extractionStatus'], 'completed')
+        record = self.db.session.get(FileUpdModel, file['id'])
+        self.assertTrue(record.text_content.isdigit())
+        self.assertNotEqual(record.text_content, str(os.getpid()))
+
+    def test_sync_extraction_failure_falls_back_to_background(self):
+        from repositories.file_repositorie.file_repository import FileRepository
+
+        with mock.patch('services.extraction_service.extractors.extract_file',
+                        side_effect=ValueError('broken pdf')), \
+                mock.patch.object(FileRepository, '_schedule_extraction') as schedule:
+            file = self._upload(b'%PDF-1.4 broken')['file']
+        self.assertEqual(file['extractionStatus'], 'pending')
+        schedule.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+
+
+class TestSearchTokenizer(unittest.TestCase):
+    """测试全文检索分词"""
+    
+    def test_chinese_bigrams_and_latin_words(self):
+        from utils.search_tokenizer import tokenize, to_tsquery
+        
+        self.assertEqual(tokenize('采购合同 Payment2023'), ['采购', '购合', '合同', 'payment2023'])
+        self.assertEqual(tokenize('合'), ['合'])
+        self.assertEqual(to_tsquery('合同 pay'), '合同 & pay:*')
+        self.assertEqual(to_tsquery('同'), '同')
+        
+        # 索引文档同时保存中文单字
+        from utils.search_tokenizer import build_document
+        self.assertEqual(build_document(['采购合同']).split(),
+                         ['采购', '购合', '合同', '采', '购', '合', '同'])
+
+
+class TestFullTextSearch(AppTestCase):
+    """测试全文检索（SQLite 使用进程内倒排索引）"""
+    
+    def setUp(self):
+        from models.file_upd_model import FileUpdModel
+        
+        super().setUp()
+        self.FileUpdModel = FileUpdModel
+    
+    def _add_file(self, file_id, name, text):
+        self.db.session.add(self.FileUpdModel(
+            id=file_id,
+            company_id='company_00001',
+            original_name=name,
+            stored_name=f'{file_id}.pdf',
+            file_type='1',
+            file_size=0,
+            file_path=f'/tmp/{file_id}.pdf',
+            text_content=text
+        ))
+        self.db.session.commit()
+    
+    def _search(self, keyword):
+        from repositories.file_repositorie.file_repository import FileRepository
+        return FileRepository(self.db).search_files_ranked(keyword)
+    
+    def test_ranked_results_with_snippet(self):
+        """文件名命中的排在前面，摘要包含关键字"""
+        self._add_file('file_001', '说明.pdf', '本文件附有采购合同的付款条款')
+        self._add_file('file_002', '采购合同.pdf', '设备清单')
+        self._add_file('file_003', '图纸.pdf', '施工图纸')
+        
+        result = self._search('采购合同')
+        self.assertEqual(result['total'], 2)
+        self.assertEqual([item['file'].id for item in result['items']], ['file_002', 'file_001'])
+        self.assertIn('采购合同', result['items'][1]['snippet'])
+    
+    def test_single_chinese_character(self):
+        """单字查询：只出现在二元组后半的字也能检索到"""
+        self._add_file('file_001', 'a.pdf', '采购合同')
+        self._add_file('file_002', 'b.pdf', '同意书')
+        self._add_file('file_003', 'c.pdf', '施工图纸')
+        
+        result = self._search('同')
+        self.assertEqual(sorted(item['file'].id for item in result['items']), ['file_001', 'file_002'])
+    
+    def test_index_follows_update_and_delete(self):
+        """更新和删除提交后索引同步"""
+        self._add_file('file_001', 'a.pdf', '旧内容')
+        self.assertEqual(self._search('新内容')['total'], 0)
+        
+        file = self.FileUpdModel.query.get('file_001')
+        file.text_content = '新内容'
+        self.db.session.commit()
+        self.assertEqual(self._search('新内容')['total'], 1)
+        
+        self.db.session.delete(file)
+        self.db.session.commit()
+        self.assertEqual(self._search('新内容')['total'], 0)
+    
+    def test_savepoint_rollback_keeps_outer_changes(self):
+        """SAVEPOINT 回滚只丢弃其中的变更，外层事务提交后索引仍然同步"""
+        self._add_file('file_001', 'a.pdf', '施工图纸')
+        self.assertEqual(self._search('合同')['total'], 0)
+        
+        def new_file(file_id, text):
+            return self.FileUpdModel(id=file_id, company_id='company_00001', original_name=f'{file_id}.pdf',
+                                     stored_name=f'{file_id}.pdf', file_type='1', file_size=0,
+                                     file_path=f'/tmp/{file_id}.pdf', text_content=text)
+        
+        self.db.session.add(new_file('file_002', '采购合同'))
+        self.db.session.flush()
+        savepoint = self.db.session.begin_nested()
+        self.db.session.add(new_file('file_003', '付款合同'))
+        self.db.session.flush()
+        savepoint.rollback()
+        self.db.session.commit()
+        
+        result = self._search('合同')
+        self.assertEqual([item['file'].id for item in result['items']], ['file_002'])
+    
+    def test_paginated_keyword_search_with_cursor(self):
+        """列表关键字搜索在数据库分页，游标分页与偏移分页结果一致"""
+        from repositories.file_repositorie.file_repository import FileRepository
+        
+        for i in range(5):
+            self._add_file(f'file_{i + 1:03d}', f'{i}.pdf', '采购合同' if i % 2 == 0 else '图纸')
+        repo = FileRepository(self.db)
+        
+        first = repo.get_paginated_files(page=1, page_size=2, keyword='合同')
+        self.assertEqual(first['total'], 3)
+        self.assertEqual(len(first['items']), 2)
+        
+        second = repo.get_paginated_files(page_size=2, keyword='合同', cursor=first['nextCursor'])
+        by_offset = repo.get_paginated_files(page=2, page_size=2, keyword='合同')
+        self.assertEqual([f.id for f in second['items']], [f.id for f in by_offset['items']])
+        self.assertIsNone(second['nextCursor'])
+        
+        with self.assertRaises(ValueError):
+            repo.get_paginated_files(cursor='not-a-cursor')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+
+
+class TestStatsCache(AppTestCase):
+    """测试统计结果缓存和失效"""
+    
+    def setUp(self):
+        from models.file_upd_model import FileUpdModel
+        
+        super().setUp()
+        self.FileUpdModel = FileUpdModel
+    
+    def _add_file(self, file_id):
+        self.db.session.add(self.FileUpdModel(
+            id=file_id,
+            company_id='company_00001',
+            original_name=f'{file_id}.pdf',
+            stored_name=f'{file_id}.pdf',
+            file_type='1',
+            file_size=100,
+            file_path=f'/tmp/{file_id}.pdf'
+        ))
+        self.db.session.commit()
+    
+    def _repo(self, config=None):
+        from repositories.file_repositorie.file_repository import FileRepository
+        return FileRepository(self.db, config)
+    
+    def test_cached_until_table_changes(self):
+        """缓存命中不再查询；文件表写入提交后失效，回滚不影响缓存"""
+        from sqlalchemy import event
+        
+        self._add_file('file_001')
+        repo = self._repo()
+        self.assertEqual(repo.get_file_stats()['total_files'], 1)
+        
+        statements = []
+        event.listen(self.db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        self.assertEqual(repo.get_file_stats()['total_files'], 1)
+        self.assertEqual(statements, [])
+        
+        self._add_file('file_002')
+        self.assertEqual(repo.get_file_stats()['total_files'], 2)
+        
+        # 未提交的写入不会使缓存失效
+        self.db.session.add(self.FileUpdModel(
+            id='file_003', company_id='company_00001', original_name='3.pdf',
+            stored_name='3.pdf', file_type='1', file_size=1, file_path='/tmp/3.pdf'
+        ))
+        self.db.session.flush()
+        self.db.session.rollback()
+        statements.clear()
+        self.assertEqual(repo.get_file_stats()['total_files'], 2)
+        self.assertEqual(statements, [])
+    
+    def test_savepoint_rollback_keeps_outer_changes(self):
+        """SAVEPOINT 回滚（如唯一约束冲突后重试）不影响外层事务提交后的失效"""
+        from sqlalchemy.exc import IntegrityError
+        
+        self._add_file('file_001')
+        repo = self._repo()
+        self.assertEqual(repo.get_file_stats()['total_files'], 1)
+        
+        self.db.session.add(self.FileUpdModel(
+            id='file_002', company_id='company_00001', original_name='2.pdf',
+            stored_name='2.pdf', file_type='1', file_size=1, file_path='/tmp/2.pdf'
+        ))
+        self.db.session.flush()
+        with self.assertRaises(IntegrityError):
+            with self.db.session.begin_nested():
+                self.db.session.add(self.FileUpdModel(
+                    id='file_001', company_id='company_00001', original_name='1.pdf',
+                    stored_name='1.pdf', file_type='1', file_size=1, file_path='/tmp/1.pdf'
+                ))
+        self.db.session.commit()
+        
+        self.assertEqual(repo.get_file_stats()['total_files'], 2)
+    
+    def test_ttl_zero_disables_cache(self):
+        self._add_file('file_001')
+        repo = self._repo({'STATS_CACHE_TTL': 0})
+        stats = repo.get_file_stats()
+        stats['total_files'] = 99
+        self.assertEqual(repo.get_file_stats()['total_files'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
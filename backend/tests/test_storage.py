@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+
+
+class TestStorage(AppTestCase):
+    """测试存储后端和数据库文件内容迁移"""
+
+    def app_config(self):
+        return {
+            'UPLOAD_FOLDER': self.temp_dir(),
+            'STORAGE_BACKEND': 'local'
+        }
+
+    def test_local_storage_keys_and_locations(self):
+        from services.storage_service import blob_key, get_storage, resolve_location
+
+        storage = get_storage(self.app.config)
+        fd, temp_path = tempfile.mkstemp(dir=self.app.config['UPLOAD_FOLDER'])
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'content')
+
+        key = blob_key('ab' * 32)
+        storage.store(temp_path, key)
+        self.assertFalse(os.path.exists(temp_path))
+        self.assertEqual(storage.size(key), 7)
+        self.assertEqual(b''.join(storage.iter_chunks(key, 3)), b'content')
+
+        backend, resolved_key = resolve_location(storage.location(key), self.app.config)
+        self.assertIs(backend, storage)
+        self.assertEqual(resolved_key, key)
+
+        self.assertTrue(storage.delete(key))
+        self.assertFalse(storage.exists(key))
+
+    def test_move_content_to_storage(self):
+        from models.file_blob_model import FileBlobModel
+        from models.file_upd_model import FileUpdModel
+        from repositories.file_repositorie.file_repository import FileRepository
+
+        legacy_path = os.path.join(self.app.config['UPLOAD_FOLDER'], 'others', 'old.pdf')
+        for file_id in ('file_a', 'file_b'):
+            self.db.session.add(FileUpdModel(
+                id=file_id, company_id='company_00001', original_name='old.pdf', stored_name=f'{file_id}.pdf', file_type='1',
+                file_size=8, file_path=legacy_path, file_content=b'%PDF-old'
+            ))
+        self.db.session.commit()
+
+        file_repo = FileRepository(self.db, self.app.config)
+        stats = file_repo.move_content_to_storage(batch_size=1)
+
+        self.assertEqual((stats['moved'], stats['deduplicated'], stats['cleared']), (1, 1, 2))
+        blob = FileBlobModel.query.one()
+        self.assertEqual(blob.ref_count, 2)
+        for file in FileUpdModel.query.all():
+            self.assertFalse(file.has_content)
+            self.assertIsNone(file.file_content)
+            self.assertEqual(file.file_path, blob.blob_path)
+        self.assertEqual(file_repo.get_file_content('file_a'), b'%PDF-old')
+
+    def test_reupload_between_release_and_removal_keeps_content(self):
+        """最后一个引用释放后、物理文件删除前上传相同内容：内容被复用，不会被删除"""
+        import hashlib
+        from models.file_blob_model import FileBlobModel
+        from repositories.file_repositorie.blob_repository import BlobRepository
+
+        data = b'%PDF-shared'
+        file_hash = hashlib.sha256(data).hexdigest()
+        blob_repo = BlobRepository(self.db, self.app.config)
+
+        def upload():
+            fd, temp_path = tempfile.mkstemp(dir=self.app.config['UPLOAD_FOLDER'])
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            location, _ = blob_repo.store_file(temp_path, file_hash, len(data))
+            self.db.session.commit()
+            return location
+
+        location = upload()
+        released_path = blob_repo.release_reference(file_hash)
+        self.db.session.commit()
+        self.assertEqual(released_path, location)
+
+        # 删除前又上传了相同内容
+        self.assertEqual(upload(), location)
+        self.assertFalse(blob_repo.remove_unreferenced_file(file_hash, released_path))
+        self.assertTrue(os.path.exists(location))
+        self.assertEqual(self.db.session.get(FileBlobModel, file_hash).ref_count, 1)
+
+        blob_repo.release_reference(file_hash)
+        self.db.session.commit()
+        self.assertTrue(blob_repo.remove_unreferenced_file(file_hash, location))
+        self.assertFalse(os.path.exists(location))
+        self.assertIsNone(self.db.session.get(FileBlobModel, file_hash))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import io
+import hashlib
+import tempfile
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app_test_case import AppTestCase
+
+
+class TestUploadSession(AppTestCase):
+    """测试断点续传（按序分块、中断后续传、完成后生成文件记录）"""
+
+    def app_config(self):
+        return {
+            'UPLOAD_FOLDER': tempfile.mkdtemp(),
+            'ALLOWED_EXTENSIONS': {'1': ['pdf']},
+            'MAX_CONTENT_LENGTH': 1024 * 1024,
+            'EXTRACTION_ASYNC': False,
+            'UPLOAD_SESSION_MIN_CHUNK_SIZE': 1
+        }
+
+    def test_resume_and_complete(self):
+        from models.contract_model import ContractModel
+        from repositories.file_repositorie import upload_session_repository
+        from repositories.file_repositorie.upload_session_repository import (
+            UploadSessionError, UploadSessionRepository
+        )
+
+        data = b'%PDF-1.4\n' + bytes(range(256)) * 10
+        repo = UploadSessionRepository(self.db, self.app.config)
+        session = repo.create_session('drawing.pdf', len(data), '1', company_id='company_00001', chunk_size=1000)
+        self.assertEqual(session.total_chunks, 3)
+
+        repo.write_chunk(session.id, 0, io.BytesIO(data[:1000]))
+
+        # 分块不完整时不推进偏移量
+        with self.assertRaises(UploadSessionError):
+            repo.write_chunk(session.id, 1, io.BytesIO(data[1000:1400]))
+        with self.assertRaises(UploadSessionError) as ctx:
+            repo.write_chunk(session.id, 2, io.BytesIO(data[2000:]))
+        self.assertEqual(ctx.exception.status_code, 409)
+        self.assertEqual(repo.get_session(session.id).received_size, 1000)
+
+        # 其他进程续传时没有增量哈希状态，完成时重新计算
+        upload_session_repository._hash_states.clear()
+        repo.write_chunk(session.id, 1, io.BytesIO(data[1000:2000]))
+        repo.write_chunk(session.id, 1, io.BytesIO(data[1000:2000]))
+        repo.write_chunk(session.id, 2, io.BytesIO(data[2000:]))
+
+        session, result = repo.complete_session(session.id, hashlib.sha256(data).hexdigest())
+        self.assertEqual(session.status, 'completed')
+        self.assertEqual(result['file']['size'], len(data))
+        self.assertEqual(repo.file_repo.get_file_content(session.file_id), data)
+        self.assertEqual(ContractModel.query.filter_by(file_id=session.file_id).count(), 1)
+        self.assertFalse(os.path.exists(repo.get_part_path(session.id)))
+
+        # 重复完成返回同一文件
+        _, again = repo.complete_session(session.id)
+        self.assertEqual(again['file']['id'], session.file_id)
+
+    def test_cleanup_stale_sessions(self):
+        from repositories.file_repositorie.upload_session_repository import UploadSessionRepository
+
+        repo = UploadSessionRepository(self.db, self.app.config)
+        session = repo.create_session('a.pdf', 10, '1', company_id='company_00001')
+        stats = repo.cleanup_stale_sessions(ttl=-1)
+
+        self.assertEqual(stats['expired'], 1)
+        self.assertIsNone(repo.get_session(session.id))
+        self.assertFalse(os.path.exists(repo.get_part_path(session.id)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,8 @@
 # utils/db_helper.py
 from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
-from typing import Optional
+from sqlalchemy import inspect, text
+from typing import List, Optional
 
 def get_db() -> Optional[SQLAlchemy]:
     """安全获取数据库实例"""
@@ -43,4 +44,40 @@ def get_db_session():
     db = get_db()
     if db:
         return db.session
-    return None
\ No newline at end of file
+    return None
+
+def upgrade_schema(db) -> List[str]:
+    """补齐已存在表中缺失的列和索引（create_all 不会修改已存在的表）
+
+    模型定义了 upgrade_columns(connection, columns) 时，在新增列之后于同一事务中调用，
+    用于为旧数据回填新列（只在列首次添加时执行一次）。
+    """
+    added = []
+    engine = db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    models = {mapper.local_table.name: mapper.class_ for mapper in db.Model.registry.mappers}
+    
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            
+            existing_columns = {c['name'] for c in inspector.get_columns(table.name)}
+            new_columns = []
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                new_columns.append(column.name)
+                added.append(f'{table.name}.{column.name}')
+            
+            upgrade_columns = getattr(models.get(table.name), 'upgrade_columns', None)
+            if new_columns and upgrade_columns:
+                upgrade_columns(conn, new_columns)
+            
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    
+    return added
@@ -0,0 +1,152 @@
+# utils/db_pool.py
+"""数据库连接池 - database.json 连接池配置映射和连接池监控指标"""
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    """连接池获取连接的统计（次数、等待时间、超时）"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def begin_wait(self) -> float:
+        """开始获取连接"""
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        return time.perf_counter()
+    
+    def end_wait(self, started: float, timed_out: bool = False, failed: bool = False) -> None:
+        """获取连接结束（成功、超时或连接失败）"""
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+            elif failed:
+                self.errors += 1
+            else:
+                self.checkouts += 1
+                self.total_wait += elapsed
+                self.max_wait = max(self.max_wait, elapsed)
+    
+    def record_connect(self) -> None:
+        """新建数据库连接"""
+        with self._lock:
+            self.connects += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """统计快照"""
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'waiting': self.waiting,
+                'maxWaiting': self.max_waiting,
+                'avgWaitMs': round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'maxWaitMs': round(self.max_wait * 1000, 3)
+            }
+
+
+class MonitoredQueuePool(QueuePool):
+    """记录获取连接等待时间和超时次数的 QueuePool"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        self._getting = threading.local()
+    
+    def _do_get(self):
+        # QueuePool._do_get 在溢出计数竞争时会递归调用自身，只统计最外层
+        if getattr(self._getting, 'active', False):
+            return super()._do_get()
+        
+        self._getting.active = True
+        started = self.stats.begin_wait()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.end_wait(started, timed_out=True)
+            raise
+        except Exception:
+            self.stats.end_wait(started, failed=True)
+            raise
+        finally:
+            self._getting.active = False
+        self.stats.end_wait(started)
+        return connection
+    
+    def _create_connection(self):
+        self.stats.record_connect()
+        return super()._create_connection()
+
+
+def build_engine_options(pool_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    将 database.json 的 pool 配置（max/min/acquire/recycle，时间单位毫秒）映射为 SQLAlchemy 引擎参数：
+    min -> pool_size（常驻连接数，至少1，SQLAlchemy 中 0 表示不限制），
+    max -> pool_size + max_overflow（连接总数上限），
+    acquire -> pool_timeout（获取连接的最长等待秒数），
+    recycle -> pool_recycle（连接建立超过该时间后在取出时重建，未配置时不重建）
+    idle 是空闲连接的释放时间，不对应连接的存活时间，不再映射为 pool_recycle（否则每个超过 idle
+    的连接都会在取出时重建）；数据库端断开的空闲连接由 pool_pre_ping 在取出时检测并重连。
+    """
+    options: Dict[str, Any] = {'pool_pre_ping': True}
+    if not pool_config:
+        return options
+    
+    max_connections = int(pool_config.get('max', 5))
+    pool_size = max(int(pool_config.get('min', 0)), 1)
+    pool_size = min(pool_size, max(max_connections, 1))
+    
+    options.update({
+        'poolclass': MonitoredQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max(max_connections - pool_size, 0)
+    })
+    if pool_config.get('acquire') is not None:
+        # create_engine 会把 pool_timeout 转为整数，向上取整到秒
+        options['pool_timeout'] = max(math.ceil(int(pool_config['acquire']) / 1000), 1)
+    if pool_config.get('recycle') is not None:
+        options['pool_recycle'] = max(int(pool_config['recycle']) // 1000, 1)
+    return options
+
+
+def get_pool_metrics(engine) -> Dict[str, Any]:
+    """连接池当前状态和累计统计"""
+    pool = engine.pool
+    metrics: Dict[str, Any] = {'poolClass': type(pool).__name__}
+    
+    if isinstance(pool, QueuePool):
+        max_overflow = pool._max_overflow
+        metrics.update({
+            'size': pool.size(),
+            'maxOverflow': max_overflow,
+            'maxConnections': pool.size() + max_overflow if max_overflow >= 0 else None,
+            'checkedOut': pool.checkedout(),
+            'checkedIn': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'timeout': pool.timeout(),
+            'recycle': pool._recycle
+        })
+    
+    stats = getattr(pool, 'stats', None)
+    if stats is not None:
+        metrics.update(stats.snapshot())
+    return metrics
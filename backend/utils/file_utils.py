@@ -1,5 +1,14 @@
 # utils/file_utils.py
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# 后台删除物理文件的线程池（数据库事务提交后使用）
+REMOVE_WORKERS = 4
+REMOVE_BATCH_SIZE = 100
+_remove_executor = None
+_remove_lock = threading.Lock()
+_pending_removals = set()
 
 def allowed_file(filename, file_type, config=None):
     """检查文件类型是否允许"""
@@ -34,6 +43,50 @@ def format_file_size(size_bytes):
     
     return f"{size_bytes:.2f} {size_names[i]}"
 
+def _remove_files(paths, remove=None):
+    """删除一批物理文件，返回删除的数量"""
+    remove = remove or os.remove
+    removed = 0
+    for path in paths:
+        try:
+            if remove(path) is False:
+                continue
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"删除物理文件失败 {path}: {e}")
+    return removed
+
+def remove_files_in_background(paths, remove=None):
+    """在线程池中分批删除物理文件，不阻塞请求（remove 为删除单个文件的函数，默认 os.remove）"""
+    global _remove_executor
+    
+    paths = [path for path in dict.fromkeys(paths) if path]
+    if not paths:
+        return []
+    
+    with _remove_lock:
+        if _remove_executor is None:
+            _remove_executor = ThreadPoolExecutor(
+                max_workers=REMOVE_WORKERS, thread_name_prefix='file-remove'
+            )
+        futures = [
+            _remove_executor.submit(_remove_files, paths[start:start + REMOVE_BATCH_SIZE], remove)
+            for start in range(0, len(paths), REMOVE_BATCH_SIZE)
+        ]
+        _pending_removals.update(futures)
+    
+    for future in futures:
+        future.add_done_callback(_pending_removals.discard)
+    return futures
+
+def wait_for_removals(timeout=None):
+    """等待已提交的后台删除完成（脚本和测试使用）"""
+    with _remove_lock:
+        futures = list(_pending_removals)
+    wait(futures, timeout=timeout)
+
 # # 测试函数
 # if __name__ == "__main__":
 #     # 测试代码
@@ -0,0 +1,332 @@
+# utils/http_utils.py
+"""文件下载/预览的 HTTP 处理：Range 分段请求、强 ETag、条件请求和缓存策略"""
+import mimetypes
+import os
+import unicodedata
+import uuid
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from flask import Response, current_app, redirect, request, send_file, stream_with_context
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.http import http_date, is_resource_modified, quote_etag
+
+from services.storage_service import resolve_location
+
+# URL 携带内容哈希（?v=<file_hash>）时的缓存时间：一年，内容变化时 URL 随之变化
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# 一次请求最多处理的分段数，超过时忽略 Range 返回完整文件
+MAX_RANGES = 32
+# 多段响应读取文件的块大小
+RANGE_READ_SIZE = 64 * 1024
+# 交给前置 Web 服务器发送文件的下载方式
+OFFLOAD_MODES = ('x-accel', 'x-sendfile')
+
+
+def send_stored_file(file_path: str, mimetype: str = None, download_name: str = None,
+                     as_attachment: bool = False, file_hash: str = None, etag: str = None) -> Response:
+    """发送磁盘上的文件
+
+    - 支持 Range 请求：单段返回 206，多段返回 multipart/byteranges
+    - 有内容哈希时使用哈希作为强 ETag，处理 If-None-Match / If-Modified-Since / If-Range
+    - 请求参数 v 等于内容哈希时（URL 由内容决定）允许客户端长期缓存，否则每次使用前重新验证
+    - FILE_DELIVERY_MODE 为 x-accel / x-sendfile 时只返回响应头，由前置 Web 服务器发送文件内容
+    - 发送由原文件生成的内容（缩略图等）时 etag 区分不同版本，file_hash 仍为原文件哈希（用于 ?v= 长期缓存）
+    """
+    etag = etag or file_hash
+    if current_app.config.get('FILE_DELIVERY_MODE', 'send_file') in OFFLOAD_MODES:
+        response = _offload_file(file_path, mimetype, download_name, as_attachment, file_hash, etag)
+        if response is not None:
+            return response
+
+    file_size = os.path.getsize(file_path)
+    mtime = os.path.getmtime(file_path)
+
+    try:
+        ranges = _requested_ranges(file_size, etag, mtime)
+    except RequestedRangeNotSatisfiable as e:
+        return e.get_response()
+
+    if ranges:
+        if not is_resource_modified(request.environ, quote_etag(etag) if etag else None,
+                                    last_modified=http_date(int(mtime))):
+            response = Response(status=304)
+            _set_validators(response, etag, mtime)
+        else:
+            response = _send_ranges(file_path, ranges, file_size, mimetype, download_name, as_attachment)
+            _set_validators(response, etag, mtime)
+        apply_cache_headers(response, file_hash)
+        return response
+
+    try:
+        response = send_file(
+            file_path,
+            mimetype=mimetype,
+            as_attachment=as_attachment,
+            download_name=download_name,
+            conditional=ranges is not False,
+            etag=etag or True
+        )
+    except RequestedRangeNotSatisfiable as e:
+        return e.get_response()
+
+    if ranges is False:
+        # 分段过多时忽略 Range：仍然需要处理条件请求
+        response.make_conditional(request.environ)
+
+    response.headers['Accept-Ranges'] = 'bytes'
+    apply_cache_headers(response, file_hash)
+    return response
+
+
+def send_from_storage(location: Optional[str], mimetype: str = None, download_name: str = None,
+                      as_attachment: bool = False, file_hash: str = None) -> Optional[Response]:
+    """发送存储后端中的文件，内容不存在时返回 None
+
+    本地存储由 send_stored_file 发送；远程存储开启 S3_PRESIGNED_DOWNLOADS 时重定向到临时下载地址，
+    否则由 Python 进程分块转发（不支持 Range）。
+    """
+    if not location:
+        return None
+    
+    backend, key = resolve_location(location, current_app.config)
+    local_path = backend.local_path(key)
+    if local_path:
+        return send_stored_file(local_path, mimetype=mimetype, download_name=download_name,
+                                as_attachment=as_attachment, file_hash=file_hash)
+    
+    size = backend.size(key)
+    if size is None:
+        return None
+    
+    if current_app.config.get('S3_PRESIGNED_DOWNLOADS', False):
+        url = backend.presigned_url(key, download_name=download_name, as_attachment=as_attachment,
+                                    expires=current_app.config.get('S3_PRESIGNED_EXPIRES', 300))
+        if url:
+            return apply_cache_headers(redirect(url))
+    
+    chunk_size = current_app.config.get('CONTENT_STREAM_CHUNK_SIZE', 1024 * 1024)
+    return send_stream(backend.iter_chunks(key, chunk_size), size, mimetype=mimetype,
+                       download_name=download_name, as_attachment=as_attachment, file_hash=file_hash)
+
+
+def send_stream(chunks: Iterator[bytes], content_length: Optional[int], mimetype: str = None,
+                download_name: str = None, as_attachment: bool = False, file_hash: str = None) -> Response:
+    """分块发送没有磁盘文件的内容（如数据库中保存的文件），支持 ETag 条件请求，不支持 Range"""
+    response = Response(stream_with_context(chunks), mimetype=mimetype or 'application/octet-stream',
+                        direct_passthrough=True)
+    if content_length is not None:
+        response.content_length = content_length
+    if download_name:
+        response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline',
+                             **_disposition_names(download_name))
+    if file_hash:
+        response.set_etag(file_hash)
+
+    # 返回 304 时不会读取内容
+    response.make_conditional(request.environ)
+    apply_cache_headers(response, file_hash)
+    return response
+
+
+def apply_cache_headers(response: Response, file_hash: str = None) -> Response:
+    """设置缓存策略：内容寻址的 URL 长期缓存，其他 URL 每次使用前通过 ETag 重新验证"""
+    response.cache_control.private = True
+    if file_hash and request.args.get('v') == file_hash:
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def _offload_file(file_path: str, mimetype: Optional[str], download_name: Optional[str],
+                  as_attachment: bool, file_hash: Optional[str], etag: Optional[str]) -> Optional[Response]:
+    """生成 X-Accel-Redirect / X-Sendfile 响应（Range 由前置 Web 服务器处理）
+
+    x-accel 模式下文件不在 UPLOAD_FOLDER 中时无法映射到内部路径，返回 None 由 Python 进程发送。
+    """
+    mode = current_app.config.get('FILE_DELIVERY_MODE')
+    file_path = os.path.abspath(file_path)
+
+    if mode == 'x-accel':
+        upload_root = os.path.abspath(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
+        if not file_path.startswith(upload_root + os.sep):
+            return None
+        relative_path = os.path.relpath(file_path, upload_root).replace(os.sep, '/')
+        prefix = current_app.config.get('FILE_ACCEL_PREFIX', '/protected-files/').rstrip('/')
+        offload_header = ('X-Accel-Redirect', f'{prefix}/{quote(relative_path)}')
+    else:
+        offload_header = ('X-Sendfile', file_path)
+
+    if mimetype is None and download_name:
+        mimetype = mimetypes.guess_type(download_name)[0]
+
+    response = Response(mimetype=mimetype or 'application/octet-stream')
+    # 响应体由前置服务器填充，不能带上空响应体的 Content-Length: 0
+    response.automatically_set_content_length = False
+    if download_name:
+        response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline',
+                             **_disposition_names(download_name))
+    _set_validators(response, etag, os.path.getmtime(file_path))
+
+    response.make_conditional(request.environ)
+    if response.status_code == 200:
+        response.headers[offload_header[0]] = offload_header[1]
+    apply_cache_headers(response, file_hash)
+    return response
+
+
+def _set_validators(response: Response, etag: Optional[str], mtime: float) -> None:
+    """设置 ETag 和 Last-Modified"""
+    if etag:
+        response.set_etag(etag)
+    response.headers['Last-Modified'] = http_date(int(mtime))
+    response.headers['Accept-Ranges'] = 'bytes'
+
+
+def _requested_ranges(file_size: int, etag: Optional[str], mtime: float):
+    """解析 Range 请求头
+
+    返回值：None 表示按普通请求处理（交给 send_file，单段 Range 也由它处理）；
+    False 表示分段过多、忽略 Range；列表为合并后需要返回的 (start, stop) 分段。
+    """
+    if request.method not in ('GET', 'HEAD') or not file_size:
+        return None
+
+    parsed = request.range
+    if parsed is not None:
+        if parsed.units != 'bytes' or len(parsed.ranges) < 2:
+            return None
+        requested = parsed.ranges
+    else:
+        # werkzeug 不接受重叠或乱序的分段，这里自行解析后合并
+        requested = _parse_byte_ranges(request.headers.get('Range'))
+        if not requested:
+            return None
+
+    # If-Range 与当前内容不一致时返回完整文件（交给 send_file 判断）
+    if_range = request.if_range
+    if if_range.etag and if_range.etag != etag:
+        return None
+    if if_range.date and if_range.date.timestamp() < int(mtime):
+        return None
+
+    if len(requested) > MAX_RANGES:
+        return False
+
+    ranges = []
+    for start, stop in requested:
+        if start < 0:
+            start, stop = max(file_size + start, 0), file_size
+        else:
+            stop = file_size if stop is None else min(stop, file_size)
+        if start < stop:
+            ranges.append((start, stop))
+
+    if not ranges:
+        raise RequestedRangeNotSatisfiable(length=file_size)
+
+    return _merge_ranges(ranges)
+
+
+def _parse_byte_ranges(header: Optional[str]) -> Optional[List[Tuple[int, Optional[int]]]]:
+    """解析 bytes=0-9,5-19,-100 格式的 Range 头，返回 [(start, stop)]（stop 不含；后缀分段 start 为负数）"""
+    if not header or not header.strip().lower().startswith('bytes='):
+        return None
+
+    ranges = []
+    for item in header.split('=', 1)[1].split(','):
+        first, sep, last = item.strip().partition('-')
+        if not sep:
+            return None
+        try:
+            if not first:
+                if int(last) > 0:
+                    ranges.append((-int(last), None))
+            elif not last:
+                ranges.append((int(first), None))
+            elif int(first) <= int(last):
+                ranges.append((int(first), int(last) + 1))
+            else:
+                return None
+        except ValueError:
+            return None
+    return ranges
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """合并重叠或相邻的分段"""
+    merged = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+def _send_ranges(file_path: str, ranges: List[Tuple[int, int]], file_size: int, mimetype: Optional[str],
+                 download_name: Optional[str], as_attachment: bool) -> Response:
+    """返回多个分段（合并后只剩一段时返回普通 206 响应）"""
+    mimetype = mimetype or 'application/octet-stream'
+
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        response = Response(_read_ranges(file_path, [(b'', start, stop)], b''),
+                            status=206, mimetype=mimetype, direct_passthrough=True)
+        response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{file_size}'
+        response.content_length = stop - start
+    else:
+        boundary = uuid.uuid4().hex
+        parts = [
+            (
+                (f'--{boundary}\r\nContent-Type: {mimetype}\r\n'
+                 f'Content-Range: bytes {start}-{stop - 1}/{file_size}\r\n\r\n').encode('ascii'),
+                start,
+                stop
+            )
+            for start, stop in ranges
+        ]
+        closing = f'\r\n--{boundary}--\r\n'.encode('ascii')
+        # 每段数据后面的 \r\n 与下一段的分隔符合并写出
+        parts = [(header if i == 0 else b'\r\n' + header, start, stop)
+                 for i, (header, start, stop) in enumerate(parts)]
+
+        response = Response(_read_ranges(file_path, parts, closing), status=206,
+                            content_type=f'multipart/byteranges; boundary={boundary}', direct_passthrough=True)
+        response.content_length = sum(len(header) + stop - start for header, start, stop in parts) + len(closing)
+
+    if download_name:
+        response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline',
+                             **_disposition_names(download_name))
+    return response
+
+
+def _read_ranges(file_path: str, parts: List[Tuple[bytes, int, int]], closing: bytes) -> Iterator[bytes]:
+    """按块读取各分段的数据"""
+    with open(file_path, 'rb') as f:
+        for header, start, stop in parts:
+            if header:
+                yield header
+            f.seek(start)
+            remaining = stop - start
+            while remaining > 0:
+                chunk = f.read(min(RANGE_READ_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+    if closing:
+        yield closing
+
+
+def _disposition_names(download_name: str) -> dict:
+    """Content-Disposition 文件名参数（非 ASCII 文件名使用 RFC 5987 的 filename*）"""
+    try:
+        download_name.encode('ascii')
+        return {'filename': download_name}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        return {'filename': simple, 'filename*': f"UTF-8''{quote(download_name, safe='!#$&+-.^_`|~')}"}
@@ -0,0 +1,177 @@
+# utils/id_allocator.py
+"""ID 分配器 - 生成 file_001 / contract_001 / company_00001 格式的可读ID
+
+PostgreSQL：每类ID对应一个数据库序列，序列步长即号段大小，每个进程一次租用一个号段，
+在进程内分配，用完再租用下一个号段（nextval 不受事务回滚影响，不会重复）；序列在独立的自动提交连接中创建，
+不随调用方事务回滚。
+其他数据库（如测试用的 SQLite）：使用 id_sequence 表，在当前会话事务中逐个分配。
+"""
+import os
+import re
+import threading
+import weakref
+from typing import Dict, Tuple
+
+from sqlalchemy import Column, MetaData, String, BigInteger, Table, text
+from sqlalchemy.exc import IntegrityError
+
+_sequence_metadata = MetaData()
+
+# 非 PostgreSQL 数据库使用的序列表
+id_sequence_table = Table(
+    'id_sequence', _sequence_metadata,
+    Column('name', String(100), primary_key=True, comment='序列名称'),
+    Column('next_value', BigInteger, nullable=False, comment='下一个可用值'),
+    comment='ID序列表（不支持序列的数据库使用）'
+)
+
+# 已创建 id_sequence 表的数据库引擎（每个引擎只检查一次）
+_sequence_table_engines = weakref.WeakSet()
+_sequence_table_lock = threading.Lock()
+
+
+class IdAllocator:
+    """单个ID序列的分配器"""
+    
+    def __init__(self, model_class, prefix: str, width: int):
+        self.model_class = model_class
+        self.prefix = prefix
+        self.width = width
+        self.table_name = model_class.__tablename__
+        self.sequence_name = f'{self.table_name}_id_seq'
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._next = 0
+        self._limit = 0  # 当前号段上限（不含）
+        self._increment = None  # 序列步长，创建/检查序列时读取
+    
+    def format_id(self, number: int) -> str:
+        """格式化为可读ID"""
+        return f'{self.prefix}_{number:0{self.width}d}'
+    
+    def next_id(self, session, block_size: int = 20) -> str:
+        """分配下一个ID"""
+        if session.get_bind().dialect.name == 'postgresql':
+            return self.format_id(self._next_from_sequence(session, block_size))
+        return self.format_id(self._next_from_table(session))
+    
+    def _next_from_sequence(self, session, block_size: int) -> int:
+        """从进程内号段分配，号段用完时从数据库序列租用新号段"""
+        with self._lock:
+            # fork 出的子进程不能继续使用父进程的号段
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._next = self._limit = 0
+            
+            if self._next >= self._limit:
+                if self._increment is None:
+                    self._ensure_sequence(session, block_size)
+                try:
+                    start = session.execute(
+                        text(f'SELECT nextval(\'"{self.sequence_name}"\')')
+                    ).scalar()
+                except Exception:
+                    # 序列被删除等情况：下次租用时重新检查并创建
+                    self._increment = None
+                    self._next = self._limit = 0
+                    raise
+                self._next, self._limit = start, start + self._increment
+            
+            number = self._next
+            self._next += 1
+            return number
+    
+    def _ensure_sequence(self, session, block_size: int) -> None:
+        """创建数据库序列（起始值为现有最大编号+1）并读取步长
+
+        在独立的自动提交连接中执行：调用方事务回滚时序列不会随之消失。
+        """
+        engine = session.get_bind().engine
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            increment = self._read_increment(connection)
+            if increment is None:
+                start = self._current_max(connection) + 1
+                connection.execute(text(
+                    f'CREATE SEQUENCE IF NOT EXISTS "{self.sequence_name}" '
+                    f'INCREMENT BY {int(block_size)} START WITH {int(start)}'
+                ))
+                increment = self._read_increment(connection)
+        self._increment = increment or 1
+    
+    def _read_increment(self, connection):
+        """序列步长（序列不存在时返回 None）"""
+        return connection.execute(
+            text('SELECT increment_by FROM pg_sequences WHERE sequencename = :name'),
+            {'name': self.sequence_name}
+        ).scalar()
+    
+    def _next_from_table(self, session) -> int:
+        """从 id_sequence 表分配（在当前会话事务中执行，先更新再读取以获得写锁）"""
+        connection = session.connection()
+        with _sequence_table_lock:
+            if connection.engine not in _sequence_table_engines:
+                id_sequence_table.create(connection, checkfirst=True)
+                _sequence_table_engines.add(connection.engine)
+        
+        table = id_sequence_table
+        updated = connection.execute(
+            table.update()
+            .where(table.c.name == self.sequence_name)
+            .values(next_value=table.c.next_value + 1)
+        ).rowcount
+        
+        if not updated:
+            start = self._current_max(session.connection()) + 1
+            try:
+                with session.begin_nested():
+                    session.connection().execute(
+                        table.insert().values(name=self.sequence_name, next_value=start + 1)
+                    )
+                return start
+            except IntegrityError:
+                connection.execute(
+                    table.update()
+                    .where(table.c.name == self.sequence_name)
+                    .values(next_value=table.c.next_value + 1)
+                )
+        
+        return connection.execute(
+            table.select().where(table.c.name == self.sequence_name)
+        ).first().next_value - 1
+    
+    def _current_max(self, connection) -> int:
+        """现有记录中的最大编号（按数值比较，file_1000 大于 file_999）"""
+        pattern = re.compile(rf'^{re.escape(self.prefix)}_(\d+)$')
+        id_column = self.model_class.__table__.c.id
+        max_number = 0
+        rows = connection.execute(
+            self.model_class.__table__.select()
+            .with_only_columns(id_column)
+            .where(id_column.like(f'{self.prefix}\\_%', escape='\\'))
+        )
+        for (record_id,) in rows:
+            match = pattern.match(record_id or '')
+            if match:
+                max_number = max(max_number, int(match.group(1)))
+        return max_number
+
+
+_allocators: Dict[Tuple[str, str], IdAllocator] = {}
+_allocators_lock = threading.Lock()
+
+
+def allocate_id(model_class, prefix: str, width: int) -> str:
+    """为模型分配下一个可读ID"""
+    from flask import current_app, has_app_context
+    from models import get_db
+    
+    session = get_db().session
+    key = (str(session.get_bind().url), model_class.__tablename__)
+    
+    with _allocators_lock:
+        allocator = _allocators.get(key)
+        if allocator is None:
+            allocator = _allocators[key] = IdAllocator(model_class, prefix, width)
+    
+    block_size = current_app.config.get('ID_BLOCK_SIZE', 20) if has_app_context() else 20
+    return allocator.next_id(session, block_size)
@@ -0,0 +1,22 @@
+# utils/pagination.py
+"""分页工具 - 游标（keyset）分页的游标编码"""
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(sort_value: datetime, record_id: str) -> str:
+    """将最后一条记录的 (排序时间, ID) 编码为游标"""
+    payload = json.dumps({'t': sort_value.isoformat(), 'id': record_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """解析游标，格式错误时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        return datetime.fromisoformat(payload['t']), str(payload['id'])
+    except (ValueError, KeyError, TypeError, UnicodeError) as e:
+        raise ValueError(f'无效的分页游标: {cursor}') from e
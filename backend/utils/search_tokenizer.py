@@ -0,0 +1,93 @@
+# utils/search_tokenizer.py
+"""全文检索分词工具 - 中文按二元组（bigram）切分，英文/数字按单词切分
+
+索引文档中的中文同时保存单字，单字查询精确匹配单字（只出现在二元组后半的字也能检索到）。
+"""
+import re
+from typing import Iterable, List
+
+# 中日韩统一表意文字 或 连续的英文字母/数字
+_TOKEN_PATTERN = re.compile(r'[㐀-䶿一-鿿豈-﫿]+|[0-9A-Za-z]+')
+_CJK_PATTERN = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+
+
+def is_cjk(text: str) -> bool:
+    """是否为中文字符串"""
+    return bool(text) and bool(_CJK_PATTERN.match(text))
+
+
+def tokenize(text: str, unigrams: bool = False) -> List[str]:
+    """分词：中文连续片段切为二元组（单字保留单字），英文/数字转小写按单词切分
+
+    unigrams 为 True 时（生成索引文档）中文片段的每个字也作为词。
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text or ''):
+        run = match.group()
+        if is_cjk(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+                if unigrams:
+                    tokens.extend(run)
+        else:
+            tokens.append(run.lower())
+    return tokens
+
+
+def unique_tokens(texts: Iterable[str], unigrams: bool = False) -> List[str]:
+    """多个文本分词后去重（保持首次出现顺序）"""
+    seen = set()
+    result = []
+    for text in texts:
+        for token in tokenize(text, unigrams):
+            if token not in seen:
+                seen.add(token)
+                result.append(token)
+    return result
+
+
+def build_document(texts: Iterable[str]) -> str:
+    """生成索引文档：去重后的词（含中文单字）以空格连接"""
+    return ' '.join(unique_tokens(texts, unigrams=True))
+
+
+def query_terms(keyword: str) -> List[str]:
+    """解析搜索关键字为查询词（去重）"""
+    return unique_tokens([keyword])
+
+
+def is_prefix_term(term: str) -> bool:
+    """查询词是否按前缀匹配：英文/数字单词按前缀匹配，中文单字和二元组精确匹配"""
+    return not is_cjk(term)
+
+
+def to_tsquery(keyword: str) -> str:
+    """生成 PostgreSQL to_tsquery 查询串（各词 AND 连接）"""
+    return ' & '.join(
+        f'{term}:*' if is_prefix_term(term) else term
+        for term in query_terms(keyword)
+    )
+
+
+def make_snippet(text: str, keyword: str, width: int = 100) -> str:
+    """截取关键字附近的文本片段"""
+    if not text:
+        return ''
+    
+    text = ' '.join(text.split())
+    position = text.lower().find((keyword or '').strip().lower()) if keyword else -1
+    if position < 0:
+        for term in query_terms(keyword or ''):
+            position = text.lower().find(term)
+            if position >= 0:
+                break
+    
+    start = max(position - width // 3, 0) if position >= 0 else 0
+    snippet = text[start:start + width]
+    if start > 0:
+        snippet = '…' + snippet
+    if start + width < len(text):
+        snippet = snippet + '…'
+    return snippet
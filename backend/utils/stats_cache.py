@@ -0,0 +1,127 @@
+# utils/stats_cache.py
+"""统计结果缓存 - 按TTL过期，相关表在事务提交后有写入时立即失效"""
+import copy
+import functools
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# 默认缓存秒数（配置项 STATS_CACHE_TTL，0 表示不缓存）
+DEFAULT_TTL = 30
+
+
+class StatsCache:
+    """统计缓存：引擎 -> {缓存键: (过期时间, 依赖的表, 结果)}"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, engine, key):
+        """读取未过期的缓存，不存在时返回 None"""
+        with self._lock:
+            entry = self._entries.get(engine, {}).get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return copy.deepcopy(entry[2])
+    
+    def set(self, engine, key, tables: Iterable[str], value, ttl: float) -> None:
+        """写入缓存"""
+        with self._lock:
+            self._entries.setdefault(engine, {})[key] = (
+                time.monotonic() + ttl, frozenset(tables), copy.deepcopy(value)
+            )
+    
+    def invalidate(self, engine, tables: Iterable[str]) -> None:
+        """使依赖这些表的缓存失效"""
+        tables = set(tables)
+        with self._lock:
+            entries = self._entries.get(engine)
+            if not entries:
+                return
+            for key in [key for key, entry in entries.items() if entry[1] & tables]:
+                del entries[key]
+    
+    def clear(self) -> None:
+        """清空所有缓存"""
+        with self._lock:
+            self._entries.clear()
+
+
+stats_cache = StatsCache()
+
+
+def cached_stats(name: str, tables: Tuple[str, ...]):
+    """仓储统计方法的缓存装饰器，缓存键为 (name, 参数)，依赖的表有写入时失效"""
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            ttl = (getattr(self, 'config', None) or {}).get('STATS_CACHE_TTL', DEFAULT_TTL)
+            if not ttl:
+                return func(self, *args, **kwargs)
+            
+            engine = self.session.get_bind()
+            key = (name, args, tuple(sorted(kwargs.items())))
+            value = stats_cache.get(engine, key)
+            if value is None:
+                value = func(self, *args, **kwargs)
+                stats_cache.set(engine, key, tables, value, ttl)
+            return value
+        return wrapper
+    return decorator
+
+
+def _changed_tables(session) -> Dict[Any, set]:
+    """当前事务中有写入的表（按引擎）"""
+    return session.info.setdefault('stats_changed_tables', {})
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_tables(session, flush_context):
+    """记录本次 flush 写入的表，提交后再使缓存失效"""
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        mapper = inspect(instance).mapper
+        engine = session.get_bind(mapper=mapper).engine
+        _changed_tables(session).setdefault(engine, set()).update(
+            table.name for table in mapper.tables
+        )
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_changed_tables(orm_execute_state):
+    """ORM 批量 UPDATE/DELETE 语句不经过 flush，同样记录写入的表"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    session = orm_execute_state.session
+    engine = session.get_bind(mapper=mapper).engine
+    _changed_tables(session).setdefault(engine, set()).update(table.name for table in mapper.tables)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_tables(session):
+    """事务提交后使相关统计缓存失效"""
+    for engine, tables in session.info.pop('stats_changed_tables', {}).items():
+        stats_cache.invalidate(engine, tables)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_tables(session):
+    """事务回滚时丢弃记录
+
+    SAVEPOINT 回滚（begin_nested）同样触发该事件，外层事务仍会提交，保留记录；
+    SAVEPOINT 中写入的表多记录只会让缓存多失效一次。
+    """
+    if session.in_nested_transaction():
+        return
+    session.info.pop('stats_changed_tables', None)